@@ -0,0 +1,56 @@
+"""
+Add background_jobs table for the durable job queue.
+
+Revision ID: 20261016_add_background_jobs_table
+Revises: 470ff4da3817
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_add_background_jobs_table"
+down_revision: Union[str, None] = "470ff4da3817"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "background_jobs" in sa.inspect(bind).get_table_names():
+        return
+    op.create_table(
+        "background_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.String(length=64), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="queued"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer(), nullable=False, server_default="5"),
+        sa.Column("run_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("locked_by", sa.String(length=64), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_background_jobs_id", "background_jobs", ["id"])
+    # Claim scan: due jobs of one kind
+    op.create_index("ix_background_jobs_claim", "background_jobs", ["kind", "status", "run_at"])
+    # Retention sweep of finished jobs
+    op.create_index("ix_background_jobs_finished", "background_jobs", ["status", "finished_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_background_jobs_finished", table_name="background_jobs")
+    op.drop_index("ix_background_jobs_claim", table_name="background_jobs")
+    op.drop_index("ix_background_jobs_id", table_name="background_jobs")
+    op.drop_table("background_jobs")
@@ -0,0 +1,75 @@
+"""
+Add calendar_busy_days and background sync state on calendar_accounts.
+
+Revision ID: 20261017_add_calendar_busy_days
+Revises: 20261017_add_provider_location_geohash
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_add_calendar_busy_days"
+down_revision: Union[str, None] = "20261017_add_provider_location_geohash"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_ACCOUNT_COLUMNS = (
+    sa.Column("sync_token", sa.Text(), nullable=True),
+    sa.Column("next_sync_at", sa.DateTime(), nullable=True),
+    sa.Column("sync_failures", sa.Integer(), nullable=False, server_default="0"),
+    sa.Column("channel_id", sa.String(), nullable=True),
+    sa.Column("channel_resource_id", sa.String(), nullable=True),
+    sa.Column("channel_expires_at", sa.DateTime(), nullable=True),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing = {c["name"] for c in inspector.get_columns("calendar_accounts")}
+    for column in _ACCOUNT_COLUMNS:
+        if column.name not in existing:
+            op.add_column("calendar_accounts", column.copy())
+    if "next_sync_at" not in existing:
+        op.create_index("ix_calendar_accounts_next_sync_at", "calendar_accounts", ["next_sync_at"])
+    if "channel_id" not in existing:
+        op.create_index("ix_calendar_accounts_channel_id", "calendar_accounts", ["channel_id"])
+
+    if "calendar_busy_days" not in inspector.get_table_names():
+        op.create_table(
+            "calendar_busy_days",
+            sa.Column(
+                "account_id",
+                sa.Integer(),
+                sa.ForeignKey("calendar_accounts.id", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            sa.Column("event_id", sa.String(length=255), primary_key=True),
+            sa.Column(
+                "user_id",
+                sa.Integer(),
+                sa.ForeignKey("users.id", ondelete="CASCADE"),
+                nullable=False,
+            ),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_calendar_busy_days_user_day", "calendar_busy_days", ["user_id", "day"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_calendar_busy_days_user_day", table_name="calendar_busy_days")
+    op.drop_table("calendar_busy_days")
+    op.drop_index("ix_calendar_accounts_channel_id", table_name="calendar_accounts")
+    op.drop_index("ix_calendar_accounts_next_sync_at", table_name="calendar_accounts")
+    for column in reversed(_ACCOUNT_COLUMNS):
+        op.drop_column("calendar_accounts", column.name)
@@ -0,0 +1,48 @@
+"""
+Index messages.updated_at for the incremental thread state reconcile.
+
+``thread_state.reconcile_thread_state_job`` recounts only threads whose
+messages changed since its previous run; this index serves that lookup. On
+Postgres it is built concurrently.
+
+Revision ID: 20261017_add_messages_updated_at_index
+Revises: 20261017_add_provider_search_index
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_add_messages_updated_at_index"
+down_revision: Union[str, None] = "20261017_add_provider_search_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "messages" not in inspector.get_table_names():
+        return
+    if any(ix["name"] == "ix_messages_updated_at" for ix in inspector.get_indexes("messages")):
+        return
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_updated_at ON messages (updated_at)")
+    else:
+        op.create_index("ix_messages_updated_at", "messages", ["updated_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_updated_at")
+    else:
+        op.drop_index("ix_messages_updated_at", table_name="messages")
@@ -0,0 +1,57 @@
+"""
+Add notifications.booking_request_id plus aggregate and retention indexes.
+
+Existing rows are backfilled from their links here, once
+(``crud_notification.backfill_notification_threads``).
+
+Revision ID: 20261017_add_notification_thread_id
+Revises: 20261017_add_thread_participant_state
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_add_notification_thread_id"
+down_revision: Union[str, None] = "20261017_add_thread_participant_state"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "notifications" not in inspector.get_table_names():
+        return
+    columns = {c["name"] for c in inspector.get_columns("notifications")}
+    if "booking_request_id" not in columns:
+        op.add_column("notifications", sa.Column("booking_request_id", sa.Integer(), nullable=True))
+    indexes = {idx["name"] for idx in inspector.get_indexes("notifications")}
+    if "ix_notifications_user_type_thread" not in indexes:
+        op.create_index(
+            "ix_notifications_user_type_thread",
+            "notifications",
+            ["user_id", "type", "booking_request_id"],
+        )
+    if "ix_notifications_read_ts" not in indexes:
+        op.create_index("ix_notifications_read_ts", "notifications", ["is_read", "timestamp"])
+
+    # Backfill with the same link parsing the app uses for new notifications.
+    from sqlalchemy.orm import Session
+
+    from app.crud.crud_notification import backfill_notification_threads
+
+    with Session(bind=bind) as db:
+        backfill_notification_threads(db)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_read_ts", table_name="notifications")
+    op.drop_index("ix_notifications_user_type_thread", table_name="notifications")
+    op.drop_column("notifications", "booking_request_id")
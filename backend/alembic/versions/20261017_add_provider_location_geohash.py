@@ -0,0 +1,59 @@
+"""
+Add service_provider_profiles.location_geohash for proximity search.
+
+Revision ID: 20261017_add_provider_location_geohash
+Revises: 20261017_add_provider_search_stats
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_add_provider_location_geohash"
+down_revision: Union[str, None] = "20261017_add_provider_search_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = {c["name"] for c in sa.inspect(bind).get_columns("service_provider_profiles")}
+    if "location_geohash" not in columns:
+        op.add_column(
+            "service_provider_profiles",
+            sa.Column("location_geohash", sa.String(length=12), nullable=True),
+        )
+        op.create_index(
+            "ix_service_provider_profiles_location_geohash",
+            "service_provider_profiles",
+            ["location_geohash"],
+        )
+
+    # Backfill providers that already have coordinates.
+    from app.utils.geohash import encode_optional
+
+    rows = bind.execute(
+        sa.text(
+            "SELECT user_id, location_lat, location_lng FROM service_provider_profiles "
+            "WHERE location_lat IS NOT NULL AND location_lng IS NOT NULL"
+        )
+    ).fetchall()
+    for user_id, lat, lng in rows:
+        bind.execute(
+            sa.text("UPDATE service_provider_profiles SET location_geohash = :g WHERE user_id = :uid"),
+            {"g": encode_optional(lat, lng), "uid": int(user_id)},
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_service_provider_profiles_location_geohash",
+        table_name="service_provider_profiles",
+    )
+    op.drop_column("service_provider_profiles", "location_geohash")
@@ -0,0 +1,72 @@
+"""
+Add provider search text columns and their Postgres full-text/trigram indexes.
+
+``provider_search_stats.search_name`` and ``search_document`` are filled on
+startup (``provider_search_index.ensure_provider_search_index``), which also
+creates the SQLite FTS5 table. On Postgres this revision enables ``pg_trgm``
+and builds the GIN indexes concurrently.
+
+Revision ID: 20261017_add_provider_search_index
+Revises: 20261017_add_notification_thread_id
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_add_provider_search_index"
+down_revision: Union[str, None] = "20261017_add_notification_thread_id"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_PG_INDEXES = (
+    (
+        "ix_provider_search_stats_document_fts",
+        "ON provider_search_stats USING gin "
+        "(to_tsvector('simple'::regconfig, coalesce(search_document, '')))",
+    ),
+    ("ix_provider_search_stats_name_trgm", "ON provider_search_stats USING gin (search_name gin_trgm_ops)"),
+    ("ix_provider_search_stats_document_trgm", "ON provider_search_stats USING gin (search_document gin_trgm_ops)"),
+    (
+        "ix_service_provider_profiles_location_trgm",
+        "ON service_provider_profiles USING gin (location gin_trgm_ops)",
+    ),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "provider_search_stats" not in inspector.get_table_names():
+        return
+    columns = {c["name"] for c in inspector.get_columns("provider_search_stats")}
+    for name in ("search_name", "search_document"):
+        if name not in columns:
+            op.add_column("provider_search_stats", sa.Column(name, sa.Text(), nullable=True))
+    if bind.dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, spec in _PG_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {spec}")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, _ in _PG_INDEXES:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    else:
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS provider_search_fts_{suffix}")
+        op.execute("DROP TABLE IF EXISTS provider_search_fts")
+    op.drop_column("provider_search_stats", "search_document")
+    op.drop_column("provider_search_stats", "search_name")
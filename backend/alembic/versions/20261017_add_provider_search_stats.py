@@ -0,0 +1,83 @@
+"""
+Add provider_search_stats: denormalized per-provider ranking row.
+
+Revision ID: 20261017_add_provider_search_stats
+Revises: 20261016_add_background_jobs_table
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_add_provider_search_stats"
+down_revision: Union[str, None] = "20261016_add_background_jobs_table"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "provider_search_stats" not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            "provider_search_stats",
+            sa.Column(
+                "artist_id",
+                sa.Integer(),
+                sa.ForeignKey("service_provider_profiles.user_id", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            sa.Column("book_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("rating_avg", sa.Float(), nullable=True),
+            sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("rating_sort", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("view_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("best_match_score", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("has_listed_service", sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column("has_approved_service", sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column("min_price", sa.Numeric(10, 2), nullable=True),
+            sa.Column("min_approved_price", sa.Numeric(10, 2), nullable=True),
+            sa.Column("category_names", sa.Text(), nullable=True),
+            sa.Column("category_slugs", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        # One index per list sort so ORDER BY ... LIMIT walks the index
+        op.create_index(
+            "ix_provider_search_stats_most_booked",
+            "provider_search_stats",
+            ["has_listed_service", "book_count", "artist_id"],
+        )
+        op.create_index(
+            "ix_provider_search_stats_top_rated",
+            "provider_search_stats",
+            ["has_listed_service", "rating_sort", "artist_id"],
+        )
+        op.create_index(
+            "ix_provider_search_stats_best_match",
+            "provider_search_stats",
+            ["has_listed_service", "best_match_score", "artist_id"],
+        )
+        op.create_index(
+            "ix_provider_search_stats_min_price",
+            "provider_search_stats",
+            ["has_listed_service", "min_price"],
+        )
+
+    # Backfill with the same code the app uses for refresh/reconcile.
+    from app.services.provider_stats import reconcile_provider_stats
+
+    reconcile_provider_stats(bind)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_provider_search_stats_min_price", table_name="provider_search_stats")
+    op.drop_index("ix_provider_search_stats_best_match", table_name="provider_search_stats")
+    op.drop_index("ix_provider_search_stats_top_rated", table_name="provider_search_stats")
+    op.drop_index("ix_provider_search_stats_most_booked", table_name="provider_search_stats")
+    op.drop_table("provider_search_stats")
@@ -0,0 +1,62 @@
+"""
+Add thread_participant_state (per-participant unread counters).
+
+Rows are filled on startup when the table is empty, or on demand with
+``scripts/db/reconcile_thread_state.py``.
+
+Revision ID: 20261017_add_thread_participant_state
+Revises: 20261017_backfill_profile_timestamps
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_add_thread_participant_state"
+down_revision: Union[str, None] = "20261017_backfill_profile_timestamps"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "thread_participant_state" in inspector.get_table_names():
+        return
+    op.create_table(
+        "thread_participant_state",
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "booking_request_id",
+            sa.Integer(),
+            sa.ForeignKey("booking_requests.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("last_read_message_id", sa.Integer(), nullable=True),
+        sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_message_id", sa.Integer(), nullable=True),
+        sa.Column("last_activity_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_thread_participant_state_thread",
+        "thread_participant_state",
+        ["booking_request_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_thread_participant_state_thread", table_name="thread_participant_state")
+    op.drop_table("thread_participant_state")
@@ -0,0 +1,51 @@
+"""
+Backfill NULL created_at/updated_at on profiles, services and reviews.
+
+The public profile routes used to patch these on every read (and commit);
+they are now pure reads, so legacy rows are fixed once here.
+
+Revision ID: 20261017_backfill_profile_timestamps
+Revises: 20261017_add_calendar_busy_days
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_backfill_profile_timestamps"
+down_revision: Union[str, None] = "20261017_add_calendar_busy_days"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TABLES = ("service_provider_profiles", "services", "reviews")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    for table in _TABLES:
+        if table not in tables:
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        if not {"created_at", "updated_at"} <= columns:
+            continue
+        op.execute(
+            sa.text(
+                f"UPDATE {table} SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) "
+                "WHERE created_at IS NULL"
+            )
+        )
+        op.execute(sa.text(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+def downgrade() -> None:
+    # Data backfill only; there is nothing to undo.
+    pass
@@ -16,6 +16,7 @@ from ..models.booking_status import BookingStatus
 from ..api.auth import get_user_by_email
 from ..utils.auth import verify_password, normalize_email
 from ..utils.redis_cache import invalidate_artist_list_cache
+from ..utils.pagination import InvalidCursor, approximate_count, decode_cursor, encode_cursor, keyset_after
 from ..utils.notifications import notify_listing_moderation, notify_user_new_message
 from .. import crud
 from .. import models
@@ -239,7 +240,7 @@ def _apply_ra_filters(query, model, params):
             if hasattr(model, key):
                 query = query.filter(getattr(model, key) == value)
     # Also support direct query params as equality filters
-    skip = {"_page", "_perPage", "_sort", "_order", "q", "filter", "range", "sort"}
+    skip = {"_page", "_perPage", "_sort", "_order", "q", "filter", "range", "sort", "cursor"}
     for key, value in params.items():
         if key in skip:
             continue
@@ -281,12 +282,122 @@ def _paginate_offset(query, offset: int, limit: int):
     return total, items
 
 
-def _with_total(items: List[Dict[str, Any]], total: int, resource: str, start: int, end: int) -> Response:
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _ra_sort_field(model, params) -> Tuple[str | None, bool]:
+    """Return ``(field, descending)`` from RA ``sort`` or ``_sort/_order`` params."""
+    sort = _parse_json_param(params, "sort")
+    if isinstance(sort, list) and len(sort) == 2:
+        field, order = sort[0], str(sort[1]).upper()
+    else:
+        field, order = params.get("_sort"), str(params.get("_order", "ASC")).upper()
+    if field and hasattr(model, field) and field in model.__table__.columns:
+        return field, order != "ASC"
+    return None, False
+
+
+def _keyset_null_default(column) -> Any:
+    try:
+        py = column.type.python_type
+    except Exception:
+        return None
+    if py is datetime:
+        return _EPOCH
+    if py is str:
+        return ""
+    if py in (int, float, bool):
+        return py(0)
+    return None
+
+
+def _ra_keyset(model, params, default_desc: bool = False) -> Tuple[str, List[Any], bool, List[Any]]:
+    """Keyset spec for an RA list over ``model``: ``(name, exprs, descending, null defaults)``.
+
+    Sorts by the requested column (NULLs coalesced to a type default so they
+    stay comparable) with ``id`` as the tiebreak; without a sort param, by
+    ``id`` (ascending unless ``default_desc``).
+    """
+    field, descending = _ra_sort_field(model, params)
+    if not field:
+        return f"{model.__tablename__}:id", [model.id], default_desc, [None]
+    if field == "id":
+        return f"{model.__tablename__}:id", [model.id], descending, [None]
+    col = getattr(model, field)
+    default = _keyset_null_default(model.__table__.columns[field])
+    expr = func.coalesce(col, default) if default is not None else col
+    return f"{model.__tablename__}:{field}", [expr, model.id], descending, [default, None]
+
+
+def _apply_ra_keyset(query, model, params, cursor: str | None, default_desc: bool = False):
+    """Order ``query`` for keyset paging and seek past ``cursor``; return ``(query, spec)``."""
+    spec = _ra_keyset(model, params, default_desc)
+    name, exprs, descending, _defaults = spec
+    query = query.order_by(*[desc(e) if descending else asc(e) for e in exprs])
+    if cursor:
+        try:
+            values = decode_cursor(cursor, name, len(exprs))
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(keyset_after(exprs, values, descending))
+    return query, spec
+
+
+_PAGING_PARAMS = {"cursor", "range", "_page", "_perPage"}
+
+
+def _ra_page(query, model, params, resource: str, offset: int, limit: int, *, key=lambda row: row, default_desc: bool = False):
+    """Fetch one RA list page; return ``(total, rows, next_cursor)``.
+
+    Without ``cursor`` this is the classic ``range``/``_page`` OFFSET page with
+    an exact count. With ``cursor`` (from the previous page's
+    ``X-Next-Cursor``) rows are sought by keyset and the total is a count
+    cached per filter set. ``key`` maps a row to the object carrying the sort
+    column and ``id``.
+    """
+    cursor = params.get("cursor")
+    count_query = query
+    query, spec = _apply_ra_keyset(query, model, params, cursor, default_desc)
+    if cursor:
+        parts = sorted((k, str(v)) for k, v in params.items() if k not in _PAGING_PARAMS)
+        total = approximate_count(f"admin:{resource}", parts, count_query.count)
+        rows = query.limit(limit + 1).all()
+    else:
+        total = count_query.count()
+        rows = query.offset(offset).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _ra_next_cursor(key(rows[-1]), model, params, spec)
+    return total, rows, next_cursor
+
+
+def _ra_next_cursor(obj, model, params, spec) -> str:
+    name, exprs, _descending, defaults = spec
+    field, _ = _ra_sort_field(model, params)
+    values: List[Any] = []
+    if len(exprs) == 2:
+        value = getattr(obj, field)
+        values.append(defaults[0] if value is None else value)
+    values.append(obj.id)
+    return encode_cursor(name, values)
+
+
+def _with_total(
+    items: List[Dict[str, Any]],
+    total: int,
+    resource: str,
+    start: int,
+    end: int,
+    next_cursor: str | None = None,
+) -> Response:
     resp = Response(content=_json_dumps(items), media_type="application/json")
     # Expose both headers for compatibility with different RA providers
-    resp.headers["Access-Control-Expose-Headers"] = "X-Total-Count, Content-Range"
+    resp.headers["Access-Control-Expose-Headers"] = "X-Total-Count, Content-Range, X-Next-Cursor"
     resp.headers["X-Total-Count"] = str(total)
     resp.headers["Content-Range"] = f"{resource} {start}-{end}/{total}"
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
     return resp
 
 
@@ -394,9 +505,9 @@ def list_providers(request: Request, _: Tuple[User, AdminUser] = Depends(require
     )
     # Apply filters/sorting based on User fields
     q_user = _apply_ra_filters(q, User, request.query_params)
-    q_user = _apply_ra_sorting(q_user, User, request.query_params)
-    total = q_user.count()
-    rows = q_user.offset(offset).limit(limit).all()
+    total, rows, next_cursor = _ra_page(
+        q_user, User, request.query_params, "providers", offset, limit, key=lambda row: row[0]
+    )
     provider_ids = [u.id for u, _p in rows if getattr(u, "id", None) is not None]
     svc_counts: Dict[int, int] = {}
     if provider_ids:
@@ -417,7 +528,7 @@ def list_providers(request: Request, _: Tuple[User, AdminUser] = Depends(require
     items: List[Dict[str, Any]] = []
     for u, p in rows:
         items.append(provider_to_admin(u, p, int(svc_counts.get(int(u.id), 0))))
-    return _with_total(items, total, "providers", start, start + len(items) - 1)
+    return _with_total(items, total, "providers", start, start + len(items) - 1, next_cursor)
 
 
 @router.get("/providers/{user_id}")
@@ -450,9 +561,7 @@ def list_clients(
 
     # Filters/sorting on User fields
     q = _apply_ra_filters(q, User, request.query_params)
-    q = _apply_ra_sorting(q, User, request.query_params)
-    total = q.count()
-    rows: List[User] = q.offset(offset).limit(limit).all()
+    total, rows, next_cursor = _ra_page(q, User, request.query_params, "clients", offset, limit)
 
     items: List[Dict[str, Any]] = []
     # For each client row, compute paid and completed counts
@@ -497,7 +606,7 @@ def list_clients(
 
         items.append(client_to_admin(u, paid_count, int(completed_count)))
 
-    return _with_total(items, total, "clients", start, start + len(items) - 1)
+    return _with_total(items, total, "clients", start, start + len(items) - 1, next_cursor)
 
 
 @router.get("/clients/{user_id}")
@@ -754,6 +863,7 @@ def purge_user(user_id: int, payload: Dict[str, Any], current: Tuple[User, Admin
         db.execute(text("DELETE FROM invoices WHERE artist_id=:uid OR client_id=:uid"), {"uid": user_id})
         db.execute(text("DELETE FROM messages WHERE booking_request_id IN (SELECT id FROM booking_requests WHERE artist_id=:uid OR client_id=:uid)"), {"uid": user_id})
         db.execute(text("DELETE FROM messages WHERE sender_id=:uid"), {"uid": user_id})
+        db.execute(text("DELETE FROM thread_participant_state WHERE user_id=:uid OR booking_request_id IN (SELECT id FROM booking_requests WHERE artist_id=:uid OR client_id=:uid)"), {"uid": user_id})
         db.execute(text("DELETE FROM message_reactions WHERE user_id=:uid"), {"uid": user_id})
         db.execute(text("DELETE FROM message_reactions WHERE message_id IN (SELECT id FROM messages WHERE booking_request_id IN (SELECT id FROM booking_requests WHERE artist_id=:uid OR client_id=:uid))"), {"uid": user_id})
         db.execute(text("DELETE FROM reviews WHERE artist_id=:uid"), {"uid": user_id})
@@ -767,6 +877,7 @@ def purge_user(user_id: int, payload: Dict[str, Any], current: Tuple[User, Admin
         db.execute(text("DELETE FROM email_tokens WHERE user_id=:uid"), {"uid": user_id})
         db.execute(text("DELETE FROM admin_users WHERE user_id=:uid"), {"uid": user_id})
         db.execute(text("DELETE FROM webauthn_credentials WHERE user_id=:uid"), {"uid": user_id})
+        db.execute(text("DELETE FROM calendar_busy_days WHERE user_id=:uid"), {"uid": user_id})
         db.execute(text("DELETE FROM calendar_accounts WHERE user_id=:uid"), {"uid": user_id})
         db.execute(text("DELETE FROM quote_templates WHERE artist_id=:uid"), {"uid": user_id})
         # Artist profile views use the artist_profile_views table
@@ -774,6 +885,7 @@ def purge_user(user_id: int, payload: Dict[str, Any], current: Tuple[User, Admin
         db.execute(text("DELETE FROM artist_profile_views WHERE viewer_id=:uid"), {"uid": user_id})
         db.execute(text("DELETE FROM email_events WHERE user_id=:uid"), {"uid": user_id})
         db.execute(text("DELETE FROM sms_events WHERE user_id=:uid"), {"uid": user_id})
+        db.execute(text("DELETE FROM provider_search_stats WHERE artist_id=:uid"), {"uid": user_id})
         db.execute(text("DELETE FROM service_provider_profiles WHERE user_id=:uid"), {"uid": user_id})
         # Final user delete
         db.execute(text("DELETE FROM users WHERE id=:uid"), {"uid": user_id})
@@ -1074,8 +1186,11 @@ def list_conversations(request: Request, _: Tuple[User, AdminUser] = Depends(req
             | (func.lower(User.last_name).ilike(ilike))
         )
 
-    total = q.count()
-    threads = q.offset(offset).limit(limit).all()
+    # Newest threads first; sort params do not apply to this projection.
+    total, threads, next_cursor = _ra_page(
+        q, models.BookingRequest, {k: v for k, v in request.query_params.items() if k not in ("sort", "_sort", "_order")},
+        "conversations", offset, limit, default_desc=True,
+    )
 
     items: List[Dict[str, Any]] = []
     for tid, artist_id in threads:
@@ -1098,7 +1213,7 @@ def list_conversations(request: Request, _: Tuple[User, AdminUser] = Depends(req
         )
     # Sort by last_at desc at the application layer for consistency
     items.sort(key=lambda x: x.get("last_at") or "", reverse=True)
-    return _with_total(items, total, "conversations", start, start + len(items) - 1)
+    return _with_total(items, total, "conversations", start, start + len(items) - 1, next_cursor)
 
 
 @router.get("/conversations/{thread_id}")
@@ -1913,15 +2028,39 @@ def list_payouts(request: Request, _: Tuple[User, AdminUser] = Depends(require_r
         if filters.get('q'):
             where.append("(CAST(id AS TEXT) ILIKE :q OR CAST(booking_id AS TEXT) ILIKE :q OR CAST(provider_id AS TEXT) ILIKE :q OR reference ILIKE :q)")
             params['q'] = f"%{filters.get('q')}%"
+    filter_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    filter_params = {k: v for k, v in params.items() if k in ('bid', 'pid', 'st', 'tp', 'q')}
+    # Keyset paging: ?cursor=<X-Next-Cursor> seeks past the last (created_at, id)
+    cursor = request.query_params.get("cursor")
+    if cursor:
+        try:
+            c_at, c_id = decode_cursor(cursor, "payouts", 2)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        where.append("(created_at < :c_at OR (created_at = :c_at AND id < :c_id))")
+        params.update({"c_at": c_at, "c_id": int(c_id), "off": 0})
     where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    params["lim"] = limit + 1
     rows = db.execute(text(f"""
         SELECT id, booking_id, provider_id, amount, currency, status, type, scheduled_at, paid_at, method, reference, batch_id, created_at, meta
         FROM payouts
         {where_sql}
-        ORDER BY created_at DESC
+        ORDER BY created_at DESC, id DESC
         LIMIT :lim OFFSET :off
     """), params).fetchall()
-    total = db.execute(text(f"SELECT COUNT(*) FROM payouts {where_sql}"), {k:v for k,v in params.items() if k in ('bid','pid','st','tp','q')}).scalar() or 0
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_at = rows[-1][12]
+        if last_at is not None:
+            if isinstance(last_at, str):
+                last_at = datetime.fromisoformat(last_at)
+            next_cursor = encode_cursor("payouts", [last_at, int(rows[-1][0])])
+
+    def _count() -> int:
+        return int(db.execute(text(f"SELECT COUNT(*) FROM payouts {filter_sql}"), filter_params).scalar() or 0)
+
+    total = approximate_count("admin:payouts", sorted(filter_params.items()), _count) if cursor else _count()
 
     # Helpers
     def _safe_last4(account_number: Any) -> str | None:
@@ -2148,7 +2287,7 @@ def list_payouts(request: Request, _: Tuple[User, AdminUser] = Depends(require_r
                 "banking_summary": bank_payload.get("banking_summary"),
             }
         )
-    return _with_total(items, int(total), "payouts", start, start + len(items) - 1)
+    return _with_total(items, int(total), "payouts", start, start + len(items) - 1, next_cursor)
 
 
 @router.get("/payouts/{payout_id}/pdf-url")
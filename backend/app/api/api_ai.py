@@ -5,8 +5,8 @@ from typing import Any, Dict, List, Optional, Literal
 from app.core.config import settings
 from app.database import get_db
 from sqlalchemy.orm import Session
-from app.services.ai_search import ai_provider_search
-from app.services.booking_agent import run_booking_agent_step
+from app.services.ai_search import ai_provider_search_async
+from app.services.booking_agent import run_booking_agent_step_async
 from app.schemas.booking_agent import BookingAgentState
 from .dependencies import get_current_active_client
 
@@ -142,7 +142,7 @@ class BookingAgentResponse(BaseModel):
     response_model_exclude_none=True,
     summary="AI-assisted provider search for Booka frontends",
 )
-def ai_providers_search(
+async def ai_providers_search(
     payload: AiProviderSearchRequest,
     db: Session = Depends(get_db),
 ):
@@ -154,6 +154,9 @@ def ai_providers_search(
 
     Behavior is gated behind the FEATURE_AI_SEARCH flag. When disabled, the
     endpoint returns HTTP 503 with a machine-readable detail.
+
+    Model calls are awaited without holding a DB connection or a threadpool
+    worker (see ``app.services.llm``).
     """
     if not getattr(settings, "FEATURE_AI_SEARCH", False):
         raise HTTPException(
@@ -162,7 +165,7 @@ def ai_providers_search(
         )
 
     try:
-        result = ai_provider_search(db, payload.model_dump())
+        result = await ai_provider_search_async(db, payload.model_dump())
     except ValueError as exc:
         if str(exc) == "query_required":
             raise HTTPException(
@@ -198,7 +201,7 @@ def ai_providers_search(
     response_model_exclude_none=True,
     summary="AI conversational assistant for provider discovery and booking prep",
 )
-def ai_assistant(
+async def ai_assistant(
     payload: AiAssistantRequest,
     db: Session = Depends(get_db),
 ):
@@ -257,7 +260,7 @@ def ai_assistant(
     }
 
     try:
-        result = ai_provider_search(db, search_payload)
+        result = await ai_provider_search_async(db, search_payload)
     except ValueError as exc:
         if str(exc) == "query_required":
             raise HTTPException(
@@ -312,7 +315,7 @@ def ai_assistant(
     response_model_exclude_none=True,
     summary="AI booking agent for conversational booking requests",
 )
-def booking_agent(
+async def booking_agent(
     payload: BookingAgentRequest,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_active_client),
@@ -348,7 +351,7 @@ def booking_agent(
     state_in = payload.state or BookingAgentState()
 
     try:
-        step = run_booking_agent_step(
+        step = await run_booking_agent_step_async(
             db=db,
             current_user=current_user,
             messages=msg_dicts,
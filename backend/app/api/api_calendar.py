@@ -9,9 +9,9 @@ from jose import JWTError, jwt
 
 from app.core.config import settings
 from app.database import get_db
-from app.models import User, CalendarAccount, CalendarProvider
+from app.models import User, CalendarAccount, CalendarBusyDay, CalendarProvider
 from app.api.auth import SECRET_KEY, ALGORITHM, get_user_by_email, get_current_user
-from app.services import calendar_service
+from app.services import calendar_service, calendar_sync
 
 logger = logging.getLogger(__name__)
 
@@ -135,6 +135,29 @@ def disconnect_google_calendar(
         .first()
     )
     if account:
+        db.query(CalendarBusyDay).filter(CalendarBusyDay.account_id == account.id).delete(
+            synchronize_session=False
+        )
         db.delete(account)
         db.commit()
     return {"status": "deleted"}
+
+
+@router.post("/google-calendar/notifications")
+def google_calendar_notification(request: Request, db: Session = Depends(get_db)):
+    """Google push-notification webhook: mark the account due for sync.
+
+    Always answers 200 so Google does not retry; unknown or unverified
+    channels are ignored.
+    """
+    headers = request.headers
+    try:
+        calendar_sync.handle_push_notification(
+            db,
+            headers.get("X-Goog-Channel-ID") or "",
+            headers.get("X-Goog-Channel-Token") or "",
+            headers.get("X-Goog-Resource-State") or "",
+        )
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Failed to handle Google Calendar notification: %s", exc)
+    return {"status": "ok"}
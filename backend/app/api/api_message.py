@@ -17,11 +17,11 @@ from typing import List, Optional, Literal
 from datetime import datetime, timezone
 import logging
 import time
-from fastapi.concurrency import run_in_threadpool
 
 from .. import crud, models, schemas
 from ..schemas.storage import PresignIn, PresignOut
 from .dependencies import get_db, get_current_user
+from ..database import run_db
 from ..utils.notifications import (
     notify_user_new_message,
     notify_user_new_booking_request,
@@ -41,7 +41,8 @@ import shutil
 from pydantic import BaseModel
 from ..utils.json import dumps_bytes as _json_dumps
 from ..utils.outbox import enqueue_outbox
-from ..utils.redis_cache import invalidate_preview_cache_for_user
+from ..utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+from ..utils.redis_cache import invalidate_preview_cache_for_user, invalidate_preview_cache_for_users
 from threading import BoundedSemaphore, Lock
 from contextlib import contextmanager
 
@@ -378,47 +379,26 @@ def _cheap_snapshot_thread(db: Session, request_id: int, viewer: "models.Visible
         return 0, 0
 
 
-@router.get(
-    "/booking-requests/{request_id}/messages",
-    response_model=schemas.MessageListResponse,
-)
-async def read_messages_async(
+def _read_messages_page(
     request_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(200, ge=1, le=5000),
-    after_id: Optional[int] = Query(
-        None,
-        description="Return only messages with an id greater than this value",
-    ),
-    before_id: Optional[int] = Query(
-        None,
-        description="Return only messages with an id less than this value (older history)",
-    ),
-    fields: Optional[str] = Query(
-        None, description="Comma-separated fields to include in the response"
-    ),
-    mode: Literal["full", "lite", "delta"] = Query(
-        "full", description="full returns the legacy payload, lite trims optional fields, delta is optimized for after_id fetches"
-    ),
-    since: Optional[datetime] = Query(
-        None,
-        description="ISO datetime: include messages with timestamp >= since; primarily used with mode=delta",
-    ),
-    include_quotes: bool = Query(
-        False,
-        description="When true, include lightweight quote summaries keyed by quote_id to eliminate a follow-up fetch on first paint.",
-    ),
-    known_quote_ids: Optional[str] = Query(
-        None,
-        description="Comma-separated list of quote IDs already known to the client; server will omit these from the quotes map to reduce payload.",
-    ),
-    if_none_match: Optional[str] = Header(default=None, convert_underscores=False, alias="If-None-Match"),
-    x_after_write: Optional[str] = Header(default=None, alias="X-After-Write", convert_underscores=False),
-    request: Request = None,
-    response: Response = None,
+    db: Session,
+    current_user: models.User,
+    skip: int,
+    limit: int,
+    after_id: Optional[int],
+    before_id: Optional[int],
+    fields: Optional[str],
+    mode: Literal["full", "lite", "delta"],
+    since: Optional[datetime],
+    include_quotes: bool,
+    known_quote_ids: Optional[str],
+    if_none_match: Optional[str],
+    x_after_write: Optional[str],
+    request: Optional[Request],
+    response: Optional[Response],
+    cursor: Optional[str],
 ):
+    """Blocking body of :func:`read_messages_async` (runs in the threadpool)."""
     # Fast deny-cache to stop repeated unauthorized storms
     deny_set = _get_message_deny_set()
     if (int(current_user.id), int(request_id)) in deny_set:
@@ -474,6 +454,18 @@ async def read_messages_async(
     )
     if after_id is not None and after_id < 0:
         after_id = None
+    if isinstance(cursor, str) and cursor:
+        try:
+            (cursor_id,) = decode_cursor(cursor, "messages", 1)
+            before_id = int(cursor_id)
+        except (InvalidCursor, TypeError, ValueError):
+            raise error_response(
+                "Invalid cursor",
+                {"cursor": "invalid"},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        # Keyset replaces OFFSET; the two never combine.
+        skip = 0
 
 
     normalized_mode: Literal["full", "lite", "delta"] = mode
@@ -592,7 +584,12 @@ async def read_messages_async(
     has_more = False
     if len(db_messages) > effective_limit:
         has_more = True
-        db_messages = db_messages[:effective_limit]
+        # Descending fetches were reversed above, so the over-fetched row is
+        # the oldest one at the front; ascending (delta) pages drop the tail.
+        if ('newest_first' in locals() and newest_first) or before_id is not None:
+            db_messages = db_messages[-effective_limit:]
+        else:
+            db_messages = db_messages[:effective_limit]
 
     lite_base_fields = {
         "id",
@@ -732,11 +729,7 @@ async def read_messages_async(
             except Exception:
                 parent_preview_by_id = {}
 
-    # CPU-heavy serialization step offloaded to a thread pool.
-    # Keep all DB work above on the main path; only the transformation runs off-thread.
-    # Offload CPU-bound per-row transformation to a worker thread.
-    result: List[dict] = await run_in_threadpool(
-        process_messages_sync,
+    result: List[dict] = process_messages_sync(
         db_messages,
         include=include,
         include_attachment_meta=include_attachment_meta,
@@ -764,6 +757,13 @@ async def read_messages_async(
         elif isinstance(ts_val, str):
             next_cursor = ts_val
 
+    # Older-history cursor: the oldest id on a newest-first or history page
+    history_cursor = None
+    if has_more and result and after_id is None and since is None:
+        oldest_id = result[0].get("id")
+        if oldest_id is not None:
+            history_cursor = encode_cursor("messages", [int(oldest_id)])
+
     total_latency_ms = (time.perf_counter() - request_start) * 1000.0
 
     envelope_dict = {
@@ -772,6 +772,7 @@ async def read_messages_async(
         "has_more": has_more,
         "next_cursor": next_cursor,
         "delta_cursor": delta_cursor,
+        "history_cursor": history_cursor,
         "requested_after_id": after_id,
         "requested_since": since,
         "total_latency_ms": round(total_latency_ms, 2),
@@ -909,6 +910,73 @@ async def read_messages_async(
         headers["ETag"] = etag
     return Response(content=body, media_type="application/json", headers=headers)
 
+@router.get(
+    "/booking-requests/{request_id}/messages",
+    response_model=schemas.MessageListResponse,
+)
+async def read_messages_async(
+    request_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(200, ge=1, le=5000),
+    after_id: Optional[int] = Query(
+        None,
+        description="Return only messages with an id greater than this value",
+    ),
+    before_id: Optional[int] = Query(
+        None,
+        description="Return only messages with an id less than this value (older history)",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to include in the response"
+    ),
+    mode: Literal["full", "lite", "delta"] = Query(
+        "full", description="full returns the legacy payload, lite trims optional fields, delta is optimized for after_id fetches"
+    ),
+    since: Optional[datetime] = Query(
+        None,
+        description="ISO datetime: include messages with timestamp >= since; primarily used with mode=delta",
+    ),
+    include_quotes: bool = Query(
+        False,
+        description="When true, include lightweight quote summaries keyed by quote_id to eliminate a follow-up fetch on first paint.",
+    ),
+    known_quote_ids: Optional[str] = Query(
+        None,
+        description="Comma-separated list of quote IDs already known to the client; server will omit these from the quotes map to reduce payload.",
+    ),
+    if_none_match: Optional[str] = Header(default=None, convert_underscores=False, alias="If-None-Match"),
+    x_after_write: Optional[str] = Header(default=None, alias="X-After-Write", convert_underscores=False),
+    request: Request = None,
+    response: Response = None,
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque history_cursor from a previous page; loads the next older page (replaces skip/before_id)",
+    ),
+):
+    return await run_db(
+        _read_messages_page,
+        request_id,
+        db,
+        current_user,
+        skip,
+        limit,
+        after_id,
+        before_id,
+        fields,
+        mode,
+        since,
+        include_quotes,
+        known_quote_ids,
+        if_none_match,
+        x_after_write,
+        request,
+        response,
+        cursor,
+    )
+
+
 # Back-compat wrapper for tests and internal callers that import read_messages
 def read_messages(
     request_id: int,
@@ -927,31 +995,27 @@ def read_messages(
     x_after_write: Optional[str] = Header(default=None, alias="X-After-Write", convert_underscores=False),
     request: Request = None,
     response: Response = None,
+    cursor: Optional[str] = Query(None),
 ):
-    # Execute the async route implementation in a private event loop
-    import anyio
-
-    async def _run():
-        return await read_messages_async(
-            request_id,
-            db,
-            current_user,
-            skip,
-            limit,
-            after_id,
-            before_id,
-            fields,
-            mode,
-            since,
-            include_quotes,
-            known_quote_ids,
-            if_none_match,
-            x_after_write,
-            request,
-            response,
-        )
-
-    return anyio.run(_run)
+    return _read_messages_page(
+        request_id,
+        db,
+        current_user,
+        skip,
+        limit,
+        after_id,
+        before_id,
+        fields,
+        mode,
+        since,
+        include_quotes,
+        known_quote_ids,
+        if_none_match,
+        x_after_write,
+        request,
+        response,
+        cursor,
+    )
 
 
 @router.get(
@@ -1213,14 +1277,12 @@ def read_messages_batch(
         return Response(content=_json_dumps({"mode": mode, "threads": threads_out, "payload_bytes": 0}), media_type="application/json", headers=headers)
 
 
-@router.put("/booking-requests/{request_id}/messages/read")
-async def mark_messages_read(
+def _mark_messages_read_sync(
     request_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-):
-    """Mark messages in the thread as read by the current user."""
+    db: Session,
+    current_user: models.User,
+    background_tasks: BackgroundTasks,
+) -> dict:
     booking_request = crud.crud_booking_request.get_booking_request(
         db, request_id=request_id
     )
@@ -1273,6 +1335,17 @@ async def mark_messages_read(
     return {"updated": updated}
 
 
+@router.put("/booking-requests/{request_id}/messages/read")
+async def mark_messages_read(
+    request_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+):
+    """Mark messages in the thread as read by the current user."""
+    return await run_db(_mark_messages_read_sync, request_id, db, current_user, background_tasks)
+
+
 class DeliveredIn(BaseModel):
     up_to_id: int
 
@@ -1289,7 +1362,7 @@ async def mark_messages_delivered(
     This is an ephemeral hint to flip sender bubbles to 'delivered'. It does not
     persist any DB state; it only broadcasts an event on the thread topic.
     """
-    booking_request = crud.crud_booking_request.get_booking_request(db, request_id=request_id)
+    booking_request = await run_db(crud.crud_booking_request.get_booking_request, db, request_id=request_id)
     if not booking_request:
         raise error_response(
             "Booking request not found",
@@ -1720,13 +1793,9 @@ def create_message(
         pass
     # Invalidate preview cache for both participants to keep previews fresh
     try:
-        invalidate_preview_cache_for_user(int(current_user.id))
-        try:
-            other_user = db.query(models.User).filter(models.User.id == other_user_id).first()
-        except Exception:
-            other_user = None
-        if other_user:
-            invalidate_preview_cache_for_user(int(other_user.id))
+        invalidate_preview_cache_for_users(
+            [int(current_user.id)] + ([int(other_user_id)] if other_user_id else [])
+        )
     except Exception:
         pass
     return data
@@ -1819,8 +1888,7 @@ def delete_message(
         pass
     # Invalidate preview cache for both participants (snippet/last message may change)
     try:
-        invalidate_preview_cache_for_user(int(booking_request.client_id))
-        invalidate_preview_cache_for_user(int(booking_request.artist_id))
+        invalidate_preview_cache_for_users([int(booking_request.client_id), int(booking_request.artist_id)])
     except Exception:
         pass
     # No content response
@@ -2066,12 +2134,8 @@ def init_attachment_message(
         pass
     # Invalidate preview cache for both participants (new placeholder message affects previews)
     try:
-        invalidate_preview_cache_for_user(int(current_user.id))
-        try:
-            other_user_id = booking_request.artist_id if current_user.id == booking_request.client_id else booking_request.client_id
-            invalidate_preview_cache_for_user(int(other_user_id))
-        except Exception:
-            pass
+        other_user_id = booking_request.artist_id if current_user.id == booking_request.client_id else booking_request.client_id
+        invalidate_preview_cache_for_users([int(current_user.id), int(other_user_id)])
     except Exception:
         pass
     return {"message": data, "presign": info}
@@ -2209,12 +2273,8 @@ def finalize_attachment_message(
         pass
     # Invalidate preview cache for both participants (attachment update may affect snippets)
     try:
-        invalidate_preview_cache_for_user(int(current_user.id))
-        try:
-            other_user_id = booking_request.artist_id if current_user.id == booking_request.client_id else booking_request.client_id
-            invalidate_preview_cache_for_user(int(other_user_id))
-        except Exception:
-            pass
+        other_user_id = booking_request.artist_id if current_user.id == booking_request.client_id else booking_request.client_id
+        invalidate_preview_cache_for_users([int(current_user.id), int(other_user_id)])
     except Exception:
         pass
     return data
@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..services.ops_scheduler import run_maintenance
+from ..services.job_scheduler import scheduler as job_scheduler
+from ..services import job_queue
 from .. import models
 from sqlalchemy import update
 from sqlalchemy.sql import text
@@ -28,6 +30,18 @@ def ops_tick():
     return {"status": "ok", **summary}
 
 
+@router.get("/ops/scheduler/status")
+def ops_scheduler_status():
+    """Leader state and per-job bookkeeping for this instance's scheduler."""
+    return job_scheduler.status()
+
+
+@router.get("/ops/jobs/status")
+def ops_jobs_status():
+    """Job counts by kind and status for the durable job queue."""
+    return job_queue.stats()
+
+
 @router.post("/ops/migrate-notification-links-booka")
 def migrate_booka_links(db: Session = Depends(get_db)):
     """One-off migration: rewrite moderation NEW_MESSAGE links to use /inbox?booka=1.
@@ -30,7 +30,7 @@ from ..models import (
     VisibleTo,
 )
 from .dependencies import get_db, get_current_active_client, get_current_service_provider, get_current_user
-from ..database import SessionLocal
+from ..database import SessionLocal, run_db
 from ..core.config import settings
 from ..core.config import FRONTEND_PRIMARY
 from ..utils import error_response
@@ -1154,104 +1154,20 @@ def paystack_verify(
 ## Removed plaintext receipt endpoint; PDF receipt (ReportLab-only) implemented below.
 
 
-@router.post("/paystack/webhook")
-async def paystack_webhook(
-    request: Request,
-    db: Session = Depends(get_db),
-    x_paystack_signature: str | None = Header(default=None),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-):
-    """Handle Paystack webhook events (test/production).
+def _apply_paystack_charge(
+    db: Session,
+    data: dict,
+    reference: str,
+    amount: Decimal,
+    background_tasks: BackgroundTasks,
+    timer: ServerTimer,
+    t_start_webhook: float,
+) -> Response:
+    """Blocking part of :func:`paystack_webhook` (runs in the threadpool).
 
-    - Verifies HMAC SHA512 signature of the raw request body using PAYSTACK_SECRET_KEY.
-    - On `charge.success`, marks the matching booking paid and emits the system message.
-    - Idempotent: if already marked paid, returns 200 OK.
+    WebSocket broadcasts are queued on ``background_tasks`` like the verify
+    path does, so nothing here needs the event loop.
     """
-    timer = ServerTimer()
-    if not settings.PAYSTACK_SECRET_KEY:
-        resp = Response(status_code=status.HTTP_200_OK)
-        try:
-            hdr = timer.header()
-            if hdr:
-                resp.headers['Server-Timing'] = hdr
-        except Exception:
-            pass
-        return resp
-
-    raw = await request.body()
-    t_start_webhook = time.perf_counter()
-    try:
-        expected = hmac.new(
-            key=settings.PAYSTACK_SECRET_KEY.encode("utf-8"),
-            msg=raw,
-            digestmod=hashlib.sha512,
-        ).hexdigest()
-        if not x_paystack_signature or x_paystack_signature != expected:
-            logger.warning("Paystack webhook signature mismatch")
-            try:
-                metrics_incr("paystack.webhook_signature_mismatch_total")
-            except Exception:
-                pass
-            resp = Response(status_code=status.HTTP_400_BAD_REQUEST)
-            try:
-                hdr = timer.header()
-                if hdr:
-                    resp.headers['Server-Timing'] = hdr
-            except Exception:
-                pass
-            return resp
-    except Exception as exc:
-        logger.error("Webhook signature verification failed: %s", exc)
-        resp = Response(status_code=status.HTTP_400_BAD_REQUEST)
-        try:
-            hdr = timer.header()
-            if hdr:
-                resp.headers['Server-Timing'] = hdr
-        except Exception:
-            pass
-        return resp
-
-    try:
-        t0 = ServerTimer.start()
-        payload = json.loads(raw.decode("utf-8"))
-        timer.stop('parse', t0)
-    except Exception:
-        resp = Response(status_code=status.HTTP_400_BAD_REQUEST)
-        try:
-            hdr = timer.header()
-            if hdr:
-                resp.headers['Server-Timing'] = hdr
-        except Exception:
-            pass
-        return resp
-
-    event = str(payload.get("event", "")).lower()
-    data = payload.get("data", {}) or {}
-    reference = str(data.get("reference", ""))
-    status_str = str(data.get("status", "")).lower()
-    amount_kobo = int(data.get("amount", 0) or 0)
-    amount = Decimal(str(amount_kobo / 100.0))
-
-    if event != "charge.success" and status_str != "success":
-        resp = Response(status_code=status.HTTP_200_OK)
-        try:
-            hdr = timer.header()
-            if hdr:
-                resp.headers['Server-Timing'] = hdr
-        except Exception:
-            pass
-        return resp
-
-    if not reference:
-        resp = Response(status_code=status.HTTP_200_OK)
-        try:
-            hdr = timer.header()
-            if hdr:
-                resp.headers['Server-Timing'] = hdr
-        except Exception:
-            pass
-        return resp
-
     # Correlate with pending BookingSimple using reference
     simple = db.query(BookingSimple).filter(BookingSimple.payment_id == reference).first()
     if not simple:
@@ -1366,8 +1282,7 @@ async def paystack_webhook(
                 if ws_manager and created_msgs:
                     for m in created_msgs:
                         env = _message_to_envelope(db, m)
-                        t0 = datetime.utcnow()
-                        await ws_manager.broadcast(int(br.id), env)
+                        background_tasks.add_task(ws_manager.broadcast, int(br.id), env)
                         try:
                             enqueue_outbox(db, topic=f"booking-requests:{int(br.id)}", payload=env)
                         except Exception:
@@ -1395,8 +1310,10 @@ async def paystack_webhook(
                 db.commit()
                 try:
                     if ws_manager:
-                        await ws_manager.broadcast(
-                            int(br.id), {"v": 1, "type": "message_deleted", "id": int(last_exp.id)}
+                        background_tasks.add_task(
+                            ws_manager.broadcast,
+                            int(br.id),
+                            {"v": 1, "type": "message_deleted", "id": int(last_exp.id)},
                         )
                     enqueue_outbox(
                         db,
@@ -1570,6 +1487,110 @@ async def paystack_webhook(
     return resp
 
 
+
+@router.post("/paystack/webhook")
+async def paystack_webhook(
+    request: Request,
+    db: Session = Depends(get_db),
+    x_paystack_signature: str | None = Header(default=None),
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+):
+    """Handle Paystack webhook events (test/production).
+
+    - Verifies HMAC SHA512 signature of the raw request body using PAYSTACK_SECRET_KEY.
+    - On `charge.success`, marks the matching booking paid and emits the system message.
+    - Idempotent: if already marked paid, returns 200 OK.
+    """
+    timer = ServerTimer()
+    if not settings.PAYSTACK_SECRET_KEY:
+        resp = Response(status_code=status.HTTP_200_OK)
+        try:
+            hdr = timer.header()
+            if hdr:
+                resp.headers['Server-Timing'] = hdr
+        except Exception:
+            pass
+        return resp
+
+    raw = await request.body()
+    t_start_webhook = time.perf_counter()
+    try:
+        expected = hmac.new(
+            key=settings.PAYSTACK_SECRET_KEY.encode("utf-8"),
+            msg=raw,
+            digestmod=hashlib.sha512,
+        ).hexdigest()
+        if not x_paystack_signature or x_paystack_signature != expected:
+            logger.warning("Paystack webhook signature mismatch")
+            try:
+                metrics_incr("paystack.webhook_signature_mismatch_total")
+            except Exception:
+                pass
+            resp = Response(status_code=status.HTTP_400_BAD_REQUEST)
+            try:
+                hdr = timer.header()
+                if hdr:
+                    resp.headers['Server-Timing'] = hdr
+            except Exception:
+                pass
+            return resp
+    except Exception as exc:
+        logger.error("Webhook signature verification failed: %s", exc)
+        resp = Response(status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            hdr = timer.header()
+            if hdr:
+                resp.headers['Server-Timing'] = hdr
+        except Exception:
+            pass
+        return resp
+
+    try:
+        t0 = ServerTimer.start()
+        payload = json.loads(raw.decode("utf-8"))
+        timer.stop('parse', t0)
+    except Exception:
+        resp = Response(status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            hdr = timer.header()
+            if hdr:
+                resp.headers['Server-Timing'] = hdr
+        except Exception:
+            pass
+        return resp
+
+    event = str(payload.get("event", "")).lower()
+    data = payload.get("data", {}) or {}
+    reference = str(data.get("reference", ""))
+    status_str = str(data.get("status", "")).lower()
+    amount_kobo = int(data.get("amount", 0) or 0)
+    amount = Decimal(str(amount_kobo / 100.0))
+
+    if event != "charge.success" and status_str != "success":
+        resp = Response(status_code=status.HTTP_200_OK)
+        try:
+            hdr = timer.header()
+            if hdr:
+                resp.headers['Server-Timing'] = hdr
+        except Exception:
+            pass
+        return resp
+
+    if not reference:
+        resp = Response(status_code=status.HTTP_200_OK)
+        try:
+            hdr = timer.header()
+            if hdr:
+                resp.headers['Server-Timing'] = hdr
+        except Exception:
+            pass
+        return resp
+
+    return await run_db(
+        _apply_paystack_charge, db, data, reference, amount, background_tasks, timer, t_start_webhook
+    )
+
+
 class PaymentAuthorizeIn(BaseModel):
     artist_amount: Optional[float] = Field(default=None, gt=0)
     sound_amount: Optional[float] = Field(default=None, ge=0)
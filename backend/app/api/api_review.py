@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, status, Path
+from fastapi import APIRouter, Depends, status, Path, Query, Response
+from fastapi.params import Query as QueryParam
 from sqlalchemy.orm import Session, selectinload
-from typing import List, Any
+from typing import List, Any, Optional
 
 from ..database import get_db
 from ..models.user import User, UserType
@@ -15,6 +16,8 @@ from ..schemas.review import (
     ClientReviewCreate,
     ClientReviewResponse,
 )
+from ..services.provider_profile import MAX_REVIEWS_PAGE_SIZE, REVIEWS_PAGE_SIZE, review_page
+from ..utils.pagination import InvalidCursor
 from .dependencies import get_current_user, get_current_active_client, get_current_service_provider
 from ..utils import error_response
 
@@ -122,69 +125,45 @@ def get_review(booking_id: int, db: Session = Depends(get_db)) -> Any:
 
 
 @router.get("/service-provider-profiles/{service_provider_id}/reviews", response_model=List[ReviewDetails])
-def list_reviews_for_service_provider(service_provider_id: int, db: Session = Depends(get_db)) -> Any:
+def list_reviews_for_service_provider(
+    service_provider_id: int,
+    response: Response = None,
+    cursor: Optional[str] = Query(None, description="reviews_next_cursor or a previous X-Next-Cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_REVIEWS_PAGE_SIZE),
+    db: Session = Depends(get_db),
+) -> Any:
     """
-    List all reviews for a specific service provider.
-    This requires joining through Bookings and Services or directly if Review had artist_id.
-    For now, let's assume reviews are primarily linked to bookings.
+    List reviews for a specific service provider, newest first.
+
+    Without ``cursor`` or ``limit`` every review is returned. With either, one
+    page is returned and the following page's cursor is sent in the
+    ``X-Next-Cursor`` header (absent on the last page).
     """
+    if isinstance(cursor, QueryParam):
+        cursor = cursor.default
+    if isinstance(limit, QueryParam):
+        limit = limit.default
     # Ensure service provider exists
-    service_provider_profile = (
-        db.query(ServiceProviderProfile)
+    exists = (
+        db.query(ServiceProviderProfile.user_id)
         .filter(ServiceProviderProfile.user_id == service_provider_id)
         .first()
     )
     # Return an empty list instead of 404 so UI can gracefully render when
     # a provider profile was deleted or hasn't been created yet.
-    if not service_provider_profile:
+    if not exists:
         return []
 
-    reviews = (
-        db.query(Review)
-        .join(Booking, Review.booking_id == Booking.id)
-        .filter(Booking.artist_id == service_provider_id)
-        .options(selectinload(Review.booking).selectinload(Booking.client))
-        .order_by(Review.created_at.desc())
-        .all()
-    )
-    # Coalesce timestamps on legacy rows and attach lightweight client identity
-    # so the frontend can show which client left each review.
+    if cursor is not None and limit is None:
+        limit = REVIEWS_PAGE_SIZE
     try:
-        from datetime import datetime as _dt
-        for r in reviews:
-            if not getattr(r, "created_at", None):
-                r.created_at = getattr(r, "updated_at", None) or _dt.utcnow()
-            if not getattr(r, "updated_at", None):
-                r.updated_at = r.created_at
-        db.commit()
-    except Exception:
-        pass
-    for r in reviews:
-        try:
-            booking = getattr(r, "booking", None)
-            client = getattr(booking, "client", None) if booking is not None else None
-            if client is None:
-                continue
-            # Expose a nested `client` object for ReviewDetails
-            setattr(r, "client", client)
-            try:
-                setattr(r, "client_id", int(getattr(client, "id")))
-            except Exception:
-                pass
-            first_name = getattr(client, "first_name", None)
-            last_name = getattr(client, "last_name", None)
-            setattr(r, "client_first_name", first_name)
-            setattr(r, "client_last_name", last_name)
-            display = f"{first_name or ''} {last_name or ''}".strip()
-            setattr(r, "client_display_name", display or None)
-            try:
-                loc = getattr(booking, "event_city", None)
-                if loc:
-                    setattr(r, "client_location", loc)
-            except Exception:
-                pass
-        except Exception:
-            continue
+        reviews, next_cursor = review_page(db, service_provider_id, cursor, limit)
+    except InvalidCursor:
+        raise error_response("Invalid cursor", {"cursor": "invalid"}, status.HTTP_400_BAD_REQUEST)
+    if response is not None:
+        response.headers["Access-Control-Expose-Headers"] = "X-Next-Cursor"
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
     return reviews
 
 
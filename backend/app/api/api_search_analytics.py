@@ -6,7 +6,7 @@ from typing import Any, List, Optional, Dict
 import logging
 import json
 
-from ..database import get_db
+from ..database import get_db, run_db
 from .dependencies import get_current_user
 from ..models.user import User
 from ..utils.auth import normalize_email
@@ -82,24 +82,7 @@ def _get_optional_user_id(request: Request, db: Session) -> Optional[int]:
         return None
 
 
-@router.post("/search-events", status_code=status.HTTP_202_ACCEPTED)
-async def log_search_event(request: Request, db: Session = Depends(get_db)):
-    """Record a search event for analytics (anonymous or user-linked).
-
-    This endpoint is intentionally unauthenticated; it attempts to infer the
-    user from cookies/headers but succeeds even when anonymous.
-    """
-    try:
-        body = await request.json()
-    except Exception:
-        body = {}
-    if not isinstance(body, dict):
-        body = {}
-    payload = _SearchEventCreatePayload(body)
-    if not payload.search_id or not payload.source:
-        # Missing core identifiers: treat as no-op to avoid noisy rows
-        return ORJSONResponse({"status": "ignored"}, status_code=status.HTTP_202_ACCEPTED)
-
+def _insert_search_event(request: Request, db: Session, payload: _SearchEventCreatePayload) -> None:
     try:
         user_id = _get_optional_user_id(request, db)
     except Exception:
@@ -159,34 +142,31 @@ async def log_search_event(request: Request, db: Session = Depends(get_db)):
         except Exception:
             pass
         logger.warning("search-events insert failed: %s", exc)
-    return {"status": "ok"}
 
 
-@router.post("/search-events/click", status_code=status.HTTP_202_ACCEPTED)
-async def log_search_click(request: Request, db: Session = Depends(get_db)):
-    """Record a click on a search result for analytics."""
+@router.post("/search-events", status_code=status.HTTP_202_ACCEPTED)
+async def log_search_event(request: Request, db: Session = Depends(get_db)):
+    """Record a search event for analytics (anonymous or user-linked).
+
+    This endpoint is intentionally unauthenticated; it attempts to infer the
+    user from cookies/headers but succeeds even when anonymous.
+    """
     try:
         body = await request.json()
     except Exception:
         body = {}
     if not isinstance(body, dict):
         body = {}
+    payload = _SearchEventCreatePayload(body)
+    if not payload.search_id or not payload.source:
+        # Missing core identifiers: treat as no-op to avoid noisy rows
+        return ORJSONResponse({"status": "ignored"}, status_code=status.HTTP_202_ACCEPTED)
 
-    search_id = str(body.get("search_id") or "").strip()
-    artist_id_raw = body.get("artist_id")
-    rank_raw = body.get("rank")
-    try:
-        artist_id = int(artist_id_raw)
-    except Exception:
-        artist_id = None
-    try:
-        rank = int(rank_raw) if rank_raw is not None else None
-    except Exception:
-        rank = None
+    await run_db(_insert_search_event, request, db, payload)
+    return {"status": "ok"}
 
-    if not search_id or artist_id is None:
-        return ORJSONResponse({"status": "ignored"}, status_code=status.HTTP_202_ACCEPTED)
 
+def _record_search_click(db: Session, search_id: str, artist_id: int, rank: Optional[int]) -> None:
     try:
         row = db.execute(
             text(
@@ -222,6 +202,34 @@ async def log_search_click(request: Request, db: Session = Depends(get_db)):
         except Exception:
             pass
         logger.warning("search-events click update failed: %s", exc)
+
+
+@router.post("/search-events/click", status_code=status.HTTP_202_ACCEPTED)
+async def log_search_click(request: Request, db: Session = Depends(get_db)):
+    """Record a click on a search result for analytics."""
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+
+    search_id = str(body.get("search_id") or "").strip()
+    artist_id_raw = body.get("artist_id")
+    rank_raw = body.get("rank")
+    try:
+        artist_id = int(artist_id_raw)
+    except Exception:
+        artist_id = None
+    try:
+        rank = int(rank_raw) if rank_raw is not None else None
+    except Exception:
+        rank = None
+
+    if not search_id or artist_id is None:
+        return ORJSONResponse({"status": "ignored"}, status_code=status.HTTP_202_ACCEPTED)
+
+    await run_db(_record_search_click, db, search_id, artist_id, rank)
     return {"status": "ok"}
 
 
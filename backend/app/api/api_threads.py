@@ -26,10 +26,12 @@ import asyncio
 import logging
 
 from ..utils.json import dumps_bytes as _json_dumps
-from ..utils.redis_cache import get_redis_client, cache_bytes, get_cached_bytes
+from ..utils.redis_cache import get_redis_client, cache_bytes, get_cached_bytes, preview_cache_key
 from threading import BoundedSemaphore
 from fastapi.concurrency import run_in_threadpool
 from ..database import get_db_session
+from ..realtime import inbox_events
+from ..realtime.bus import bus_enabled
 import random
 
 try:
@@ -210,10 +212,19 @@ def get_threads_preview(
         cache_on_early = (os.getenv("PREVIEW_CACHE_ENABLED", "0").strip().lower() in {"1", "true", "yes"})
     except Exception:
         cache_on_early = False
-    if cache_on_early and not skip_precheck:
+    # Resolve the viewer's preview namespace once, before any DB reads, so a
+    # write that invalidates it mid-request also orphans what we store below.
+    preview_base_key: Optional[str] = None
+    if cache_on_early:
         try:
-            role_key_early = view_mode or ("artist" if is_artist else "client")
-            base_key_early = f"preview:{int(current_user.id)}:{role_key_early}:{int(limit)}"
+            preview_base_key = preview_cache_key(
+                int(current_user.id), view_mode or ("artist" if is_artist else "client"), int(limit)
+            )
+        except Exception:
+            preview_base_key = None
+    if preview_base_key and not skip_precheck:
+        try:
+            base_key_early = preview_base_key
             etag_key_early = f"{base_key_early}:etag"
             body_key_early = f"{base_key_early}:body"
             client_early = get_redis_client()
@@ -237,7 +248,7 @@ def get_threads_preview(
                 )
 
             # Otherwise, if we have a cached body, serve it immediately.
-            cached_body_early = get_cached_bytes(body_key_early)
+            cached_body_early = get_cached_bytes(body_key_early, local=False)
             if cached_etag_early and cached_body_early:
                 pre_ms = (time.perf_counter() - t_start) * 1000.0
                 return Response(
@@ -279,10 +290,9 @@ def get_threads_preview(
         cache_on = (os.getenv("PREVIEW_CACHE_ENABLED", "0").strip().lower() in {"1", "true", "yes"})
     except Exception:
         cache_on = False
-    if cache_on and not skip_precheck:
+    if cache_on and preview_base_key and not skip_precheck:
         try:
-            role_key = view_mode or ("artist" if is_artist else "client")
-            base_key = f"preview:{int(current_user.id)}:{role_key}:{int(limit)}"
+            base_key = preview_base_key
             etag_key = f"{base_key}:etag"
             body_key = f"{base_key}:body"
             client = get_redis_client()
@@ -292,7 +302,7 @@ def get_threads_preview(
             except Exception:
                 cached_etag = None
             if cached_etag and str(cached_etag).strip() == etag_pre:
-                cached_body = get_cached_bytes(body_key)
+                cached_body = get_cached_bytes(body_key, local=False)
                 if cached_body:
                     pre_ms = (time.perf_counter() - t_start) * 1000.0
                     headers = {
@@ -632,9 +642,8 @@ def get_threads_preview(
 
     # Write to cache for subsequent requests (best-effort)
     try:
-        if cache_on:
-            role_key = view_mode or ("artist" if is_artist else "client")
-            base_key = f"preview:{int(current_user.id)}:{role_key}:{int(limit)}"
+        if cache_on and preview_base_key:
+            base_key = preview_base_key
             etag_key = f"{base_key}:etag"
             body_key = f"{base_key}:body"
             # TTL with small jitter to avoid cache stampedes
@@ -1114,8 +1123,13 @@ async def inbox_stream(
 ):
     """Push minimal change events when the user's inbox state changes.
 
-    Implementation: cheap polling of the snapshot every ~1s (non-blocking for clients).
-    For ultra-low latency & scale, pair this with Postgres NOTIFY triggers (see SQL below).
+    Two modes (``INBOX_STREAM_MODE``):
+      - push: recompute the snapshot only when an inbox-dirty signal for this
+        user arrives (see ``app.realtime.inbox_events``), plus a slow safety
+        poll (``INBOX_STREAM_SAFETY_POLL`` seconds) to heal missed signals.
+      - poll: cheap polling of the snapshot every ~1s.
+    The default ``auto`` uses push when the cross-instance WS bus is enabled
+    (signals then reach every instance) and poll otherwise.
     """
     is_artist = current_user.user_type == models.UserType.SERVICE_PROVIDER
     if role == "client":
@@ -1129,6 +1143,12 @@ async def inbox_stream(
     except Exception:
         poll_interval = 1.0
     poll_interval = max(0.5, min(poll_interval, 5.0))
+    push_mode = _inbox_stream_push_mode()
+    try:
+        safety_poll = float(os.getenv("INBOX_STREAM_SAFETY_POLL", "30") or 30.0)
+    except Exception:
+        safety_poll = 30.0
+    safety_poll = max(5.0, min(safety_poll, 300.0))
 
     user_id = int(current_user.id)
     try:
@@ -1223,6 +1243,16 @@ async def inbox_stream(
                 pass
 
     async def _aiter_events():
+        # Subscribe before the first snapshot so writes in between are not lost.
+        wake_event = inbox_events.subscribe(user_id) if push_mode else None
+        try:
+            async for chunk in _aiter_snapshots(wake_event):
+                yield chunk
+        finally:
+            if wake_event is not None:
+                inbox_events.unsubscribe(user_id, wake_event)
+
+    async def _aiter_snapshots(wake_event: Optional[asyncio.Event]):
         # Initial snapshot/token
         max_msg_id, max_br_id, unread_total, thread_count = await _poll_snapshot(user_id, is_artist)
         token = _change_token("snap", user_id, max_msg_id, max_br_id, unread_total, thread_count)
@@ -1232,6 +1262,7 @@ async def inbox_stream(
         first_payload = {"token": token, "max_msg_id": max_msg_id, "max_br_id": max_br_id, "unread_total": unread_total, "thread_count": thread_count}
         yield f"event: hello\ndata: {json.dumps(first_payload)}\n\n"
 
+        last_snapshot_ts = time.time()
         while True:
             if cancel_event.is_set():
                 break
@@ -1241,8 +1272,31 @@ async def inbox_stream(
                 yield f": keepalive {int(now)}\n\n"
                 last_emit_ts = now
 
-            # Poll snapshot cheaply
+            if wake_event is not None:
+                # Sleep until a dirty signal, the next heartbeat, or the safety poll.
+                now = time.time()
+                timeout = min(
+                    heartbeat - (now - last_emit_ts),
+                    safety_poll - (now - last_snapshot_ts),
+                )
+                if timeout > 0:
+                    try:
+                        await asyncio.wait_for(wake_event.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                if cancel_event.is_set():
+                    break
+                if wake_event.is_set():
+                    # Coalesce bursts (message + read + status in one request).
+                    await asyncio.sleep(_PUSH_DEBOUNCE_S)
+                    wake_event.clear()
+                elif (time.time() - last_snapshot_ts) < safety_poll:
+                    # Heartbeat due; nothing changed.
+                    continue
+
+            # Snapshot cheaply
             new_max_msg_id, new_max_br_id, new_unread_total, new_thread_count = await _poll_snapshot(user_id, is_artist)
+            last_snapshot_ts = time.time()
             new_token = _change_token("snap", user_id, new_max_msg_id, new_max_br_id, new_unread_total, new_thread_count)
 
             if new_token != token:
@@ -1257,8 +1311,9 @@ async def inbox_stream(
                 token = new_token
                 last_emit_ts = time.time()
 
-            # Non-blocking delay between polls
-            await asyncio.sleep(poll_interval)
+            if wake_event is None:
+                # Non-blocking delay between polls
+                await asyncio.sleep(poll_interval)
 
     async def _logged_stream():
         stream_start = time.time()
@@ -1276,6 +1331,7 @@ async def inbox_stream(
                     "role": ("artist" if is_artist else "client"),
                     "heartbeat": heartbeat,
                     "poll_interval": poll_interval,
+                    "mode": ("push" if push_mode else "poll"),
                     "active_streams": _STREAM_ACTIVE,
                     "preempted_streams": preempted_streams,
                     "per_user_limit": per_user_limit,
@@ -1337,6 +1393,7 @@ async def inbox_stream(
 
 _STREAM_SEM: asyncio.BoundedSemaphore | None = None
 _STREAM_ACTIVE: int = 0
+_PUSH_DEBOUNCE_S = 0.2
 _STREAM_USER_EVENTS: dict[int, list[asyncio.Event]] = {}
 _STREAM_IP_EVENTS: dict[str, list[asyncio.Event]] = {}
 _STREAM_PER_USER_LIMIT: int | None = None
@@ -1363,6 +1420,16 @@ def _get_stream_sem() -> asyncio.BoundedSemaphore:
     return _STREAM_SEM
 
 
+def _inbox_stream_push_mode() -> bool:
+    """Resolve INBOX_STREAM_MODE (push|poll|auto) to True for push."""
+    mode = (os.getenv("INBOX_STREAM_MODE") or "auto").strip().lower()
+    if mode == "push":
+        return True
+    if mode == "poll":
+        return False
+    return bus_enabled()
+
+
 def _get_stream_user_limit() -> int:
     """Max concurrent inbox streams allowed per user (per-process)."""
     global _STREAM_PER_USER_LIMIT
@@ -25,7 +25,7 @@ from ..schemas.user import UserResponse
 from ..schemas.booking import BookingResponse
 from ..schemas.quote_v2 import BookingSimpleRead
 from ..schemas.message import MessageResponse
-from .dependencies import get_current_user
+from .dependencies import get_current_user, get_current_user_live
 from ..utils.auth import verify_password, normalize_email
 from ..utils.email import send_email
 from ..utils.mailjet_contacts import sync_marketing_opt_in
@@ -112,7 +112,7 @@ def export_me(
 )
 async def upload_profile_picture_me(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_live),
     file: UploadFile = File(...),
 ) -> Any:
     """POST /api/v1/users/me/profile-picture"""
@@ -162,7 +162,7 @@ class UpdateMeRequest(BaseModel):
 def update_me(
     payload: UpdateMeRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_live),
     background_tasks: BackgroundTasks = BackgroundTasks(),
 ) -> Any:
     """Update basic profile fields for the current user."""
@@ -230,7 +230,7 @@ class DeleteMeRequest(BaseModel):
 def delete_me(
     payload: DeleteMeRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_live),
     background_tasks: BackgroundTasks = BackgroundTasks(),
 ) -> None:
     """Delete the current user's account after password confirmation."""
@@ -433,7 +433,7 @@ def confirm_email_change(
 def become_service_provider(
     payload: BecomeProviderRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_live),
 ) -> Any:
     if current_user.user_type == UserType.SERVICE_PROVIDER:
         # Already a provider; return current state
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Query, status
+from fastapi.responses import JSONResponse
 import logging
 
 from ..utils.errors import error_response
@@ -10,25 +11,34 @@ logger = logging.getLogger(__name__)
 
 
 @router.get("/travel-forecast", status_code=status.HTTP_202_ACCEPTED)
-def travel_forecast(location: str = Query(..., min_length=1)):
-    """Queue a weather forecast fetch and return a task identifier."""
+async def travel_forecast(location: str = Query(..., min_length=1)):
+    """Queue a weather forecast fetch and return a task identifier.
 
-    task_id = background_worker.enqueue(weather_service.get_3day_forecast, location)
+    Identical locations already in flight share one task (and one upstream call).
+    """
+
+    task_id = await background_worker.submit(
+        weather_service.get_3day_forecast,
+        location,
+        coalesce_key=f"forecast:{weather_service.normalize_location(location)}",
+    )
     return {"task_id": task_id}
 
 
 @router.get("/travel-forecast/{task_id}")
 async def travel_forecast_result(task_id: str):
-    """Return the queued weather forecast result."""
+    """Return the queued weather forecast result (202 while it is still running)."""
 
     try:
         return await background_worker.result(task_id)
     except KeyError:
         raise error_response("Task not found", {"task_id": "not_found"}, status.HTTP_404_NOT_FOUND)
-    except weather_service.LocationNotFoundError:
-        raise error_response("Invalid location", {"location": "Unknown location"})
-    except weather_service.WeatherAPIError as exc:  # pragma: no cover - network
-        logger.error("Weather API error: %s", exc, exc_info=True)
+    except background_worker.TaskPending:
+        return JSONResponse({"task_id": task_id, "status": "pending"}, status_code=status.HTTP_202_ACCEPTED)
+    except background_worker.TaskFailed as exc:
+        if exc.error_type == weather_service.LocationNotFoundError.__name__:
+            raise error_response("Invalid location", {"location": "Unknown location"})
+        logger.error("Weather API error: %s", exc)
         raise error_response(
             "Weather service error",
             {},
@@ -10,8 +10,9 @@ import json
 import logging
 import os
 import time
+from collections import OrderedDict, deque
 from contextlib import suppress
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from types import SimpleNamespace
 from typing import Any, Dict, List, Optional, Set
 
@@ -25,7 +26,9 @@ from ..models.user import User
 from .. import crud
 from .auth import ALGORITHM, SECRET_KEY, get_user_by_email
 from fastapi.concurrency import run_in_threadpool
-from ..utils.metrics import incr as metrics_incr
+from ..realtime.presence import presence
+from ..utils.json import dumps_bytes
+from ..utils.metrics import incr as metrics_incr, gauge as metrics_gauge, timing_ms as metrics_timing
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -42,6 +45,19 @@ try:
     WS_AUTH_WARN_MS = float(os.getenv("WS_AUTH_WARN_MS") or 300.0)
 except Exception:
     WS_AUTH_WARN_MS = 300.0
+# Per-connection outbound queue: broadcasts enqueue pre-encoded frames and a
+# writer task drains them, so one slow socket never delays the others.
+try:
+    WS_SEND_QUEUE_MAX = max(1, int(os.getenv("WS_SEND_QUEUE_MAX") or 256))
+except Exception:
+    WS_SEND_QUEUE_MAX = 256
+try:
+    WS_SLOW_CONSUMER_MAX_DROPS = max(1, int(os.getenv("WS_SLOW_CONSUMER_MAX_DROPS") or 64))
+except Exception:
+    WS_SLOW_CONSUMER_MAX_DROPS = 64
+# Ephemeral event types where only the latest queued frame per topic matters.
+# Presence is excluded: each frame carries different users' state.
+_COALESCE_TYPES = {"typing"}
 
 ENABLE_NOISE = os.getenv("ENABLE_NOISE", "0").lower() in {"1","true","yes"}
 WS_ENABLE_RECONNECT_HINT = os.getenv("WS_ENABLE_RECONNECT_HINT", "0").lower() in {"1","true","yes"}
@@ -57,12 +73,24 @@ except Exception:
 # Tiny in-memory cache to avoid repeated DB hits during WS handshake bursts.
 _USER_CACHE: Dict[str, tuple[float, Any]] = {}
 
+_ENVELOPE_FIELDS = frozenset({"v", "type", "topic", "payload"})
+
+
 @dataclass
 class Envelope:
     v: int = 1
     type: str = ""        # default to "message" on send
     topic: Optional[str] = None
     payload: Optional[Dict[str, Any]] = None
+    # Encoded form, computed once per envelope and shared by every socket and
+    # the bus publish. Reassigning a field drops it; payloads must not be
+    # mutated in place after the first send.
+    _encoded: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _ENVELOPE_FIELDS:
+            object.__setattr__(self, "_encoded", None)
+        object.__setattr__(self, name, value)
 
     @staticmethod
     def from_raw(raw: Any) -> "Envelope":
@@ -87,16 +115,31 @@ class Envelope:
         return Envelope()
 
     def to_json(self) -> str:
-        data: Dict[str, Any] = {"v": self.v, "type": (self.type or "message")}
-        if self.topic is not None: data["topic"] = self.topic
-        if self.payload is not None: data["payload"] = self.payload
-        return json.dumps(data, separators=(",", ":"))
+        return self.to_json_bytes().decode("utf-8")
 
     def to_json_bytes(self) -> bytes:
-        try:
-            return self.to_json().encode("utf-8")
-        except Exception:
-            return b"{}"
+        encoded = self._encoded
+        if encoded is None:
+            data: Dict[str, Any] = {"v": self.v, "type": (self.type or "message")}
+            if self.topic is not None: data["topic"] = self.topic
+            if self.payload is not None: data["payload"] = self.payload
+            try:
+                encoded = dumps_bytes(data)
+            except Exception:
+                return b"{}"
+            object.__setattr__(self, "_encoded", encoded)
+        return encoded
+
+    def to_bus_bytes(self, origin: str, outbox_id: Optional[int] = None) -> bytes:
+        """Encoded envelope with ``"origin"`` spliced in as the last key.
+
+        Consumers rely on that position to read and strip the origin without
+        parsing the frame (see ``_split_bus_frame``). Frames relayed from the
+        outbox carry ``"outbox_id"`` just before it.
+        """
+        data = self.to_json_bytes()
+        marker = b',"outbox_id":%d' % int(outbox_id) if outbox_id is not None else b""
+        return data[:-1] + marker + b',"origin":' + dumps_bytes(origin) + b"}"
 
 # ─── WS DB concurrency limiter ───────────────────────────────────────────────
 _WS_DB_SEM: asyncio.BoundedSemaphore | None = None
@@ -233,6 +276,16 @@ class NoiseWS:
     def __init__(self, websocket: WebSocket) -> None:
         self.ws = websocket
         self._noise: Optional["NoiseConnection"] = None
+        # Outbound queue of (coalesce_key, frame, frame_text) drained by _writer.
+        self._outbox: deque[tuple[Optional[str], bytes, Optional[str]]] = deque()
+        self._outbox_evt = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        with suppress(RuntimeError):
+            self._loop = asyncio.get_running_loop()
+        self.closed = False
+        # Frames dropped since the queue last drained (reset when it does).
+        self.dropped = 0
 
     async def handshake(self) -> None:
         chosen_subproto: Optional[str] = None
@@ -289,13 +342,15 @@ class NoiseWS:
         self._noise = noise
 
     async def send_envelope(self, env: Envelope) -> None:
-        data = env.to_json_bytes()
+        await self._send_frame(env.to_json_bytes())
+
+    async def _send_frame(self, data: bytes, text: Optional[str] = None) -> None:
         try:
             if self._noise:
                 ct = self._noise.encrypt(data)
                 await self.ws.send_bytes(ct)
             else:
-                await self.ws.send_text(data.decode("utf-8", errors="ignore"))
+                await self.ws.send_text(text if text is not None else data.decode("utf-8", errors="ignore"))
         except WebSocketDisconnect:
             raise
         except RuntimeError:
@@ -303,6 +358,106 @@ class NoiseWS:
         except Exception:
             raise WebSocketDisconnect(code=1006)
 
+    @property
+    def queue_depth(self) -> int:
+        return len(self._outbox)
+
+    def enqueue(self, data: bytes, coalesce_key: Optional[str] = None, text: Optional[str] = None) -> bool:
+        """Queue a pre-encoded frame for the writer task without awaiting I/O.
+
+        ``text`` is the decoded frame, shared across sockets by broadcasters.
+        Safe to call from another thread/loop (hops onto the socket's loop).
+        Returns False once the connection is closed so callers can prune it.
+        """
+        if self.closed:
+            return False
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self._loop is None:
+            self._loop = running
+        if self._loop is None:
+            return False
+        if running is not self._loop:
+            try:
+                self._loop.call_soon_threadsafe(self._enqueue_local, data, coalesce_key, text)
+            except RuntimeError:
+                self.closed = True
+                return False
+            return True
+        self._enqueue_local(data, coalesce_key, text)
+        return not self.closed
+
+    def _enqueue_local(self, data: bytes, coalesce_key: Optional[str], text: Optional[str] = None) -> None:
+        if self.closed:
+            return
+        if coalesce_key is not None:
+            # Replace a still-queued frame of the same kind in place.
+            for i, item in enumerate(self._outbox):
+                if item[0] == coalesce_key:
+                    self._outbox[i] = (coalesce_key, data, text)
+                    metrics_incr("ws.fanout.coalesced")
+                    return
+        if len(self._outbox) >= WS_SEND_QUEUE_MAX:
+            # Drop-oldest: a slow consumer loses stale frames, not new ones.
+            self._outbox.popleft()
+            self.dropped += 1
+            metrics_incr("ws.fanout.dropped")
+            if self.dropped >= WS_SLOW_CONSUMER_MAX_DROPS:
+                self._abort("slow consumer")
+                return
+        self._outbox.append((coalesce_key, data, text))
+        if self._writer is None:
+            self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+        self._outbox_evt.set()
+
+    async def _write_loop(self) -> None:
+        try:
+            while not self.closed:
+                if not self._outbox:
+                    if self.dropped:
+                        # Caught up: report this backlog's losses and start a
+                        # fresh count, so only a sustained backlog trips the
+                        # slow-consumer close.
+                        metrics_gauge("ws.fanout.backlog_dropped", self.dropped)
+                        self.dropped = 0
+                    self._outbox_evt.clear()
+                    await self._outbox_evt.wait()
+                    continue
+                _, data, text = self._outbox.popleft()
+                await asyncio.wait_for(self._send_frame(data, text), timeout=SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Send failed or timed out; the receive loop observes the close.
+            self._abort("send failed")
+
+    def _abort(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._outbox.clear()
+        metrics_incr("ws.fanout.closed", tags={"reason": reason})
+        try:
+            asyncio.get_running_loop().create_task(self._close_quietly(reason))
+        except RuntimeError:
+            pass
+
+    async def _close_quietly(self, reason: str) -> None:
+        with suppress(Exception):
+            await self.ws.close(code=1011, reason=reason)
+
+    async def shutdown(self) -> None:
+        """Stop the writer task; called when the connection handler exits."""
+        self.closed = True
+        self._outbox.clear()
+        writer, self._writer = self._writer, None
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await writer
+
     async def recv_envelope(self) -> Envelope:
         if self._noise:
             b = await self.ws.receive_bytes()
@@ -494,29 +649,43 @@ async def _current_user_from_token(token: str) -> tuple[Optional[User], Optional
         pass
     return user, None, meta
 
-# -------- presence & topic mux --------
+# -------- topic mux --------
 
-class Presence:
-    _counts: Dict[int, int] = {}
-    _status: Dict[int, str] = {}
+def _coalesce_key(env_type: str, topic: Optional[str]) -> Optional[str]:
+    return f"{env_type}:{topic}" if env_type in _COALESCE_TYPES else None
 
-    @classmethod
-    def mark_online(cls, uid: int) -> None:
-        cls._counts[uid] = cls._counts.get(uid, 0) + 1
-        cls._status[uid] = "online"
 
-    @classmethod
-    def mark_offline(cls, uid: int) -> None:
-        cnt = cls._counts.get(uid, 0) - 1
-        if cnt <= 0:
-            cls._counts[uid] = 0
-            cls._status[uid] = "offline"
-        else:
-            cls._counts[uid] = cnt
+def _fanout(conns: List[NoiseWS], env: Envelope, kind: str) -> List[NoiseWS]:
+    """Encode ``env`` once and enqueue it on every connection."""
+    if not conns:
+        return []
+    return _fanout_frame(conns, env.to_json_bytes(), _coalesce_key(env.type or "message", env.topic), kind)
+
+
+def _fanout_frame(conns: List[NoiseWS], data: bytes, key: Optional[str], kind: str) -> List[NoiseWS]:
+    """Enqueue an already-encoded frame on every connection.
+
+    O(n) and never awaits a socket; returns connections that are closed so
+    the caller can unregister them.
+    """
+    if not conns:
+        return []
+    t0 = time.perf_counter()
+    text = data.decode("utf-8", errors="ignore")
+    dead: List[NoiseWS] = []
+    max_depth = 0
+    for conn in conns:
+        if not conn.enqueue(data, key, text):
+            dead.append(conn)
+            continue
+        depth = conn.queue_depth
+        if depth > max_depth:
+            max_depth = depth
+    tags = {"kind": kind}
+    metrics_gauge("ws.fanout.queue_depth_max", max_depth, tags=tags)
+    metrics_timing("ws.fanout.enqueue_ms", (time.perf_counter() - t0) * 1000.0, tags=tags)
+    return dead
 
-    @classmethod
-    def is_online(cls, uid: int) -> bool:
-        return cls._counts.get(uid, 0) > 0 or cls._status.get(uid) == "online"
 
 class TopicMux:
     def __init__(self) -> None:
@@ -544,19 +713,19 @@ class TopicMux:
     async def broadcast_topic(self, topic: str, env: Envelope, publish: bool = True) -> None:
         if env.topic is None:
             env.topic = topic
-        for conn in list(self.topic_sockets.get(topic, set())):
-            try:
-                await asyncio.wait_for(conn.send_envelope(env), timeout=SEND_TIMEOUT)
-            except Exception:
-                await self.disconnect(conn)
+        for conn in _fanout(list(self.topic_sockets.get(topic, ())), env, "topic"):
+            await self.disconnect(conn)
         if publish and _bus_enabled():
             try:
-                data = json.loads(env.to_json())
-                data["origin"] = INSTANCE_ID
-                await _bus_publish(topic, data)
+                await _bus_publish(topic, env.to_bus_bytes(INSTANCE_ID))
             except Exception:
                 pass
 
+    async def deliver_frame(self, topic: str, data: bytes, key: Optional[str]) -> None:
+        """Fan out a frame that is already encoded (bus consumer path)."""
+        for conn in _fanout_frame(list(self.topic_sockets.get(topic, ())), data, key, "topic"):
+            await self.disconnect(conn)
+
 mux = TopicMux()
 
 class ChatRoom:
@@ -574,20 +743,22 @@ class ChatRoom:
                 del self.room_sockets[request_id]
 
     async def broadcast(self, request_id: int, env: Envelope, publish: bool = True) -> None:
-        for conn in list(self.room_sockets.get(request_id, [])):
-            try:
-                await asyncio.wait_for(conn.send_envelope(env), timeout=SEND_TIMEOUT)
-            except Exception:
-                self.disconnect(request_id, conn)
+        for conn in _fanout(list(self.room_sockets.get(request_id, ())), env, "room"):
+            self.disconnect(request_id, conn)
         if publish and _bus_enabled():
             try:
                 topic = f"booking-requests:{int(request_id)}"
-                data = json.loads(env.to_json())
-                data["origin"] = INSTANCE_ID
-                await _bus_publish(topic, data)
+                # Remote mux subscribers need the topic; local frames are already queued.
+                if env.topic is None:
+                    env.topic = topic
+                await _bus_publish(topic, env.to_bus_bytes(INSTANCE_ID))
             except Exception:
                 pass
 
+    def deliver_frame(self, request_id: int, data: bytes, key: Optional[str]) -> None:
+        for conn in _fanout_frame(list(self.room_sockets.get(request_id, ())), data, key, "room"):
+            self.disconnect(request_id, conn)
+
 chat = ChatRoom()
 
 
@@ -685,7 +856,7 @@ async def booking_request_ws(
     _preempted, _rejected = await _register_ws_conn(int(user.id), client_ip, conn)
     if _rejected:
         raise WebSocketException(code=WS_4403_FORBIDDEN, reason="Too many websocket connections")
-    Presence.mark_online(int(user.id))
+    presence_lease = await presence.connect(int(user.id))
     await chat.connect(request_id, conn)
 
     try:
@@ -750,8 +921,9 @@ async def booking_request_ws(
             with suppress(asyncio.CancelledError):
                 await pinger
     finally:
-        Presence.mark_offline(int(user.id))
+        await presence.disconnect(presence_lease)
         chat.disconnect(request_id, conn)
+        await conn.shutdown()
         try:
             await _release_ws_conn(int(user.id), conn)
         except Exception:
@@ -802,7 +974,7 @@ async def multiplex_ws(
     preempted, rejected = await _register_ws_conn(int(user.id), client_ip, conn)
     if rejected:
         raise WebSocketException(code=WS_4403_FORBIDDEN, reason="Too many websocket connections")
-    Presence.mark_online(int(user.id))
+    presence_lease = await presence.connect(int(user.id))
     try:
         logger.info(
             "ws.mux.connect",
@@ -883,9 +1055,10 @@ async def multiplex_ws(
                         if not br or int(user.id) not in {int(br.client_id), int(br.artist_id)}:
                             continue
                         await mux.subscribe(conn, topic)
+                        online = await presence.is_online_many([int(br.client_id), int(br.artist_id)])
                         updates = {
-                            str(int(br.client_id)): "online" if Presence.is_online(int(br.client_id)) else "offline",
-                            str(int(br.artist_id)): "online" if Presence.is_online(int(br.artist_id)) else "offline",
+                            str(uid): "online" if is_on else "offline"
+                            for uid, is_on in online.items()
                         }
                         await mux.broadcast_topic(topic, Envelope(type="presence", topic=topic, payload={"updates": updates}), publish=False)
                     continue
@@ -943,8 +1116,9 @@ async def multiplex_ws(
             with suppress(asyncio.CancelledError):
                 await pinger
     finally:
-        Presence.mark_offline(int(user.id))
+        await presence.disconnect(presence_lease)
         await mux.disconnect(conn)
+        await conn.shutdown()
         try:
             await _release_ws_conn(int(user.id), conn)
         except Exception:
@@ -979,20 +1153,19 @@ class NotifyFanout:
 
     async def push(self, user_id: int, env: Envelope, publish: bool = True) -> None:
         env.topic = env.topic or f"notifications:{int(user_id)}"
-        for conn in list(self.user_sockets.get(int(user_id), set())):
-            try:
-                await asyncio.wait_for(conn.send_envelope(env), timeout=SEND_TIMEOUT)
-            except Exception:
-                self.disconnect(int(user_id), conn)
+        for conn in _fanout(list(self.user_sockets.get(int(user_id), ())), env, "notify"):
+            self.disconnect(int(user_id), conn)
         if publish and _bus_enabled():
             try:
                 topic = f"notifications:{int(user_id)}"
-                data = json.loads(env.to_json())
-                data["origin"] = INSTANCE_ID
-                await _bus_publish(topic, data)
+                await _bus_publish(topic, env.to_bus_bytes(INSTANCE_ID))
             except Exception:
                 pass
 
+    def deliver_frame(self, user_id: int, data: bytes, key: Optional[str]) -> None:
+        for conn in _fanout_frame(list(self.user_sockets.get(int(user_id), ())), data, key, "notify"):
+            self.disconnect(int(user_id), conn)
+
 notify = NotifyFanout()
 
 @router.websocket("/ws/notifications")
@@ -1039,7 +1212,7 @@ async def notifications_ws(
     if rejected:
         raise WebSocketException(code=WS_4403_FORBIDDEN, reason="Too many websocket connections")
     await notify.connect(int(user.id), conn)
-    Presence.mark_online(int(user.id))
+    presence_lease = await presence.connect(int(user.id))
     try:
         logger.info(
             "ws.notifications.connect",
@@ -1109,8 +1282,9 @@ async def notifications_ws(
             with suppress(asyncio.CancelledError):
                 await pinger
     finally:
-        Presence.mark_offline(int(user.id))
+        await presence.disconnect(presence_lease)
         notify.disconnect(int(user.id), conn)
+        await conn.shutdown()
         try:
             await _release_ws_conn(int(user.id), conn)
         except Exception:
@@ -1129,6 +1303,51 @@ async def notifications_ws(
 
 # -------- compatibility shims --------
 
+def topic_envelope(topic: str, message: Any) -> Envelope:
+    """Envelope the compat managers send for ``message`` on ``topic``.
+
+    The outbox relay builds its frames here too, so a relayed copy of an
+    event encodes to the same bytes as the synchronous broadcast.
+    """
+    if topic.startswith("notifications:"):
+        try:
+            if isinstance(message, Envelope):
+                env = message
+            elif isinstance(message, dict):
+                env = Envelope.from_raw(message)
+            else:
+                env = Envelope(type="notification", payload={"data": message})
+        except Exception:
+            env = Envelope(type="notification")
+        # The topic is added after the push to /ws/notifications sockets.
+        return env
+    if isinstance(message, Envelope):
+        env = message
+        env.topic = env.topic or topic
+        env.type = env.type or "message"
+    elif isinstance(message, dict):
+        # Distinguish between full message payloads and typed control events.
+        # Chat messages (MessageResponse) do not include a top-level 'type';
+        # control envelopes (read, typing, presence, message_deleted, etc.)
+        # do. For the latter, preserve the type and move remaining fields into
+        # the payload so multiplex clients see a consistent shape.
+        msg_type = str(message.get("type") or "").strip().lower()
+        if msg_type and msg_type != "message":
+            # Build an Envelope where payload carries all non-envelope keys.
+            payload: Dict[str, Any] = {}
+            for k, v in message.items():
+                if k in {"v", "type", "topic"}:
+                    continue
+                payload[k] = v
+            v = int(message.get("v", 1) or 1)
+            env = Envelope(v=v, type=msg_type, topic=topic, payload=payload)
+        else:
+            env = Envelope(v=1, type="message", topic=topic, payload={"data": message, "message": message})
+    else:
+        env = Envelope(v=1, type="message", topic=topic, payload={"data": message})
+    return env
+
+
 class _CompatManager:
     async def broadcast(self, request_id: int, message: Any) -> None:
         try:
@@ -1136,31 +1355,8 @@ class _CompatManager:
         except Exception:
             rid = request_id
         topic = f"booking-requests:{int(rid)}"
-
-        if isinstance(message, Envelope):
-            env = message
-            env.topic = env.topic or topic
-            env.type = env.type or "message"
-        elif isinstance(message, dict):
-            # Distinguish between full message payloads and typed control events.
-            # Chat messages (MessageResponse) do not include a top-level 'type';
-            # control envelopes (read, typing, presence, message_deleted, etc.)
-            # do. For the latter, preserve the type and move remaining fields into
-            # the payload so multiplex clients see a consistent shape.
-            msg_type = str(message.get("type") or "").strip().lower()
-            if msg_type and msg_type != "message":
-                # Build an Envelope where payload carries all non-envelope keys.
-                payload: Dict[str, Any] = {}
-                for k, v in message.items():
-                    if k in {"v", "type", "topic"}:
-                        continue
-                    payload[k] = v
-                v = int(message.get("v", 1) or 1)
-                env = Envelope(v=v, type=msg_type, topic=topic, payload=payload)
-            else:
-                env = Envelope(v=1, type="message", topic=topic, payload={"data": message, "message": message})
-        else:
-            env = Envelope(v=1, type="message", topic=topic, payload={"data": message})
+        env = topic_envelope(topic, message)
+        _recent_frames.add((env.topic, hash(env.to_json_bytes())))
 
         await chat.broadcast(int(rid), env)
         try:
@@ -1170,21 +1366,15 @@ class _CompatManager:
 
 class _CompatNotificationsManager:
     async def broadcast(self, user_id: int, message: Any) -> None:
-        try:
-            if isinstance(message, Envelope):
-                env = message
-            elif isinstance(message, dict):
-                env = Envelope.from_raw(message)
-            else:
-                env = Envelope(type="notification", payload={"data": message})
-        except Exception:
-            env = Envelope(type="notification")
+        topic = f"notifications:{int(user_id)}"
+        env = topic_envelope(topic, message)
         # Push to dedicated /ws/notifications connections
         await notify.push(int(user_id), env)
         # Also fan out to the multiplex bus under notifications:{user_id}
         try:
-            topic = env.topic or f"notifications:{int(user_id)}"
+            topic = env.topic or topic
             env.topic = topic
+            _recent_frames.add((topic, hash(env.to_json_bytes())))
             await mux.broadcast_topic(topic, env)
         except Exception:
             pass
@@ -1203,7 +1393,7 @@ def _bus_enabled() -> bool:
     except Exception:
         return False
 
-async def _bus_publish(topic: str, data: dict) -> None:
+async def _bus_publish(topic: str, data: dict | bytes) -> None:
     try:
         from app.realtime.bus import publish_topic  # type: ignore
         await publish_topic(topic, data)
@@ -1213,19 +1403,146 @@ async def _bus_publish(topic: str, data: dict) -> None:
 async def _bus_start_consumer(pattern: str, handler) -> None:
     try:
         from app.realtime.bus import start_pattern_consumer  # type: ignore
-        await start_pattern_consumer(pattern, handler)
+        await start_pattern_consumer(pattern, handler, raw=True)
     except Exception:
         pass
 
-async def _bus_dispatch(topic: str, data: dict) -> None:
-    try:
-        if isinstance(data, dict) and data.get("origin") == INSTANCE_ID:
+_BUS_ORIGIN_MARK = b',"origin":"'
+_BUS_OUTBOX_MARK = b',"outbox_id":'
+_BUS_TYPE_PREFIX = b'{"v":1,"type":"'
+
+try:
+    OUTBOX_DEDUPE_TTL_S = max(1.0, float(os.getenv("WS_OUTBOX_DEDUPE_TTL") or 600.0))
+except Exception:
+    OUTBOX_DEDUPE_TTL_S = 600.0
+try:
+    OUTBOX_DEDUPE_MAX = max(1, int(os.getenv("WS_OUTBOX_DEDUPE_MAX") or 20000))
+except Exception:
+    OUTBOX_DEDUPE_MAX = 20000
+
+
+class _RecentKeys:
+    """Bounded, TTL'd set of recently delivered frames and outbox ids.
+
+    Outbox rows are relayed after the request that wrote them has usually
+    broadcast the same event already (locally and over the bus), and a row
+    can be relayed twice if its ack is lost. Relayed frames whose outbox id
+    or bytes were seen recently are dropped. Only the event loop touches it.
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, float]" = OrderedDict()
+
+    def seen(self, key: Any) -> bool:
+        expires = self._entries.get(key)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            self._entries.pop(key, None)
+            return False
+        return True
+
+    def add(self, key: Any) -> None:
+        self._entries[key] = time.monotonic() + self.ttl_s
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_recent_frames = _RecentKeys(OUTBOX_DEDUPE_TTL_S, OUTBOX_DEDUPE_MAX)
+
+def _split_bus_frame(raw: bytes) -> tuple[Optional[str], bytes]:
+    """Return (origin, frame_without_origin) for a frame from ``to_bus_bytes``.
+
+    The origin is the last key, so it can be read and stripped by slicing.
+    Frames in any other shape come back unchanged with origin None.
+    """
+    if not raw.endswith(b'"}'):
+        return None, raw
+    idx = raw.rfind(_BUS_ORIGIN_MARK)
+    if idx <= 0:
+        return None, raw
+    origin = raw[idx + len(_BUS_ORIGIN_MARK):-2]
+    if b'"' in origin or b"\\" in origin:
+        return None, raw
+    return origin.decode("utf-8", errors="ignore"), raw[:idx] + b"}"
+
+def _split_outbox_id(frame: bytes) -> tuple[Optional[int], bytes]:
+    """Return (outbox_id, frame_without_it) for a frame relayed from the outbox."""
+    idx = frame.rfind(_BUS_OUTBOX_MARK)
+    if idx <= 0:
+        return None, frame
+    digits = frame[idx + len(_BUS_OUTBOX_MARK):-1]
+    if not digits.isdigit():
+        return None, frame
+    return int(digits), frame[:idx] + b"}"
+
+def _peek_bus_type(frame: bytes) -> Optional[str]:
+    """Envelope type read from the canonical encoding prefix, else None."""
+    if not frame.startswith(_BUS_TYPE_PREFIX):
+        return None
+    end = frame.find(b'"', len(_BUS_TYPE_PREFIX))
+    if end < 0:
+        return None
+    value = frame[len(_BUS_TYPE_PREFIX):end]
+    if value.endswith(b"\\"):
+        return None
+    return value.decode("utf-8", errors="ignore")
+
+async def _bus_dispatch(topic: str, data: dict | bytes | str) -> None:
+    """Deliver a bus frame from another instance to local sockets.
+
+    Frames published by ``Envelope.to_bus_bytes`` are forwarded as-is (minus
+    the origin key); only foreign-shaped payloads are parsed and re-encoded.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    frame: Optional[bytes] = None
+    env_type: Optional[str] = None
+    if isinstance(data, (bytes, bytearray)):
+        origin, frame = _split_bus_frame(bytes(data))
+        if origin == INSTANCE_ID:
             return
-        env = Envelope.from_raw(data)
-    except Exception:
-        env = Envelope()
+        if origin is not None:
+            outbox_id, frame = _split_outbox_id(frame)
+            frame_key = (topic, hash(frame))
+            if outbox_id is not None:
+                if _recent_frames.seen(("outbox", outbox_id)) or _recent_frames.seen(frame_key):
+                    metrics_incr("ws.bus.outbox_duplicate")
+                    return
+                _recent_frames.add(("outbox", outbox_id))
+            _recent_frames.add(frame_key)
+        env_type = _peek_bus_type(frame) if origin is not None else None
+        if env_type is None:
+            try:
+                parsed = json.loads(frame)
+            except Exception:
+                parsed = {"payload": frame.decode("utf-8", errors="ignore")}
+            data = parsed if isinstance(parsed, dict) else {"payload": parsed}
+            frame = None
+    if isinstance(data, dict) and data.get("origin") == INSTANCE_ID:
+        return
+    if topic.startswith("inbox:"):
+        # Inbox-dirty signals only wake local SSE streams; no socket fanout.
+        try:
+            from app.realtime.inbox_events import wake_local
+            wake_local([int(topic.split(":", 1)[1])])
+        except Exception:
+            pass
+        return
+    if frame is None:
+        try:
+            env = Envelope.from_raw(data)
+        except Exception:
+            env = Envelope()
+        env.topic = env.topic or topic
+        frame = env.to_json_bytes()
+        env_type = env.type or "message"
+    key = _coalesce_key(env_type or "message", topic)
     try:
-        await mux.broadcast_topic(topic, env, publish=False)
+        await mux.deliver_frame(topic, frame, key)
     except Exception:
         pass
     try:
@@ -1234,23 +1551,15 @@ async def _bus_dispatch(topic: str, data: dict) -> None:
             try: req_id = int(topic.split(":", 1)[1])
             except Exception: req_id = None
             if isinstance(req_id, int):
-                try: await chat.broadcast(req_id, env, publish=False)
-                except Exception: pass
+                chat.deliver_frame(req_id, frame, key)
         elif topic.startswith("notifications:"):
             user_id = None
             try: user_id = int(topic.split(":", 1)[1])
             except Exception: user_id = None
             if isinstance(user_id, int):
-                try:
-                    # Keep /ws/notifications connections updated
-                    await notify.push(user_id, env, publish=False)
-                except Exception:
-                    pass
-                try:
-                    # Mirror notifications to multiplex subscribers as well
-                    await mux.broadcast_topic(topic, env, publish=False)
-                except Exception:
-                    pass
+                # Keep /ws/notifications connections updated; multiplex
+                # subscribers were already served by mux above.
+                notify.deliver_frame(user_id, frame, key)
     except Exception:
         pass
 
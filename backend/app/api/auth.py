@@ -1,6 +1,7 @@
 # backend/app/api/auth.py
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from pathlib import Path
 import base64
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
@@ -31,12 +32,20 @@ from ..schemas.user import (
     MFACode,
     EmailConfirmRequest,
 )
-from ..utils.auth import get_password_hash, verify_password, normalize_email, bcrypt_rounds_from_hash
+from ..utils.auth import (
+    HashingBusy,
+    get_password_hash,
+    get_password_hash_async,
+    normalize_email,
+    password_needs_rehash,
+    verify_password_async,
+)
 from ..utils.email import send_email
 from ..utils.mailjet_contacts import sync_marketing_opt_in
 from ..utils.redis_cache import get_redis_client
 from ..utils.server_timing import ServerTimer
 from ..utils.json import dumps_bytes as _json_dumps
+from ..services import principal_cache
 from app.core.config import settings
 import redis
 
@@ -318,12 +327,25 @@ def _clear_auth_cookies(response: Response) -> None:
 
 
 @router.post("/register", response_model=UserResponse)
-def register(
+async def register(
     user_data: UserCreate,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     email = normalize_email(user_data.email)
+    await run_in_threadpool(_ensure_email_available, db, email)
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except HashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Sign-up is busy. Please try again in a moment.",
+            headers={"Retry-After": "1"},
+        )
+    return await run_in_threadpool(_create_registered_user, db, user_data, email, hashed_password, background_tasks)
+
+
+def _ensure_email_available(db: Session, email: str) -> None:
     # Compare against normalized email directly so the index on users.email is usable
     existing_user = db.query(User).filter(User.email == email).first()
     if existing_user:
@@ -333,7 +355,14 @@ def register(
             detail="That email already has an account. Sign in instead.",
         )
 
-    hashed_password = get_password_hash(user_data.password)
+
+def _create_registered_user(
+    db: Session,
+    user_data: UserCreate,
+    email: str,
+    hashed_password: str,
+    background_tasks: BackgroundTasks,
+) -> User:
     db_user = User(
         email=email,
         password=hashed_password,
@@ -419,18 +448,59 @@ def register(
 # Login rate limiting and lockout are already implemented and tested in
 # `test_login_lockout.py`.
 @router.post("/login")
-def login(
+async def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
     background_tasks: BackgroundTasks = None,
 ):
+    """Password login.
+
+    DB and Redis work runs in the shared threadpool in two short hops; the
+    bcrypt verify (and any rehash) runs on the dedicated hashing executor in
+    between, so a login burst cannot occupy the threads other sync routes
+    need.
+    """
     t = ServerTimer()
     ip = request.client.host if request.client else "unknown"
     email = normalize_email(form_data.username)
     user_key = f"login_fail:user:{email}"
     ip_key = f"login_fail:ip:{ip}"
     client = get_redis_client()
+    user = await run_in_threadpool(_login_lookup, db, client, t, email, ip, user_key, ip_key)
+
+    t0hash = ServerTimer.start()
+    new_hash: Optional[str] = None
+    try:
+        valid_pwd = bool(user) and await verify_password_async(form_data.password, user.password)
+        if valid_pwd and password_needs_rehash(user.password):
+            # Transparent rehash to the current BCRYPT_ROUNDS policy.
+            try:
+                new_hash = await get_password_hash_async(form_data.password)
+            except HashingBusy:
+                new_hash = None
+    except HashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Sign-in is busy. Please try again in a moment.",
+            headers={"Retry-After": "1"},
+        )
+    t.stop('authhash', t0hash)
+    return await run_in_threadpool(
+        _login_complete, request, db, client, t, user, valid_pwd, new_hash, user_key, ip_key, background_tasks
+    )
+
+
+def _login_lookup(
+    db: Session,
+    client,
+    t: ServerTimer,
+    email: str,
+    ip: str,
+    user_key: str,
+    ip_key: str,
+) -> Optional[User]:
+    """Lockout check and user lookup (threadpool)."""
     try:
         t0r = ServerTimer.start()
         user_attempts = int(client.get(user_key) or 0)
@@ -449,9 +519,22 @@ def login(
     t0db = ServerTimer.start()
     user = db.query(User).filter(User.email == email).first()
     t.stop('authdb', t0db)
-    t0hash = ServerTimer.start()
-    valid_pwd = bool(user) and verify_password(form_data.password, user.password)
-    t.stop('authhash', t0hash)
+    return user
+
+
+def _login_complete(
+    request: Request,
+    db: Session,
+    client,
+    t: ServerTimer,
+    user: Optional[User],
+    valid_pwd: bool,
+    new_hash: Optional[str],
+    user_key: str,
+    ip_key: str,
+    background_tasks: Optional[BackgroundTasks],
+):
+    """Attempt bookkeeping, MFA and session issue after the verify (threadpool)."""
     if not user or not valid_pwd:
         try:
             client.incr(user_key)
@@ -466,17 +549,9 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Optional: rehash-on-login to align with current bcrypt rounds policy.
-    # This can also reduce future login verify cost when rounds were higher.
-    try:
-        desired = int(os.getenv("BCRYPT_ROUNDS", "11") or 11)
-        current = bcrypt_rounds_from_hash(user.password) if user and isinstance(user.password, str) else None
-        if current is not None and current > desired:
-            user.password = get_password_hash(form_data.password)
-            # No explicit commit here; _create_session() will commit this change.
-    except Exception:
-        # Never fail login due to rehash issues
-        pass
+    if new_hash:
+        user.password = new_hash
+        # No explicit commit here; _create_session() will commit this change.
 
     # Skip MFA if a recognized trusted device is present
     device_id_hdr = request.headers.get("x-device-id") or request.headers.get("X-Device-Id")
@@ -1107,6 +1182,7 @@ def logout_all(
             db.commit()
     except Exception:
         db.rollback()
+    principal_cache.invalidate_user(current_user)
     resp = Response(content=_json_dumps({"message": "logged out all"}), media_type="application/json")
     _clear_auth_cookies(resp)
     try:
@@ -7,8 +7,10 @@ from ..database import SessionLocal, get_db
 from ..models.user import User, UserType
 from .auth import oauth2_scheme, SECRET_KEY, ALGORITHM, get_user_by_email
 from ..utils.auth import normalize_email
+from ..services import principal_cache
+from ..services.principal_cache import Principal
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db), request: Request = None) -> User:
+def _token_subject(token: str | None, request: Request | None) -> str:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,22 +27,48 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    return email
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db), request: Request = None) -> Principal:
+    """Authenticated user as a cached, read-only ``Principal`` snapshot.
+
+    Routes that modify the user, delete it, or need its relationships use
+    ``get_current_user_live`` instead.
+    """
+    email = _token_subject(token, request)
+    principal = principal_cache.load(db, email)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+
+def get_current_user_live(principal: Principal = Depends(get_current_user), db: Session = Depends(get_db)) -> User:
+    """Authenticated user as a live ORM ``User`` bound to the request session."""
+    if isinstance(principal, User):
+        # Test overrides of get_current_user hand back ORM users directly.
+        return principal
     # Eager load artist_profile if it exists, to potentially save queries in dependent functions
-    # Compare using normalized equality so the email index can be used
-    user = db.query(User).options(joinedload(User.artist_profile)).filter(
-        User.email == normalize_email(email)
-    ).first()
+    user = db.query(User).options(joinedload(User.artist_profile)).filter(User.id == principal.id).first()
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
-def get_current_active_client(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_client(current_user: User = Depends(get_current_user_live)) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     # Any active user can be a client for actions like creating a booking
     return current_user
 
-def get_current_service_provider(current_user: User = Depends(get_current_user)) -> User:
+def get_current_service_provider(current_user: User = Depends(get_current_user_live)) -> User:
     """Ensure the current user is an active service provider."""
 
     if not current_user.is_active:
@@ -51,7 +79,7 @@ def get_current_service_provider(current_user: User = Depends(get_current_user))
             detail="User is not a service provider.",
         )
 
-    # get_current_user should have eager-loaded artist_profile.
+    # get_current_user_live should have eager-loaded artist_profile.
     # If user_type is SERVICE_PROVIDER, they must have an associated profile.
     if not current_user.artist_profile:
         raise HTTPException(
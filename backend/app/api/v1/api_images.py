@@ -9,6 +9,7 @@ from pathlib import Path
 from app.database import get_db
 from app.models.service_provider_profile import ServiceProviderProfile as Artist
 from app.utils.redis_cache import get_redis, cache_bytes, get_cached_bytes
+from app.utils.tiered_cache import single_flight_scope
 
 # Locate backend/app/static from this file's position
 STATIC_DIR = Path(__file__).resolve().parents[3] / "app" / "static"
@@ -27,6 +28,7 @@ def _decode_data_url(data_url: str) -> bytes:
 
 
 @img_router.get("/avatar/{artist_id}")
+@single_flight_scope
 def avatar_thumb(
     request: Request,
     artist_id: int,
@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query,
 from fastapi.encoders import jsonable_encoder
 from fastapi.params import Query as QueryParam
 from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import func, desc, or_, case
+from sqlalchemy import func, desc, case
 from collections import defaultdict
 from datetime import datetime, timedelta, date
 import logging
@@ -20,24 +20,40 @@ except Exception:  # pragma: no cover - optional
     Image = None  # type: ignore
 
 from app.utils.redis_cache import (
-    get_cached_artist_list,
-    cache_artist_list,
+    get_cached_artist_list_response,
+    cache_artist_list_response,
     get_cached_availability,
     cache_availability,
+    ARTIST_LIST_KEY_PREFIX,
+)
+from app.utils.tiered_cache import single_flight_scope
+from app.utils.pagination import (
+    InvalidCursor,
+    approximate_count,
+    decode_cursor,
+    encode_cursor,
+    keyset_after,
 )
 from app.services import calendar_service
 from app.services.geocode import geocode_address
+from app.services.proximity import CLOSEST_SEARCH_RADIUS_KM, nearby_providers
+from app.services.availability import bulk_busy_days, unavailable_artist_ids
 from app.utils.slug import slugify_name, generate_unique_slug, RESERVED_SLUGS
 
-from app.database import get_db
+from app.database import get_db, get_db_session
 from app.models.user import User
 from app.models.service_provider_profile import ServiceProviderProfile as Artist
 from app.models.booking import Booking
 from app.models.booking_status import BookingStatus
 from app.models.booking_request import BookingRequest
+from app.models.calendar_busy_day import CalendarBusyDay
 from app.models.service import Service
 from app.models.service_category import ServiceCategory
 from app.models.review import Review
+from app.models.provider_search_stats import ProviderSearchStats
+from app.services.provider_stats import LISTED_SERVICE_STATUSES
+from app.services.provider_search_index import provider_text_match
+from app.services.provider_profile import get_profile_body
 from app.schemas.artist import (
     ArtistProfileResponse,
     ArtistProfileUpdate,  # new Pydantic schema for updates
@@ -82,7 +98,7 @@ PRICE_BUCKETS: List[Tuple[int, int]] = [
     (2000001, 5000000),
 ]
 
-SERVICE_LIST_VISIBLE_STATUSES = ("approved", "pending_review")
+SERVICE_LIST_VISIBLE_STATUSES = LISTED_SERVICE_STATUSES
 
 # Paths for storing uploaded images:
 STATIC_DIR = Path(__file__).resolve().parent.parent.parent / "static"
@@ -675,6 +691,89 @@ def update_portfolio_images_order_me(
     return artist_profile
 
 
+def _encode_list_response(payload: Dict[str, Any]) -> Tuple[bytes, str]:
+    """Encode a list payload exactly as the route's response model would.
+
+    Returns ``(body, etag)``; both are cached so hits skip all JSON work.
+    """
+    body = ArtistListResponse.model_validate(payload).model_dump_json(by_alias=True, exclude_none=True).encode("utf-8")
+    return body, 'W/"' + hashlib.sha256(body).hexdigest() + '"'
+
+
+def _restore_excluded_nones(model_cls: Any, data: Any) -> Any:
+    """Re-add nullable fields that ``exclude_none`` dropped from an encoded body."""
+    if not isinstance(data, dict) or not hasattr(model_cls, "model_fields"):
+        return data
+    for name, info in model_cls.model_fields.items():
+        key = info.alias or name
+        if key not in data:
+            if info.is_required():
+                data[key] = None
+            continue
+        for arg in (info.annotation, *getattr(info.annotation, "__args__", ())):
+            if hasattr(arg, "model_fields"):
+                data[key] = _restore_excluded_nones(arg, data[key])
+                break
+    return data
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _list_sort_key(sort: Optional[str], *, fast: bool) -> Optional[Tuple[str, List[Any], bool]]:
+    """Return ``(name, key columns, descending)`` for keyset paging of ``sort``.
+
+    The columns are both the ORDER BY and the cursor; the provider id comes
+    last as the tiebreak. ``closest`` orders by a computed distance and has
+    no cursor (page/offset only).
+    """
+    stats = ProviderSearchStats
+    if sort == "most_booked":
+        return "most_booked", [stats.book_count, stats.artist_id], True
+    if fast:
+        return "recent", [func.coalesce(Artist.updated_at, _EPOCH), Artist.user_id], True
+    if sort == "top_rated":
+        return "top_rated", [stats.rating_sort, stats.artist_id], True
+    if sort == "best_match":
+        return "best_match", [stats.best_match_score, stats.artist_id], True
+    if sort == "newest":
+        return "newest", [func.coalesce(Artist.created_at, _EPOCH), Artist.user_id], True
+    if sort is None:
+        return "default", [Artist.user_id], False
+    return None
+
+
+def _apply_list_keyset(query, key: Optional[Tuple[str, List[Any], bool]], cursor: Optional[str]):
+    """Order ``query`` by ``key``, seek past ``cursor`` and select the key values last."""
+    if key is None:
+        return query
+    name, columns, descending = key
+    query = query.order_by(*[desc(c) if descending else c for c in columns])
+    if cursor:
+        try:
+            values = decode_cursor(cursor, name, len(columns))
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(keyset_after(columns, values, descending))
+    return query.add_columns(*columns)
+
+
+def _list_body_response(
+    body: bytes,
+    etag: str,
+    if_none_match: Optional[str],
+    *,
+    cache_control: str,
+    x_cache: str,
+) -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if if_none_match == etag:
+        headers["X-Cache"] = "REVALIDATED"
+        return Response(status_code=304, headers=headers)
+    headers["X-Cache"] = x_cache
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get(
     "/",
     response_model=ArtistListResponse,
@@ -682,6 +781,7 @@ def update_portfolio_images_order_me(
     summary="List all service provider profiles",
     description="Return a paginated list of service provider profiles.",
 )
+@single_flight_scope
 def read_all_service_provider_profiles(
     response: Response = None,
     request: Request = None,
@@ -703,6 +803,16 @@ def read_all_service_provider_profiles(
     include_price_distribution: bool = Query(False, alias="include_price_distribution"),
     artist: Optional[str] = Query(None, description="Filter by artist name"),
     fields: Optional[str] = Query(None, description="Comma-separated fields to include. Trims payload."),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque next_cursor from a previous page; replaces page. total is then approximate.",
+    ),
+    radius_km: Optional[float] = Query(
+        None,
+        gt=0,
+        le=1000,
+        description="With sort=closest, only return providers within this distance of location.",
+    ),
 ):
     """Return a list of all service provider profiles with optional filters.
 
@@ -710,6 +820,16 @@ def read_all_service_provider_profiles(
     - Fast path for lean field sets (id, business_name, profile_picture_url)
       with tiny avatar proxy URLs and ETag-based 304 revalidation.
     - Redis-backed caching for common parameter combinations (including fields).
+      The cache holds the encoded response body and its ETag, so a hit is a
+      byte fetch plus an If-None-Match compare.
+    - Keyset pagination: every page carries ``next_cursor`` (except for
+      ``sort=closest``); passing it back seeks past the last row instead of
+      OFFSET-scanning, and ``total`` then comes from a short-lived cached count.
+    - ``sort=closest`` geocodes ``location`` (cached) and ranks providers in
+      the surrounding geohash cells by great-circle distance; ``radius_km``
+      turns that radius into a hard filter.
+    - ``artist`` matches names through the provider search index and, without
+      an explicit ``sort``, lists the best matches first.
     """
 
     def _coerce_cached_payload(raw: Any) -> Dict[str, Any]:
@@ -719,6 +839,10 @@ def read_all_service_provider_profiles(
         raw_data = raw.get("data") or []
         profiles_from_cache: list[ArtistProfileResponse] = []
         for item in raw_data:
+            # ``user_id`` is excluded from encoded bodies; ``id`` mirrors it.
+            if isinstance(item, dict) and item.get("user_id") is None and isinstance(item.get("id"), int):
+                item["user_id"] = int(item["id"])
+            item = _restore_excluded_nones(ArtistProfileResponse, item)
             try:
                 profiles_from_cache.append(ArtistProfileResponse.model_validate(item))
             except Exception:
@@ -735,6 +859,7 @@ def read_all_service_provider_profiles(
             "data": profiles_from_cache,
             "total": total_val,
             "price_distribution": price_dist,
+            "next_cursor": raw.get("next_cursor"),
         }
 
     # When invoked directly (e.g., unit tests), FastAPI will not inject
@@ -763,6 +888,10 @@ def read_all_service_provider_profiles(
         artist = None
     if hasattr(fields, "default"):
         fields = None
+    if hasattr(cursor, "default"):
+        cursor = None
+    if hasattr(radius_km, "default"):
+        radius_km = None
 
     # Normalize ``category`` to a slug (e.g. "videographer") so the filter works
     # regardless of whether the frontend sends "Videographer" or "videographer".
@@ -784,7 +913,6 @@ def read_all_service_provider_profiles(
             }
 
     cache_category = category_slug
-    cached = None
     # Determine if fast path applies
     requested: Optional[set[str]] = None
     if isinstance(fields, str) and fields.strip():
@@ -814,67 +942,39 @@ def read_all_service_provider_profiles(
     fast_filters_ok = (when is None) and (artist is None) and (not include_price_distribution)
     use_fast_path = requested and requested.issubset(fast_fields) and fast_sort_ok and fast_filters_ok
 
-    # Try Redis cache first (now keyed by fields too)
+    # Try the response cache first (keyed by fields too)
     cacheable = (not include_price_distribution) and (when is None) and (not artist)
+    cache_params: Dict[str, Any] = dict(
+        page=page,
+        limit=limit,
+        category=cache_category,
+        location=location,
+        sort=sort,
+        min_price=min_price,
+        max_price=max_price,
+        fields=fields,
+        cursor=cursor,
+        radius_km=radius_km,
+    )
+    if_none_match = req_headers.get("if-none-match")
     if cacheable:
-        cached = get_cached_artist_list(
-            page=page,
-            limit=limit,
-            category=cache_category,
-            location=location,
-            sort=sort,
-            min_price=min_price,
-            max_price=max_price,
-            fields=fields,
-        )
+        cached = get_cached_artist_list_response(**cache_params)
         if cached is not None:
-            # Defensive scrub: legacy cached payloads may have null timestamps
-            try:
-                from datetime import datetime as _dt
-                items = cached.get("data") if isinstance(cached, dict) else None
-                if isinstance(items, list):
-                    for it in items:
-                        if isinstance(it, dict):
-                            # Ensure user_id is present for response validation; derive from id if needed
-                            if it.get("user_id") is None and isinstance(it.get("id"), int):
-                                it["user_id"] = int(it["id"])  # id mirrors user_id in schema
-                            ca = it.get("created_at")
-                            ua = it.get("updated_at")
-                            if not ca and ua:
-                                it["created_at"] = ua
-                            if not ua and ca:
-                                it["updated_at"] = ca
-                            if not it.get("created_at"):
-                                it["created_at"] = _dt.utcnow()
-                            if not it.get("updated_at"):
-                                it["updated_at"] = it.get("created_at")
-            except Exception:
-                pass
-            try:
-                etag = 'W/"' + hashlib.sha256(json.dumps(cached, separators=(",", ":"), sort_keys=True).encode("utf-8")).hexdigest() + '"'
-            except Exception:
-                etag = None
-            response.headers["Cache-Control"] = "public, s-maxage=60, stale-while-revalidate=300"
-            if etag:
-                if req_headers.get("if-none-match") == etag:
-                    response.headers["ETag"] = etag
-                    response.headers["X-Cache"] = "REVALIDATED"
-                    return Response(status_code=304)
-                response.headers["ETag"] = etag
-            response.headers["X-Cache"] = "HIT"
-            return _coerce_cached_payload(cached)
+            etag, body = cached
+            if request is None:
+                # Direct callers (tests, internal reuse) expect the dict shape.
+                return _coerce_cached_payload(json.loads(body))
+            return _list_body_response(
+                body,
+                etag,
+                if_none_match,
+                cache_control="public, s-maxage=60, stale-while-revalidate=300",
+                x_cache="HIT",
+            )
 
     # FAST PATH: only id, business_name, profile_picture_url
     if use_fast_path:
-        booking_subq = (
-            db.query(
-                Booking.artist_id.label("artist_id"),
-                func.count(Booking.id).label("book_count"),
-            )
-            .group_by(Booking.artist_id)
-            .subquery()
-        )
-
+        stats = ProviderSearchStats
         cols = [
             Artist.user_id.label("user_id"),
             Artist.business_name,
@@ -882,49 +982,38 @@ def read_all_service_provider_profiles(
             Artist.profile_picture_url,
             Artist.created_at.label("created_at"),
             Artist.updated_at.label("updated_at"),
-            booking_subq.c.book_count,
+            stats.book_count,
         ]
-        query = db.query(*cols).outerjoin(booking_subq, booking_subq.c.artist_id == Artist.user_id)
-        query = query.filter(Artist.services.any(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES)))
+        # One row per listed provider in provider_search_stats: no aggregates
+        # or service joins needed to filter, count or sort.
+        listed = [stats.has_listed_service.is_(True)]
         if category_slug:
-            query = (
-                query.join(Service, Service.artist_id == Artist.user_id)
-                .join(ServiceCategory, Service.service_category_id == ServiceCategory.id)
-                .filter(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES))
-                .filter(func.lower(ServiceCategory.name) == category_slug.replace("_", " "))
-            )
-            # Avoid duplicates when an artist has multiple matching services
-            query = query.group_by(
-                Artist.user_id,
-                Artist.business_name,
-                Artist.slug,
-                Artist.profile_picture_url,
-                Artist.created_at,
-                Artist.updated_at,
-                booking_subq.c.book_count,
-            )
+            listed.append(stats.category_slugs.like(f"%,{category_slug},%"))
+        query = db.query(*cols).join(stats, stats.artist_id == Artist.user_id).filter(*listed)
         if location:
             query = query.filter(Artist.location.ilike(f"%{location}%"))
-        if sort == "most_booked":
-            # SQLite doesn't support NULLS LAST; use COALESCE so NULLs sort as 0
-            query = query.order_by(desc(func.coalesce(booking_subq.c.book_count, 0)))
-        else:
-            query = query.order_by(Artist.updated_at.desc())
+        sort_key = _list_sort_key(sort, fast=True)
+        query = _apply_list_keyset(query, sort_key, cursor)
 
-        total_q = db.query(func.count(Artist.user_id))
-        total_q = total_q.filter(Artist.services.any(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES)))
-        if category_slug:
-            total_q = (
-                total_q.join(Service, Service.artist_id == Artist.user_id)
-                .join(ServiceCategory, Service.service_category_id == ServiceCategory.id)
-                .filter(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES))
-                .filter(func.lower(ServiceCategory.name) == category_slug.replace("_", " "))
-            )
+        total_q = db.query(func.count(stats.artist_id)).filter(*listed)
         if location:
-            total_q = total_q.filter(Artist.location.ilike(f"%{location}%"))
-        total = int(total_q.scalar() or 0)
-
-        rows = query.offset((page - 1) * limit).limit(limit).all()
+            total_q = total_q.join(Artist, Artist.user_id == stats.artist_id).filter(
+                Artist.location.ilike(f"%{location}%")
+            )
+        if cursor:
+            total = approximate_count(
+                ARTIST_LIST_KEY_PREFIX,
+                ("fast", category_slug, location),
+                lambda: total_q.scalar(),
+            )
+            rows = query.limit(limit + 1).all()
+        else:
+            total = int(total_q.scalar() or 0)
+            rows = query.offset((page - 1) * limit).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(sort_key[0], tuple(rows[-1])[-len(sort_key[1]) :])
 
         def tiny_avatar_url(_id: int, src: Optional[str], v) -> Optional[str]:
             """Return a public absolute URL suitable for Next.js image optimizer.
@@ -958,7 +1047,8 @@ def read_all_service_provider_profiles(
 
         data = []
         from datetime import datetime as _dt
-        for _user_id, name, slug, avatar, created_at, updated_at, _book_count in rows:
+        for row in rows:
+            _user_id, name, slug, avatar, created_at, updated_at, _book_count = tuple(row)[: len(cols)]
             # Coalesce legacy null timestamps to satisfy response model
             ca = created_at or updated_at or _dt.utcnow()
             ua = updated_at or created_at or ca
@@ -976,206 +1066,143 @@ def read_all_service_provider_profiles(
                 item["profile_picture_url"] = tiny_avatar_url(int(_user_id), avatar, updated_at)
             data.append(item)
 
-        payload = {"data": data, "total": total, "price_distribution": []}
-        payload_for_etag = jsonable_encoder(payload)
-        # Cache the fast-path payload so repeated requests HIT Redis
+        payload = {"data": data, "total": total, "price_distribution": [], "next_cursor": next_cursor}
         try:
-            cache_artist_list(
-                payload,
-                page=page,
-                limit=limit,
-                category=cache_category,
-                location=location,
-                sort=sort,
-                min_price=min_price,
-                max_price=max_price,
-                expire=60,
-                fields=fields,
-            )
-        except Exception:
-            pass
-        try:
-            serialized = json.dumps(payload_for_etag, separators=(",", ":"), sort_keys=True).encode("utf-8")
-            etag = 'W/"' + hashlib.sha256(serialized).hexdigest() + '"'
+            body, etag = _encode_list_response(payload)
         except Exception:
-            etag = None
-        response.headers["Cache-Control"] = "public, s-maxage=300, stale-while-revalidate=1800"
-        if etag:
-            if req_headers.get("if-none-match") == etag:
-                response.headers["ETag"] = etag
-                response.headers["X-Cache"] = "REVALIDATED"
-                return Response(status_code=304)
-            response.headers["ETag"] = etag
-        response.headers["X-Cache"] = "MISS"
-        return payload
-
-    # SLOWER PATH (original logic, slightly trimmed)
-    rating_subq = (
-        db.query(
-            Review.artist_id.label("artist_id"),
-            func.avg(Review.rating).label("rating"),
-            func.count(Review.id).label("rating_count"),
-        )
-        .group_by(Review.artist_id)
-        .subquery()
-    )
-    booking_subq = (
-        db.query(
-            Booking.artist_id.label("artist_id"),
-            func.count(Booking.id).label("book_count"),
+            logger.exception("Could not encode artist list fast-path payload")
+            response.headers["Cache-Control"] = "public, s-maxage=300, stale-while-revalidate=1800"
+            response.headers["X-Cache"] = "MISS"
+            return payload
+        # Cache the encoded fast-path response so repeated requests HIT
+        if cacheable:
+            cache_artist_list_response(body, etag, expire=60, **cache_params)
+        if request is None:
+            return payload
+        return _list_body_response(
+            body,
+            etag,
+            if_none_match,
+            cache_control="public, s-maxage=300, stale-while-revalidate=1800",
+            x_cache="MISS",
         )
-        .group_by(Booking.artist_id)
-        .subquery()
-    )
-    # Cross-DB compatible aggregation of category names
-    dialect = getattr(db.get_bind(), "dialect", None)
-    dname = getattr(dialect, "name", "sqlite") if dialect else "sqlite"
-    if dname == "postgresql":
-        categories_agg = func.string_agg(ServiceCategory.name, ",")
-    else:
-        categories_agg = func.group_concat(ServiceCategory.name, ",")
-
-    category_subq = (
-        db.query(
-            Service.artist_id.label("artist_id"),
-            categories_agg.label("service_categories"),
-        )
-        .join(ServiceCategory, Service.service_category_id == ServiceCategory.id)
-        .filter(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES))
-        .group_by(Service.artist_id)
-        .subquery()
-    )
 
+    # SLOWER PATH (original logic, slightly trimmed)
+    # Ratings, booking counts and category names come from the denormalized
+    # provider_search_stats row (one per provider) instead of GROUP BY
+    # subqueries over reviews/bookings/services.
+    stats = ProviderSearchStats
     query = (
         db.query(
             Artist,
-            rating_subq.c.rating,
-            rating_subq.c.rating_count,
-            booking_subq.c.book_count,
-            category_subq.c.service_categories,
+            stats.rating_avg,
+            stats.rating_count,
+            stats.book_count,
+            stats.category_names,
         )
         # Only load user if needed by downstream serialization
         # .options(joinedload(Artist.user))
-        .outerjoin(rating_subq, rating_subq.c.artist_id == Artist.user_id)
-        .outerjoin(booking_subq, booking_subq.c.artist_id == Artist.user_id)
-        .outerjoin(category_subq, category_subq.c.artist_id == Artist.user_id)
+        .join(stats, stats.artist_id == Artist.user_id)
     )
     # Exclude service providers who have not added any APPROVED services.
-    query = query.filter(Artist.services.any(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES)))
-    if artist:
-        query = query.join(User).filter(
-            or_(
-                Artist.business_name.ilike(f"%{artist}%"),
-                User.first_name.ilike(f"%{artist}%"),
-                User.last_name.ilike(f"%{artist}%"),
-            )
-        )
+    query = query.filter(stats.has_listed_service.is_(True))
+    # Name search goes through the provider search index (trigram/FTS5)
+    # instead of ILIKE scans over profile and user name columns.
+    text_match = provider_text_match(db, [artist], field="name") if artist else None
+    if text_match is not None:
+        query = query.join(text_match, text_match.c.artist_id == Artist.user_id)
 
     join_services = False
     service_price_col = None
-    if category_slug or min_price is not None or max_price is not None:
-        price_query = db.query(
-            Service.artist_id.label("artist_id"),
-            func.min(Service.price).label("service_price"),
-        ).filter(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES))
-        if category_slug:
-            price_query = price_query.join(Service.service_category).filter(
-                func.lower(ServiceCategory.name) == category_slug.replace("_", " ")
+    if category_slug:
+        # The displayed price is the cheapest service *in the category*, which
+        # the per-provider stats row cannot hold; keep a focused subquery.
+        price_subq = (
+            db.query(
+                Service.artist_id.label("artist_id"),
+                func.min(Service.price).label("service_price"),
             )
-        price_subq = price_query.group_by(Service.artist_id).subquery()
+            .filter(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES))
+            .join(Service.service_category)
+            .filter(func.lower(ServiceCategory.name) == category_slug.replace("_", " "))
+            .group_by(Service.artist_id)
+            .subquery()
+        )
         query = query.join(price_subq, price_subq.c.artist_id == Artist.user_id)
         query = query.add_columns(price_subq.c.service_price)
         service_price_col = price_subq.c.service_price
         join_services = True
+    elif min_price is not None or max_price is not None:
+        query = query.add_columns(stats.min_price)
+        service_price_col = stats.min_price
+        join_services = True
     if min_price is not None:
         query = query.filter(service_price_col >= min_price)
     if max_price is not None:
         query = query.filter(service_price_col <= max_price)
-    if join_services:
-        query = query.group_by(
-            Artist.user_id,
-            rating_subq.c.rating,
-            rating_subq.c.rating_count,
-            booking_subq.c.book_count,
-            category_subq.c.service_categories,
-            service_price_col,
-        )
+
+    # Date filter: exclude providers busy on ``when`` in SQL, before counting
+    # and paging, so totals and pages only contain bookable providers.
+    if when:
+        busy_ids = unavailable_artist_ids(db, when)
+        if busy_ids:
+            query = query.filter(Artist.user_id.notin_(sorted(busy_ids)))
 
     # Location filter:
     # - For most sort modes, keep the existing behavior of filtering to artists
     #   whose location string matches the search term.
     # - For "closest", we treat location as a soft proximity hint instead of a
-    #   hard filter so all artists remain eligible and can be ordered by
-    #   textual closeness.
-    if location and sort != "closest":
+    #   hard filter: providers near the geocoded search location come first,
+    #   nearest first, then everyone else with textual matches ahead. With
+    #   ``radius_km`` only the providers inside the radius are returned.
+    nearby: Optional[List[Tuple[int, float]]] = None
+    if sort == "closest" and location:
+        search_geo = geocode_address(location)
+        if search_geo is not None:
+            nearby = nearby_providers(
+                query,
+                float(search_geo.lat),
+                float(search_geo.lng),
+                radius_km or CLOSEST_SEARCH_RADIUS_KM,
+            )
+    if location and (sort != "closest" or (radius_km is not None and nearby is None)):
+        # A radius we cannot measure (geocoding unavailable) degrades to text matching.
         query = query.filter(Artist.location.ilike(f"%{location}%"))
 
-    if sort == "top_rated":
-        query = query.order_by(desc(rating_subq.c.rating))
-    elif sort == "most_booked":
-        query = query.order_by(desc(booking_subq.c.book_count))
-    elif sort == "newest":
-        query = query.order_by(desc(Artist.created_at))
-    elif sort == "closest" and location:
-        # Proximity ordering based on the provider's base location:
-        # - When geocoding is available and the provider has coordinates,
-        #   order by squared distance between (location_lat, location_lng)
-        #   and the geocoded search location.
-        # - For providers without coordinates or when geocoding is disabled,
-        #   fall back to a textual "location contains search term" grouping.
+    count_query = query
+    row_width = len(query.column_descriptions)
+    sort_key = _list_sort_key(sort, fast=False)
+    if text_match is not None and sort is None:
+        # A name search without an explicit sort lists the best matches first.
+        sort_key = ("relevance", [text_match.c.score, Artist.user_id], True)
+    if sort == "closest" and location:
+        # Providers outside the search radius (or all of them when geocoding
+        # is unavailable) follow in textual-closeness order.
         pattern = f"%{location.lower()}%"
         text_closeness = case(
             (func.lower(Artist.location).ilike(pattern), 0),
             else_=1,
         )
-        search_geo = geocode_address(location)
-        if search_geo is not None:
-            try:
-                lat = float(search_geo.lat)
-                lng = float(search_geo.lng)
-            except Exception:
-                lat = None
-                lng = None
-        else:
-            lat = None
-            lng = None
-
-        if lat is not None and lng is not None:
-            # Artists whose location text matches the search term should always
-            # appear first, even when only some providers have coordinates.
-            # Within each text_closeness group, prefer providers with stored
-            # coordinates ordered by distance; others follow by rating/recency.
-            has_coords = case(
-                (
-                    (Artist.location_lat.isnot(None) & Artist.location_lng.isnot(None)),
-                    0,
-                ),
-                else_=1,
-            )
-            distance_sq = (
-                (Artist.location_lat - lat) * (Artist.location_lat - lat)
-                + (Artist.location_lng - lng) * (Artist.location_lng - lng)
-            )
-            query = query.order_by(
-                text_closeness,
-                has_coords,
-                distance_sq,
-                desc(rating_subq.c.rating),
-                desc(booking_subq.c.book_count),
-                desc(Artist.created_at),
-            )
-        else:
-            # Geocoding not available: keep the lightweight textual proximity
-            # behavior so providers whose location text matches the search
-            # come first.
-            query = query.order_by(
-                text_closeness,
-                desc(rating_subq.c.rating),
-                desc(booking_subq.c.book_count),
-                desc(Artist.created_at),
-            )
-
-    total_count = query.count()
+        query = query.order_by(
+            text_closeness,
+            desc(stats.rating_sort),
+            desc(stats.book_count),
+            desc(Artist.created_at),
+            Artist.user_id,
+        )
+    else:
+        query = _apply_list_keyset(query, sort_key, cursor)
+
+    if nearby is not None and radius_km is not None:
+        total_count = len(nearby)
+    elif cursor and sort_key is not None:
+        total_count = approximate_count(
+            ARTIST_LIST_KEY_PREFIX,
+            ("full", category_slug, location, min_price, max_price, artist),
+            count_query.count,
+        )
+    else:
+        total_count = count_query.count()
 
     price_distribution_data: List[Dict[str, Any]] = []
     if include_price_distribution:
@@ -1191,12 +1218,11 @@ def read_all_service_provider_profiles(
                 prices = prices.group_by(Service.artist_id)
                 all_min_prices = [float(p or 0) for p, in prices.all()]
             else:
-                # All artists: same approach as the lean endpoint
+                # All artists: per-provider minimum from provider_search_stats
                 all_min_prices = [
                     float(p or 0)
-                    for p, in db.query(func.min(Service.price))
-                    .filter(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES))
-                    .group_by(Service.artist_id)
+                    for p, in db.query(ProviderSearchStats.min_price)
+                    .filter(ProviderSearchStats.has_listed_service.is_(True))
                     .all()
                 ]
             for price in all_min_prices:
@@ -1213,8 +1239,31 @@ def read_all_service_provider_profiles(
         except Exception:
             price_distribution_data = []
 
-    offset = (page - 1) * limit
-    artists = query.offset(offset).limit(limit).all()
+    distances: Dict[int, float] = dict(nearby or ())
+    if nearby is not None:
+        # Serve the distance-ranked ids for this page, loading only their rows,
+        # then fill from the rest of the list unless a radius was requested.
+        offset = (page - 1) * limit
+        page_ids = [uid for uid, _ in nearby[offset : offset + limit]]
+        artists = []
+        if page_ids:
+            by_id = {
+                tuple(row)[0].user_id: row
+                for row in query.filter(Artist.user_id.in_(page_ids)).order_by(None).all()
+            }
+            artists = [by_id[uid] for uid in page_ids if uid in by_id]
+        if radius_km is None and len(artists) < limit:
+            rest = query.filter(Artist.user_id.notin_(list(distances))) if distances else query
+            artists += rest.offset(max(0, offset - len(nearby))).limit(limit - len(artists)).all()
+    elif cursor and sort_key is not None:
+        artists = query.limit(limit + 1).all()
+    else:
+        artists = query.offset((page - 1) * limit).limit(limit + 1).all()
+    next_cursor = None
+    if len(artists) > limit:
+        artists = artists[:limit]
+        if sort_key is not None:
+            next_cursor = encode_cursor(sort_key[0], tuple(artists[-1])[row_width:])
 
     # Helper to scrub heavy inline images from list payloads
     def _scrub_image(val: Optional[str]) -> Optional[str]:
@@ -1229,6 +1278,7 @@ def read_all_service_provider_profiles(
 
     profiles: List[ArtistProfileResponse] = []
     for row in artists:
+        row = tuple(row)[:row_width]
         if join_services:
             artist, rating, rating_count, book_count, category_names, service_price = (
                 row
@@ -1280,23 +1330,12 @@ def read_all_service_provider_profiles(
         except Exception:
             # Fallback to an untrimmed model on validation issues to avoid 500s
             profile = ArtistProfileResponse.model_validate({**base})
-        # Avoid per-artist availability lookups for list pages without a specific date
-        if when:
-            availability = read_artist_availability(
-                artist.user_id,
-                when=when,
-                db=db,
-            )
-            profile.is_available = (when.isoformat() not in availability["unavailable_dates"]) 
-        else:
-            # Default to available when no specific date filter is applied to keep the list fast
-            profile.is_available = True
+        # Busy providers were filtered out in SQL when ``when`` is set.
+        profile.is_available = True
+        if artist.user_id in distances:
+            profile.distance_km = round(distances[artist.user_id], 1)
         profiles.append(profile)
 
-    if when:
-        profiles = [p for p in profiles if p.is_available]
-        total_count = len(profiles)
-
     # When browsing the DJ category, filter out placeholder legacy records
     # that were imported from older systems. These entries usually have a
     # business name that exactly matches the user's full name and lack any
@@ -1326,36 +1365,6 @@ def read_all_service_provider_profiles(
         profiles = [p for p in profiles if not _is_placeholder(p)]
         total_count = len(profiles)
 
-    if cacheable:
-        try:
-            # Include user_id explicitly so cached payloads validate on response_model
-            payload_for_cache = {
-                "data": [
-                    ({**p.model_dump(), "user_id": int(getattr(p, "user_id", 0) or 0)} if hasattr(p, "user_id") else p.model_dump())
-                    for p in profiles
-                ],
-                "total": total_count,
-                "price_distribution": price_distribution_data,
-            }
-        except Exception:
-            payload_for_cache = {
-                "data": [],
-                "total": total_count,
-                "price_distribution": price_distribution_data,
-            }
-        cache_artist_list(
-            payload_for_cache,
-            page=page,
-            limit=limit,
-            category=cache_category,
-            location=location,
-            sort=sort,
-            min_price=min_price,
-            max_price=max_price,
-            expire=60,
-            fields=fields,
-        )
-
     # Prefer direct, cacheable public URLs for avatars (Option A)
     # - If the stored value is an absolute URL (e.g., Cloudflare R2), keep as-is.
     # - If it's a relative storage path (e.g., profile_pics/...), expose it via /static so Next/Image can optimize.
@@ -1402,43 +1411,35 @@ def read_all_service_provider_profiles(
     except Exception:
         pass
 
-    try:
-        serialized_profiles = [
-            ({**p.model_dump(), "user_id": int(getattr(p, "user_id", 0) or 0)} if hasattr(p, "user_id") else p.model_dump())
-            for p in profiles
-        ]
-    except Exception:
-        serialized_profiles = jsonable_encoder(profiles)
-
-    # Set caching headers on the response
-    if cacheable:
-        try:
-            payload = jsonable_encoder(serialized_profiles)
-            etag = 'W/"' + hashlib.sha256(json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")).hexdigest() + '"'
-        except Exception:
-            etag = None
-        response.headers["Cache-Control"] = "public, s-maxage=60, stale-while-revalidate=300"
-        if etag:
-            if req_headers.get("if-none-match") == etag:
-                response.headers["ETag"] = etag
-                response.headers["X-Cache"] = "REVALIDATED"
-                return Response(status_code=304)
-            response.headers["ETag"] = etag
-        response.headers["X-Cache"] = "MISS"
-    else:
-        response.headers["Cache-Control"] = "no-store"
-        response.headers["X-Cache"] = "BYPASS"
-
     payload = {
         "data": profiles,
         "total": total_count,
         "price_distribution": price_distribution_data,
+        "next_cursor": next_cursor,
     }
-    # When invoked directly (e.g., unit tests), coerce payload to JSON-safe
-    # primitives so cached and non-cached calls compare equally.
+    if not cacheable:
+        response.headers["Cache-Control"] = "no-store"
+        response.headers["X-Cache"] = "BYPASS"
+        return payload
+
+    try:
+        body, etag = _encode_list_response(payload)
+    except Exception:
+        logger.exception("Could not encode artist list payload")
+        response.headers["Cache-Control"] = "public, s-maxage=60, stale-while-revalidate=300"
+        response.headers["X-Cache"] = "MISS"
+        return payload
+    cache_artist_list_response(body, etag, expire=60, **cache_params)
+    # When invoked directly (e.g., unit tests), return the payload itself.
     if request is None:
         return payload
-    return payload
+    return _list_body_response(
+        body,
+        etag,
+        if_none_match,
+        cache_control="public, s-maxage=60, stale-while-revalidate=300",
+        x_cache="MISS",
+    )
 
 
 class AvatarPresignIn(BaseModel):
@@ -1540,156 +1541,32 @@ def presign_portfolio_image_me(
     )
 
 
-def _hydrate_artist_profile(artist: Artist, db: Session) -> Artist:
-    """Ensure timestamps + aggregate counters are present on an Artist ORM row."""
-    if not artist:
-        return artist
-    try:
-        from datetime import datetime as _dt
-        if not getattr(artist, "created_at", None):
-            artist.created_at = getattr(artist, "updated_at", None) or _dt.utcnow()
-        if not getattr(artist, "updated_at", None):
-            artist.updated_at = artist.created_at
-        db.add(artist)
-        db.commit()
-        db.refresh(artist)
-    except Exception:
-        pass
-
-    artist_id = getattr(artist, "user_id", None)
-    # Completed / cancelled events counts for this provider
-    try:
-        completed_count = (
-            db.query(Booking)
-            .filter(
-                Booking.artist_id == int(artist_id),
-                Booking.status == BookingStatus.COMPLETED,
-            )
-            .count()
-        )
-        cancelled_count = (
-            db.query(Booking)
-            .filter(
-                Booking.artist_id == int(artist_id),
-                Booking.status == BookingStatus.CANCELLED,
-            )
-            .count()
-        )
-        setattr(artist, "completed_events", int(completed_count))
-        setattr(artist, "cancelled_events", int(cancelled_count))
-    except Exception:
-        setattr(artist, "completed_events", 0)
-        setattr(artist, "cancelled_events", 0)
-
-    # Aggregate rating + review count for this provider so the client-side
-    # provider profile panel can show an accurate "reviews" badge that matches
-    # the reviews list.
-    try:
-        rating_row = (
-            db.query(func.avg(Review.rating), func.count(Review.id))
-            .filter(Review.artist_id == int(artist_id))
-            .first()
-        )
-        if rating_row is not None:
-            avg_rating, rating_count = rating_row
-            setattr(
-                artist,
-                "rating",
-                float(avg_rating) if avg_rating is not None else None,
-            )
-            setattr(
-                artist,
-                "rating_count",
-                int(rating_count or 0),
-            )
-    except Exception:
-        # Leave default rating / rating_count on error
-        pass
-
-    # Strip any inline/base64 portfolio blobs to avoid massive payloads
-    try:
-        imgs = getattr(artist, "portfolio_image_urls", None)
-        if isinstance(imgs, list):
-            cleaned = [u for u in imgs if isinstance(u, str) and not u.strip().lower().startswith("data:")]
-            if len(cleaned) != len(imgs):
-                artist.portfolio_image_urls = cleaned
-    except Exception:
-        pass
-
-    return artist
-
-
-def _build_full_profile_payload(artist: Artist, db: Session) -> dict[str, Any]:
-    """Return provider + services + reviews in one payload."""
-    artist = _hydrate_artist_profile(artist, db)
-
-    services = (
-        db.query(Service)
-        .filter(Service.artist_id == artist.user_id)
-        .filter(Service.status.in_(SERVICE_LIST_VISIBLE_STATUSES))
-        .order_by(Service.display_order)
-        .all()
+def _profile_response(db: Session, artist_id: int, variant: str, request: Optional[Request]) -> Any:
+    """Serve a provider's cached profile payload (see ``services.provider_profile``)."""
+    found = get_profile_body(db, artist_id, variant)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Artist profile not found.")
+    etag, body, hit = found
+    if request is None:
+        # Direct callers (tests, internal reuse) expect the dict shape.
+        return json.loads(body)
+    return _list_body_response(
+        body,
+        etag,
+        request.headers.get("if-none-match"),
+        cache_control="public, no-cache",
+        x_cache="HIT" if hit else "MISS",
     )
-    try:
-        now = datetime.utcnow()
-        for s in services:
-            if getattr(s, "created_at", None) is None:
-                s.created_at = now
-            if getattr(s, "updated_at", None) is None:
-                s.updated_at = s.created_at or now
-        db.commit()
-    except Exception:
-        pass
 
-    reviews = (
-        db.query(Review)
-        .join(Booking, Review.booking_id == Booking.id)
-        .filter(Booking.artist_id == artist.user_id)
-        .options(selectinload(Review.booking).selectinload(Booking.client))
-        .order_by(Review.created_at.desc())
-        .all()
-    )
-    try:
-        from datetime import datetime as _dt
-        for r in reviews:
-            if not getattr(r, "created_at", None):
-                r.created_at = getattr(r, "updated_at", None) or _dt.utcnow()
-            if not getattr(r, "updated_at", None):
-                r.updated_at = r.created_at
-        db.commit()
-    except Exception:
-        pass
-    for r in reviews:
-        try:
-            booking = getattr(r, "booking", None)
-            client = getattr(booking, "client", None) if booking is not None else None
-            if client is None:
-                continue
-            setattr(r, "client", client)
-            try:
-                setattr(r, "client_id", int(getattr(client, "id")))
-            except Exception:
-                pass
-            first_name = getattr(client, "first_name", None)
-            last_name = getattr(client, "last_name", None)
-            setattr(r, "client_first_name", first_name)
-            setattr(r, "client_last_name", last_name)
-            display = f"{first_name or ''} {last_name or ''}".strip()
-            setattr(r, "client_display_name", display or None)
-            try:
-                loc = getattr(booking, "event_city", None)
-                if loc:
-                    setattr(r, "client_location", loc)
-            except Exception:
-                pass
-        except Exception:
-            continue
 
-    return {
-        "provider": artist,
-        "services": services,
-        "reviews": reviews,
-    }
+def _artist_id_for_slug(slug: str, db: Session) -> int:
+    cleaned = slugify_name(slug)
+    if not cleaned:
+        raise HTTPException(status_code=404, detail="Artist profile not found.")
+    row = db.query(Artist.user_id).filter(func.lower(Artist.slug) == cleaned).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Artist profile not found.")
+    return int(row[0])
 
 
 def _validate_portfolio_urls(urls: List[str]) -> List[str]:
@@ -1719,16 +1596,56 @@ def _validate_portfolio_urls(urls: List[str]) -> List[str]:
     return cleaned
 
 
+MAX_BULK_AVAILABILITY_IDS = 100
+MAX_BULK_AVAILABILITY_DAYS = 366
+
+
+@router.get(
+    "/availability",
+    summary="Unavailable dates for several providers",
+)
+def read_bulk_availability(
+    ids: str = Query(..., description="Comma-separated provider ids (max 100)"),
+    start: Optional[date] = Query(None, description="First day (default: today)"),
+    end: Optional[date] = Query(None, description="Day after the last (default: start + 30 days)"),
+    db: Session = Depends(get_db),
+):
+    """Return ``{"availability": {id: [unavailable ISO dates]}}`` in one pass.
+
+    Bookings, requests and synced calendar days for all providers come from
+    one grouped query.
+    """
+    if isinstance(start, QueryParam):
+        start = start.default
+    if isinstance(end, QueryParam):
+        end = end.default
+    try:
+        artist_ids = sorted({int(p) for p in str(ids).split(",") if p.strip()})
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    if not artist_ids or len(artist_ids) > MAX_BULK_AVAILABILITY_IDS:
+        raise HTTPException(status_code=422, detail=f"Provide 1-{MAX_BULK_AVAILABILITY_IDS} ids")
+    start = start or datetime.utcnow().date()
+    end = end or start + timedelta(days=30)
+    if end <= start or (end - start).days > MAX_BULK_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=422, detail=f"Range must be 1-{MAX_BULK_AVAILABILITY_DAYS} days")
+    busy = bulk_busy_days(db, artist_ids, start, end)
+    return {
+        "availability": {
+            str(artist_id): sorted(d.isoformat() for d in busy.get(artist_id, ()))
+            for artist_id in artist_ids
+        }
+    }
+
+
 @router.get(
     "/{artist_id}",
     response_model=ArtistProfileResponse,
     response_model_exclude_none=True,
 )
-def read_artist_profile_by_id(artist_id: int, db: Session = Depends(get_db)):
-    artist = db.query(Artist).filter(Artist.user_id == artist_id).first()
-    if not artist:
-        raise HTTPException(status_code=404, detail="Artist profile not found.")
-    return _hydrate_artist_profile(artist, db)
+@single_flight_scope
+def read_artist_profile_by_id(artist_id: int, request: Request = None, db: Session = Depends(get_db)):
+    return _profile_response(db, artist_id, "profile", request)
 
 
 @router.get(
@@ -1737,11 +1654,13 @@ def read_artist_profile_by_id(artist_id: int, db: Session = Depends(get_db)):
     response_model_exclude_none=True,
     summary="Get provider profile, services, and reviews by id",
 )
-def read_artist_profile_full_by_id(artist_id: int, db: Session = Depends(get_db)):
-    artist = db.query(Artist).filter(Artist.user_id == artist_id).first()
-    if not artist:
-        raise HTTPException(status_code=404, detail="Artist profile not found.")
-    return _build_full_profile_payload(artist, db)
+@single_flight_scope
+def read_artist_profile_full_by_id(artist_id: int, request: Request = None, db: Session = Depends(get_db)):
+    """Profile, listed services and the newest reviews.
+
+    Older reviews come from the reviews endpoint via ``reviews_next_cursor``.
+    """
+    return _profile_response(db, artist_id, "full", request)
 
 
 @router.get(
@@ -1750,16 +1669,9 @@ def read_artist_profile_full_by_id(artist_id: int, db: Session = Depends(get_db)
     response_model_exclude_none=True,
     summary="Get artist profile by slug",
 )
-def read_artist_profile_by_slug(slug: str, db: Session = Depends(get_db)):
-    cleaned = slugify_name(slug)
-    if not cleaned:
-        raise HTTPException(status_code=404, detail="Artist profile not found.")
-
-    artist = db.query(Artist).filter(func.lower(Artist.slug) == cleaned).first()
-    if not artist:
-        raise HTTPException(status_code=404, detail="Artist profile not found.")
-
-    return _hydrate_artist_profile(artist, db)
+@single_flight_scope
+def read_artist_profile_by_slug(slug: str, request: Request = None, db: Session = Depends(get_db)):
+    return _profile_response(db, _artist_id_for_slug(slug, db), "profile", request)
 
 
 @router.get(
@@ -1768,16 +1680,9 @@ def read_artist_profile_by_slug(slug: str, db: Session = Depends(get_db)):
     response_model_exclude_none=True,
     summary="Get provider profile, services, and reviews by slug",
 )
-def read_artist_profile_full_by_slug(slug: str, db: Session = Depends(get_db)):
-    cleaned = slugify_name(slug)
-    if not cleaned:
-        raise HTTPException(status_code=404, detail="Artist profile not found.")
-
-    artist = db.query(Artist).filter(func.lower(Artist.slug) == cleaned).first()
-    if not artist:
-        raise HTTPException(status_code=404, detail="Artist profile not found.")
-
-    return _build_full_profile_payload(artist, db)
+@single_flight_scope
+def read_artist_profile_full_by_slug(slug: str, request: Request = None, db: Session = Depends(get_db)):
+    return _profile_response(db, _artist_id_for_slug(slug, db), "full", request)
 
 
 @router.get(
@@ -1785,6 +1690,7 @@ def read_artist_profile_full_by_slug(slug: str, db: Session = Depends(get_db)):
     response_model=ArtistAvailabilityResponse,
     response_model_exclude_none=True,
 )
+@single_flight_scope
 def read_artist_availability(
     artist_id: int,
     when: Optional[date] = Query(None),
@@ -1801,10 +1707,25 @@ def read_artist_availability(
     if isinstance(when, QueryParam):
         when = when.default
 
-    cached = get_cached_availability(artist_id, when)
+    cached = get_cached_availability(
+        artist_id, when, refresh=lambda: _refresh_artist_availability(artist_id, when)
+    )
     if cached:
         return cached
 
+    result = _compute_artist_availability(artist_id, when, db)
+    cache_availability(result, artist_id, when)
+    return result
+
+
+def _refresh_artist_availability(artist_id: int, when: Optional[date]) -> None:
+    """Recompute and store availability on a fresh session (background refresh)."""
+    with get_db_session() as db:
+        result = _compute_artist_availability(artist_id, when, db)
+    cache_availability(result, artist_id, when)
+
+
+def _compute_artist_availability(artist_id: int, when: Optional[date], db: Session) -> dict:
     # Best-effort DB lookups; fall back to empty lists on error so the
     # endpoint never fails hard during booking flows.
     bookings = []
@@ -1859,24 +1780,18 @@ def read_artist_availability(
         if r.proposed_datetime_2:
             dates.add(r.proposed_datetime_2.date().isoformat())
 
-    if when:
-        start = datetime.combine(when, datetime.min.time())
-        end = start + timedelta(days=1)
-    else:
-        start = datetime.utcnow()
-        end = start + timedelta(days=365)
+    # Calendar events come from the locally synced calendar_busy_days table
+    # (app.services.calendar_sync), never from a live Google call.
     try:
-        for ev in calendar_service.fetch_events(artist_id, start, end, db):
-            try:
-                dates.add(ev.date().isoformat())
-            except Exception:
-                continue
+        busy_query = db.query(CalendarBusyDay.day).filter(CalendarBusyDay.user_id == artist_id)
+        if when:
+            busy_query = busy_query.filter(CalendarBusyDay.day == when)
+        for (day,) in busy_query.all():
+            if day:
+                dates.add(day.isoformat())
     except Exception:
-        # Calendar sync issues should not break booking flows.
-        logger.exception("Failed to fetch calendar events for availability (artist_id=%s)", artist_id)
-    result = {"unavailable_dates": sorted(dates)}
-    cache_availability(result, artist_id, when)
-    return result
+        logger.exception("Failed to load calendar busy days for availability (artist_id=%s)", artist_id)
+    return {"unavailable_dates": sorted(dates)}
 
 
 # (Removed duplicate "/" list route to avoid undefined behavior and cache fragmentation)
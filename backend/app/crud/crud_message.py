@@ -6,6 +6,8 @@ from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func, or_, and_
 
 from .. import models, schemas
+from ..realtime.inbox_events import note_inbox_dirty
+from ..services import thread_state
 
 
 logger = logging.getLogger(__name__)
@@ -319,6 +321,10 @@ def mark_messages_read(db: Session, booking_request_id: int, user_id: int) -> in
         )
         .update({"is_read": True}, synchronize_session="fetch")
     )
+    if updated:
+        # Bulk UPDATE bypasses the flush listener; signal the reader explicitly.
+        note_inbox_dirty(db, [user_id])
+    thread_state.mark_thread_read(db, booking_request_id, user_id, int(updated))
     db.commit()
     return int(updated)
 
@@ -384,86 +390,21 @@ def get_unread_counts_for_user_threads(
     user_id: int,
     thread_ids: Optional[List[int]] = None,
 ) -> Dict[int, int]:
-    """Compute unread counts per thread based on messages table.
+    """Return unread counts per thread for the user (threads with none are omitted).
 
-    Unread = messages in a thread where:
-      - the booking request involves the user (as artist or client)
-      - the message sender is NOT the user
-      - the message is not read (is_read is False or NULL)
-
-    Optionally limit to a subset of ``thread_ids`` to reduce workload.
+    Unread = messages in a thread the user participates in (as artist or
+    client) that someone else sent, that are not read and not tombstones.
+    Read from ``thread_participant_state``; optionally limited to ``thread_ids``.
     """
-    from .. import models
-
-    query = (
-        db.query(models.Message.booking_request_id, func.count(models.Message.id))
-        .join(
-            models.BookingRequest,
-            models.BookingRequest.id == models.Message.booking_request_id,
-        )
-        .filter(
-            or_(
-                models.BookingRequest.client_id == user_id,
-                models.BookingRequest.artist_id == user_id,
-            )
-        )
-        .filter(models.Message.sender_id != user_id)
-        .filter(or_(models.Message.is_read.is_(False), models.Message.is_read.is_(None)))
-        # Tombstone rows should not contribute to unread counts.
-        .filter(
-            or_(
-                models.Message.system_key.is_(None),
-                models.Message.system_key != DELETED_SYSTEM_KEY,
-            )
-        )
-    )
-    if thread_ids:
-        query = query.filter(models.Message.booking_request_id.in_(thread_ids))
-
-    rows = query.group_by(models.Message.booking_request_id).all()
-    out: Dict[int, int] = {}
-    for bid, cnt in rows:
-        try:
-            out[int(bid)] = int(cnt or 0)
-        except Exception:
-            continue
-    return out
+    return thread_state.unread_counts(db, user_id, thread_ids)
 
 
 def get_unread_message_totals_for_user(
     db: Session, user_id: int
 ) -> Tuple[int, datetime | None]:
-    """Return total unread messages and the latest unread timestamp for the user.
+    """Return total unread messages and the latest activity among unread threads.
 
-    This aggregates across all threads the user participates in and only
-    considers messages sent by the other party.
+    This aggregates the user's ``thread_participant_state`` rows, one per
+    thread they participate in.
     """
-    from .. import models
-
-    count, latest_ts = (
-        db.query(
-            func.count(models.Message.id),
-            func.max(models.Message.timestamp),
-        )
-        .join(
-            models.BookingRequest,
-            models.BookingRequest.id == models.Message.booking_request_id,
-        )
-        .filter(
-            or_(
-                models.BookingRequest.client_id == user_id,
-                models.BookingRequest.artist_id == user_id,
-            )
-        )
-        .filter(models.Message.sender_id != user_id)
-        .filter(or_(models.Message.is_read.is_(False), models.Message.is_read.is_(None)))
-        # Exclude tombstone rows from aggregate unread totals.
-        .filter(
-            or_(
-                models.Message.system_key.is_(None),
-                models.Message.system_key != DELETED_SYSTEM_KEY,
-            )
-        )
-        .one()
-    )
-    return int(count or 0), latest_ts
+    return thread_state.unread_totals(db, user_id)
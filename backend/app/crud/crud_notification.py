@@ -1,14 +1,39 @@
 from collections import defaultdict
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Dict, List, Iterable, Tuple
-import re
+from sqlalchemy import and_, case, delete, func, or_, select, text
+from typing import Dict, List, Tuple
+import logging
+import os
 
 from ..utils.messages import BOOKING_DETAILS_PREFIX, parse_booking_details
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from .. import models
+from ..models.notification import thread_id_from_link
+
+logger = logging.getLogger(__name__)
+
+try:
+    THREAD_NOTIFICATIONS_LIMIT = max(1, int(os.getenv("THREAD_NOTIFICATIONS_LIMIT") or 100))
+except Exception:
+    THREAD_NOTIFICATIONS_LIMIT = 100
+try:
+    # Read notifications older than this are deleted by the retention job
+    NOTIFICATION_RETENTION_DAYS = max(1, int(os.getenv("NOTIFICATION_RETENTION_DAYS") or 90))
+except Exception:
+    NOTIFICATION_RETENTION_DAYS = 90
+
+# Stable link for Booka moderation updates; it carries no numeric thread id.
+BOOKA_ALIAS_LINK = "/inbox?booka=1"
+# Latest listing-moderation thread of the notified provider (correlated on
+# ``notifications.user_id``); used to resolve legacy alias rows.
+_BOOKA_THREAD_SQL = (
+    "SELECT m.booking_request_id FROM messages m"
+    " JOIN booking_requests br ON br.id = m.booking_request_id"
+    " WHERE br.artist_id = notifications.user_id AND m.system_key LIKE 'listing_%'"
+    " ORDER BY m.timestamp DESC LIMIT 1"
+)
 
 
 def create_notification(
@@ -17,8 +42,20 @@ def create_notification(
     type: models.NotificationType,
     message: str,
     link: str,
+    booking_request_id: int | None = None,
 ) -> models.Notification:
-    db_obj = models.Notification(user_id=user_id, type=type, message=message, link=link)
+    """Persist a notification.
+
+    ``booking_request_id`` defaults to the thread id found in ``link``; pass
+    it explicitly for links that do not carry one (the Booka alias).
+    """
+    db_obj = models.Notification(
+        user_id=user_id,
+        type=type,
+        message=message,
+        link=link,
+        booking_request_id=booking_request_id,
+    )
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
@@ -69,119 +106,101 @@ def mark_as_read(
     return db_notification
 
 
-def get_message_thread_notifications(db: Session, user_id: int) -> List[dict]:
+def get_message_thread_notifications(
+    db: Session, user_id: int, limit: int = THREAD_NOTIFICATIONS_LIMIT
+) -> List[dict]:
     """Return aggregated message notifications grouped by booking_request.
 
     Threads are returned even if all messages have been read; ``unread_count``
-    simply becomes ``0`` when no unread notifications remain.
+    simply becomes ``0`` when no unread notifications remain. Only the
+    ``limit`` most recently active threads are returned.
     """
-    notifs = (
-        db.query(models.Notification)
+    N = models.Notification
+    groups = (
+        db.query(
+            N.booking_request_id,
+            func.sum(case((N.is_read.is_(False), 1), else_=0)),
+            func.max(N.id),
+        )
         .filter(
-            models.Notification.user_id == user_id,
-            models.Notification.type == models.NotificationType.NEW_MESSAGE,
+            N.user_id == user_id,
+            N.type == models.NotificationType.NEW_MESSAGE,
+            N.booking_request_id.isnot(None),
         )
-        .order_by(models.Notification.timestamp.desc())
+        .group_by(N.booking_request_id)
+        .order_by(func.max(N.timestamp).desc())
+        .limit(limit)
         .all()
     )
+    if not groups:
+        return []
+
+    request_ids = [int(rid) for rid, _, _ in groups]
+    latest = {
+        int(n.id): n
+        for n in db.query(N).filter(N.id.in_([int(last_id) for _, _, last_id in groups])).all()
+    }
+    requests = {
+        int(br.id): br
+        for br in db.query(models.BookingRequest)
+        .filter(models.BookingRequest.id.in_(request_ids))
+        .all()
+    }
+    other_ids = {
+        int(br.client_id if br.artist_id == user_id else br.artist_id)
+        for br in requests.values()
+    }
+    users = {
+        int(u.id): u
+        for u in db.query(models.User).filter(models.User.id.in_(other_ids)).all()
+    } if other_ids else {}
+    provider_ids = [
+        uid for uid, u in users.items() if u.user_type == models.UserType.SERVICE_PROVIDER
+    ]
+    profiles = {
+        int(p.user_id): p
+        for p in db.query(models.ServiceProviderProfile)
+        .filter(models.ServiceProviderProfile.user_id.in_(provider_ids))
+        .all()
+    } if provider_ids else {}
 
     threads: Dict[int, dict] = {}
-    for n in notifs:
-        match = re.search(r"(?:/booking-requests/|/inbox\?requestId=)(\d+)", n.link)
-        request_id: int | None = int(match.group(1)) if match else None
-        # Support stable Booka alias links without numeric id
-        if request_id is None and "/inbox?booka=1" in (n.link or ""):
-            # Resolve the most recent Booka moderation thread for this user (artist)
-            try:
-                # Find the latest moderation message for any of the user's threads
-                latest = (
-                    db.query(models.Message)
-                    .join(models.BookingRequest, models.BookingRequest.id == models.Message.booking_request_id)
-                    .filter(
-                        models.BookingRequest.artist_id == user_id,
-                        models.Message.message_type == models.MessageType.SYSTEM,
-                        models.Message.system_key.ilike("listing_%"),
-                    )
-                    .order_by(models.Message.timestamp.desc())
-                    .first()
-                )
-                if latest:
-                    request_id = int(latest.booking_request_id)
-            except Exception:
-                request_id = None
-        if request_id is None:
+    for request_id, unread, last_id in groups:
+        request_id = int(request_id)
+        br = requests.get(request_id)
+        n = latest.get(int(last_id))
+        if br is None or n is None:
             continue
-
-        thread = threads.get(request_id)
-        if thread is None:
-            br = (
-                db.query(models.BookingRequest)
-                .filter(models.BookingRequest.id == request_id)
-                .first()
-            )
-            if br is None:
-                continue
-            other_id = br.client_id if br.artist_id == user_id else br.artist_id
-            other = db.query(models.User).filter(models.User.id == other_id).first()
-            name = "Unknown"
-            avatar_url = None
-            if other:
-                name = f"{other.first_name} {other.last_name}"
-                if other.user_type == models.UserType.SERVICE_PROVIDER:
-                    profile = (
-                        db.query(models.ServiceProviderProfile)
-                        .filter(models.ServiceProviderProfile.user_id == other.id)
-                        .first()
-                    )
-                    if profile:
-                        if profile.business_name:
-                            name = profile.business_name
-                        if profile.profile_picture_url:
-                            avatar_url = profile.profile_picture_url
-                elif other.profile_picture_url:
-                    avatar_url = other.profile_picture_url
-            threads[request_id] = {
-                "booking_request_id": request_id,
-                "name": name,
-                "unread_count": 0 if n.is_read else 1,
-                "last_message": n.message,
-                "link": n.link,
-                "timestamp": n.timestamp,
-                "avatar_url": avatar_url,
-                "booking_details": None,
-            }
-            thread = threads[request_id]
-        else:
-            if not n.is_read:
-                thread["unread_count"] += 1
-            if n.timestamp > thread["timestamp"]:
-                thread["last_message"] = n.message
-                thread["timestamp"] = n.timestamp
-
-        if thread.get("booking_details") is None:
-            details_msg = (
-                db.query(models.Message)
-                .filter(
-                    models.Message.booking_request_id == request_id,
-                    models.Message.message_type == models.MessageType.SYSTEM,
-                    models.Message.content.startswith(BOOKING_DETAILS_PREFIX),
-                )
-                .order_by(models.Message.timestamp.asc())
-                .first()
-            )
-            if details_msg:
-                thread["booking_details"] = {
-                    "timestamp": details_msg.timestamp,
-                    **parse_booking_details(details_msg.content),
-                }
+        other = users.get(int(br.client_id if br.artist_id == user_id else br.artist_id))
+        name = "Unknown"
+        avatar_url = None
+        if other:
+            name = f"{other.first_name} {other.last_name}"
+            profile = profiles.get(int(other.id))
+            if profile:
+                if profile.business_name:
+                    name = profile.business_name
+                if profile.profile_picture_url:
+                    avatar_url = profile.profile_picture_url
+            elif other.user_type != models.UserType.SERVICE_PROVIDER and other.profile_picture_url:
+                avatar_url = other.profile_picture_url
+        threads[request_id] = {
+            "booking_request_id": request_id,
+            "name": name,
+            "unread_count": int(unread or 0),
+            "last_message": n.message,
+            "link": n.link,
+            "timestamp": n.timestamp,
+            "avatar_url": avatar_url,
+            "booking_details": None,
+        }
 
     # Batch fetch the earliest booking-details system message for all threads
     if threads:
-        request_ids = list(threads.keys())
         details = (
             db.query(models.Message)
             .filter(
-                models.Message.booking_request_id.in_(request_ids),
+                models.Message.booking_request_id.in_(list(threads.keys())),
                 models.Message.message_type == models.MessageType.SYSTEM,
                 models.Message.content.startswith(BOOKING_DETAILS_PREFIX),
             )
@@ -206,60 +225,40 @@ def get_message_thread_notifications(db: Session, user_id: int) -> List[dict]:
 
 def get_unread_counts_for_threads(db: Session, user_id: int) -> Dict[int, int]:
     """Return a lightweight map of unread message counts per booking request."""
+    N = models.Notification
     rows = (
-        db.query(models.Notification.link, models.Notification.is_read)
+        db.query(N.booking_request_id, func.sum(case((N.is_read.is_(False), 1), else_=0)))
         .filter(
-            models.Notification.user_id == user_id,
-            models.Notification.type == models.NotificationType.NEW_MESSAGE,
+            N.user_id == user_id,
+            N.type == models.NotificationType.NEW_MESSAGE,
+            N.booking_request_id.isnot(None),
         )
-        .order_by(models.Notification.timestamp.desc())
+        .group_by(N.booking_request_id)
         .all()
     )
-
-    counts: Dict[int, int] = {}
-    for link, is_read in rows:
-        if not link:
-            continue
-        match = re.search(r"(?:/booking-requests/|/inbox\?requestId=)(\d+)", link)
-        if not match:
-            continue
-        request_id = int(match.group(1))
-        if not is_read:
-            counts[request_id] = counts.get(request_id, 0) + 1
-        else:
-            counts.setdefault(request_id, 0)
-
-    return counts
+    return {int(request_id): int(unread or 0) for request_id, unread in rows}
 
 
 def mark_thread_read(db: Session, user_id: int, booking_request_id: int) -> None:
     """Mark all message notifications for the given thread as read.
 
-    Be tolerant of absolute URLs saved historically. Match notifications where
-    the link either equals or contains the expected relative patterns.
+    Legacy Booka alias rows whose thread could not be resolved are cleared
+    with any thread, as before.
     """
-    from sqlalchemy import or_
-
-    patterns = [
-        models.Notification.link == f"/booking-requests/{booking_request_id}",
-        models.Notification.link.like(f"%%/booking-requests/{booking_request_id}"),
-        models.Notification.link == f"/inbox?requestId={booking_request_id}",
-        models.Notification.link.like(f"%%requestId={booking_request_id}%%"),
-        # Booka moderation alias (no numeric id)
-        models.Notification.link == "/inbox?booka=1",
-    ]
-    notifs: Iterable[models.Notification] = (
-        db.query(models.Notification)
+    N = models.Notification
+    (
+        db.query(N)
         .filter(
-            models.Notification.user_id == user_id,
-            models.Notification.type == models.NotificationType.NEW_MESSAGE,
-            or_(*patterns),
-            models.Notification.is_read.is_(False),
+            N.user_id == user_id,
+            N.type == models.NotificationType.NEW_MESSAGE,
+            N.is_read.is_(False),
+            or_(
+                N.booking_request_id == booking_request_id,
+                and_(N.booking_request_id.is_(None), N.link == BOOKA_ALIAS_LINK),
+            ),
         )
-        .all()
+        .update({"is_read": True}, synchronize_session="fetch")
     )
-    for n in notifs:
-        n.is_read = True
     db.commit()
 
 
@@ -298,3 +297,81 @@ def mark_all_read(db: Session, user_id: int) -> int:
     )
     db.commit()
     return int(updated)
+
+
+
+def purge_read_notifications(
+    db: Session,
+    now: datetime | None = None,
+    retention_days: int = NOTIFICATION_RETENTION_DAYS,
+    chunk: int = 5000,
+) -> int:
+    """Delete read notifications older than ``retention_days``.
+
+    Deletes in chunks so no single statement holds locks on a large range.
+    Unread notifications are kept regardless of age.
+    """
+    N = models.Notification
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    total = 0
+    while True:
+        ids = select(N.id).where(N.is_read.is_(True), N.timestamp < cutoff).limit(chunk)
+        res = db.execute(delete(N).where(N.id.in_(ids)).execution_options(synchronize_session=False))
+        db.commit()
+        n = int(res.rowcount or 0)
+        total += n
+        if n < chunk:
+            return total
+
+
+def purge_read_notifications_job() -> dict:
+    """Scheduler job: notification retention."""
+    from ..database import SessionLocal
+
+    with SessionLocal() as db:
+        return {"notifications_purged": purge_read_notifications(db)}
+
+
+def backfill_notification_threads(db: Session, chunk: int = 2000) -> int:
+    """Fill ``booking_request_id`` on notifications created before the column.
+
+    Numeric links are parsed; Booka alias links resolve to the user's latest
+    listing-moderation thread. Returns the number of rows updated. Run once
+    by migration ``20261017_add_notification_thread_id``.
+    """
+    N = models.Notification
+    updated = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(N.id, N.link)
+            .filter(N.id > last_id, N.booking_request_id.is_(None))
+            .filter(or_(N.link.like("%/booking-requests/%"), N.link.like("%requestId=%")))
+            .order_by(N.id.asc())
+            .limit(chunk)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = int(rows[-1][0])
+        values = [
+            {"nid": int(nid), "rid": rid}
+            for nid, link in rows
+            if (rid := thread_id_from_link(link)) is not None
+        ]
+        if values:
+            db.execute(
+                text("UPDATE notifications SET booking_request_id = :rid WHERE id = :nid"),
+                values,
+            )
+            updated += len(values)
+        db.commit()
+    res = db.execute(
+        text(
+            f"UPDATE notifications SET booking_request_id = ({_BOOKA_THREAD_SQL})"
+            f" WHERE booking_request_id IS NULL AND link = :alias AND EXISTS ({_BOOKA_THREAD_SQL})"
+        ),
+        {"alias": BOOKA_ALIAS_LINK},
+    )
+    db.commit()
+    return updated + int(res.rowcount or 0)
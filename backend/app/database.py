@@ -1,11 +1,14 @@
 from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+import asyncio
 import os
 import time
 import random
 import logging
+import weakref
 from collections import deque
 from contextlib import contextmanager
 
@@ -194,3 +197,54 @@ def get_db_session():
             db.close()
         except Exception:
             pass
+
+
+# ─── Offloading blocking DB work from async routes ───────────────────────────
+# Sessions and the engine are synchronous. ``async def`` routes must not run
+# queries inline: a slow statement would freeze every WebSocket/SSE stream on
+# the worker (see ``health.loop_lag``). ``run_db`` runs the blocking part in
+# the threadpool. Concurrent offloads are capped at the pool capacity so
+# excess callers queue on the loop instead of parking threadpool workers on
+# a pool checkout.
+try:
+    DB_OFFLOAD_CONCURRENCY = int(os.getenv("DB_OFFLOAD_CONCURRENCY") or 0)
+except Exception:
+    DB_OFFLOAD_CONCURRENCY = 0
+if DB_OFFLOAD_CONCURRENCY <= 0:
+    DB_OFFLOAD_CONCURRENCY = 8 if is_sqlite else int(pool_kwargs.get("pool_size", 6)) + int(pool_kwargs.get("max_overflow", 6))
+
+_OFFLOAD_SEMS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _offload_sem() -> asyncio.Semaphore:
+    # One semaphore per loop: tests and the back-compat sync wrappers run
+    # handlers on short-lived loops.
+    loop = asyncio.get_running_loop()
+    sem = _OFFLOAD_SEMS.get(loop)
+    if sem is None:
+        sem = _OFFLOAD_SEMS[loop] = asyncio.Semaphore(DB_OFFLOAD_CONCURRENCY)
+    return sem
+
+
+async def run_db(fn, /, *args, **kwargs):
+    """Run blocking SQLAlchemy work ``fn(*args, **kwargs)`` off the event loop.
+
+    Pass the request's session in ``args`` as usual; it is only touched by one
+    thread at a time because the route awaits the result.
+    """
+    async with _offload_sem():
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+
+def release_connection(db) -> None:
+    """Return ``db``'s pooled connection before a slow non-DB wait (e.g. an LLM call).
+
+    Ends the current transaction when nothing is pending; the session stays
+    usable and checks a connection out again on its next query. Sessions with
+    unflushed changes are left untouched.
+    """
+    try:
+        if db.in_transaction() and not (db.new or db.dirty or db.deleted):
+            db.commit()
+    except Exception:
+        pass
@@ -4,6 +4,7 @@ from sqlalchemy.engine import Engine
 from sqlalchemy import Table, MetaData, Column, String as SAString, Integer as SAInteger
 
 from app.utils.slug import slugify_name, generate_unique_slug
+from app.utils.geohash import encode_optional
 
 
 def add_column_if_missing(engine: Engine, table: str, column: str, ddl: str) -> None:
@@ -345,6 +346,13 @@ def ensure_payout_tables(engine: Engine) -> None:
     add_column_if_missing(engine, "payouts", "method", "method VARCHAR")
     add_column_if_missing(engine, "payouts", "reference", "reference VARCHAR")
     add_column_if_missing(engine, "payouts", "meta", "meta JSON")
+    # Admin payouts list pages by (created_at, id) keyset
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_payouts_created_at_id ON payouts(created_at, id)"))
+            conn.commit()
+    except Exception:
+        pass
 
 
 def ensure_dispute_table(engine: Engine) -> None:
@@ -651,6 +659,8 @@ def ensure_notification_core_indexes(engine: Engine) -> None:
     Adds the following when missing:
     - idx_notifications_user_ts(user_id, timestamp)
     - idx_notifications_user_type_unread_ts(user_id, type, is_read, timestamp)
+    - ix_notifications_user_type_thread(user_id, type, booking_request_id)
+    - ix_notifications_read_ts(is_read, timestamp)
     """
     try:
         inspector = inspect(engine)
@@ -667,6 +677,11 @@ def ensure_notification_core_indexes(engine: Engine) -> None:
                     conn.execute(text("CREATE INDEX IF NOT EXISTS idx_notifications_user_ts ON notifications(user_id, timestamp)"))
                 if "idx_notifications_user_type_unread_ts" not in existing:
                     conn.execute(text("CREATE INDEX IF NOT EXISTS idx_notifications_user_type_unread_ts ON notifications(user_id, type, is_read, timestamp)"))
+                columns = {c["name"] for c in inspector.get_columns("notifications")}
+                if "ix_notifications_user_type_thread" not in existing and "booking_request_id" in columns:
+                    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_notifications_user_type_thread ON notifications(user_id, type, booking_request_id)"))
+                if "ix_notifications_read_ts" not in existing:
+                    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_notifications_read_ts ON notifications(is_read, timestamp)"))
                 conn.commit()
             except Exception:
                 conn.rollback()
@@ -1137,6 +1152,24 @@ def ensure_notification_link_column(engine: Engine) -> None:
     )
 
 
+def ensure_notification_thread_column(engine: Engine) -> None:
+    """Add the ``booking_request_id`` column to ``notifications`` if it's missing."""
+
+    add_column_if_missing(
+        engine,
+        "notifications",
+        "booking_request_id",
+        "booking_request_id INTEGER",
+    )
+
+
+def ensure_provider_search_columns(engine: Engine) -> None:
+    """Add the search text columns to ``provider_search_stats`` if missing."""
+
+    add_column_if_missing(engine, "provider_search_stats", "search_name", "search_name TEXT")
+    add_column_if_missing(engine, "provider_search_stats", "search_document", "search_document TEXT")
+
+
 def ensure_custom_subtitle_column(engine: Engine) -> None:
     """Add the ``custom_subtitle`` column to service provider profiles if missing."""
 
@@ -1410,6 +1443,22 @@ def ensure_calendar_account_email_column(engine: Engine) -> None:
     )
 
 
+def ensure_calendar_sync_columns(engine: Engine) -> None:
+    """Add background calendar sync state columns to ``calendar_accounts``."""
+
+    add_column_if_missing(engine, "calendar_accounts", "sync_token", "sync_token TEXT")
+    add_column_if_missing(engine, "calendar_accounts", "next_sync_at", "next_sync_at DATETIME")
+    add_column_if_missing(
+        engine,
+        "calendar_accounts",
+        "sync_failures",
+        "sync_failures INTEGER NOT NULL DEFAULT 0",
+    )
+    add_column_if_missing(engine, "calendar_accounts", "channel_id", "channel_id VARCHAR")
+    add_column_if_missing(engine, "calendar_accounts", "channel_resource_id", "channel_resource_id VARCHAR")
+    add_column_if_missing(engine, "calendar_accounts", "channel_expires_at", "channel_expires_at DATETIME")
+
+
 def ensure_user_profile_picture_column(engine: Engine) -> None:
     """Add the ``profile_picture_url`` column to ``users`` if it's missing."""
 
@@ -1697,6 +1746,44 @@ def backfill_service_provider_slugs(engine: Engine) -> None:
         # Best-effort: never block startup if backfill fails.
         pass
 
+def ensure_service_provider_geohash_column(engine: Engine) -> None:
+    """Ensure ``location_geohash`` exists, is indexed and is filled in.
+
+    Proximity search range-scans this column, so rows that already have
+    coordinates are backfilled here. Safe to run repeatedly.
+    """
+    add_column_if_missing(
+        engine,
+        "service_provider_profiles",
+        "location_geohash",
+        "location_geohash VARCHAR(12)",
+    )
+    try:
+        inspector = inspect(engine)
+        if "service_provider_profiles" not in inspector.get_table_names():
+            return
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_service_provider_profiles_location_geohash "
+                    "ON service_provider_profiles(location_geohash)"
+                )
+            )
+            rows = conn.execute(
+                text(
+                    "SELECT user_id, location_lat, location_lng FROM service_provider_profiles "
+                    "WHERE location_geohash IS NULL AND location_lat IS NOT NULL AND location_lng IS NOT NULL"
+                )
+            ).fetchall()
+            for user_id, lat, lng in rows:
+                conn.execute(
+                    text("UPDATE service_provider_profiles SET location_geohash = :g WHERE user_id = :uid"),
+                    {"g": encode_optional(lat, lng), "uid": int(user_id)},
+                )
+    except Exception:
+        # Best-effort: "closest" falls back to text matching without hashes.
+        pass
+
 def ensure_service_provider_vat_columns(engine: Engine) -> None:
     """Ensure VAT/legal/agent invoicing columns exist on service_provider_profiles.
 
@@ -73,9 +73,9 @@ from .api.v1 import api_service_provider as api_service_provider_profiles
 from .core.config import settings, FRONTEND_ORIGINS
 from .core.observability import setup_logging, setup_tracer
 from .crud import crud_quote
+from .crud.crud_notification import purge_read_notifications_job
 from .database import Base, SessionLocal, engine
 from sqlalchemy import text
-from sqlalchemy.exc import OperationalError
 from .db_utils import (
     ensure_attachment_url_column,
     ensure_attachment_meta_column,
@@ -86,6 +86,7 @@ from .db_utils import (
     remove_deposit_columns_from_booking_simple,
     ensure_booking_artist_deadline_column,
     ensure_calendar_account_email_column,
+    ensure_calendar_sync_columns,
     ensure_currency_column,
     ensure_custom_subtitle_column,
     ensure_display_order_column,
@@ -103,6 +104,8 @@ from .db_utils import (
     ensure_mfa_columns,
     ensure_refresh_token_columns,
     ensure_notification_link_column,
+    ensure_notification_thread_column,
+    ensure_provider_search_columns,
     ensure_portfolio_image_urls_column,
     ensure_price_visible_column,
     ensure_request_attachment_column,
@@ -131,6 +134,7 @@ from .db_utils import (
     ensure_service_provider_slug_column,
     backfill_service_provider_slugs,
     ensure_service_provider_slug_index,
+    ensure_service_provider_geohash_column,
     ensure_service_provider_vat_columns,
     ensure_invoice_agent_columns,
     ensure_invoice_booking_type_unique_index,
@@ -157,17 +161,25 @@ from .models.service_category import ServiceCategory
 from .models.service_provider_profile import ServiceProviderProfile
 from .models.user import User
 from .utils.notifications import (
-    alert_scheduler_failure,
     notify_quote_expired,
     notify_quote_expiring,
 )
 from .services.ops_scheduler import run_maintenance
+from .services.job_scheduler import scheduler as job_scheduler
+from .services import job_queue
 from .services.admin_bootstrap import ensure_default_admin
 from .utils.redis_cache import close_redis_client
+from .utils.outbox import prune_outbox_job
+from .services.provider_stats import ensure_provider_search_stats, reconcile_provider_stats_job
+from .services.provider_search_index import ensure_provider_search_index
+from .services.thread_state import ensure_thread_participant_state, reconcile_thread_state_job
+from .services.calendar_sync import calendar_sync_job
+from .services import weather_service
 from .utils.status_logger import register_status_listeners
+from .utils.session_tracking import register_session_trackers
 from .api.v1.api_service_provider import read_all_service_provider_profiles
 import httpx
-from .utils.redis_cache import get_cached_artist_list
+from .utils.redis_cache import get_cached_artist_list_response
 from .api import api_search_analytics, api_ai
 
 # Configure logging before creating any loggers
@@ -310,6 +322,9 @@ except Exception as _exc:  # pragma: no cover
 
 # Register SQLAlchemy listeners that log status transitions
 register_status_listeners()
+# Session listeners for the dirty-id trackers (inbox signals, provider profile
+# cache, provider stats, thread unread counters)
+register_session_trackers()
 
 # ─── Ensure database schema is up-to-date ──────────────────────────────────
 ensure_message_type_column(engine)
@@ -339,6 +354,8 @@ ensure_timestamp_columns(engine, "services")
 ensure_timestamp_defaults(engine, "services")
 ensure_display_order_column(engine)
 ensure_notification_link_column(engine)
+ensure_notification_thread_column(engine)
+ensure_provider_search_columns(engine)
 ensure_custom_subtitle_column(engine)
 ensure_price_visible_column(engine)
 ensure_portfolio_image_urls_column(engine)
@@ -356,6 +373,7 @@ ensure_timestamp_defaults(engine, "bookings_simple")
 ensure_timestamp_columns(engine, "bookings")
 ensure_timestamp_defaults(engine, "bookings")
 ensure_calendar_account_email_column(engine)
+ensure_calendar_sync_columns(engine)
 ensure_timestamp_columns(engine, "calendar_accounts")
 ensure_timestamp_defaults(engine, "calendar_accounts")
 ensure_timestamp_columns(engine, "service_provider_profiles")
@@ -386,6 +404,7 @@ if os.getenv("SKIP_DB_BOOTSTRAP", "0").strip().lower() not in {"1", "true", "yes
     ensure_service_provider_slug_column(engine)
     backfill_service_provider_slugs(engine)
     ensure_service_provider_slug_index(engine)
+    ensure_service_provider_geohash_column(engine)
     ensure_service_provider_vat_columns(engine)
     ensure_invoice_agent_columns(engine)
     ensure_invoice_sequences_table(engine)
@@ -442,6 +461,25 @@ if os.getenv("SKIP_DB_BOOTSTRAP", "0").strip().lower() not in {"1", "true", "yes
     except Exception as _exc:
         logger.warning("EventPrep schedule columns ensure skipped: %s", _exc)
 Base.metadata.create_all(bind=engine)
+if os.getenv("SKIP_DB_BOOTSTRAP", "0").strip().lower() not in {"1", "true", "yes"}:
+    try:
+        _backfilled = ensure_provider_search_stats(engine)
+        if _backfilled:
+            logger.info("Backfilled provider_search_stats for %s providers", _backfilled)
+    except Exception as _exc:
+        logger.warning("provider_search_stats backfill skipped: %s", _exc)
+    try:
+        _backfilled = ensure_provider_search_index(engine)
+        if _backfilled:
+            logger.info("Filled provider search text for %s providers", _backfilled)
+    except Exception as _exc:
+        logger.warning("provider search index ensure skipped: %s", _exc)
+    try:
+        _backfilled = ensure_thread_participant_state(engine)
+        if _backfilled:
+            logger.info("Backfilled thread_participant_state with %s rows", _backfilled)
+    except Exception as _exc:
+        logger.warning("thread_participant_state backfill skipped: %s", _exc)
 try:
     ensure_default_admin()
 except Exception as _exc:
@@ -1097,64 +1135,35 @@ def process_quote_expiration(db):
         notify_quote_expired(db, client, q.id, q.booking_request_id)
 
 
-async def expire_quotes_loop() -> None:
-    """Periodically expire pending quotes and send notifications.
-
-    This lightweight scheduler runs once per hour to handle quote
-    expirations and reminders.
-    """
-    while True:
-        await asyncio.sleep(3600)
-        # Retry with backoff on transient DB failures
-        delay = 5
-        max_retries = 5
+def expire_quotes_job() -> None:
+    """Expire pending quotes and send reminders (hourly scheduled job)."""
+    with SessionLocal() as db:
+        process_quote_expiration(db)
 
-        def _expire_once() -> None:
-            with SessionLocal() as db:
-                process_quote_expiration(db)
 
-        for attempt in range(max_retries):
-            try:
-                await asyncio.to_thread(_expire_once)
-                break
-            except OperationalError as exc:  # pragma: no cover - transient DB outage
-                alert_scheduler_failure(exc)
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(delay)
-                    delay = min(delay * 2, 60)
-                    continue
-                else:
-                    # Give up for this cycle; try again next tick
-                    break
-            except Exception as exc:  # pragma: no cover - log and continue
-                alert_scheduler_failure(exc)
-                break
+def register_scheduled_jobs() -> None:
+    """Register periodic maintenance with the cluster-wide job scheduler.
 
-
-async def ops_maintenance_loop() -> None:
-    """Periodic operational tasks: reminders and outreach upkeep."""
-    while True:
-        # Run every 30 minutes for timely nudges/reminders without being noisy
-        await asyncio.sleep(1800)
-        delay = 5
-        max_retries = 5
-        for attempt in range(max_retries):
-            try:
-                summary = await asyncio.to_thread(run_maintenance)
-                logger.info("Maintenance summary: %s", summary)
-                break
-            except OperationalError as exc:  # pragma: no cover - transient DB outage
-                alert_scheduler_failure(exc)
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(delay)
-                    delay = min(delay * 2, 60)
-                    continue
-                else:
-                    # Give up for this cycle; try again next tick
-                    break
-            except Exception as exc:  # pragma: no cover - continue running
-                alert_scheduler_failure(exc)
-                break
+    Jobs run only on the instance holding the scheduler leader lease.
+    """
+    job_scheduler.register("expire_quotes", expire_quotes_job, interval_s=3600, jitter_s=60)
+    # Every 30 minutes for timely nudges/reminders without being noisy
+    job_scheduler.register("ops_maintenance", run_maintenance, interval_s=1800, jitter_s=60)
+    job_scheduler.register("job_queue_cleanup", job_queue.cleanup_jobs, interval_s=3600, jitter_s=60)
+    job_scheduler.register("outbox_retention", prune_outbox_job, interval_s=3600, jitter_s=60)
+    job_scheduler.register(
+        "notification_retention", purge_read_notifications_job, interval_s=21600, jitter_s=300
+    )
+    # Repairs provider_search_stats rows missed by the commit-time refresh
+    job_scheduler.register(
+        "provider_stats_reconcile", reconcile_provider_stats_job, interval_s=900, jitter_s=60
+    )
+    # Repairs unread counters that drifted (raw SQL deletes, racing first messages)
+    job_scheduler.register(
+        "thread_state_reconcile", reconcile_thread_state_job, interval_s=21600, jitter_s=300
+    )
+    # Pulls due Google Calendar accounts into calendar_busy_days
+    job_scheduler.register("calendar_sync", calendar_sync_job, interval_s=60, jitter_s=10)
 
 
 async def _wait_for_db_ready(max_wait_seconds: int = 30, interval_seconds: float = 1.0) -> None:
@@ -1195,8 +1204,12 @@ async def start_background_tasks() -> None:
         await _api_ws.ensure_ws_bus_started()
     except Exception:
         pass
-    asyncio.create_task(expire_quotes_loop())
-    asyncio.create_task(ops_maintenance_loop())
+    register_scheduled_jobs()
+    asyncio.create_task(job_scheduler.run_forever())
+    # Durable job queue (SMS/WhatsApp/email). Disable when dedicated
+    # scripts/workers/job_worker.py processes run instead.
+    if os.getenv("JOB_WORKER_EMBEDDED", "1").strip().lower() not in {"0", "false", "no"}:
+        asyncio.create_task(job_queue.worker.run_forever())
 
 
 # ─── A simple root check ─────────────────────────────────────────────────────────────
@@ -1224,6 +1237,12 @@ def shutdown_redis_client() -> None:
     close_redis_client()
 
 
+@app.on_event("shutdown")
+async def shutdown_weather_client() -> None:
+    """Close pooled upstream connections used by the travel forecast."""
+    await weather_service.close_client()
+
+
 @app.on_event("startup")
 async def warm_cache_on_startup() -> None:
     """Warm the homepage list via an internal HTTP GET so ETag/Redis are engaged.
@@ -1231,7 +1250,9 @@ async def warm_cache_on_startup() -> None:
     Best effort; if it fails, we simply skip warming.
     """
     try:
-        if get_cached_artist_list(1, limit=12) is not None:
+        if get_cached_artist_list_response(
+            1, limit=12, sort="newest", fields="id,business_name,profile_picture_url"
+        ) is not None:
             return
         url = f"http://127.0.0.1:{os.getenv('PORT','8000')}{settings.API_V1_STR}/service-provider-profiles/?limit=12&sort=newest&fields=id,business_name,profile_picture_url"
         async with httpx.AsyncClient(timeout=5.0) as client:
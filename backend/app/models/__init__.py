@@ -16,6 +16,7 @@ from .message import Message, SenderType, MessageType, VisibleTo, MessageAction
 from .message_reaction import MessageReaction
 from .notification import Notification, NotificationType
 from .calendar_account import CalendarAccount, CalendarProvider
+from .calendar_busy_day import CalendarBusyDay
 from .email_token import EmailToken
 from .invoice import Invoice, InvoiceStatus
 from .profile_view import ArtistProfileView
@@ -28,6 +29,9 @@ from .admin_user import AdminUser
 from .trusted_device import TrustedDevice
 from .dispute import Dispute
 from .video_order_idempotency import VideoOrderIdempotency
+from .background_job import BackgroundJob
+from .provider_search_stats import ProviderSearchStats
+from .thread_participant_state import ThreadParticipantState
 
 __all__ = [
     "User",
@@ -55,6 +59,7 @@ __all__ = [
     "NotificationType",
     "CalendarAccount",
     "CalendarProvider",
+    "CalendarBusyDay",
     "EmailToken",
     "Invoice",
     "InvoiceStatus",
@@ -71,4 +76,7 @@ __all__ = [
     "TrustedDevice",
     "Dispute",
     "VideoOrderIdempotency",
+    "BackgroundJob",
+    "ProviderSearchStats",
+    "ThreadParticipantState",
 ]
@@ -32,5 +32,16 @@ class CalendarAccount(BaseModel):
     last_error = Column(Text, nullable=True)
     last_error_at = Column(DateTime, nullable=True)
     last_success_sync_at = Column(DateTime, nullable=True)
+    # Background sync state (app.services.calendar_sync):
+    # - sync_token: Google's nextSyncToken for incremental event pulls.
+    # - next_sync_at: when the account is next due; NULL means "now".
+    # - sync_failures: consecutive failures, drives exponential backoff.
+    # - channel_*: push-notification channel that marks the account due.
+    sync_token = Column(Text, nullable=True)
+    next_sync_at = Column(DateTime, nullable=True, index=True)
+    sync_failures = Column(Integer, nullable=False, default=0)
+    channel_id = Column(String, nullable=True, index=True)
+    channel_resource_id = Column(String, nullable=True)
+    channel_expires_at = Column(DateTime, nullable=True)
 
     user = relationship("User", backref="calendar_accounts")
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, String
+
+from .base import BaseModel
+
+
+class CalendarBusyDay(BaseModel):
+    """Start day of one event on a provider's connected calendar.
+
+    Filled by ``app.services.calendar_sync`` (full and incremental syncs) so
+    availability reads never call the calendar provider. One row per event;
+    cancelled events are deleted on the next incremental sync.
+    """
+
+    __tablename__ = "calendar_busy_days"
+
+    account_id = Column(
+        Integer,
+        ForeignKey("calendar_accounts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    event_id = Column(String(255), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+
+    __table_args__ = (Index("ix_calendar_busy_days_user_day", "user_id", "day"),)
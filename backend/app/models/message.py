@@ -76,6 +76,8 @@ class Message(BaseModel):
             "booking_request_id",
             "id",
         ),
+        # Watermark for the incremental thread_participant_state reconcile
+        Index("ix_messages_updated_at", "updated_at"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
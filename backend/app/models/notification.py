@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
+import re
 
 from .base import BaseModel
 from .types import CaseInsensitiveEnum
@@ -16,15 +17,40 @@ class NotificationType(str, enum.Enum):
     NEW_BOOKING = "new_booking"
     REVIEW_REQUEST = "review_request"
 
+
+_THREAD_LINK_RE = re.compile(r"(?:/booking-requests/|/inbox\?requestId=)(\d+)")
+
+
+def thread_id_from_link(link: str | None) -> int | None:
+    """Return the booking request id a notification link points at, if any."""
+    match = _THREAD_LINK_RE.search(link or "")
+    return int(match.group(1)) if match else None
+
+
 class Notification(BaseModel):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Per-thread aggregates for the notification drawer
+        Index("ix_notifications_user_type_thread", "user_id", "type", "booking_request_id"),
+        # Retention sweep of old read notifications
+        Index("ix_notifications_read_ts", "is_read", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     type = Column(CaseInsensitiveEnum(NotificationType, name="notificationtype"), nullable=False)
     message = Column(String, nullable=False)
     link = Column(String, nullable=False)
+    # Thread the notification belongs to. Not a foreign key: notifications
+    # outlive purged booking requests and are read without a join.
+    booking_request_id = Column(Integer, nullable=True)
     is_read = Column(Boolean, default=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", backref="notifications")
+
+
+@event.listens_for(Notification, "before_insert")
+def _derive_booking_request_id(mapper, connection, target) -> None:
+    if target.booking_request_id is None:
+        target.booking_request_id = thread_id_from_link(target.link)
@@ -0,0 +1,48 @@
+from sqlalchemy import Boolean, Column, Float, ForeignKey, Index, Integer, Numeric, Text
+
+from .base import BaseModel
+
+
+class ProviderSearchStats(BaseModel):
+    """Denormalized per-provider ranking row read by list and search queries.
+
+    Maintained by ``app.services.provider_stats``: refreshed for the affected
+    providers after commits that touch bookings, reviews, services, profile
+    views or the names and location searched on, and swept by a periodic
+    reconcile job.
+    """
+
+    __tablename__ = "provider_search_stats"
+
+    artist_id = Column(
+        Integer,
+        ForeignKey("service_provider_profiles.user_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    book_count = Column(Integer, nullable=False, default=0)
+    rating_avg = Column(Float, nullable=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    # rating_avg with unrated providers as 0 so "top_rated" needs no NULLS LAST
+    rating_sort = Column(Float, nullable=False, default=0.0)
+    view_count = Column(Integer, nullable=False, default=0)
+    best_match_score = Column(Float, nullable=False, default=0.0)
+    # Listed = status approved or pending_review (what the public list shows)
+    has_listed_service = Column(Boolean, nullable=False, default=False)
+    has_approved_service = Column(Boolean, nullable=False, default=False)
+    min_price = Column(Numeric(10, 2), nullable=True)
+    min_approved_price = Column(Numeric(10, 2), nullable=True)
+    # Sorted, de-duplicated names of listed services' categories ("DJ,Musician")
+    category_names = Column(Text, nullable=True)
+    # Delimited slugs for containment filters (",dj,musician,")
+    category_slugs = Column(Text, nullable=True)
+    # Normalized text for the provider search index (app.services.provider_search_index):
+    # business and personal names, and names plus categories and location.
+    search_name = Column(Text, nullable=True)
+    search_document = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_provider_search_stats_most_booked", "has_listed_service", "book_count", "artist_id"),
+        Index("ix_provider_search_stats_top_rated", "has_listed_service", "rating_sort", "artist_id"),
+        Index("ix_provider_search_stats_best_match", "has_listed_service", "best_match_score", "artist_id"),
+        Index("ix_provider_search_stats_min_price", "has_listed_service", "min_price"),
+    )
@@ -10,10 +10,12 @@ from sqlalchemy import (
     Integer,
     Boolean,
     DateTime,
+    event,
 )
 from sqlalchemy.orm import relationship
 
 from .base import BaseModel      # ← import BaseModel directly
+from ..utils.geohash import encode_optional
 
 
 class ServiceProviderProfile(BaseModel):
@@ -39,6 +41,9 @@ class ServiceProviderProfile(BaseModel):
     # original human-readable `location` string as the source of truth.
     location_lat = Column(Numeric(9, 6), nullable=True, index=True)
     location_lng = Column(Numeric(9, 6), nullable=True, index=True)
+    # Geohash of (location_lat, location_lng), kept in sync on every flush.
+    # Proximity search range-scans this index for the cells around a point.
+    location_geohash = Column(String(12), nullable=True, index=True)
     hourly_rate = Column(Numeric(10, 2), nullable=True)
     portfolio_urls = Column(JSON, nullable=True)
     portfolio_image_urls = Column(JSON, nullable=True)
@@ -95,3 +100,9 @@ class ServiceProviderProfile(BaseModel):
         back_populates="artist",
         cascade="all, delete-orphan",
     )
+
+
+@event.listens_for(ServiceProviderProfile, "before_insert")
+@event.listens_for(ServiceProviderProfile, "before_update")
+def _sync_location_geohash(mapper, connection, target) -> None:
+    target.location_geohash = encode_optional(target.location_lat, target.location_lng)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
+
+from .base import BaseModel
+
+
+class ThreadParticipantState(BaseModel):
+    """One participant's read state and unread counter for one thread.
+
+    Maintained by ``app.services.thread_state`` inside the transaction that
+    writes the messages, so unread totals are indexed lookups instead of
+    counts over the message history. A reconcile job repairs drift.
+    """
+
+    __tablename__ = "thread_participant_state"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    booking_request_id = Column(
+        Integer,
+        ForeignKey("booking_requests.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    last_read_message_id = Column(Integer, nullable=True)
+    # Unread = sent by someone else, not read, not a deletion tombstone
+    unread_count = Column(Integer, nullable=False, default=0)
+    last_message_id = Column(Integer, nullable=True)
+    last_activity_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_thread_participant_state_thread", "booking_request_id"),)
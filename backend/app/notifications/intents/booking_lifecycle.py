@@ -12,6 +12,7 @@ from app.models import NotificationType, User
 from app.utils.email import send_template_email
 from app.utils.notifications import (
     _create_and_broadcast,
+    _create_and_broadcast_bulk,
     _send_sms,
     _send_whatsapp_template,
     format_notification_message,
@@ -461,3 +462,38 @@ def send_review_request_notification(
     )
     logger.info("Notify %s: %s", user.email, message)
     _send_sms(user.phone_number, message)
+
+
+def send_review_request_notifications_bulk(
+    db: Session,
+    items: list[tuple[Optional[User], int]],
+) -> int:
+    """Batched :func:`send_review_request_notification` for scheduler runs."""
+    entries = []
+    sms = []
+    for user, booking_id in items:
+        if user is None:
+            logger.error(
+                "Failed to send review request notification: user missing for booking %s",
+                booking_id,
+            )
+            continue
+        message = format_notification_message(
+            NotificationType.REVIEW_REQUEST,
+            booking_id=booking_id,
+        )
+        entries.append(
+            (
+                int(user.id),
+                NotificationType.REVIEW_REQUEST,
+                message,
+                f"/dashboard/client/bookings/{booking_id}?review=1",
+                {"booking_id": booking_id},
+            )
+        )
+        sms.append((user.phone_number, message))
+    _create_and_broadcast_bulk(db, entries)
+    for phone, message in sms:
+        _send_sms(phone, message)
+    logger.info("Sent %d review request notifications", len(entries))
+    return len(entries)
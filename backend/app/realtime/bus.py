@@ -18,16 +18,17 @@ def bus_enabled() -> bool:
     return _WS_BUS_ENABLED and hasattr(_redis_client, "publish")
 
 
-async def publish_topic(topic: str, envelope: dict[str, Any] | str) -> None:
-    """Publish an envelope to ws-topic:<topic> (JSON string or dict).
+async def publish_topic(topic: str, envelope: dict[str, Any] | str | bytes) -> None:
+    """Publish an envelope to ws-topic:<topic> (encoded JSON or dict).
 
-    Safe to call even when the bus is disabled; becomes a no-op.
+    Pre-encoded str/bytes are forwarded untouched. Safe to call even when
+    the bus is disabled; becomes a no-op.
     """
     if not bus_enabled():
         return
     try:
-        data: str
-        if isinstance(envelope, str):
+        data: str | bytes
+        if isinstance(envelope, (str, bytes)):
             data = envelope
         else:
             env = dict(envelope)
@@ -46,11 +47,13 @@ _logger = logging.getLogger(__name__)
 
 async def start_pattern_consumer(
     pattern: str,
-    handler: Callable[[str, dict[str, Any]], Awaitable[None]],
+    handler: Callable[[str, Any], Awaitable[None]],
+    raw: bool = False,
 ) -> None:
     """Start a resilient background task that PSUBSCRIBEs to a pattern and dispatches JSON payloads.
 
-    Handler receives (topic_without_prefix, envelope_dict).
+    Handler receives (topic_without_prefix, envelope_dict), or the undecoded
+    frame bytes when ``raw`` is set so it can forward them without parsing.
     Reconnects with exponential backoff on errors/timeouts.
     """
     if not bus_enabled():
@@ -81,6 +84,12 @@ async def start_pattern_consumer(
                             continue
                         chan = msg.get("channel")
                         data = msg.get("data")
+                        topic = str(chan).replace("ws-topic:", "")
+                        if raw:
+                            if isinstance(data, str):
+                                data = data.encode("utf-8")
+                            await handler(topic, data if isinstance(data, (bytes, bytearray)) else b"")
+                            continue
                         try:
                             if isinstance(data, (bytes, bytearray)):
                                 payload = json.loads(data.decode("utf-8"))
@@ -91,8 +100,6 @@ async def start_pattern_consumer(
                         except Exception:
                             # Fallback: wrap raw
                             payload = {"payload": data.decode("utf-8") if isinstance(data, (bytes, bytearray)) else str(data)}
-                        # Strip the prefix (e.g., "ws-topic:") for handler clarity
-                        topic = str(chan).replace("ws-topic:", "")
                         await handler(topic, payload)
                     except Exception as e:
                         # Swallow per-message errors to keep stream alive
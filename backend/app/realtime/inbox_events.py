@@ -0,0 +1,193 @@
+"""Per-user "inbox dirty" signals for event-driven inbox streams.
+
+Writes that change what a user's inbox snapshot would return (message
+create/update/delete, mark-read, booking-request status changes) mark the
+affected user ids dirty on the SQLAlchemy session. After the transaction
+commits the ids are:
+
+  - woken locally: any open ``/inbox/stream`` for that user on this process
+    recomputes its snapshot immediately;
+  - published on the Redis WS bus as ``ws-topic:inbox:<user_id>`` so other
+    instances can wake their streams via ``api_ws._bus_dispatch``. Publishing
+    happens on a background thread, one pipeline per batch of commits.
+
+Streams only hit the DB when a signal arrives (plus a slow safety poll), so
+idle streams cost nothing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+from typing import Iterable
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+
+from app.realtime.bus import bus_enabled
+from app.utils.session_tracking import DirtyTracker
+
+_logger = logging.getLogger(__name__)
+
+# user_id -> {(loop, event)} for streams waiting on this process
+_WAITERS: dict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+_WAITERS_LOCK = threading.Lock()
+
+
+# ---- waiter registry ---------------------------------------------------------
+
+def subscribe(user_id: int) -> asyncio.Event:
+    """Register a wake-up event for ``user_id`` on the running loop."""
+    loop = asyncio.get_running_loop()
+    ev = asyncio.Event()
+    with _WAITERS_LOCK:
+        _WAITERS.setdefault(int(user_id), set()).add((loop, ev))
+    return ev
+
+
+def unsubscribe(user_id: int, ev: asyncio.Event) -> None:
+    with _WAITERS_LOCK:
+        waiters = _WAITERS.get(int(user_id))
+        if not waiters:
+            return
+        for item in list(waiters):
+            if item[1] is ev:
+                waiters.discard(item)
+        if not waiters:
+            _WAITERS.pop(int(user_id), None)
+
+
+def waiter_count() -> int:
+    with _WAITERS_LOCK:
+        return sum(len(v) for v in _WAITERS.values())
+
+
+def wake_local(user_ids: Iterable[int]) -> int:
+    """Set wake-up events for local streams of ``user_ids``; thread-safe.
+
+    Returns the number of streams woken.
+    """
+    woken = 0
+    with _WAITERS_LOCK:
+        targets = [w for uid in user_ids for w in _WAITERS.get(int(uid), ())]
+    for loop, ev in targets:
+        try:
+            loop.call_soon_threadsafe(ev.set)
+            woken += 1
+        except RuntimeError:
+            # Loop already closed; the stream is gone.
+            continue
+    return woken
+
+
+# ---- publishing ----------------------------------------------------------------
+
+# Remote publishes leave the committing thread: ids are queued and a daemon
+# thread sends each drained batch as one Redis pipeline, so request latency
+# never includes bus round trips.
+_PUBLISH_QUEUE: "queue.SimpleQueue[frozenset[int]]" = queue.SimpleQueue()
+_publisher_lock = threading.Lock()
+_publisher: threading.Thread | None = None
+
+
+def _publish_batch(user_ids: Iterable[int]) -> None:
+    """Publish one ``inbox_dirty`` event per user id in a single pipeline."""
+    from app.api.api_ws import INSTANCE_ID  # lazy: api_ws imports crud
+    from app.utils.redis_cache import get_redis_client
+
+    client = get_redis_client()
+    if client is None or not hasattr(client, "pipeline"):
+        return
+    pipe = client.pipeline(transaction=False)
+    for uid in sorted({int(u) for u in user_ids}):
+        data = json.dumps(
+            {"v": 1, "type": "inbox_dirty", "topic": f"inbox:{uid}", "origin": INSTANCE_ID},
+            separators=(",", ":"),
+        )
+        pipe.publish(f"ws-topic:inbox:{uid}", data)
+    pipe.execute()
+
+
+def _publisher_loop() -> None:
+    while True:
+        ids = set(_PUBLISH_QUEUE.get())
+        # Coalesce everything committed meanwhile into the same pipeline.
+        while True:
+            try:
+                ids.update(_PUBLISH_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _publish_batch(ids)
+        except Exception as exc:
+            _logger.debug("inbox_dirty publish failed: %s", exc)
+
+
+def _publish_remote(user_ids: Iterable[int]) -> None:
+    """Queue the dirty ids for the cluster publisher (best effort)."""
+    global _publisher
+    if not bus_enabled():
+        return
+    with _publisher_lock:
+        if _publisher is None or not _publisher.is_alive():
+            _publisher = threading.Thread(target=_publisher_loop, name="inbox-dirty-publisher", daemon=True)
+            _publisher.start()
+    _PUBLISH_QUEUE.put(frozenset(int(u) for u in user_ids))
+
+
+def publish_inbox_dirty(user_ids: Iterable[int]) -> None:
+    """Wake local streams and publish to the cluster for ``user_ids``."""
+    ids = {int(u) for u in user_ids if u}
+    if not ids:
+        return
+    wake_local(ids)
+    _publish_remote(ids)
+
+
+# ---- session tracking --------------------------------------------------------
+
+def _collect_dirty_user_ids(session: Session) -> set[int]:
+    from app import models
+
+    br_ids: set[int] = set()
+    users: set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.Message):
+            if obj.booking_request_id:
+                br_ids.add(int(obj.booking_request_id))
+        elif isinstance(obj, models.BookingRequest):
+            if obj in session.new or inspect(obj).attrs.status.history.has_changes():
+                users.update(int(u) for u in (obj.client_id, obj.artist_id) if u)
+    if br_ids:
+        br = models.BookingRequest.__table__
+        rows = session.connection().execute(
+            select(br.c.client_id, br.c.artist_id).where(br.c.id.in_(br_ids))
+        )
+        for client_id, artist_id in rows:
+            users.update(int(u) for u in (client_id, artist_id) if u)
+    return users
+
+
+_tracker = DirtyTracker(
+    "inbox_dirty_user_ids",
+    collect=_collect_dirty_user_ids,
+    on_commit=lambda session, user_ids: publish_inbox_dirty(user_ids),
+)
+
+
+def note_inbox_dirty(db: Session, user_ids: Iterable[int]) -> None:
+    """Mark ``user_ids`` dirty; signals are sent after ``db`` commits."""
+    _tracker.note(db, user_ids)
+
+
+__all__ = [
+    "note_inbox_dirty",
+    "publish_inbox_dirty",
+    "subscribe",
+    "unsubscribe",
+    "wake_local",
+    "waiter_count",
+]
@@ -0,0 +1,205 @@
+"""Cluster-wide presence registry backed by Redis leases.
+
+Each WebSocket connection holds a lease: a member of the sorted set
+``presence:u:<user_id>`` scored by its expiry time (ms). One heartbeat task
+per process renews every local lease in a single pipeline, so leases held by
+a crashed instance simply expire. A user is online when their set has any
+member with a score in the future.
+
+Lookups are batched (one pipeline for many user ids, e.g. thread previews)
+and served through a short local read-through cache (an LRU of at most
+``PRESENCE_CACHE_MAX`` entries); users with a
+connection on this process are answered without Redis.
+
+Backends (``PRESENCE_BACKEND``):
+  - redis: leases in Redis (cluster-wide view)
+  - local: in-process counts (single instance, tests)
+  - auto (default): redis when the WS bus is enabled, else local
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from app.realtime.bus import bus_enabled
+from app.services.redis_client import redis as _redis_client  # async redis (or null)
+from app.utils.tiered_cache import TieredCache
+
+_logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "presence:u:"
+
+try:
+    LEASE_TTL_S = max(5.0, float(os.getenv("PRESENCE_LEASE_TTL") or 45.0))
+except Exception:
+    LEASE_TTL_S = 45.0
+try:
+    CACHE_TTL_S = max(0.0, float(os.getenv("PRESENCE_CACHE_TTL") or 2.0))
+except Exception:
+    CACHE_TTL_S = 2.0
+try:
+    CACHE_MAX_ENTRIES = max(1, int(os.getenv("PRESENCE_CACHE_MAX") or 10000))
+except Exception:
+    CACHE_MAX_ENTRIES = 10000
+
+
+@dataclass(frozen=True)
+class PresenceLease:
+    user_id: int
+    lease_id: str
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class PresenceRegistry:
+    def __init__(self, client=None, instance_id: Optional[str] = None, use_redis: Optional[bool] = None) -> None:
+        self._client = client if client is not None else _redis_client
+        self.instance_id = instance_id or os.getenv("INSTANCE_ID") or ("inst-" + os.urandom(4).hex())
+        self._use_redis = use_redis
+        # user_id -> lease ids held by connections on this process
+        self._local: Dict[int, set[str]] = {}
+        # str(user_id) -> online for remote answers; bounded LRU with TTL
+        self._cache = TieredCache("presence", ttl=CACHE_TTL_S, stale_ttl=0.0, max_entries=CACHE_MAX_ENTRIES)
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    # ---- backend selection ----------------------------------------------------
+
+    def redis_enabled(self) -> bool:
+        if self._use_redis is None:
+            mode = (os.getenv("PRESENCE_BACKEND") or "auto").strip().lower()
+            if mode == "redis":
+                self._use_redis = True
+            elif mode == "local":
+                self._use_redis = False
+            else:
+                self._use_redis = bus_enabled()
+            self._use_redis = bool(self._use_redis) and hasattr(self._client, "zadd")
+        return self._use_redis
+
+    # ---- leases ---------------------------------------------------------------
+
+    async def connect(self, user_id: int) -> PresenceLease:
+        """Register a connection for ``user_id`` and return its lease."""
+        uid = int(user_id)
+        lease = PresenceLease(uid, f"{self.instance_id}:{uuid.uuid4().hex[:12]}")
+        self._local.setdefault(uid, set()).add(lease.lease_id)
+        self._cache.delete(str(uid))
+        if self.redis_enabled():
+            try:
+                async with self._client.pipeline(transaction=False) as pipe:
+                    self._queue_renew(pipe, uid, [lease.lease_id], _now_ms())
+                    await pipe.execute()
+            except Exception as exc:
+                _logger.debug("presence connect failed: %s", exc)
+            self._ensure_heartbeat()
+        return lease
+
+    async def disconnect(self, lease: Optional[PresenceLease]) -> None:
+        if lease is None:
+            return
+        uid = lease.user_id
+        leases = self._local.get(uid)
+        if leases is not None:
+            leases.discard(lease.lease_id)
+            if not leases:
+                self._local.pop(uid, None)
+        self._cache.delete(str(uid))
+        if self.redis_enabled():
+            try:
+                await self._client.zrem(f"{KEY_PREFIX}{uid}", lease.lease_id)
+            except Exception as exc:
+                _logger.debug("presence disconnect failed: %s", exc)
+
+    def _queue_renew(self, pipe, uid: int, lease_ids: Iterable[str], now_ms: int) -> None:  # noqa: ANN001
+        key = f"{KEY_PREFIX}{uid}"
+        expiry = now_ms + int(LEASE_TTL_S * 1000)
+        pipe.zadd(key, {lid: expiry for lid in lease_ids})
+        # Prune leases of crashed instances and let idle keys vanish.
+        pipe.zremrangebyscore(key, "-inf", now_ms)
+        pipe.pexpire(key, int(LEASE_TTL_S * 2000))
+
+    async def renew_all(self) -> None:
+        """Extend every local lease in one round trip."""
+        if not self._local or not self.redis_enabled():
+            return
+        now_ms = _now_ms()
+        async with self._client.pipeline(transaction=False) as pipe:
+            for uid, lease_ids in list(self._local.items()):
+                if lease_ids:
+                    self._queue_renew(pipe, uid, list(lease_ids), now_ms)
+            await pipe.execute()
+
+    def _ensure_heartbeat(self) -> None:
+        if self._heartbeat is not None and not self._heartbeat.done():
+            return
+        try:
+            self._heartbeat = asyncio.get_running_loop().create_task(self._heartbeat_loop())
+        except RuntimeError:
+            self._heartbeat = None
+
+    async def _heartbeat_loop(self) -> None:
+        interval = LEASE_TTL_S / 3.0
+        while self._local:
+            await asyncio.sleep(interval)
+            try:
+                await self.renew_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                _logger.debug("presence heartbeat failed: %s", exc)
+
+    # ---- lookups --------------------------------------------------------------
+
+    async def is_online(self, user_id: int) -> bool:
+        return (await self.is_online_many([user_id])).get(int(user_id), False)
+
+    async def is_online_many(self, user_ids: Iterable[int]) -> Dict[int, bool]:
+        """Online state for ``user_ids`` using at most one Redis round trip."""
+        result: Dict[int, bool] = {}
+        missing: list[int] = []
+        for raw in user_ids:
+            uid = int(raw)
+            if uid in result:
+                continue
+            if self._local.get(uid):
+                result[uid] = True
+                continue
+            cached = self._cache.peek(str(uid))
+            if cached is not None:
+                result[uid] = cached
+                continue
+            result[uid] = False
+            missing.append(uid)
+        if not missing or not self.redis_enabled():
+            return result
+        try:
+            now_ms = _now_ms()
+            async with self._client.pipeline(transaction=False) as pipe:
+                for uid in missing:
+                    pipe.zcount(f"{KEY_PREFIX}{uid}", now_ms, "+inf")
+                counts = await pipe.execute()
+        except Exception as exc:
+            _logger.debug("presence lookup failed: %s", exc)
+            return result
+        for uid, count in zip(missing, counts):
+            online = bool(int(count or 0))
+            result[uid] = online
+            self._cache.put_local(str(uid), online)
+        return result
+
+    def local_connection_count(self, user_id: int) -> int:
+        return len(self._local.get(int(user_id), ()))
+
+
+presence = PresenceRegistry()
+
+
+__all__ = ["PresenceLease", "PresenceRegistry", "presence"]
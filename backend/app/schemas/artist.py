@@ -88,6 +88,8 @@ class ArtistProfileResponse(ArtistProfileBase):
     service_price: Optional[Decimal] = None
     service_categories: List[str] = Field(default_factory=list)
     onboarding_completed: Optional[bool] = None
+    # Great-circle distance from the searched location (sort=closest only)
+    distance_km: Optional[float] = None
     # Derived convenience field for clients to check completion status
     @computed_field(return_type=bool)
     @property
@@ -159,6 +161,8 @@ class ArtistListResponse(BaseModel):
     data: List[ArtistProfileResponse]
     total: int
     price_distribution: List[PriceBucket]
+    # Opaque keyset cursor for the next page; None on the last page
+    next_cursor: Optional[str] = None
 
 
 class ArtistFullResponse(BaseModel):
@@ -167,6 +171,8 @@ class ArtistFullResponse(BaseModel):
     provider: "ArtistProfileResponse"
     services: List["ServiceResponse"]
     reviews: List["ReviewDetails"]
+    # Cursor for the reviews after the embedded first page (reviews endpoint)
+    reviews_next_cursor: Optional[str] = None
 
 
 from typing import TYPE_CHECKING
@@ -87,6 +87,8 @@ class MessageListResponse(BaseModel):
     has_more: bool
     next_cursor: Optional[str] = None
     delta_cursor: Optional[str] = None
+    # Opaque keyset cursor for the next older page (pass back as ?cursor=)
+    history_cursor: Optional[str] = None
     requested_after_id: Optional[int] = None
     requested_since: Optional[datetime] = None
     total_latency_ms: float
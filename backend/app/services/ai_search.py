@@ -1,22 +1,28 @@
-import json
 import logging
 from dataclasses import dataclass
 from datetime import date
 from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import and_, func
 import re
 
 from app.core.config import settings, FRONTEND_PRIMARY
+from app.database import release_connection, run_db
 from app.services.genai_client import get_genai_client
+from app.services.llm import (
+    agenerate_text,
+    generate_text,
+    get_cached_parse,
+    parse_digest,
+    parse_json_object,
+    store_parse,
+)
 from app.models.service_provider_profile import ServiceProviderProfile as Artist
 from app.models.service import Service
 from app.models.service_category import ServiceCategory
-from app.models.review import Review
-from app.models.booking import Booking
-from app.models.profile_view import ArtistProfileView
-from app.models.user import User
+from app.models.provider_search_stats import ProviderSearchStats
+from app.services.provider_search_index import provider_text_match
 from app.utils.json import dumps_bytes as orjson_dumps
 from app.services.quote_totals import compute_quote_totals_snapshot
 
@@ -258,23 +264,12 @@ def _extract_location_from_query(query_lower: str) -> Optional[str]:
     return None
 
 
-def _ai_derive_filters(
-    query: str,
-    base: AiSearchFilters,
-    *,
-    skip_llm: bool = False,
-) -> AiSearchFilters:
-    """Best-effort filter derivation using lightweight heuristics and optionally Gemini/Gemma.
+def _heuristic_filters(query: str, base: AiSearchFilters) -> AiSearchFilters:
+    """Apply lightweight local rules to the UI filters.
 
-    This function is intentionally defensive:
-    - Always applies simple local rules first (e.g., map keywords like "dj"
-      or "musician" to known categories).
-    - If GOOGLE_GENAI_API_KEY is not set, it returns the heuristic filters.
-    - If the model call fails or returns unexpected output, it falls back to
-      the heuristic filters.
-    - Existing filters from the UI (base) take precedence over AI guesses.
+    Maps keywords like "dj" or "musician" to known categories and extracts
+    date, location and budget hints. Filters already set by the UI win.
     """
-    # ── 1) Heuristic enrichment from the raw query ───────────────────────────
     query_lower = (query or "").strip().lower()
 
     # Start from the baseline filters coming from the UI.
@@ -342,7 +337,7 @@ def _ai_derive_filters(
             if max_price is None and heur_max is not None:
                 max_price = heur_max
 
-    heuristic = AiSearchFilters(
+    return AiSearchFilters(
         category=cat,
         location=loc,
         when=when_val,
@@ -350,34 +345,18 @@ def _ai_derive_filters(
         max_price=max_price,
     )
 
-    # When skip_llm is True, return the heuristic filters immediately without
-    # attempting any Gemini/Gemma refinement. This is used by the booking
-    # agent so it can benefit from lightweight local parsing (date/location/
-    # budget) while keeping search deterministic and avoiding extra model
-    # calls.
-    if skip_llm:
-        return heuristic
-
-    # ── 2) Optional Gemini/Gemma refinement ──────────────────────────────────
-    api_key = (getattr(settings, "GOOGLE_GENAI_API_KEY", "") or "").strip()
-    model_name = (getattr(settings, "GOOGLE_GENAI_MODEL", "") or "").strip() or "gemini-2.5-flash"
-    if not api_key or not model_name:
-        return heuristic
-
-    client = get_genai_client()
-    if not client:
-        logger.warning("Gemini client not available; falling back to heuristic filters")
-        return heuristic
 
-    # Prepare a compact JSON snippet of the existing filters to give the model context.
-    base_payload = {
-        "category": heuristic.category,
-        "location": heuristic.location,
-        "when": heuristic.when.isoformat() if heuristic.when else None,
-        "min_price": heuristic.min_price,
-        "max_price": heuristic.max_price,
+def _filters_to_json(f: AiSearchFilters) -> Dict[str, Any]:
+    return {
+        "category": f.category,
+        "location": f.location,
+        "when": f.when.isoformat() if f.when else None,
+        "min_price": f.min_price,
+        "max_price": f.max_price,
     }
 
+
+def _filters_prompt(query: str, heuristic: AiSearchFilters) -> str:
     system_instructions = (
         "You help interpret event search queries for a South African booking site (Booka). "
         "Given a user query and existing filters, you output ONLY a compact JSON object with "
@@ -386,9 +365,10 @@ def _ai_derive_filters(
         "Do not include any prose or explanation outside of the JSON."
     )
 
-    base_json = orjson_dumps(base_payload).decode("utf-8")
+    # A compact JSON snippet of the existing filters gives the model context.
+    base_json = orjson_dumps(_filters_to_json(heuristic)).decode("utf-8")
 
-    prompt = (
+    return (
         f"{system_instructions}\n\n"
         f"Existing filters (JSON): {base_json}\n"
         f"User query: {query.strip()}\n\n"
@@ -396,32 +376,9 @@ def _ai_derive_filters(
         '{"category": "dj", "location": "Cape Town", "when": "2026-10-14", "min_price": null, "max_price": 8000}\n'
     )
 
-    try:
-        res = client.models.generate_content(model=model_name, contents=prompt)
-        text = (getattr(res, "text", None) or "").strip()
-        if not text:
-            logger.debug("GenAI returned empty text; falling back to heuristic filters")
-            return heuristic
-
-        # Attempt to isolate JSON from any surrounding text or fences.
-        # Prefer the substring between the first '{' and last '}'.
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            json_str = text[start : end + 1]
-        else:
-            json_str = text
-
-        data = json.loads(json_str)
-        if not isinstance(data, dict):
-            logger.debug("GenAI response is not a JSON object; falling back to heuristic filters")
-            return heuristic
-    except Exception as exc:
-        logger.warning("GenAI filter derivation failed: %s", exc)
-        return heuristic
 
-    # Merge AI-derived filters with the baseline, giving precedence to baseline
-    # (UI + heuristic) values when present.
+def _merge_ai_filters(heuristic: AiSearchFilters, data: Dict[str, Any]) -> AiSearchFilters:
+    """Merge model-derived filters into the heuristic ones (which take precedence)."""
     category = heuristic.category or (data.get("category") or None)
     if isinstance(category, str):
         category = category.strip() or None
@@ -468,13 +425,79 @@ def _ai_derive_filters(
         min_price=min_price,
         max_price=max_price,
     )
-    try:
-        logger.debug("AI-derived filters: %s", merged)
-    except Exception:
-        pass
+    logger.debug("AI-derived filters: %s", merged)
     return merged
 
 
+_FILTERS_PARSE = "search_filters"
+
+
+def _filters_request(
+    query: str, base: AiSearchFilters, skip_llm: bool
+) -> Tuple[AiSearchFilters, Optional[str], Optional[Dict[str, Any]]]:
+    """Return ``(heuristic, digest, cached)``; ``digest`` is ``None`` when no model call applies."""
+    heuristic = _heuristic_filters(query, base)
+    # skip_llm is used by the booking agent so it benefits from local parsing
+    # while keeping search deterministic and avoiding extra model calls.
+    if skip_llm or get_genai_client() is None:
+        return heuristic, None, None
+    digest = parse_digest(query, _filters_to_json(heuristic))
+    return heuristic, digest, get_cached_parse(_FILTERS_PARSE, digest)
+
+
+def _ai_derive_filters(
+    query: str,
+    base: AiSearchFilters,
+    *,
+    skip_llm: bool = False,
+) -> AiSearchFilters:
+    """Best-effort filter derivation using lightweight heuristics and optionally Gemini/Gemma.
+
+    This function is intentionally defensive:
+    - Always applies simple local rules first (:func:`_heuristic_filters`).
+    - Without a model client, or when the model call fails, is gated out or
+      returns unexpected output, it returns the heuristic filters.
+    - Existing filters from the UI (base) take precedence over AI guesses.
+    - Parsed model output is cached by normalized query (``services.llm``).
+    """
+    heuristic, digest, data = _filters_request(query, base, skip_llm)
+    if digest is None:
+        return heuristic
+    if data is None:
+        try:
+            data = parse_json_object(generate_text(_filters_prompt(query, heuristic), label="ai_search.filters"))
+        except Exception as exc:
+            logger.warning("GenAI filter derivation failed: %s", exc)
+            return heuristic
+        if data is None:
+            return heuristic
+        store_parse(_FILTERS_PARSE, digest, data)
+    return _merge_ai_filters(heuristic, data)
+
+
+async def _ai_derive_filters_async(
+    query: str,
+    base: AiSearchFilters,
+    *,
+    skip_llm: bool = False,
+) -> AiSearchFilters:
+    """Async form of :func:`_ai_derive_filters`."""
+    heuristic, digest, data = _filters_request(query, base, skip_llm)
+    if digest is None:
+        return heuristic
+    if data is None:
+        try:
+            text = await agenerate_text(_filters_prompt(query, heuristic), label="ai_search.filters")
+            data = parse_json_object(text)
+        except Exception as exc:
+            logger.warning("GenAI filter derivation failed: %s", exc)
+            return heuristic
+        if data is None:
+            return heuristic
+        store_parse(_FILTERS_PARSE, digest, data)
+    return _merge_ai_filters(heuristic, data)
+
+
 def _search_providers_with_filters(
     db: Session, filters: AiSearchFilters, limit: int, query_text: Optional[str] = None
 ) -> List[Dict[str, Any]]:
@@ -483,103 +506,42 @@ def _search_providers_with_filters(
     This reuses a subset of the logic from read_all_service_provider_profiles
     to keep results consistent with the main listing page.
     """
-    # Aggregate rating info per artist
-    rating_subq = (
-        db.query(
-            Review.artist_id.label("artist_id"),
-            func.avg(Review.rating).label("rating"),
-            func.count(Review.id).label("rating_count"),
-        )
-        .group_by(Review.artist_id)
-        .subquery()
-    )
-
-    # Aggregate very simple popularity metrics per artist so Gemini can talk
-    # about “famous on Booka” in a grounded way.
-    bookings_subq = (
-        db.query(
-            Booking.artist_id.label("artist_id"),
-            func.count(Booking.id).label("booking_count"),
-        )
-        .group_by(Booking.artist_id)
-        .subquery()
-    )
-
-    views_subq = (
-        db.query(
-            ArtistProfileView.artist_id.label("artist_id"),
-            func.count(ArtistProfileView.id).label("profile_view_count"),
-        )
-        .group_by(ArtistProfileView.artist_id)
-        .subquery()
-    )
-
-    # Cross-DB category aggregation is overkill here; we only need category
-    # names for display, not histogram data. Use string_agg on Postgres and
-    # group_concat on SQLite/others.
-    dialect = getattr(db.get_bind(), "dialect", None)
-    dname = getattr(dialect, "name", "sqlite") if dialect else "sqlite"
-    if dname == "postgresql":
-        categories_agg = func.string_agg(ServiceCategory.name, ",")
-    else:
-        categories_agg = func.group_concat(ServiceCategory.name, ",")
-
-    category_subq = (
-        db.query(
-            Service.artist_id.label("artist_id"),
-            categories_agg.label("service_categories"),
-            func.min(Service.price).label("service_min_price"),
-        )
-        .join(ServiceCategory, Service.service_category_id == ServiceCategory.id)
-        .filter(getattr(Service, "status", "approved") == "approved")
-        .group_by(Service.artist_id)
-        .subquery()
-    )
-
+    # Rating, popularity, category and starting-price figures come from the
+    # denormalized provider_search_stats row so the search never aggregates
+    # bookings/reviews/views per request. Popularity lets Gemini talk about
+    # “famous on Booka” in a grounded way.
+    stats = ProviderSearchStats
     query = (
         db.query(
             Artist,
-            rating_subq.c.rating,
-            rating_subq.c.rating_count,
-            bookings_subq.c.booking_count,
-            views_subq.c.profile_view_count,
-            category_subq.c.service_categories,
-            category_subq.c.service_min_price,
+            stats.rating_avg,
+            stats.rating_count,
+            stats.book_count,
+            stats.view_count,
+            stats.category_names,
+            stats.min_approved_price,
         )
-        .outerjoin(rating_subq, rating_subq.c.artist_id == Artist.user_id)
-        .outerjoin(bookings_subq, bookings_subq.c.artist_id == Artist.user_id)
-        .outerjoin(views_subq, views_subq.c.artist_id == Artist.user_id)
-        .outerjoin(category_subq, category_subq.c.artist_id == Artist.user_id)
+        .join(stats, stats.artist_id == Artist.user_id)
     )
 
     # Only include providers with at least one approved service.
-    query = query.filter(Artist.services.any(Service.status == "approved"))
+    query = query.filter(stats.has_approved_service.is_(True))
 
     # Apply category/location/price filters first; this forms our base query.
     if filters.category:
         category_slug = filters.category.lower().replace(" ", "_")
         category_term = category_slug.replace("_", " ")
-        query = (
-            query.join(Service, Service.artist_id == Artist.user_id)
-            .join(ServiceCategory, Service.service_category_id == ServiceCategory.id)
-            .filter(getattr(Service, "status", "approved") == "approved")
-            # Use a contains match rather than strict equality so "Musician / Band"
-            # and similar names still match a "musician" category.
-            .filter(func.lower(ServiceCategory.name).ilike(f"%{category_term}%"))
-        )
-        query = query.group_by(
-            Artist.user_id,
-            Artist.business_name,
-            Artist.location,
-            Artist.profile_picture_url,
-            Artist.created_at,
-            Artist.updated_at,
-            rating_subq.c.rating,
-            rating_subq.c.rating_count,
-            bookings_subq.c.booking_count,
-            views_subq.c.profile_view_count,
-            category_subq.c.service_categories,
-            category_subq.c.service_min_price,
+        query = query.filter(
+            Artist.services.any(
+                and_(
+                    Service.status == "approved",
+                    # Use a contains match rather than strict equality so "Musician / Band"
+                    # and similar names still match a "musician" category.
+                    Service.service_category.has(
+                        func.lower(ServiceCategory.name).ilike(f"%{category_term}%")
+                    ),
+                )
+            )
         )
 
     if filters.location:
@@ -588,9 +550,9 @@ def _search_providers_with_filters(
     if filters.min_price is not None or filters.max_price is not None:
         # Filter on the min price per artist when available.
         if filters.min_price is not None:
-            query = query.filter(category_subq.c.service_min_price >= filters.min_price)
+            query = query.filter(stats.min_approved_price >= filters.min_price)
         if filters.max_price is not None:
-            query = query.filter(category_subq.c.service_min_price <= filters.max_price)
+            query = query.filter(stats.min_approved_price <= filters.max_price)
 
     base_query = query
 
@@ -648,28 +610,14 @@ def _search_providers_with_filters(
                 "wedding",
             }
             name_tokens = [t for t in raw_tokens if t not in type_words]
-            if name_tokens:
-                # Require at least one token to appear in the business or user name.
-                name_clauses = [
-                    func.lower(Artist.business_name).ilike(f"%{tok}%")
-                    for tok in name_tokens
-                ] + [
-                    func.lower(User.first_name).ilike(f"%{tok}%")
-                    for tok in name_tokens
-                ] + [
-                    func.lower(User.last_name).ilike(f"%{tok}%")
-                    for tok in name_tokens
-                ]
-
-                name_query = (
-                    base_query.join(User, User.id == Artist.user_id).filter(
-                        or_(*name_clauses)
-                    )
-                )
-
-                # Ordering: favor recently updated artists with higher ratings.
-                name_query = name_query.order_by(
-                    func.coalesce(rating_subq.c.rating, 0.0).desc(),
+            match = provider_text_match(db, name_tokens, field="name") if name_tokens else None
+            if match is not None:
+                # Require at least one token to appear in the business or user
+                # name (served by the provider search index); best matches
+                # first, then higher rated and recently updated artists.
+                name_query = base_query.join(match, match.c.artist_id == Artist.user_id).order_by(
+                    match.c.score.desc(),
+                    stats.rating_sort.desc(),
                     Artist.updated_at.desc(),
                 )
                 rows = name_query.limit(limit).all()
@@ -680,7 +628,7 @@ def _search_providers_with_filters(
     if not rows:
         # Fallback: run the base query without name narrowing.
         fallback_query = base_query.order_by(
-            func.coalesce(rating_subq.c.rating, 0.0).desc(),
+            stats.rating_sort.desc(),
             Artist.updated_at.desc(),
         )
         rows = fallback_query.limit(limit).all()
@@ -761,15 +709,12 @@ def _search_providers_with_filters(
     return providers
 
 
-def ai_provider_search(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
-    """Entry point for AI-assisted provider search.
+_DEFAULT_EXPLANATION = (
+    "I used your query and filters to suggest matching service providers in your area."
+)
 
-    This helper is designed to be called from the API layer. It performs three
-    steps:
-    1. Coerce the incoming payload into baseline filters + limit.
-    2. Optionally augment those filters using an LLM (when configured).
-    3. Run a focused provider search and format results for the frontend.
-    """
+
+def _prepare_search(payload: Dict[str, Any]) -> Tuple[str, AiSearchFilters, int, bool]:
     if not getattr(settings, "FEATURE_AI_SEARCH", False):
         # Caller should translate this into 503 / ai_search_disabled.
         raise RuntimeError("ai_search_disabled")
@@ -779,150 +724,106 @@ def ai_provider_search(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
         raise ValueError("query_required")
 
     base_filters, limit = _coerce_filters_from_payload(payload)
-    disable_llm = bool(payload.get("disable_llm"))
-    # Always apply lightweight heuristic parsing (date/location/budget), but
-    # optionally skip the Gemini/Gemma refinement step when disable_llm is
-    # true so callers like the booking agent can keep search deterministic.
-    effective_filters = _ai_derive_filters(
-        query_text,
-        base_filters,
-        skip_llm=disable_llm,
-    )
+    return query_text, base_filters, limit, bool(payload.get("disable_llm"))
+
+
+def _rerank_prompt(
+    query_text: str, filters_out: Dict[str, Any], top_providers: List[Dict[str, Any]]
+) -> str:
+    # Keep the payload compact to control latency and token usage, but
+    # include Booka-centric popularity signals so we can answer things
+    # like “most famous on the platform” or “is X popular on Booka”.
+    provider_payload: List[Dict[str, Any]] = []
+    for idx, p in enumerate(top_providers):
+        provider_payload.append(
+            {
+                "index": idx,
+                "slug": p.get("slug"),
+                "name": p.get("name"),
+                "location": p.get("location"),
+                "categories": p.get("categories"),
+                "rating": p.get("rating"),
+                "review_count": p.get("review_count"),
+                "booking_count": p.get("booking_count"),
+                "profile_view_count": p.get("profile_view_count"),
+                "starting_price": p.get("starting_price"),
+            }
+        )
 
-    providers = _search_providers_with_filters(
-        db,
-        effective_filters,
-        limit,
-        query_text=query_text,
+    system_instructions = (
+        "You are helping users find the best matching service providers on Booka, a South African booking site. "
+        "You are given the user's query, interpreted filters, and a small list of candidate providers, each with "
+        "Booka-specific popularity metrics (rating, number of reviews, booking_count, profile_view_count). "
+        "Your job is to (1) choose the most relevant providers (when any candidates exist) and (2) explain in one "
+        "or two short sentences why you chose them, strictly in terms of their popularity and fit on Booka.\n\n"
+        "Important rules:\n"
+        "- Treat higher review_count, booking_count, and rating as signals that an artist is more popular ON BOOKA.\n"
+        "- If the user asks about “famous” or “biggest” or “most popular”, prefer artists with higher popularity signals.\n"
+        "- If the user mentions a specific name, prioritise exact or very close name matches when possible.\n"
+        "- NEVER claim anything about fame or popularity outside Booka (e.g., “in South Africa” or “worldwide”). "
+        "If the question mentions fame in South Africa, answer in terms of Booka only, e.g. "
+        "“On Booka, X has Y reviews and Z bookings; we can’t speak for all of South Africa.”\n"
+        "- For “are there any … listed?” or similar yes/no questions, your explanation MUST clearly say whether there "
+        "are any matching providers in the candidate list and how many you found, based on the length of the candidates array "
+        "(e.g., “Yes – I found 4 DJs on Booka that match your request; here are a few of the top ones.”).\n"
+        "- If the candidates array is empty, your explanation MUST make it clear that no providers on Booka matched the user's "
+        "request and optionally suggest broadening the filters or trying a simpler query.\n"
+        "- Do not invent providers that are not in the candidate list.\n\n"
+        "You MUST respond with a single JSON object only, no prose outside JSON, with this shape:\n"
+        '{\"ordered_indices\": [0,1,2], \"explanation\": \"...\"}\n'
+        "The ordered_indices array must reference the 'index' field of the candidate providers."
     )
 
-    # After we have candidate providers, optionally let Gemini rerank them and
-    # generate a more human explanation. This is best-effort and fully
-    # optional; on any error we fall back to the original ordering and a
-    # generic explanation.
-    def _filters_to_json(f: AiSearchFilters) -> Dict[str, Any]:
-        return {
-            "category": f.category,
-            "location": f.location,
-            "when": f.when.isoformat() if f.when else None,
-            "min_price": f.min_price,
-            "max_price": f.max_price,
-        }
-
-    filters_out: Dict[str, Any] = _filters_to_json(effective_filters)
-
-    explanation = (
-        "I used your query and filters to suggest matching service providers in your area."
+    payload_json = {
+        "query": query_text,
+        "filters": filters_out,
+        "candidates": provider_payload,
+    }
+    payload_str = orjson_dumps(payload_json).decode("utf-8")
+    return (
+        f"{system_instructions}\n\n"
+        f"INPUT JSON:\n{payload_str}\n\n"
+        "Respond with JSON only."
     )
 
-    api_key = (getattr(settings, "GOOGLE_GENAI_API_KEY", "") or "").strip()
-    model_name = (getattr(settings, "GOOGLE_GENAI_MODEL", "") or "").strip() or "gemini-2.5-flash"
 
-    # Optional Gemini step: can run even when there are zero providers so it
-    # can generate a helpful “no results” explanation, but reranking only
-    # applies when we have candidates. When disable_llm is true, we keep the
-    # deterministic ordering and generic explanation.
-    if api_key and model_name and not disable_llm:
-        client = get_genai_client()
-        if client:
+def _apply_rerank(
+    text: Optional[str],
+    providers: List[Dict[str, Any]],
+    top_providers: List[Dict[str, Any]],
+    explanation: str,
+) -> Tuple[List[Dict[str, Any]], str]:
+    data = parse_json_object(text)
+    if data is None:
+        return providers, explanation
+    ordered_indices = data.get("ordered_indices")
+    ai_expl = data.get("explanation")
+    if isinstance(ordered_indices, list) and ordered_indices:
+        # Sanitize indices and map back into our providers list.
+        new_list: List[Dict[str, Any]] = []
+        seen = set()
+        for idx in ordered_indices:
             try:
-                # Keep the payload compact to control latency and token usage, but
-                # include Booka-centric popularity signals so we can answer things
-                # like “most famous on the platform” or “is X popular on Booka”.
-                top_providers = providers[:12] if providers else []
-                provider_payload: List[Dict[str, Any]] = []
-                for idx, p in enumerate(top_providers):
-                    provider_payload.append(
-                        {
-                            "index": idx,
-                            "slug": p.get("slug"),
-                            "name": p.get("name"),
-                            "location": p.get("location"),
-                            "categories": p.get("categories"),
-                            "rating": p.get("rating"),
-                            "review_count": p.get("review_count"),
-                            "booking_count": p.get("booking_count"),
-                            "profile_view_count": p.get("profile_view_count"),
-                            "starting_price": p.get("starting_price"),
-                        }
-                    )
-
-                system_instructions = (
-                "You are helping users find the best matching service providers on Booka, a South African booking site. "
-                "You are given the user's query, interpreted filters, and a small list of candidate providers, each with "
-                "Booka-specific popularity metrics (rating, number of reviews, booking_count, profile_view_count). "
-                "Your job is to (1) choose the most relevant providers (when any candidates exist) and (2) explain in one "
-                "or two short sentences why you chose them, strictly in terms of their popularity and fit on Booka.\n\n"
-                "Important rules:\n"
-                "- Treat higher review_count, booking_count, and rating as signals that an artist is more popular ON BOOKA.\n"
-                "- If the user asks about “famous” or “biggest” or “most popular”, prefer artists with higher popularity signals.\n"
-                "- If the user mentions a specific name, prioritise exact or very close name matches when possible.\n"
-                "- NEVER claim anything about fame or popularity outside Booka (e.g., “in South Africa” or “worldwide”). "
-                "If the question mentions fame in South Africa, answer in terms of Booka only, e.g. "
-                "“On Booka, X has Y reviews and Z bookings; we can’t speak for all of South Africa.”\n"
-                "- For “are there any … listed?” or similar yes/no questions, your explanation MUST clearly say whether there "
-                "are any matching providers in the candidate list and how many you found, based on the length of the candidates array "
-                "(e.g., “Yes – I found 4 DJs on Booka that match your request; here are a few of the top ones.”).\n"
-                "- If the candidates array is empty, your explanation MUST make it clear that no providers on Booka matched the user's "
-                "request and optionally suggest broadening the filters or trying a simpler query.\n"
-                "- Do not invent providers that are not in the candidate list.\n\n"
-                "You MUST respond with a single JSON object only, no prose outside JSON, with this shape:\n"
-                '{\"ordered_indices\": [0,1,2], \"explanation\": \"...\"}\n'
-                "The ordered_indices array must reference the 'index' field of the candidate providers."
-                )
-
-                payload_json = {
-                    "query": query_text,
-                    "filters": filters_out,
-                    "candidates": provider_payload,
-                }
-
-                payload_str = orjson_dumps(payload_json).decode("utf-8")
-
-                prompt = (
-                    f"{system_instructions}\n\n"
-                    f"INPUT JSON:\n{payload_str}\n\n"
-                    "Respond with JSON only."
-                )
-
-                res = client.models.generate_content(model=model_name, contents=prompt)
-                text = (getattr(res, "text", None) or "").strip()
-                if text:
-                    start = text.find("{")
-                    end = text.rfind("}")
-                    if start != -1 and end != -1 and end > start:
-                        json_str = text[start : end + 1]
-                    else:
-                        json_str = text
-
-                    data = json.loads(json_str)
-                    if isinstance(data, dict):
-                        ordered_indices = data.get("ordered_indices")
-                        ai_expl = data.get("explanation")
-                        if isinstance(ordered_indices, list) and ordered_indices:
-                            # Sanitize indices and map back into our providers list.
-                            new_list: List[Dict[str, Any]] = []
-                            seen = set()
-                            for idx in ordered_indices:
-                                try:
-                                    i = int(idx)
-                                except Exception:
-                                    continue
-                                if 0 <= i < len(top_providers) and i not in seen:
-                                    new_list.append(top_providers[i])
-                                    seen.add(i)
-                            # If AI gave at least one valid index, adopt this ordering
-                            if new_list:
-                                providers = new_list
-                        if isinstance(ai_expl, str) and ai_expl.strip():
-                            explanation = ai_expl.strip()
-            except Exception as exc:
-                # Never let AI rerank/explanation failures break the endpoint.
-                logger.warning("GenAI rerank/explanation failed: %s", exc)
-
-    # Append lightweight, deterministic follow-up questions when key details
-    # are missing so the assistant feels more conversational and can guide
-    # users toward a bookable brief.
+                i = int(idx)
+            except Exception:
+                continue
+            if 0 <= i < len(top_providers) and i not in seen:
+                new_list.append(top_providers[i])
+                seen.add(i)
+        # If AI gave at least one valid index, adopt this ordering
+        if new_list:
+            providers = new_list
+    if isinstance(ai_expl, str) and ai_expl.strip():
+        explanation = ai_expl.strip()
+    return providers, explanation
+
+
+def _with_followups(explanation: str, effective_filters: AiSearchFilters, query_text: str) -> str:
+    """Append lightweight, deterministic follow-up questions for missing details.
+
+    This keeps the assistant conversational and guides users toward a
+    bookable brief without forcing them through the full wizard UI.
+    """
     try:
         followups: List[str] = []
         if effective_filters.when is None:
@@ -931,8 +832,6 @@ def ai_provider_search(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
             followups.append("Which town or city is your event in?")
         if effective_filters.min_price is None and effective_filters.max_price is None:
             followups.append("Roughly what budget range are you thinking of?")
-        # Ask for a few extra details that help make the brief bookable without
-        # forcing the user through the full wizard UI.
         q_lower = query_text.lower()
         if "wedding" not in q_lower and "birthday" not in q_lower and "corporate" not in q_lower:
             followups.append("What type of event is it (e.g. wedding, birthday, corporate)?")
@@ -947,10 +846,93 @@ def ai_provider_search(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
     except Exception:
         # Never break the endpoint on follow-up formatting issues.
         pass
+    return explanation
+
 
+def _search_result(
+    providers: List[Dict[str, Any]],
+    effective_filters: AiSearchFilters,
+    explanation: str,
+    query_text: str,
+) -> Dict[str, Any]:
     return {
         "providers": providers,
-        "filters": filters_out,
-        "explanation": explanation,
+        "filters": _filters_to_json(effective_filters),
+        "explanation": _with_followups(explanation, effective_filters, query_text),
         "source": "ai_v1",
     }
+
+
+def ai_provider_search(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry point for AI-assisted provider search.
+
+    This helper is designed to be called from the API layer. It performs three
+    steps:
+    1. Coerce the incoming payload into baseline filters + limit.
+    2. Optionally augment those filters using an LLM (when configured).
+    3. Run a focused provider search and format results for the frontend.
+
+    With ``disable_llm`` set (the booking agent) no model is called. Async
+    routes use :func:`ai_provider_search_async`, which releases the DB
+    connection while the model runs.
+    """
+    query_text, base_filters, limit, disable_llm = _prepare_search(payload)
+    # Always apply lightweight heuristic parsing (date/location/budget), but
+    # optionally skip the Gemini/Gemma refinement step when disable_llm is
+    # true so callers like the booking agent can keep search deterministic.
+    effective_filters = _ai_derive_filters(query_text, base_filters, skip_llm=disable_llm)
+    providers = _search_providers_with_filters(db, effective_filters, limit, query_text=query_text)
+
+    # After we have candidate providers, optionally let Gemini rerank them and
+    # generate a more human explanation. This can run even when there are zero
+    # providers so it can explain a “no results” answer. It is best-effort;
+    # on any error we keep the original ordering and a generic explanation.
+    explanation = _DEFAULT_EXPLANATION
+    if not disable_llm:
+        top = providers[:12]
+        try:
+            text = generate_text(
+                _rerank_prompt(query_text, _filters_to_json(effective_filters), top),
+                label="ai_search.rerank",
+            )
+            providers, explanation = _apply_rerank(text, providers, top, explanation)
+        except Exception as exc:
+            # Never let AI rerank/explanation failures break the endpoint.
+            logger.warning("GenAI rerank/explanation failed: %s", exc)
+
+    return _search_result(providers, effective_filters, explanation, query_text)
+
+
+def _search_and_release(
+    db: Session, filters: AiSearchFilters, limit: int, query_text: str
+) -> List[Dict[str, Any]]:
+    try:
+        return _search_providers_with_filters(db, filters, limit, query_text=query_text)
+    finally:
+        release_connection(db)
+
+
+async def ai_provider_search_async(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Async form of :func:`ai_provider_search` for ``async def`` routes.
+
+    Model calls are awaited on the event loop (through the ``services.llm``
+    gate) and the provider query runs in the threadpool. The session's
+    connection goes back to the pool before the rerank call starts.
+    """
+    query_text, base_filters, limit, disable_llm = _prepare_search(payload)
+    effective_filters = await _ai_derive_filters_async(query_text, base_filters, skip_llm=disable_llm)
+    providers = await run_db(_search_and_release, db, effective_filters, limit, query_text)
+
+    explanation = _DEFAULT_EXPLANATION
+    if not disable_llm:
+        top = providers[:12]
+        try:
+            text = await agenerate_text(
+                _rerank_prompt(query_text, _filters_to_json(effective_filters), top),
+                label="ai_search.rerank",
+            )
+            providers, explanation = _apply_rerank(text, providers, top, explanation)
+        except Exception as exc:
+            logger.warning("GenAI rerank/explanation failed: %s", exc)
+
+    return _search_result(providers, effective_filters, explanation, query_text)
@@ -0,0 +1,115 @@
+"""Bulk provider availability.
+
+A provider is busy on a day when it has a pending/confirmed booking starting
+that day, a live booking request proposing that day, or an event starting
+that day on its connected calendar (``calendar_busy_days``, filled in the
+background by ``app.services.calendar_sync``).
+
+For any set of providers and date range all three sources are read with one
+``UNION`` query returning distinct ``(artist_id, day)`` pairs; nothing here
+calls the calendar provider.
+
+:func:`unavailable_artist_ids` answers "who is busy on this date" for the
+provider list so the filter runs in SQL before counting and paging.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import func, select, union
+from sqlalchemy.orm import Session
+
+from app.models import Booking, BookingRequest, BookingStatus, CalendarBusyDay
+
+BUSY_BOOKING_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except Exception:
+        return None
+
+
+def db_busy_days(
+    db: Session,
+    start: date,
+    end: date,
+    artist_ids: Optional[Iterable[int]] = None,
+) -> Dict[int, Set[date]]:
+    """Days in ``[start, end)`` blocked by bookings, requests or calendars, per provider.
+
+    ``artist_ids=None`` means every provider (the list filter uses this for a
+    single day, where the busy set is small).
+    """
+    lo = datetime.combine(start, datetime.min.time())
+    hi = datetime.combine(end, datetime.min.time())
+    ids = None if artist_ids is None else sorted({int(a) for a in artist_ids})
+    if ids == []:
+        return {}
+
+    def scoped(stmt, artist_col):
+        return stmt.where(artist_col.in_(ids)) if ids is not None else stmt
+
+    parts = [
+        scoped(
+            select(Booking.artist_id.label("artist_id"), func.date(Booking.start_time).label("day")).where(
+                Booking.status.in_(BUSY_BOOKING_STATUSES),
+                Booking.start_time >= lo,
+                Booking.start_time < hi,
+            ),
+            Booking.artist_id,
+        )
+    ]
+    for proposed in (BookingRequest.proposed_datetime_1, BookingRequest.proposed_datetime_2):
+        parts.append(
+            scoped(
+                select(BookingRequest.artist_id.label("artist_id"), func.date(proposed).label("day")).where(
+                    BookingRequest.status != BookingStatus.REQUEST_DECLINED,
+                    proposed >= lo,
+                    proposed < hi,
+                ),
+                BookingRequest.artist_id,
+            )
+        )
+    parts.append(
+        scoped(
+            select(CalendarBusyDay.user_id.label("artist_id"), CalendarBusyDay.day.label("day")).where(
+                CalendarBusyDay.day >= start,
+                CalendarBusyDay.day < end,
+            ),
+            CalendarBusyDay.user_id,
+        )
+    )
+    busy: Dict[int, Set[date]] = {}
+    for artist_id, day in db.execute(union(*parts)).all():
+        d = _as_date(day)
+        if artist_id is not None and d is not None:
+            busy.setdefault(int(artist_id), set()).add(d)
+    return busy
+
+
+def bulk_busy_days(db: Session, artist_ids: Iterable[int], start: date, end: date) -> Dict[int, Set[date]]:
+    """Busy days in ``[start, end)`` for each of ``artist_ids`` (absent = free)."""
+    return db_busy_days(db, start, end, artist_ids)
+
+
+def unavailable_artist_ids(db: Session, day: date) -> Set[int]:
+    """Providers that are busy on ``day``; suitable for a ``NOT IN`` filter."""
+    return set(db_busy_days(db, day, day + timedelta(days=1)))
+
+
+__all__ = [
+    "BUSY_BOOKING_STATUSES",
+    "bulk_busy_days",
+    "db_busy_days",
+    "unavailable_artist_ids",
+]
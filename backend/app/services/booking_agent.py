@@ -1,3 +1,4 @@
+import functools
 import logging
 import re
 import json
@@ -6,6 +7,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import date, datetime, time as dtime
 
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.models import User as DbUser
@@ -15,7 +17,17 @@ from app.crud.crud_service import service as crud_service
 from app.services.booking_quote import calculate_quote_breakdown
 from app.services.quote_totals import compute_quote_totals_snapshot
 from app.core.config import settings
+from app.database import release_connection
 from app.services.genai_client import get_genai_client
+from app.services.llm import (
+    agenerate_text,
+    generate_text,
+    get_cached_parse,
+    normalize_query,
+    parse_digest,
+    parse_json_object,
+    store_parse,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -212,48 +224,39 @@ def _build_search_payload_from_state(
     return payload
 
 
-def _call_gemini_parse_state(
-    messages: List[Dict[str, str]],
-    state: BookingAgentState,
-) -> Dict[str, Any]:
-    """Ask Gemini to parse the latest user message into structured state fields.
+_STATE_PARSE = "agent_state"
+_STATE_PARSE_KEYS = {
+    "event_type",
+    "city",
+    "date",
+    "time",
+    "guests",
+    "budget_min",
+    "budget_max",
+    "venue_type",
+    "sound",
+    "sound_mode",
+    "service_category",
+}
 
-    This helper is deliberately narrow and best-effort: it only attempts to
-    interpret event_type, city, date, guests, budget_min, budget_max, venue_type,
-    sound, and time from the user's text. On any error or timeout it returns an
-    empty dict so the main agent logic can fall back to local heuristics.
-    """
-    api_key = (getattr(settings, "GOOGLE_GENAI_API_KEY", "") or "").strip()
-    model_name = (getattr(settings, "GOOGLE_GENAI_MODEL", "") or "").strip() or "gemini-2.5-flash"
-    if not api_key or not model_name:
-        return {}
 
+def _parse_state_request(
+    messages: List[Dict[str, str]],
+    state: BookingAgentState,
+) -> Optional[Tuple[str, str, Optional[Dict[str, Any]]]]:
+    """Return ``(prompt, digest, cached_update)`` or ``None`` when parsing does not apply."""
     # Use the latest user message as the primary signal.
     user_messages = [m for m in messages if m.get("role") == "user"]
     last_user = (user_messages[-1].get("content") or "").strip() if user_messages else ""
     if not last_user:
-        return {}
+        return None
 
-    client = get_genai_client()
-    if not client:
-        logger.warning("Gemini client not available for state parsing; skipping")
-        return {}
+    if get_genai_client() is None:
+        return None
 
     # Compact snapshot of the current known state so Gemini can avoid
     # overwriting fields that are already confidently set.
-    base_state = {
-        "event_type": state.event_type,
-        "city": state.city,
-        "date": state.date,
-        "time": state.time,
-        "guests": state.guests,
-        "budget_min": state.budget_min,
-        "budget_max": state.budget_max,
-        "venue_type": state.venue_type,
-        "sound": state.sound,
-        "sound_mode": state.sound_mode,
-        "service_category": state.service_category,
-    }
+    base_state = {key: getattr(state, key, None) for key in sorted(_STATE_PARSE_KEYS)}
 
     system_instructions = (
         "You help a booking assistant for a South African event platform (Booka) interpret user messages into "
@@ -282,48 +285,15 @@ def _call_gemini_parse_state(
         "Respond with JSON only, for example:\n"
         '{"event_type": "birthday", "city": "Pretoria", "date": "2026-10-29", "guests": 80, "budget_min": 5000, "budget_max": 8000}\n'
     )
+    digest = parse_digest(last_user, base_json)
+    return prompt, digest, get_cached_parse(_STATE_PARSE, digest)
 
-    try:
-        t0 = time.monotonic()
-        res = client.models.generate_content(
-            model=model_name,
-            contents=prompt,
-        )
-        dt_ms = int((time.monotonic() - t0) * 1000)
-        logger.info("booking_agent: gemini_parse_ms=%s", dt_ms)
-        text = (getattr(res, "text", None) or "").strip()
-        if not text:
-            return {}
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            json_str = text[start : end + 1]
-        else:
-            json_str = text
-        data = json.loads(json_str)
-        if not isinstance(data, dict):
-            return {}
-    except Exception as exc:
-        logger.warning("Gemini state parsing failed: %s", exc)
-        return {}
 
-    # Normalise and whitelist only supported fields before returning.
-    allowed_keys = {
-        "event_type",
-        "city",
-        "date",
-        "time",
-        "guests",
-        "budget_min",
-        "budget_max",
-        "venue_type",
-        "sound",
-        "sound_mode",
-        "service_category",
-    }
+def _normalise_state_update(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Whitelist supported fields and coerce numbers; the agent validates the rest."""
     update: Dict[str, Any] = {}
     for key, value in data.items():
-        if key not in allowed_keys:
+        if key not in _STATE_PARSE_KEYS:
             continue
         # Let the main agent decide how to validate/merge; keep conversion light.
         if key in ("guests",):
@@ -341,6 +311,57 @@ def _call_gemini_parse_state(
     return update
 
 
+def _call_gemini_parse_state(
+    messages: List[Dict[str, str]],
+    state: BookingAgentState,
+) -> Dict[str, Any]:
+    """Ask Gemini to parse the latest user message into structured state fields.
+
+    This helper is deliberately narrow and best-effort: it only attempts to
+    interpret event_type, city, date, guests, budget_min, budget_max, venue_type,
+    sound, and time from the user's text. On any error or timeout it returns an
+    empty dict so the main agent logic can fall back to local heuristics.
+    Parses are cached by normalized message and current state.
+    """
+    request = _parse_state_request(messages, state)
+    if request is None:
+        return {}
+    prompt, digest, update = request
+    if update is None:
+        try:
+            data = parse_json_object(generate_text(prompt, label="booking_agent.parse"))
+        except Exception as exc:
+            logger.warning("Gemini state parsing failed: %s", exc)
+            return {}
+        if data is None:
+            return {}
+        update = _normalise_state_update(data)
+        store_parse(_STATE_PARSE, digest, update)
+    return update
+
+
+async def _call_gemini_parse_state_async(
+    messages: List[Dict[str, str]],
+    state: BookingAgentState,
+) -> Dict[str, Any]:
+    """Async form of :func:`_call_gemini_parse_state`."""
+    request = _parse_state_request(messages, state)
+    if request is None:
+        return {}
+    prompt, digest, update = request
+    if update is None:
+        try:
+            data = parse_json_object(await agenerate_text(prompt, label="booking_agent.parse"))
+        except Exception as exc:
+            logger.warning("Gemini state parsing failed: %s", exc)
+            return {}
+        if data is None:
+            return {}
+        update = _normalise_state_update(data)
+        store_parse(_STATE_PARSE, digest, update)
+    return update
+
+
 def _classify_intent_and_event_type(
     query_text: str,
     state: BookingAgentState,
@@ -348,12 +369,26 @@ def _classify_intent_and_event_type(
     """Heuristic classifier for high-level intent and event_type.
 
     This is intentionally small and deterministic. It prefers existing state
-    values and only sets intent/event_type when they are unknown.
+    values and only sets intent/event_type when they are unknown. Results are
+    memoised on the normalized text and the few state fields the rules read.
     """
-    intent: Optional[str] = state.intent or None
-    event_type: Optional[str] = state.event_type or None
+    return _classify_intent_cached(
+        normalize_query(query_text),
+        state.intent or None,
+        state.event_type or None,
+        bool(state.chosen_provider_id or state.chosen_provider_name),
+        bool(state.city or state.date or state.guests or state.budget_min or state.budget_max),
+    )
 
-    t = (query_text or "").strip().lower()
+
+@functools.lru_cache(maxsize=2048)
+def _classify_intent_cached(
+    t: str,
+    intent: Optional[str],
+    event_type: Optional[str],
+    has_provider: bool,
+    has_brief: bool,
+) -> Tuple[Optional[str], Optional[str]]:
     if not t:
         return intent, event_type
 
@@ -632,12 +667,12 @@ def _classify_intent_and_event_type(
         intent = "general_question"
     else:
         # Try to detect explicit "book this provider" phrasing.
-        if ("book " in t or "let's book" in t or "lets book" in t) and (state.chosen_provider_id or state.chosen_provider_name):
+        if ("book " in t or "let's book" in t or "lets book" in t) and has_provider:
             intent = "book_named_provider"
         # When we already have some brief filled in and user talks about
         # changing details, treat as modify_brief.
         elif (
-            (state.city or state.date or state.guests or state.budget_min or state.budget_max)
+            has_brief
             and any(
                 k in t
                 for k in (
@@ -1094,14 +1129,7 @@ def _call_gemini_reply(
     It only generates human-friendly text based on the latest user message,
     current state, and the latest provider search results.
     """
-    api_key = (getattr(settings, "GOOGLE_GENAI_API_KEY", "") or "").strip()
-    model_name = (getattr(settings, "GOOGLE_GENAI_MODEL", "") or "").strip() or "gemini-2.5-flash"
-    if not api_key or not model_name:
-        return None
-
-    client = get_genai_client()
-    if not client:
-        logger.warning("Gemini client not available; booking agent falling back to heuristics")
+    if get_genai_client() is None:
         return None
 
     # Latest user message for immediate context.
@@ -1319,15 +1347,8 @@ def _call_gemini_reply(
     )
 
     try:
-        t0 = time.monotonic()
         # HTTP timeout is enforced via the shared client configuration.
-        res = client.models.generate_content(
-            model=model_name,
-            contents=prompt,
-        )
-        dt_ms = int((time.monotonic() - t0) * 1000)
-        logger.info("booking_agent: gemini_reply_ms=%s", dt_ms)
-        text = (getattr(res, "text", None) or "").strip()
+        text = generate_text(prompt, label="booking_agent.reply")
         if not text:
             return None
         # Guardrail: if we know the requested artist is present in the current
@@ -1355,6 +1376,17 @@ def _call_gemini_reply(
         return None
 
 
+@dataclass
+class _Turn:
+    """Per-step values computed before the (optional) Gemini state parse."""
+
+    state: BookingAgentState
+    user_messages: List[Dict[str, str]]
+    query_text: str
+    is_first_user_turn: bool
+    prev_date: Optional[str]
+
+
 def run_booking_agent_step(
     db: Session,
     current_user: DbUser,
@@ -1367,6 +1399,41 @@ def run_booking_agent_step(
     optional Gemini-powered reply generator. If Gemini is not configured or
     fails, the agent falls back to a simple heuristic response.
     """
+    turn = _begin_turn(messages, state)
+    if _wants_state_parse(turn):
+        try:
+            _apply_parsed_state(turn.state, _call_gemini_parse_state(messages, turn.state))
+        except Exception:
+            # Parsing must never break the agent step.
+            pass
+    return _finish_turn(db, current_user, messages, turn)
+
+
+async def run_booking_agent_step_async(
+    db: Session,
+    current_user: DbUser,
+    messages: List[Dict[str, str]],
+    state: Optional[BookingAgentState] = None,
+) -> AgentStepResult:
+    """Async form of :func:`run_booking_agent_step` for ``async def`` routes.
+
+    The state parse is awaited on the event loop before any DB work. The rest
+    of the turn (search, quotes, availability, booking creation) runs in the
+    threadpool; it releases its DB connection before the Gemini reply call.
+    It uses plain ``run_in_threadpool`` rather than ``run_db`` so the reply
+    wait does not hold one of the DB offload slots.
+    """
+    turn = _begin_turn(messages, state)
+    if _wants_state_parse(turn):
+        try:
+            _apply_parsed_state(turn.state, await _call_gemini_parse_state_async(messages, turn.state))
+        except Exception:
+            pass
+    return await run_in_threadpool(_finish_turn, db, current_user, messages, turn)
+
+
+def _begin_turn(messages: List[Dict[str, str]], state: Optional[BookingAgentState]) -> _Turn:
+    """Heuristic classification for the turn; touches neither the DB nor Gemini."""
     state = state or BookingAgentState()
     if state.stage is None:
         state.stage = "collecting_requirements"
@@ -1421,31 +1488,55 @@ def run_booking_agent_step(
         state.stage = "collecting_requirements"
         state.summary_emitted = False
 
-    # Best-effort Gemini parser: let the model propose structured updates to
-    # the booking state based on the latest user message (date, city, guests,
-    # budget, sound, etc.). This runs only when we have missing fields, we are
-    # not in general-question mode, and we are past the first user turn, and
-    # it is strictly best-effort with a short timeout.
-    if (
-        not is_first_user_turn
+    return _Turn(
+        state=state,
+        user_messages=user_messages,
+        query_text=query_text,
+        is_first_user_turn=is_first_user_turn,
+        prev_date=prev_date,
+    )
+
+
+def _wants_state_parse(turn: _Turn) -> bool:
+    """Whether the Gemini state parser should run for this turn.
+
+    It runs only when we have missing fields, we are not in general-question
+    mode, and we are past the first user turn; it is strictly best-effort
+    with a short timeout.
+    """
+    state = turn.state
+    return (
+        not turn.is_first_user_turn
         and state.intent != "general_question"
         and (state.city is None or state.date is None or state.guests is None or (state.budget_min is None and state.budget_max is None))
-    ):
-        try:
-            parsed = _call_gemini_parse_state(messages, state)
-            for key, value in parsed.items():
-                # When the user is changing details (modify_brief intent),
-                # we allow Gemini to overwrite previous values. Otherwise we
-                # only fill fields that are currently unset so user overrides
-                # and backend heuristics remain authoritative.
-                if state.intent == "modify_brief":
-                    setattr(state, key, value)
-                else:
-                    if getattr(state, key, None) is None:
-                        setattr(state, key, value)
-        except Exception:
-            # Parsing must never break the agent step.
-            pass
+    )
+
+
+def _apply_parsed_state(state: BookingAgentState, parsed: Dict[str, Any]) -> None:
+    for key, value in parsed.items():
+        # When the user is changing details (modify_brief intent),
+        # we allow Gemini to overwrite previous values. Otherwise we
+        # only fill fields that are currently unset so user overrides
+        # and backend heuristics remain authoritative.
+        if state.intent == "modify_brief":
+            setattr(state, key, value)
+        else:
+            if getattr(state, key, None) is None:
+                setattr(state, key, value)
+
+
+def _finish_turn(
+    db: Session,
+    current_user: DbUser,
+    messages: List[Dict[str, str]],
+    turn: _Turn,
+) -> AgentStepResult:
+    """Search, quote, availability and reply for a turn after the state parse."""
+    state = turn.state
+    user_messages = turn.user_messages
+    query_text = turn.query_text
+    is_first_user_turn = turn.is_first_user_turn
+    prev_date = turn.prev_date
 
     if state.intent == "general_question":
         providers = []
@@ -1994,6 +2085,8 @@ def run_booking_agent_step(
             if "sound" not in state.asked_fields:
                 state.asked_fields.append("sound")
         else:
+            # Return the DB connection while the model writes the reply.
+            release_connection(db)
             messages_out = _call_gemini_reply(
                 messages,
                 state,
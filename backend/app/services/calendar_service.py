@@ -241,6 +241,10 @@ def exchange_code(user_id: int, code: str, redirect_uri: str, db: Session) -> No
         account.last_error = None
         account.last_error_at = None
         account.last_success_sync_at = datetime.now(timezone.utc)
+        # (Re)connected: full background sync on the next calendar_sync tick.
+        account.sync_token = None
+        account.sync_failures = 0
+        account.next_sync_at = None
     except Exception:
         # Best-effort; don't block token persistence on metadata issues.
         pass
@@ -374,3 +378,107 @@ def fetch_events(user_id: int, start: datetime, end: datetime, db: Session) -> L
             except ValueError:
                 continue
     return results
+
+
+# ---- background sync client ----------------------------------------------------
+
+class CalendarAuthError(Exception):
+    """The account's refresh token was rejected; the user must reconnect."""
+
+
+class CalendarSyncTokenExpired(Exception):
+    """Google rejected the stored sync token (HTTP 410); a full sync is needed."""
+
+
+def _rfc3339_z(dt: datetime) -> str:
+    if dt.tzinfo is None or dt.utcoffset() is None:
+        return dt.replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
+    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _http_status(exc: Exception) -> Optional[int]:
+    try:
+        return int(getattr(getattr(exc, "resp", None), "status", None))
+    except (TypeError, ValueError):
+        return None
+
+
+class GoogleCalendarClient:
+    """Calendar v3 calls used by ``calendar_sync``.
+
+    One instance per sync run: the built API service is reused across pages
+    of the same account. Refreshed access tokens are written back to the
+    account (the caller commits).
+    """
+
+    def __init__(self) -> None:
+        self._services: dict[int, Any] = {}
+
+    def _service(self, account: CalendarAccount) -> Any:
+        cached = self._services.get(account.id)
+        if cached is not None:
+            return cached
+        if not _HAS_GOOGLE:
+            raise RuntimeError("Google Calendar libs missing")
+        if not settings.GOOGLE_CLIENT_ID or not settings.GOOGLE_CLIENT_SECRET:
+            raise RuntimeError("Google Calendar credentials not configured")
+        creds = Credentials(
+            token=account.access_token,
+            refresh_token=account.refresh_token,
+            token_uri="https://oauth2.googleapis.com/token",
+            client_id=settings.GOOGLE_CLIENT_ID,
+            client_secret=settings.GOOGLE_CLIENT_SECRET,
+        )
+        if getattr(creds, "expired", False):
+            try:
+                creds.refresh(Request())
+            except RefreshError as exc:
+                raise CalendarAuthError(str(exc)) from exc
+            account.access_token = creds.token
+            account.token_expiry = getattr(creds, "expiry", account.token_expiry)
+        service = build("calendar", "v3", credentials=creds, cache_discovery=False)
+        self._services[account.id] = service
+        return service
+
+    def list_events(
+        self,
+        account: CalendarAccount,
+        *,
+        sync_token: Optional[str] = None,
+        page_token: Optional[str] = None,
+        time_min: Optional[datetime] = None,
+    ) -> dict:
+        """Return one ``events.list`` page (``items``, ``nextPageToken``, ``nextSyncToken``).
+
+        With ``sync_token`` only changes since that token are returned,
+        including cancelled events; otherwise events from ``time_min`` on.
+        """
+        params: dict[str, Any] = {"calendarId": "primary", "singleEvents": True, "maxResults": 2500}
+        if page_token:
+            params["pageToken"] = page_token
+        if sync_token:
+            params["syncToken"] = sync_token
+        elif time_min is not None:
+            params["timeMin"] = _rfc3339_z(time_min)
+        try:
+            return self._service(account).events().list(**params).execute()
+        except HttpError as exc:
+            status = _http_status(exc)
+            if status == 410:
+                raise CalendarSyncTokenExpired(str(exc)) from exc
+            if status == 401:
+                raise CalendarAuthError(str(exc)) from exc
+            raise
+        except RefreshError as exc:
+            raise CalendarAuthError(str(exc)) from exc
+
+    def watch(self, account: CalendarAccount, *, channel_id: str, address: str, token: str, ttl_s: int) -> dict:
+        """Open a push channel on the primary calendar; returns ``resourceId``/``expiration``."""
+        body = {
+            "id": channel_id,
+            "type": "web_hook",
+            "address": address,
+            "token": token,
+            "params": {"ttl": str(int(ttl_s))},
+        }
+        return self._service(account).events().watch(calendarId="primary", body=body).execute()
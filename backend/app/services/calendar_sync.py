@@ -0,0 +1,308 @@
+"""Background Google Calendar sync into ``calendar_busy_days``.
+
+Availability reads must not call Google, so connected calendars are pulled
+into a local table instead:
+
+* The ``calendar_sync`` scheduled job picks accounts whose ``next_sync_at``
+  is due (NULL = now) and syncs up to ``CALENDAR_SYNC_BATCH`` of them on a
+  bounded thread pool (``CALENDAR_SYNC_WORKERS``), one DB session each.
+* The first sync lists events from ``CALENDAR_SYNC_LOOKBACK_DAYS`` ago and
+  replaces the account's rows; later syncs send the stored ``nextSyncToken``
+  and apply only changed/cancelled events. A rejected token (HTTP 410) falls
+  back to a full sync.
+* Healthy accounts are re-synced every ``CALENDAR_SYNC_INTERVAL`` seconds.
+  Failures back off exponentially per account (``CALENDAR_SYNC_BACKOFF_BASE``
+  doubling up to ``CALENDAR_SYNC_BACKOFF_MAX``); revoked tokens mark the
+  account ``needs_reauth`` and wait the maximum.
+* When ``CALENDAR_WEBHOOK_URL`` is set, each account keeps a Google push
+  channel open; notifications (:func:`handle_push_notification`) mark the
+  account due so changes land on the next tick instead of the next interval.
+
+The Google client is injectable (``client_factory``); tests use the fake in
+``tests/google_mocks.py``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import os
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy import case, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import CalendarAccount, CalendarBusyDay, CalendarProvider
+from app.services.calendar_service import CalendarAuthError, CalendarSyncTokenExpired, GoogleCalendarClient
+from app.utils.metrics import incr as metrics_incr
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    try:
+        return max(minimum, int(os.getenv(name) or default))
+    except Exception:
+        return default
+
+
+SYNC_INTERVAL_S = _env_int("CALENDAR_SYNC_INTERVAL", 900, 60)
+SYNC_BATCH = _env_int("CALENDAR_SYNC_BATCH", 50, 1)
+SYNC_WORKERS = _env_int("CALENDAR_SYNC_WORKERS", 4, 1)
+BACKOFF_BASE_S = _env_int("CALENDAR_SYNC_BACKOFF_BASE", 60, 1)
+BACKOFF_MAX_S = _env_int("CALENDAR_SYNC_BACKOFF_MAX", 21600, 60)
+LOOKBACK_DAYS = _env_int("CALENDAR_SYNC_LOOKBACK_DAYS", 1, 0)
+CHANNEL_TTL_S = _env_int("CALENDAR_CHANNEL_TTL", 7 * 86400, 3600)
+WEBHOOK_URL = (os.getenv("CALENDAR_WEBHOOK_URL") or "").strip()
+
+_DELETE_CHUNK = 500
+
+
+def _event_day(item: Dict[str, Any]) -> Optional[date]:
+    start = item.get("start") or {}
+    raw = start.get("dateTime") or start.get("date")
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(str(raw).replace("Z", "+00:00")).date()
+    except ValueError:
+        return None
+
+
+def _replace_rows(db: Session, account: CalendarAccount, days: Dict[str, date], gone: Set[str], full: bool) -> None:
+    rows = db.query(CalendarBusyDay).filter(CalendarBusyDay.account_id == account.id)
+    if full:
+        rows.delete(synchronize_session=False)
+    else:
+        stale = sorted(gone | set(days))
+        for i in range(0, len(stale), _DELETE_CHUNK):
+            rows.filter(CalendarBusyDay.event_id.in_(stale[i : i + _DELETE_CHUNK])).delete(
+                synchronize_session=False
+            )
+    db.bulk_insert_mappings(
+        CalendarBusyDay,
+        [
+            {"account_id": account.id, "user_id": account.user_id, "event_id": event_id, "day": day}
+            for event_id, day in days.items()
+        ],
+    )
+
+
+def _pull(db: Session, account: CalendarAccount, client: Any, now: datetime) -> int:
+    full = not account.sync_token
+    days: Dict[str, date] = {}
+    gone: Set[str] = set()
+    page_token: Optional[str] = None
+    while True:
+        page = client.list_events(
+            account,
+            sync_token=None if full else account.sync_token,
+            page_token=page_token,
+            time_min=now - timedelta(days=LOOKBACK_DAYS) if full else None,
+        )
+        for item in page.get("items") or []:
+            event_id = item.get("id")
+            if not event_id:
+                continue
+            day = None if item.get("status") == "cancelled" else _event_day(item)
+            if day is None:
+                days.pop(event_id, None)
+                gone.add(event_id)
+            else:
+                days[event_id] = day
+                gone.discard(event_id)
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+    # Rows change only once every page arrived, so a failed sync leaves the
+    # previous snapshot in place.
+    _replace_rows(db, account, days, gone, full)
+    account.sync_token = page.get("nextSyncToken") or None
+    return len(days) + len(gone)
+
+
+def sync_account(db: Session, account: CalendarAccount, client: Any, now: Optional[datetime] = None) -> int:
+    """Pull the account's changes into ``calendar_busy_days``; return events applied.
+
+    Raises the client's errors; the caller records failures and commits.
+    """
+    now = now or datetime.utcnow()
+    try:
+        return _pull(db, account, client, now)
+    except CalendarSyncTokenExpired:
+        logger.info("Calendar sync token expired for account %s; running full sync", account.id)
+        account.sync_token = None
+        return _pull(db, account, client, now)
+
+
+def channel_token(channel_id: str) -> str:
+    """Verification token Google echoes back on every push for ``channel_id``."""
+    key = settings.SECRET_KEY.encode("utf-8")
+    return hmac.new(key, f"calendar-channel:{channel_id}".encode("utf-8"), hashlib.sha256).hexdigest()[:40]
+
+
+def _ensure_channel(account: CalendarAccount, client: Any, now: datetime) -> None:
+    """Open or renew the account's push channel when a webhook URL is configured."""
+    if not WEBHOOK_URL:
+        return
+    if account.channel_id and account.channel_expires_at and account.channel_expires_at > now + timedelta(days=1):
+        return
+    channel_id = uuid.uuid4().hex
+    resp = client.watch(
+        account,
+        channel_id=channel_id,
+        address=WEBHOOK_URL,
+        token=channel_token(channel_id),
+        ttl_s=CHANNEL_TTL_S,
+    )
+    expires = now + timedelta(seconds=CHANNEL_TTL_S)
+    try:
+        if resp.get("expiration"):
+            expires = datetime.utcfromtimestamp(int(resp["expiration"]) / 1000.0)
+    except Exception:
+        pass
+    account.channel_id = channel_id
+    account.channel_resource_id = resp.get("resourceId")
+    account.channel_expires_at = expires
+
+
+def _backoff_s(failures: int) -> float:
+    delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** max(0, failures - 1)))
+    return delay * (1.0 + random.uniform(0.0, 0.1))
+
+
+def _record_failure(account: CalendarAccount, status: str, error: str, now: datetime) -> None:
+    account.sync_failures = int(account.sync_failures or 0) + 1
+    account.status = status
+    account.last_error = error
+    account.last_error_at = datetime.now(timezone.utc)
+    delay = BACKOFF_MAX_S if status == "needs_reauth" else _backoff_s(account.sync_failures)
+    account.next_sync_at = now + timedelta(seconds=delay)
+
+
+def sync_account_by_id(
+    account_id: int,
+    client: Any,
+    session_factory: Optional[Callable[[], Session]] = None,
+    now: Optional[datetime] = None,
+) -> bool:
+    """Sync one account on its own session, recording success or backoff."""
+    if session_factory is None:
+        from app.database import SessionLocal as session_factory
+    now = now or datetime.utcnow()
+    with session_factory() as db:
+        account = db.get(CalendarAccount, account_id)
+        if account is None:
+            return False
+        try:
+            applied = sync_account(db, account, client, now)
+            account.status = "ok"
+            account.last_error = None
+            account.last_error_at = None
+            account.last_success_sync_at = datetime.now(timezone.utc)
+            account.sync_failures = 0
+            account.next_sync_at = now + timedelta(seconds=SYNC_INTERVAL_S)
+            try:
+                _ensure_channel(account, client, now)
+            except Exception as exc:
+                # Push is an optimization; periodic sync still covers the account.
+                logger.warning("Could not open calendar push channel for account %s: %s", account_id, exc)
+            db.commit()
+            metrics_incr("calendar_sync.synced")
+            metrics_incr("calendar_sync.events", applied)
+            return True
+        except CalendarAuthError as exc:
+            logger.warning("Calendar account %s needs re-auth: %s", account_id, exc)
+            status, error = "needs_reauth", "refresh_failed"
+        except Exception as exc:
+            logger.warning("Calendar sync failed for account %s: %s", account_id, exc)
+            status, error = "error", "api_error"
+        db.rollback()
+        account = db.get(CalendarAccount, account_id)
+        if account is not None:
+            _record_failure(account, status, error, now)
+            db.commit()
+        metrics_incr("calendar_sync.failed", tags={"status": status})
+        return False
+
+
+def sync_due_accounts(
+    client_factory: Callable[[], Any] = GoogleCalendarClient,
+    session_factory: Optional[Callable[[], Session]] = None,
+    now: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> int:
+    """Sync accounts that are due on a bounded worker pool; return successes."""
+    if session_factory is None:
+        from app.database import SessionLocal as session_factory
+    now = now or datetime.utcnow()
+    with session_factory() as db:
+        ids = [
+            account_id
+            for account_id, in db.query(CalendarAccount.id)
+            .filter(
+                CalendarAccount.provider == CalendarProvider.GOOGLE,
+                or_(CalendarAccount.next_sync_at.is_(None), CalendarAccount.next_sync_at <= now),
+            )
+            .order_by(
+                case((CalendarAccount.next_sync_at.is_(None), 0), else_=1),
+                CalendarAccount.next_sync_at,
+                CalendarAccount.id,
+            )
+            .limit(limit or SYNC_BATCH)
+            .all()
+        ]
+    if not ids:
+        return 0
+
+    def run(account_id: int) -> bool:
+        try:
+            return sync_account_by_id(account_id, client_factory(), session_factory, now)
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.exception("Calendar sync worker crashed for account %s: %s", account_id, exc)
+            return False
+
+    with ThreadPoolExecutor(max_workers=min(SYNC_WORKERS, len(ids)), thread_name_prefix="calendar-sync") as pool:
+        return sum(1 for ok in pool.map(run, ids) if ok)
+
+
+def calendar_sync_job() -> None:
+    """Scheduled entry point (``calendar_sync``)."""
+    synced = sync_due_accounts()
+    if synced:
+        logger.info("Calendar sync refreshed %s accounts", synced)
+
+
+def mark_account_due(account: CalendarAccount) -> None:
+    """Make the next job tick sync ``account`` (caller commits)."""
+    account.next_sync_at = None
+
+
+def handle_push_notification(db: Session, channel_id: str, token: str, resource_state: str) -> bool:
+    """Apply a Google push notification; returns whether it was accepted."""
+    if not channel_id or not token or not hmac.compare_digest(str(token), channel_token(channel_id)):
+        return False
+    account = db.query(CalendarAccount).filter(CalendarAccount.channel_id == channel_id).first()
+    if account is None:
+        return False
+    if resource_state != "sync":  # "sync" is only the channel handshake
+        mark_account_due(account)
+        db.commit()
+    return True
+
+
+__all__ = [
+    "calendar_sync_job",
+    "channel_token",
+    "handle_push_notification",
+    "mark_account_due",
+    "sync_account",
+    "sync_account_by_id",
+    "sync_due_accounts",
+]
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from typing import Optional
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Union
+import asyncio
 import logging
+import threading
+import time
 
 from app.core.config import settings
 
@@ -16,6 +20,17 @@ except Exception:
 
 
 _GENAI_CLIENT: Optional["genai.Client"] = None
+_OVERRIDE_CLIENT: Any = None
+
+
+def set_genai_client(client: Any) -> None:
+    """Serve ``client`` from :func:`get_genai_client` (``None`` restores Gemini).
+
+    Used by tests and benchmarks to install a :class:`FakeGenAIClient`; the
+    override applies even when no API key is configured.
+    """
+    global _OVERRIDE_CLIENT
+    _OVERRIDE_CLIENT = client
 
 
 def get_genai_client() -> Optional["genai.Client"]:
@@ -25,6 +40,8 @@ def get_genai_client() -> Optional["genai.Client"]:
     us a hard per-request timeout so slow LLM calls cannot stall the agent.
     """
     global _GENAI_CLIENT
+    if _OVERRIDE_CLIENT is not None:
+        return _OVERRIDE_CLIENT
     api_key = (getattr(settings, "GOOGLE_GENAI_API_KEY", "") or "").strip()
     if not api_key:
         return None
@@ -44,3 +61,67 @@ def get_genai_client() -> Optional["genai.Client"]:
             ),
         )
     return _GENAI_CLIENT
+
+
+class _FakeResponse:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _FakeModels:
+    def __init__(self, owner: "FakeGenAIClient") -> None:
+        self._owner = owner
+
+    def generate_content(self, *, model: str, contents: Any) -> _FakeResponse:
+        with self._owner._call(contents):
+            if self._owner.delay_s:
+                time.sleep(self._owner.delay_s)
+            return _FakeResponse(self._owner._answer(contents))
+
+
+class _FakeAsyncModels(_FakeModels):
+    async def generate_content(self, *, model: str, contents: Any) -> _FakeResponse:  # type: ignore[override]
+        with self._owner._call(contents):
+            if self._owner.delay_s:
+                await asyncio.sleep(self._owner.delay_s)
+            return _FakeResponse(self._owner._answer(contents))
+
+
+class _FakeAio:
+    def __init__(self, owner: "FakeGenAIClient") -> None:
+        self.models = _FakeAsyncModels(owner)
+
+
+class FakeGenAIClient:
+    """In-process stand-in for ``genai.Client`` (sync and ``.aio`` models).
+
+    ``reply`` is the response text, or a function of the prompt returning it.
+    Each call sleeps ``delay_s`` (``asyncio.sleep`` on the async surface).
+    ``prompts`` records every prompt and ``max_in_flight`` the peak number of
+    concurrent calls, so tests and benchmarks can assert on gating.
+    """
+
+    def __init__(self, reply: Union[str, Callable[[str], str]] = "{}", delay_s: float = 0.0) -> None:
+        self.reply = reply
+        self.delay_s = delay_s
+        self.prompts: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.models = _FakeModels(self)
+        self.aio = _FakeAio(self)
+
+    def _answer(self, contents: Any) -> str:
+        return self.reply(str(contents)) if callable(self.reply) else str(self.reply)
+
+    @contextmanager
+    def _call(self, contents: Any) -> Iterator[None]:
+        with self._lock:
+            self.prompts.append(str(contents))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
@@ -6,7 +6,10 @@ Provides a single entrypoint `geocode_address(address)` that returns a
 - Prefers the `GOOGLE_MAPS_API_KEY` env but will also fall back to
   `NEXT_PUBLIC_GOOGLE_MAPS_API_KEY` so deployments that already have a
   frontend key configured can reuse it on the backend.
-- Uses Redis for coarse caching keyed by the normalized address string.
+- Caches by the normalized address string (case and whitespace folded) in
+  an in-process tier in front of Redis, so repeated search terms such as
+  "Cape Town" resolve without a network hop. Addresses Google reports as
+  unknown are cached briefly too, so typos do not re-query on every search.
 - Fails fast and returns `None` when:
   - No API key is configured,
   - The Google Geocoding API is unreachable or returns no results.
@@ -15,16 +18,34 @@ Provides a single entrypoint `geocode_address(address)` that returns a
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Tuple
 import logging
 import os
 
 import httpx
 
 from app.utils.redis_cache import get_redis_client
+from app.utils.tiered_cache import TieredCache
 
 logger = logging.getLogger(__name__)
 
+try:
+    GEOCODE_CACHE_TTL = max(1, int(os.getenv("GEOCODE_CACHE_TTL") or 86400))
+except Exception:
+    GEOCODE_CACHE_TTL = 86400
+try:
+    GEOCODE_NEGATIVE_TTL = max(0, int(os.getenv("GEOCODE_NEGATIVE_TTL") or 600))
+except Exception:
+    GEOCODE_NEGATIVE_TTL = 600
+try:
+    GEOCODE_L1_TTL = max(0.0, float(os.getenv("GEOCODE_L1_TTL") or 3600.0))
+except Exception:
+    GEOCODE_L1_TTL = 3600.0
+
+# Cached marker for "Google knows no such place".
+_NO_RESULT = "none"
+_geocode_cache = TieredCache("geocode", ttl=GEOCODE_L1_TTL, stale_ttl=0.0)
+
 
 @dataclass
 class GeocodeResult:
@@ -33,7 +54,45 @@ class GeocodeResult:
 
 
 def _cache_key(address: str) -> str:
-    return f"geo:addr:{address.strip().lower()}"
+    return f"geo:addr:{' '.join(address.split()).lower()}"
+
+
+def _redis_get(key: str) -> Optional[str]:
+    try:
+        return get_redis_client().get(key)
+    except Exception:
+        # Cache failures should never break geocoding
+        return None
+
+
+def _cached(key: str) -> Tuple[bool, Optional[GeocodeResult]]:
+    """Return ``(hit, result)``; a hit with ``None`` is a cached "not found"."""
+    raw = _geocode_cache.get(key, lambda: _redis_get(key))
+    if not raw:
+        return False, None
+    if raw == _NO_RESULT:
+        return True, None
+    try:
+        lat_s, lng_s = raw.split(",")
+        return True, GeocodeResult(lat=float(lat_s), lng=float(lng_s))
+    except Exception:
+        # Ignore malformed cache entries and fall through to live lookup
+        return False, None
+
+
+def _store(key: str, result: Optional[GeocodeResult]) -> None:
+    if result is None:
+        raw, ttl = _NO_RESULT, GEOCODE_NEGATIVE_TTL
+    else:
+        raw, ttl = f"{result.lat},{result.lng}", GEOCODE_CACHE_TTL
+    if ttl <= 0:
+        return
+    _geocode_cache.put_local(key, raw, ttl)
+    _geocode_cache.filled(key)
+    try:
+        get_redis_client().setex(key, ttl, raw)
+    except Exception:
+        pass
 
 
 async def geocode_address_async(address: str) -> Optional[GeocodeResult]:
@@ -46,20 +105,10 @@ async def geocode_address_async(address: str) -> Optional[GeocodeResult]:
     if not address or not address.strip():
         return None
 
-    client = get_redis_client()
     key = _cache_key(address)
-    try:
-        cached = client.get(key)
-        if cached:
-            try:
-                lat_s, lng_s = cached.split(",")
-                return GeocodeResult(lat=float(lat_s), lng=float(lng_s))
-            except Exception:
-                # Ignore malformed cache entries and fall through to live lookup
-                pass
-    except Exception:
-        # Cache failures should never break geocoding
-        pass
+    hit, cached = _cached(key)
+    if hit:
+        return cached
 
     api_key = (
         os.getenv("GOOGLE_MAPS_API_KEY")
@@ -88,6 +137,8 @@ async def geocode_address_async(address: str) -> Optional[GeocodeResult]:
             data = res.json()
         results = data.get("results") or []
         if not results:
+            if data.get("status") == "ZERO_RESULTS":
+                _store(key, None)
             return None
         loc = (results[0].get("geometry") or {}).get("location") or {}
         lat = loc.get("lat")
@@ -95,12 +146,9 @@ async def geocode_address_async(address: str) -> Optional[GeocodeResult]:
         if lat is None or lng is None:
             return None
         result = GeocodeResult(lat=float(lat), lng=float(lng))
-        try:
-            # Cache for 24h; addresses change rarely and can be refreshed
-            # naturally by eviction or manual invalidation.
-            client.setex(key, 86400, f"{result.lat},{result.lng}")
-        except Exception:
-            pass
+        # Cache for 24h by default; addresses change rarely and can be
+        # refreshed naturally by eviction or manual invalidation.
+        _store(key, result)
         return result
     except Exception as exc:
         logger.warning("Geocoding failed for address %r: %s", address, exc)
@@ -116,6 +164,13 @@ def geocode_address(address: str) -> Optional[GeocodeResult]:
     """
     if not address or not address.strip():
         return None
+    try:
+        # Cache hits skip spinning up an event loop for the async lookup.
+        hit, cached = _cached(_cache_key(address))
+        if hit:
+            return cached
+    except Exception:
+        pass
     try:
         import anyio
 
@@ -0,0 +1,607 @@
+"""Durable background job queue.
+
+Side effects that must survive a deploy (SMS, WhatsApp, email) are enqueued
+as ``(kind, payload)`` rows and executed by a ``JobWorker``. Handlers are
+plain sync functions registered with :func:`job_kind`; the payload is passed
+as keyword arguments, so it must be JSON-serialisable.
+
+Backends (``JOB_QUEUE_BACKEND``):
+  - db (default): ``background_jobs`` table; workers claim due rows with
+    ``FOR UPDATE SKIP LOCKED`` and hold them for a visibility timeout, so a
+    crashed worker's jobs are picked up again once the lock lapses
+  - local: in-process stand-in (tests, scripts without a database)
+
+Failed jobs are rescheduled by moving ``run_at`` forward with exponential
+backoff; nothing sleeps while waiting. Each kind has its own concurrency
+limit. A worker claims every kind with free capacity in one statement per
+poll, and an idle worker doubles its poll interval up to
+``JOB_POLL_MAX_INTERVAL`` (in-process enqueues wake it at once). The API runs
+an embedded worker unless ``JOB_WORKER_EMBEDDED=0``; dedicated workers run
+``scripts/workers/job_worker.py``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, delete, func, or_, select, update
+
+from app.models.background_job import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+
+# app.utils imports the email module, which registers job kinds here, so the
+# metrics helpers are resolved lazily to keep the import order free.
+def metrics_incr(name: str, value: int = 1, tags: Optional[dict] = None) -> None:
+    from app.utils.metrics import incr
+
+    incr(name, value, tags=tags)
+
+
+def metrics_timing(name: str, ms: float, tags: Optional[dict] = None) -> None:
+    from app.utils.metrics import timing_ms
+
+    timing_ms(name, ms, tags=tags)
+
+try:
+    POLL_INTERVAL_S = max(0.05, float(os.getenv("JOB_POLL_INTERVAL") or 1.0))
+except Exception:
+    POLL_INTERVAL_S = 1.0
+try:
+    POLL_MAX_INTERVAL_S = max(POLL_INTERVAL_S, float(os.getenv("JOB_POLL_MAX_INTERVAL") or 30.0))
+except Exception:
+    POLL_MAX_INTERVAL_S = max(POLL_INTERVAL_S, 30.0)
+try:
+    VISIBILITY_TIMEOUT_S = max(5.0, float(os.getenv("JOB_VISIBILITY_TIMEOUT") or 300.0))
+except Exception:
+    VISIBILITY_TIMEOUT_S = 300.0
+try:
+    RESULT_TTL_S = max(60.0, float(os.getenv("JOB_RESULT_TTL") or 86400.0))
+except Exception:
+    RESULT_TTL_S = 86400.0
+try:
+    DEAD_TTL_S = max(60.0, float(os.getenv("JOB_DEAD_TTL") or 7 * 86400.0))
+except Exception:
+    DEAD_TTL_S = 7 * 86400.0
+
+# Modules whose import registers job kinds; workers load them on start.
+JOB_MODULES = ("app.utils.notifications", "app.utils.email")
+
+
+# ---- job kinds ---------------------------------------------------------------------
+
+@dataclass
+class JobKind:
+    name: str
+    func: Callable[..., Any]
+    concurrency: int = 4
+    max_attempts: int = 5
+    backoff_s: float = 5.0
+    backoff_max_s: float = 900.0
+    visibility_timeout_s: float = VISIBILITY_TIMEOUT_S
+
+    def retry_delay(self, attempts: int) -> float:
+        base = min(self.backoff_max_s, self.backoff_s * (2 ** max(0, attempts - 1)))
+        return base + random.uniform(0, base * 0.1)
+
+
+_KINDS: Dict[str, JobKind] = {}
+
+
+def job_kind(
+    name: str,
+    *,
+    concurrency: int = 4,
+    max_attempts: int = 5,
+    backoff_s: float = 5.0,
+    backoff_max_s: float = 900.0,
+    visibility_timeout_s: Optional[float] = None,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Register the decorated function as the handler for ``name`` jobs."""
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        _KINDS[name] = JobKind(
+            name=name,
+            func=func,
+            concurrency=max(1, int(concurrency)),
+            max_attempts=max(1, int(max_attempts)),
+            backoff_s=float(backoff_s),
+            backoff_max_s=float(backoff_max_s),
+            visibility_timeout_s=float(visibility_timeout_s or VISIBILITY_TIMEOUT_S),
+        )
+        return func
+
+    return decorator
+
+
+def load_job_kinds() -> Dict[str, JobKind]:
+    for module in JOB_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception as exc:  # pragma: no cover - optional deps
+            logger.warning("job kinds from %s unavailable: %s", module, exc)
+    return dict(_KINDS)
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        json.dumps(value)
+        return value
+    except Exception:
+        return str(value)
+
+
+# ---- stores ------------------------------------------------------------------------
+
+class DbJobStore:
+    """``background_jobs`` table. Every method uses its own short session."""
+
+    def __init__(self, session_factory: Optional[Callable[[], Any]] = None) -> None:
+        self._session_factory = session_factory
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.database import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def add(self, kind: str, payload: dict, run_at: datetime, max_attempts: int, db=None) -> int:  # noqa: ANN001
+        row = BackgroundJob(kind=kind, payload=payload, run_at=run_at, max_attempts=max_attempts, status="queued")
+        if db is not None:
+            # Joins the caller's transaction: the job exists iff they commit.
+            db.add(row)
+            db.flush()
+            return int(row.id)
+        with self._session() as session:
+            session.add(row)
+            session.commit()
+            return int(row.id)
+
+    def claim(self, kind: str, limit: int, worker_id: str, now: datetime, visibility_s: float) -> List[ClaimedJob]:
+        return self.claim_many({kind: limit}, worker_id, now, {kind: visibility_s})
+
+    def claim_many(
+        self, limits: Dict[str, int], worker_id: str, now: datetime, visibility_s: Dict[str, float]
+    ) -> List[ClaimedJob]:
+        """Claim up to ``limits[kind]`` due jobs of each kind in one statement."""
+        limits = {k: n for k, n in limits.items() if n > 0}
+        if not limits:
+            return []
+        t = BackgroundJob.__table__
+        due = or_(
+            and_(t.c.status == "queued", t.c.run_at <= now),
+            # Lapsed lock: the previous worker died mid-job.
+            and_(t.c.status == "running", t.c.locked_until <= now, t.c.attempts < t.c.max_attempts),
+        )
+        # One locked id subquery per kind keeps each kind's limit exact.
+        picks = [
+            t.c.id.in_(
+                select(t.c.id)
+                .where(t.c.kind == kind, due)
+                .order_by(t.c.run_at.asc())
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            for kind, limit in limits.items()
+        ]
+        locked_until = case(
+            *[(t.c.kind == kind, now + timedelta(seconds=visibility_s[kind])) for kind in limits],
+            else_=now + timedelta(seconds=VISIBILITY_TIMEOUT_S),
+        )
+        stmt = (
+            update(t)
+            .where(or_(*picks))
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_until=locked_until,
+                attempts=t.c.attempts + 1,
+                updated_at=now,
+            )
+            .returning(t.c.id, t.c.kind, t.c.payload, t.c.attempts, t.c.max_attempts)
+        )
+        with self._session() as session:
+            rows = session.execute(stmt).fetchall()
+            session.commit()
+        return [ClaimedJob(int(r[0]), r[1], r[2] or {}, int(r[3]), int(r[4])) for r in rows]
+
+    def _finish(self, job_id: int, worker_id: str, values: dict) -> bool:
+        t = BackgroundJob.__table__
+        with self._session() as session:
+            res = session.execute(
+                update(t)
+                .where(t.c.id == job_id, t.c.status == "running", t.c.locked_by == worker_id)
+                .values(locked_until=None, **values)
+            )
+            session.commit()
+            return bool(res.rowcount)
+
+    def complete(self, job_id: int, worker_id: str, result: Any, now: datetime) -> bool:
+        return self._finish(
+            job_id, worker_id, {"status": "succeeded", "result": result, "last_error": None, "finished_at": now, "updated_at": now}
+        )
+
+    def retry(self, job_id: int, worker_id: str, error: str, run_at: datetime, now: datetime) -> bool:
+        return self._finish(
+            job_id, worker_id, {"status": "queued", "run_at": run_at, "last_error": error, "locked_by": None, "updated_at": now}
+        )
+
+    def bury(self, job_id: int, worker_id: str, error: str, now: datetime) -> bool:
+        return self._finish(job_id, worker_id, {"status": "dead", "last_error": error, "finished_at": now, "updated_at": now})
+
+    def cleanup(self, now: datetime, result_ttl_s: float = RESULT_TTL_S, dead_ttl_s: float = DEAD_TTL_S) -> dict:
+        t = BackgroundJob.__table__
+        with self._session() as session:
+            # Out of attempts with a lapsed lock: nobody will claim it again.
+            abandoned = session.execute(
+                update(t)
+                .where(t.c.status == "running", t.c.locked_until <= now, t.c.attempts >= t.c.max_attempts)
+                .values(status="dead", last_error="visibility timeout", finished_at=now, locked_until=None, updated_at=now)
+            ).rowcount
+            succeeded = session.execute(
+                delete(t).where(t.c.status == "succeeded", t.c.finished_at < now - timedelta(seconds=result_ttl_s))
+            ).rowcount
+            dead = session.execute(
+                delete(t).where(t.c.status == "dead", t.c.finished_at < now - timedelta(seconds=dead_ttl_s))
+            ).rowcount
+            session.commit()
+        return {"jobs_abandoned": int(abandoned or 0), "jobs_purged": int(succeeded or 0) + int(dead or 0)}
+
+    def get(self, job_id: int) -> Optional[dict]:
+        with self._session() as session:
+            row = session.get(BackgroundJob, job_id)
+            if row is None:
+                return None
+            return {
+                "id": int(row.id),
+                "kind": row.kind,
+                "payload": row.payload,
+                "status": row.status,
+                "attempts": row.attempts,
+                "max_attempts": row.max_attempts,
+                "run_at": row.run_at,
+                "last_error": row.last_error,
+                "result": row.result,
+                "finished_at": row.finished_at,
+            }
+
+    def stats(self) -> dict:
+        t = BackgroundJob.__table__
+        with self._session() as session:
+            rows = session.execute(select(t.c.kind, t.c.status, func.count()).group_by(t.c.kind, t.c.status)).fetchall()
+        out: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in rows:
+            out.setdefault(kind, {})[status] = int(count)
+        return out
+
+
+class LocalJobStore:
+    """In-process stand-in with the same semantics as :class:`DbJobStore`."""
+
+    def __init__(self) -> None:
+        self._rows: Dict[int, dict] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, payload: dict, run_at: datetime, max_attempts: int, db=None) -> int:  # noqa: ANN001
+        with self._lock:
+            job_id = next(self._ids)
+            self._rows[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "payload": payload,
+                "status": "queued",
+                "attempts": 0,
+                "max_attempts": max_attempts,
+                "run_at": run_at,
+                "locked_by": None,
+                "locked_until": None,
+                "last_error": None,
+                "result": None,
+                "finished_at": None,
+            }
+            return job_id
+
+    def claim(self, kind: str, limit: int, worker_id: str, now: datetime, visibility_s: float) -> List[ClaimedJob]:
+        return self.claim_many({kind: limit}, worker_id, now, {kind: visibility_s})
+
+    def claim_many(
+        self, limits: Dict[str, int], worker_id: str, now: datetime, visibility_s: Dict[str, float]
+    ) -> List[ClaimedJob]:
+        with self._lock:
+            due = [
+                r
+                for r in self._rows.values()
+                if limits.get(r["kind"], 0) > 0
+                and (
+                    (r["status"] == "queued" and r["run_at"] <= now)
+                    or (r["status"] == "running" and r["locked_until"] <= now and r["attempts"] < r["max_attempts"])
+                )
+            ]
+            due.sort(key=lambda r: r["run_at"])
+            taken: Dict[str, int] = {}
+            claimed = []
+            for r in due:
+                kind = r["kind"]
+                if taken.get(kind, 0) >= limits[kind]:
+                    continue
+                taken[kind] = taken.get(kind, 0) + 1
+                r.update(status="running", locked_by=worker_id, locked_until=now + timedelta(seconds=visibility_s[kind]))
+                r["attempts"] += 1
+                claimed.append(ClaimedJob(r["id"], kind, r["payload"] or {}, r["attempts"], r["max_attempts"]))
+            return claimed
+
+    def _finish(self, job_id: int, worker_id: str, values: dict) -> bool:
+        with self._lock:
+            r = self._rows.get(job_id)
+            if r is None or r["status"] != "running" or r["locked_by"] != worker_id:
+                return False
+            r.update(locked_until=None, **values)
+            return True
+
+    def complete(self, job_id: int, worker_id: str, result: Any, now: datetime) -> bool:
+        return self._finish(job_id, worker_id, {"status": "succeeded", "result": result, "last_error": None, "finished_at": now})
+
+    def retry(self, job_id: int, worker_id: str, error: str, run_at: datetime, now: datetime) -> bool:
+        return self._finish(job_id, worker_id, {"status": "queued", "run_at": run_at, "last_error": error, "locked_by": None})
+
+    def bury(self, job_id: int, worker_id: str, error: str, now: datetime) -> bool:
+        return self._finish(job_id, worker_id, {"status": "dead", "last_error": error, "finished_at": now})
+
+    def cleanup(self, now: datetime, result_ttl_s: float = RESULT_TTL_S, dead_ttl_s: float = DEAD_TTL_S) -> dict:
+        abandoned = purged = 0
+        with self._lock:
+            for job_id, r in list(self._rows.items()):
+                if r["status"] == "running" and r["locked_until"] <= now and r["attempts"] >= r["max_attempts"]:
+                    r.update(status="dead", last_error="visibility timeout", finished_at=now, locked_until=None)
+                    abandoned += 1
+                ttl = {"succeeded": result_ttl_s, "dead": dead_ttl_s}.get(r["status"])
+                if ttl is not None and r["finished_at"] < now - timedelta(seconds=ttl):
+                    del self._rows[job_id]
+                    purged += 1
+        return {"jobs_abandoned": abandoned, "jobs_purged": purged}
+
+    def get(self, job_id: int) -> Optional[dict]:
+        with self._lock:
+            r = self._rows.get(job_id)
+            return dict(r) if r is not None else None
+
+    def stats(self) -> dict:
+        out: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for r in self._rows.values():
+                by_status = out.setdefault(r["kind"], {})
+                by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+        return out
+
+
+_store: Any = None
+_wakeups: List[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+
+def get_store():
+    global _store
+    if _store is None:
+        mode = (os.getenv("JOB_QUEUE_BACKEND") or "db").strip().lower()
+        _store = LocalJobStore() if mode == "local" else DbJobStore()
+    return _store
+
+
+def _wake_local_workers() -> None:
+    for loop, event in list(_wakeups):
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:  # loop closed
+            pass
+
+
+def enqueue(
+    kind: str,
+    payload: Optional[dict] = None,
+    *,
+    delay_s: float = 0.0,
+    max_attempts: Optional[int] = None,
+    db=None,  # noqa: ANN001
+) -> Optional[int]:
+    """Persist a ``kind`` job and return its id (``None`` if enqueue failed).
+
+    With ``db`` the job is added to the caller's session and only becomes
+    visible when the caller commits.
+    """
+    spec = _KINDS.get(kind)
+    attempts = max_attempts or (spec.max_attempts if spec else 5)
+    try:
+        job_id = get_store().add(kind, payload or {}, _utcnow() + timedelta(seconds=delay_s), attempts, db=db)
+    except Exception as exc:
+        logger.warning("job enqueue failed kind=%s: %s", kind, exc)
+        metrics_incr("jobs.enqueue_failed", tags={"kind": kind})
+        return None
+    metrics_incr("jobs.enqueued", tags={"kind": kind})
+    if db is None:
+        _wake_local_workers()
+    return job_id
+
+
+def cleanup_jobs() -> dict:
+    """Scheduler job: purge finished jobs past their retention."""
+    return get_store().cleanup(_utcnow())
+
+
+def stats() -> dict:
+    return get_store().stats()
+
+
+# ---- worker ------------------------------------------------------------------------
+
+class JobWorker:
+    def __init__(
+        self,
+        store: Any = None,
+        kinds: Optional[Iterable[str]] = None,
+        worker_id: Optional[str] = None,
+        poll_interval_s: float = POLL_INTERVAL_S,
+        max_poll_interval_s: float = POLL_MAX_INTERVAL_S,
+    ) -> None:
+        self._store = store
+        self._kind_names = set(kinds) if kinds is not None else None
+        self.worker_id = worker_id or f"{os.getenv('INSTANCE_ID') or 'worker'}-{os.getpid()}-{os.urandom(3).hex()}"
+        self.poll_interval_s = poll_interval_s
+        self.max_poll_interval_s = max(poll_interval_s, max_poll_interval_s)
+        self._inflight: Dict[str, int] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = get_store()
+        return self._store
+
+    def _kinds(self) -> Dict[str, JobKind]:
+        if self._kind_names is None:
+            return dict(_KINDS)
+        return {name: spec for name, spec in _KINDS.items() if name in self._kind_names}
+
+    def inflight(self, kind: str) -> int:
+        return self._inflight.get(kind, 0)
+
+    async def run_once(self) -> int:
+        """Claim due jobs up to each kind's free capacity and start them."""
+        kinds = self._kinds()
+        limits = {name: spec.concurrency - self._inflight.get(name, 0) for name, spec in kinds.items()}
+        limits = {name: free for name, free in limits.items() if free > 0}
+        if not limits:
+            return 0
+        visibility = {name: kinds[name].visibility_timeout_s for name in limits}
+        jobs = await asyncio.to_thread(self.store.claim_many, limits, self.worker_id, _utcnow(), visibility)
+        for job in jobs:
+            self._inflight[job.kind] = self._inflight.get(job.kind, 0) + 1
+            task = asyncio.create_task(self._execute(kinds[job.kind], job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return len(jobs)
+
+    async def _execute(self, spec: JobKind, job: ClaimedJob) -> None:
+        tags = {"kind": spec.name}
+        t0 = time.perf_counter()
+        try:
+            try:
+                result = await asyncio.to_thread(spec.func, **(job.payload or {}))
+            except Exception as exc:
+                await asyncio.to_thread(self._handle_failure, spec, job, exc)
+            else:
+                await asyncio.to_thread(self.store.complete, job.id, self.worker_id, _jsonable(result), _utcnow())
+                metrics_incr("jobs.succeeded", tags=tags)
+        except Exception as exc:
+            # Store unavailable: the visibility timeout hands the job back.
+            logger.warning("job bookkeeping failed id=%s kind=%s: %s", job.id, spec.name, exc)
+        finally:
+            self._inflight[spec.name] = max(0, self._inflight.get(spec.name, 0) - 1)
+            metrics_timing("jobs.duration_ms", (time.perf_counter() - t0) * 1000.0, tags=tags)
+            if self._wake is not None:
+                self._wake.set()
+
+    def _handle_failure(self, spec: JobKind, job: ClaimedJob, exc: Exception) -> None:
+        error = f"{type(exc).__name__}: {exc}"[:2000]
+        now = _utcnow()
+        tags = {"kind": spec.name}
+        if job.attempts >= job.max_attempts:
+            self.store.bury(job.id, self.worker_id, error, now)
+            metrics_incr("jobs.dead", tags=tags)
+            logger.error("Job %s (%s) failed permanently after %s attempts: %s", job.id, spec.name, job.attempts, error)
+            return
+        delay = spec.retry_delay(job.attempts)
+        self.store.retry(job.id, self.worker_id, error, now + timedelta(seconds=delay), now)
+        metrics_incr("jobs.failed", tags=tags)
+        logger.warning(
+            "Job %s (%s) failed on attempt %s/%s, retry in %.0fs: %s",
+            job.id,
+            spec.name,
+            job.attempts,
+            job.max_attempts,
+            delay,
+            error,
+        )
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait for in-flight jobs to finish."""
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+
+    async def run_forever(self) -> None:
+        load_job_kinds()
+        self._wake = asyncio.Event()
+        entry = (asyncio.get_running_loop(), self._wake)
+        _wakeups.append(entry)
+        logger.info("job worker %s started kinds=%s", self.worker_id, sorted(self._kinds()))
+        idle_s = self.poll_interval_s
+        try:
+            while True:
+                # Clear before polling so a wake-up during the claim is kept.
+                self._wake.clear()
+                try:
+                    started = await self.run_once()
+                except Exception as exc:
+                    logger.warning("job worker poll failed: %s", exc)
+                    started = 0
+                if started:
+                    idle_s = self.poll_interval_s
+                    continue
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=idle_s)
+                    idle_s = self.poll_interval_s
+                except asyncio.TimeoutError:
+                    # Nothing due: back off so an idle API stops polling the table.
+                    idle_s = min(self.max_poll_interval_s, idle_s * 2)
+        finally:
+            try:
+                _wakeups.remove(entry)
+            except ValueError:
+                pass
+            await self.drain(timeout=10)
+
+
+worker = JobWorker()
+
+
+__all__ = [
+    "DbJobStore",
+    "JobKind",
+    "JobWorker",
+    "LocalJobStore",
+    "cleanup_jobs",
+    "enqueue",
+    "get_store",
+    "job_kind",
+    "load_job_kinds",
+    "stats",
+    "worker",
+]
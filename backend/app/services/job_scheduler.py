@@ -0,0 +1,336 @@
+"""Cluster-wide periodic job scheduler with lease-based leader election.
+
+Every API instance runs a ``JobScheduler``, but only the instance holding
+the leader lease executes jobs, so maintenance work scales with data rather
+than with the number of machines. The lease is renewed on a short tick by a
+keeper task that runs independently of job execution; if the leader dies the
+lease expires and another instance takes over within ``LEASE_TTL_S``.
+
+Lease backends (``SCHEDULER_LEADER_BACKEND``):
+  - redis: ``SET key holder NX PX ttl`` with compare-and-renew/release
+  - local: in-process stand-in (single instance, tests)
+  - auto (default): redis whenever a Redis client is configured (``REDIS_URL``),
+    else local. Redis is used even with the WS bus off; a per-process lease
+    would make every instance a leader.
+
+An explicit ``redis`` backend without a Redis client logs an error and never
+elects a leader, so no instance runs jobs instead of every instance.
+
+Per-job last-run timestamps are stored with the lease backend so a newly
+elected leader continues the schedule instead of re-running everything.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.exc import OperationalError
+
+from app.services.redis_client import redis as _redis_client  # async redis (or null)
+from app.utils.metrics import incr as metrics_incr, timing_ms as metrics_timing
+from app.utils.notifications import alert_scheduler_failure
+
+logger = logging.getLogger(__name__)
+
+LEADER_KEY = "scheduler:leader"
+LAST_RUN_KEY = "scheduler:last_run"
+
+try:
+    LEASE_TTL_S = max(5.0, float(os.getenv("SCHEDULER_LEASE_TTL") or 30.0))
+except Exception:
+    LEASE_TTL_S = 30.0
+try:
+    TICK_S = max(0.5, float(os.getenv("SCHEDULER_TICK") or 5.0))
+except Exception:
+    TICK_S = 5.0
+
+_RENEW_LUA = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+)
+_RELEASE_LUA = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+
+# ---- leader leases -------------------------------------------------------------
+
+class LocalLeaderLease:
+    """In-process lease. Candidates sharing ``state`` compete like instances."""
+
+    def __init__(self, holder_id: str, state: Optional[dict] = None, ttl_s: float = LEASE_TTL_S) -> None:
+        self.holder_id = holder_id
+        self.ttl_s = ttl_s
+        self._state = state if state is not None else {}
+        self._state.setdefault("last_run", {})
+
+    async def acquire_or_renew(self) -> bool:
+        now = time.monotonic()
+        holder, expires = self._state.get("leader", (None, 0.0))
+        if holder in (None, self.holder_id) or expires <= now:
+            self._state["leader"] = (self.holder_id, now + self.ttl_s)
+            return True
+        return False
+
+    async def release(self) -> None:
+        holder, _ = self._state.get("leader", (None, 0.0))
+        if holder == self.holder_id:
+            self._state.pop("leader", None)
+
+    async def get_last_run(self, name: str) -> Optional[float]:
+        return self._state["last_run"].get(name)
+
+    async def set_last_run(self, name: str, ts: float) -> None:
+        self._state["last_run"][name] = ts
+
+
+class RedisLeaderLease:
+    def __init__(self, client, holder_id: str, key: str = LEADER_KEY, ttl_s: float = LEASE_TTL_S) -> None:  # noqa: ANN001
+        self._client = client
+        self.holder_id = holder_id
+        self.key = key
+        self.ttl_ms = int(ttl_s * 1000)
+
+    async def acquire_or_renew(self) -> bool:
+        try:
+            renewed = await self._client.eval(_RENEW_LUA, 1, self.key, self.holder_id, self.ttl_ms)
+            if int(renewed or 0):
+                return True
+            return bool(await self._client.set(self.key, self.holder_id, nx=True, px=self.ttl_ms))
+        except Exception as exc:
+            # Without Redis nobody can prove leadership; skipping a cycle is
+            # safer than running the same job on every instance.
+            logger.warning("scheduler lease check failed: %s", exc)
+            return False
+
+    async def release(self) -> None:
+        try:
+            await self._client.eval(_RELEASE_LUA, 1, self.key, self.holder_id)
+        except Exception:
+            pass
+
+    async def get_last_run(self, name: str) -> Optional[float]:
+        try:
+            raw = await self._client.hget(LAST_RUN_KEY, name)
+            return float(raw) if raw is not None else None
+        except Exception:
+            return None
+
+    async def set_last_run(self, name: str, ts: float) -> None:
+        try:
+            await self._client.hset(LAST_RUN_KEY, name, repr(ts))
+        except Exception:
+            pass
+
+
+class NoLeaderLease:
+    """Lease that is never granted: the configured backend is unavailable."""
+
+    def __init__(self, holder_id: str) -> None:
+        self.holder_id = holder_id
+
+    async def acquire_or_renew(self) -> bool:
+        return False
+
+    async def release(self) -> None:
+        return None
+
+    async def get_last_run(self, name: str) -> Optional[float]:
+        return None
+
+    async def set_last_run(self, name: str, ts: float) -> None:
+        return None
+
+
+def default_lease(holder_id: str):
+    mode = (os.getenv("SCHEDULER_LEADER_BACKEND") or "auto").strip().lower()
+    if mode == "local":
+        return LocalLeaderLease(holder_id)
+    # The null client (no REDIS_URL / no redis package) has no eval().
+    if hasattr(_redis_client, "eval"):
+        return RedisLeaderLease(_redis_client, holder_id)
+    if mode == "redis":
+        logger.error(
+            "SCHEDULER_LEADER_BACKEND=redis but no Redis client is configured; "
+            "scheduled jobs will not run on this instance"
+        )
+        return NoLeaderLease(holder_id)
+    return LocalLeaderLease(holder_id)
+
+
+# ---- jobs ------------------------------------------------------------------------
+
+@dataclass
+class ScheduledJob:
+    name: str
+    func: Callable[[], Any]
+    interval_s: float
+    jitter_s: float = 0.0
+    retries: int = 5
+    next_run_at: Optional[float] = None
+    last_run_at: Optional[float] = None
+    last_duration_ms: Optional[float] = None
+    last_error: Optional[str] = None
+    runs: int = 0
+    failures: int = 0
+
+    def schedule_after(self, ts: float) -> None:
+        jitter = random.uniform(0, self.jitter_s) if self.jitter_s > 0 else 0.0
+        self.next_run_at = ts + self.interval_s + jitter
+
+
+@dataclass
+class JobScheduler:
+    holder_id: str = field(default_factory=lambda: os.getenv("INSTANCE_ID") or ("inst-" + os.urandom(4).hex()))
+    lease: Any = None
+    tick_s: float = TICK_S
+    jobs: Dict[str, ScheduledJob] = field(default_factory=dict)
+    is_leader: bool = False
+
+    def __post_init__(self) -> None:
+        if self.lease is None:
+            self.lease = default_lease(self.holder_id)
+
+    def register(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval_s: float,
+        jitter_s: float = 0.0,
+        retries: int = 5,
+    ) -> ScheduledJob:
+        """Register a sync job (run in a worker thread) every ``interval_s``."""
+        job = ScheduledJob(name=name, func=func, interval_s=float(interval_s), jitter_s=float(jitter_s), retries=retries)
+        self.jobs[name] = job
+        return job
+
+    async def _load_schedule(self, now: float) -> None:
+        """Schedule jobs that have no next run yet (new, or after failover)."""
+        for job in self.jobs.values():
+            if job.next_run_at is not None:
+                continue
+            last = await self.lease.get_last_run(job.name)
+            if last is not None:
+                job.last_run_at = last
+            # Without history, wait one interval like the old per-instance loops.
+            job.schedule_after(last if last is not None else now)
+
+    async def refresh_leadership(self) -> bool:
+        was_leader = self.is_leader
+        self.is_leader = await self.lease.acquire_or_renew()
+        if self.is_leader != was_leader:
+            logger.info("scheduler leadership %s: holder=%s", "acquired" if self.is_leader else "lost", self.holder_id)
+            # Re-read shared last-run times when (re)gaining leadership.
+            for job in self.jobs.values():
+                job.next_run_at = None
+        return self.is_leader
+
+    async def run_pending(self, now: Optional[float] = None) -> List[str]:
+        """Run every due job once if this instance is the leader."""
+        if not self.is_leader:
+            return []
+        now = time.time() if now is None else now
+        await self._load_schedule(now)
+        ran: List[str] = []
+        for job in list(self.jobs.values()):
+            if job.next_run_at is not None and job.next_run_at > now:
+                continue
+            await self._run_job(job, now)
+            ran.append(job.name)
+            if not self.is_leader:
+                break
+        return ran
+
+    async def _run_job(self, job: ScheduledJob, started: float) -> None:
+        t0 = time.perf_counter()
+        delay = 5
+        job.last_error = None
+        for attempt in range(max(1, job.retries)):
+            try:
+                result = await asyncio.to_thread(job.func)
+                if result is not None:
+                    logger.info("Scheduled job %s summary: %s", job.name, result)
+                break
+            except OperationalError as exc:  # pragma: no cover - transient DB outage
+                alert_scheduler_failure(exc)
+                job.last_error = str(exc)
+                if attempt < job.retries - 1:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 60)
+                    continue
+            except Exception as exc:
+                alert_scheduler_failure(exc)
+                job.last_error = str(exc)
+                break
+        duration_ms = (time.perf_counter() - t0) * 1000.0
+        job.runs += 1
+        job.last_run_at = started
+        job.last_duration_ms = round(duration_ms, 1)
+        tags = {"job": job.name}
+        if job.last_error:
+            job.failures += 1
+            metrics_incr("scheduler.job.failure", tags=tags)
+        metrics_incr("scheduler.job.run", tags=tags)
+        metrics_timing("scheduler.job.duration_ms", duration_ms, tags=tags)
+        job.schedule_after(started)
+        await self.lease.set_last_run(job.name, started)
+
+    async def _keep_lease(self) -> None:
+        while True:
+            try:
+                await self.refresh_leadership()
+            except Exception as exc:
+                logger.warning("scheduler lease keeper error: %s", exc)
+                self.is_leader = False
+            await asyncio.sleep(self.tick_s)
+
+    async def run_forever(self) -> None:
+        keeper = asyncio.create_task(self._keep_lease())
+        try:
+            while True:
+                try:
+                    await self.run_pending()
+                except Exception as exc:  # pragma: no cover - keep scheduling
+                    alert_scheduler_failure(exc)
+                await asyncio.sleep(self.tick_s)
+        finally:
+            keeper.cancel()
+            self.is_leader = False
+            await self.lease.release()
+
+    def status(self) -> dict:
+        return {
+            "holder_id": self.holder_id,
+            "is_leader": self.is_leader,
+            "jobs": {
+                name: {
+                    "interval_s": job.interval_s,
+                    "next_run_at": job.next_run_at,
+                    "last_run_at": job.last_run_at,
+                    "last_duration_ms": job.last_duration_ms,
+                    "last_error": job.last_error,
+                    "runs": job.runs,
+                    "failures": job.failures,
+                }
+                for name, job in self.jobs.items()
+            },
+        }
+
+
+scheduler = JobScheduler()
+
+
+__all__ = [
+    "JobScheduler",
+    "LocalLeaderLease",
+    "RedisLeaderLease",
+    "ScheduledJob",
+    "scheduler",
+]
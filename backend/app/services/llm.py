@@ -0,0 +1,182 @@
+"""Gated, cached model calls for AI search and the booking agent.
+
+* **Async calls.** :func:`agenerate_text` awaits the SDK's async client, so
+  ``async def`` routes wait on Gemini without holding a threadpool worker.
+  Callers end their DB transaction first (:func:`app.database.release_connection`)
+  so no pooled connection is parked on a multi-second model call.
+  :func:`generate_text` is the blocking twin for code already on a worker thread.
+* **Concurrency gate.** At most ``LLM_MAX_CONCURRENCY`` model calls run per
+  process, counted across worker threads and the event loop. A caller that
+  gets no slot within ``LLM_GATE_WAIT`` seconds receives ``None`` and falls
+  back to its heuristics instead of queueing behind slow calls.
+* **Parse cache.** Parsed model output (search filters, booking-state
+  updates) is cached under a digest of the normalized query text, the
+  caller's context and today's date for ``AI_PARSE_CACHE_TTL`` seconds.
+  Only successful parses are stored, so a failed call is retried next time.
+
+Tests and benchmarks install :class:`~app.services.genai_client.FakeGenAIClient`
+with :func:`~app.services.genai_client.set_genai_client`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.services.genai_client import get_genai_client
+from app.utils.metrics import incr as metrics_incr
+from app.utils.redis_cache import cache_ai_parse, get_cached_ai_parse
+
+logger = logging.getLogger(__name__)
+
+try:
+    LLM_MAX_CONCURRENCY = max(1, int(os.getenv("LLM_MAX_CONCURRENCY") or 4))
+except Exception:
+    LLM_MAX_CONCURRENCY = 4
+try:
+    LLM_GATE_WAIT_S = max(0.0, float(os.getenv("LLM_GATE_WAIT") or 2.0))
+except Exception:
+    LLM_GATE_WAIT_S = 2.0
+try:
+    AI_PARSE_CACHE_TTL = max(1, int(os.getenv("AI_PARSE_CACHE_TTL") or 3600))
+except Exception:
+    AI_PARSE_CACHE_TTL = 3600
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+class _Gate:
+    """Counting semaphore shared by worker threads and the event loop.
+
+    Async waiters poll instead of parking a thread on the lock, so a
+    cancelled request never leaves a slot acquired behind it.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._sem = threading.BoundedSemaphore(limit)
+
+    def acquire(self, timeout: float) -> bool:
+        return self._sem.acquire(timeout=timeout)
+
+    async def acquire_async(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self._sem.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.02)
+        return True
+
+    def release(self) -> None:
+        self._sem.release()
+
+
+_gate = _Gate(LLM_MAX_CONCURRENCY)
+
+
+def model_name() -> str:
+    return (getattr(settings, "GOOGLE_GENAI_MODEL", "") or "").strip() or DEFAULT_MODEL
+
+
+def _gate_full(label: str) -> None:
+    logger.warning("llm gate full; skipping %s", label)
+    metrics_incr("llm.gate_full", tags={"call": label})
+
+
+def _done(label: str, t0: float, res: Any) -> str:
+    logger.info("llm %s_ms=%s", label, int((time.monotonic() - t0) * 1000))
+    return (getattr(res, "text", None) or "").strip()
+
+
+def generate_text(prompt: str, *, label: str) -> Optional[str]:
+    """Blocking model call; return the response text.
+
+    Returns ``None`` when no client is configured or the gate stays full.
+    Model and transport errors propagate to the caller.
+    """
+    client = get_genai_client()
+    if client is None:
+        return None
+    if not _gate.acquire(LLM_GATE_WAIT_S):
+        _gate_full(label)
+        return None
+    t0 = time.monotonic()
+    try:
+        res = client.models.generate_content(model=model_name(), contents=prompt)
+    finally:
+        _gate.release()
+    return _done(label, t0, res)
+
+
+async def agenerate_text(prompt: str, *, label: str) -> Optional[str]:
+    """Async form of :func:`generate_text` (same gate, same ``None`` cases)."""
+    client = get_genai_client()
+    if client is None:
+        return None
+    if not await _gate.acquire_async(LLM_GATE_WAIT_S):
+        _gate_full(label)
+        return None
+    t0 = time.monotonic()
+    try:
+        aio = getattr(client, "aio", None)
+        if aio is not None:
+            res = await aio.models.generate_content(model=model_name(), contents=prompt)
+        else:
+            res = await asyncio.to_thread(client.models.generate_content, model=model_name(), contents=prompt)
+    finally:
+        _gate.release()
+    return _done(label, t0, res)
+
+
+def parse_json_object(text: Optional[str]) -> Optional[dict]:
+    """Parse the JSON object in a model reply (tolerates fences/prose around it)."""
+    if not text:
+        return None
+    start = text.find("{")
+    end = text.rfind("}")
+    json_str = text[start : end + 1] if start != -1 and end > start else text
+    try:
+        data = json.loads(json_str)
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def normalize_query(text: Optional[str]) -> str:
+    """Lower-case ``text`` and collapse whitespace (the parse-cache key form)."""
+    return " ".join((text or "").lower().split())
+
+
+def parse_digest(text: Optional[str], context: Any = None) -> str:
+    """Digest of normalized ``text``, ``context`` and today's date.
+
+    The date is included because prompts resolve relative dates ("next
+    Friday") against it.
+    """
+    raw = json.dumps([normalize_query(text), context, date.today().isoformat()], default=str, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_cached_parse(kind: str, digest: str) -> Optional[dict]:
+    try:
+        cached = get_cached_ai_parse(kind, digest)
+    except Exception as exc:
+        logger.debug("ai parse cache read failed: %s", exc)
+        return None
+    metrics_incr("llm.parse_cache", tags={"kind": kind, "result": "hit" if cached is not None else "miss"})
+    return cached
+
+
+def store_parse(kind: str, digest: str, data: dict) -> None:
+    try:
+        cache_ai_parse(kind, digest, data, expire=AI_PARSE_CACHE_TTL)
+    except Exception as exc:
+        logger.debug("ai parse cache write failed: %s", exc)
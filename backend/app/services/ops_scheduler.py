@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Optional
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time, timedelta
+from typing import Iterable, Iterator, Optional, Sequence, TypeVar
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import String, cast, exists, or_, text
 from ..database import SessionLocal
 
 from .. import models
@@ -12,12 +15,34 @@ from ..core.config import settings
 from ..crud import crud_message
 from ..utils.notifications import (
     notify_user_new_message,
+    notify_users_new_messages_bulk,
     notify_service_nudge,
 )
 from ..api.api_sound_outreach import _preferred_suppliers_for_city, _fallback_sound_services
 from ..crud import crud_sound, crud_service
+from .provider_profile import note_provider_profile_dirty
+from ..utils.status_logger import log_status_changes
 from sqlalchemy import and_
 
+logger = logging.getLogger(__name__)
+
+# Rows per IN-list / bulk statement. Handlers work in set-based chunks so a
+# maintenance cycle costs a handful of queries per chunk instead of several
+# round trips per booking.
+try:
+    _BATCH_CHUNK = max(1, int(os.getenv("OPS_BATCH_CHUNK") or 500))
+except Exception:
+    _BATCH_CHUNK = 500
+
+_OPEN_DISPUTE_STATUSES = ("open", "needs_info")
+
+T = TypeVar("T")
+
+
+def _chunks(items: Sequence[T], size: int = _BATCH_CHUNK) -> Iterator[Sequence[T]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
 
 def _resolve_booking_request_id(db: Session, booking: models.Booking) -> Optional[int]:
     """Best-effort resolution of the original booking_request_id for a booking.
@@ -30,35 +55,6 @@ def _resolve_booking_request_id(db: Session, booking: models.Booking) -> Optiona
     return qv2.booking_request_id if qv2 else None
 
 
-def _has_open_dispute(db: Session, booking_id: int) -> bool:
-    """Return True if there is an open/active dispute row for this booking."""
-    try:
-        # Use raw SQL to match the lightweight disputes table created in db_utils.
-        row = db.execute(
-            text(
-                "SELECT 1 FROM disputes WHERE booking_id=:bid AND status IN ('open', 'needs_info') LIMIT 1"
-            ),
-            {"bid": int(booking_id)},
-        ).fetchone()
-        return row is not None
-    except Exception:
-        return False
-
-
-def _has_open_simple_dispute(db: Session, booking_simple_id: int) -> bool:
-    """Return True if there is an open/active dispute row for this BookingSimple."""
-    try:
-        row = db.execute(
-            text(
-                "SELECT 1 FROM disputes WHERE booking_simple_id=:sid AND status IN ('open', 'needs_info') LIMIT 1"
-            ),
-            {"sid": int(booking_simple_id)},
-        ).fetchone()
-        return row is not None
-    except Exception:
-        return False
-
-
 def _post_system(
     db: Session,
     br_id: int,
@@ -96,6 +92,112 @@ def _post_system(
         pass
 
 
+@dataclass(frozen=True)
+class _SystemPost:
+    br_id: int
+    actor_id: int
+    content: str
+    visible_to: models.VisibleTo = models.VisibleTo.BOTH
+    system_key: str | None = None
+
+
+def _load_users(db: Session, user_ids: Iterable[int]) -> dict[int, models.User]:
+    ids = sorted({int(u) for u in user_ids if u is not None})
+    users: dict[int, models.User] = {}
+    for chunk in _chunks(ids):
+        for u in db.query(models.User).filter(models.User.id.in_(chunk)).all():
+            users[int(u.id)] = u
+    return users
+
+
+def _existing_system_keys(
+    db: Session, br_ids: Iterable[int], keys: Iterable[str]
+) -> set[tuple[int, str]]:
+    """Return the ``(booking_request_id, system_key)`` pairs already posted."""
+    ids = sorted({int(b) for b in br_ids})
+    key_list = sorted(set(keys))
+    if not ids or not key_list:
+        return set()
+    found: set[tuple[int, str]] = set()
+    for chunk in _chunks(ids):
+        rows = (
+            db.query(models.Message.booking_request_id, models.Message.system_key)
+            .filter(
+                models.Message.booking_request_id.in_(chunk),
+                models.Message.system_key.in_(key_list),
+            )
+            .all()
+        )
+        found.update((int(br_id), key) for br_id, key in rows)
+    return found
+
+
+def _post_system_bulk(db: Session, posts: Sequence[_SystemPost]) -> None:
+    """Set-based :func:`_post_system` for scheduler batches.
+
+    Keeps the ``create_message`` upsert semantics: a post whose
+    ``(booking_request_id, system_key)`` already exists (in the database or
+    earlier in the batch) creates no message but still notifies. Each chunk
+    costs one existence check, one insert commit and one notification commit.
+    """
+    for chunk in _chunks(list(posts)):
+        taken = _existing_system_keys(
+            db,
+            (p.br_id for p in chunk if p.system_key),
+            (p.system_key for p in chunk if p.system_key),
+        )
+        msgs: list[models.Message] = []
+        for p in chunk:
+            if p.system_key:
+                if (p.br_id, p.system_key) in taken:
+                    continue
+                taken.add((p.br_id, p.system_key))
+            msgs.append(
+                models.Message(
+                    booking_request_id=p.br_id,
+                    sender_id=p.actor_id,
+                    sender_type=models.SenderType.ARTIST,
+                    content=p.content,
+                    message_type=models.MessageType.SYSTEM,
+                    visible_to=p.visible_to,
+                    system_key=p.system_key,
+                )
+            )
+        if msgs:
+            db.add_all(msgs)
+            db.commit()
+        _notify_system_posts(db, chunk)
+
+
+def _notify_system_posts(db: Session, posts: Sequence[_SystemPost]) -> None:
+    """Notify both parties of each post, loading participants in bulk."""
+    try:
+        br_ids = sorted({p.br_id for p in posts})
+        parties = {
+            int(br_id): (client_id, artist_id)
+            for br_id, client_id, artist_id in db.query(
+                models.BookingRequest.id,
+                models.BookingRequest.client_id,
+                models.BookingRequest.artist_id,
+            )
+            .filter(models.BookingRequest.id.in_(br_ids))
+            .all()
+        }
+        users = _load_users(db, (uid for pair in parties.values() for uid in pair))
+        items = []
+        for p in posts:
+            client_id, artist_id = parties.get(p.br_id, (None, None))
+            client = users.get(client_id) if client_id is not None else None
+            artist = users.get(artist_id) if artist_id is not None else None
+            if artist and client:
+                items.append((client, artist, p.br_id, p.content))
+                items.append((artist, artist, p.br_id, p.content))
+        notify_users_new_messages_bulk(db, items, models.MessageType.SYSTEM)
+    except Exception as exc:
+        db.rollback()
+        logger.warning("ops scheduler notifications failed: %s", exc)
+
+
 # Deposits removed: no deposit reminders
 
 
@@ -252,140 +354,120 @@ def handle_sound_outreach_nudges_and_expiry(db: Session) -> dict:
     return results
 
 
-def handle_pre_event_reminders(db: Session) -> int:
-    """Send 7-day and 3-day pre-event reminders with system messages to both parties."""
-    now = datetime.utcnow()
-    today = now.date()
+_REMINDER_HORIZONS = {30: ("30d", "Event in 30 days"), 7: ("7d", "Event in 7 days"), 3: ("3d", "Event in 3 days"), 0: ("0d", "Event today")}
 
-    bookings = (
-        db.query(models.Booking)
-        .filter(models.Booking.status == models.BookingStatus.CONFIRMED)
-        .all()
-    )
-    sent = 0
-    for b in bookings:
-        if b.start_time is None:
-            continue
-
-        days_until = (b.start_time.date() - today).days
-        label: str | None = None
-        horizon: str | None = None
 
+def _reminder_contents(horizon: str, label: str, date_str: str) -> tuple[str, str]:
+    """Return ``(client_content, artist_content)`` for a reminder horizon."""
+    if horizon == "30d":
         # 30 days out: early heads-up so both sides can still change plans.
-        if days_until == 30:
-            horizon = "30d"
-            label = "Event in 30 days"
-        # 7 days: existing weekly reminder.
-        elif days_until == 7:
-            horizon = "7d"
-            label = "Event in 7 days"
-        # 3 days: existing last‑few‑days reminder.
-        elif days_until == 3:
-            horizon = "3d"
-            label = "Event in 3 days"
-        # 0 days: same‑day reminder rendered as “Event is today: …”.
-        elif days_until == 0:
-            horizon = "0d"
-            label = "Event today"
-        else:
-            continue
-
-        if not label or not horizon:
-            continue
+        client_content = (
+            f"{label}: {date_str}. "
+            "Your event is in 30 days. Take a moment to double-check the date, "
+            "location and guest count, and share any important details in this chat."
+        )
+        artist_content = (
+            f"{label}: {date_str}. "
+            "You have an event in 30 days. Block your calendar, review travel and "
+            "equipment needs, and message the client if anything major changes."
+        )
+    elif horizon == "7d":
+        client_content = (
+            f"{label}: {date_str}. "
+            "Your event is in 7 days. Please review your booking details "
+            "(time, address, guest count and any special requests) and use "
+            "this chat if anything needs to change."
+        )
+        artist_content = (
+            f"{label}: {date_str}. "
+            "You have an event in 7 days. Please review the booking details, "
+            "confirm your schedule, travel and equipment, and message the "
+            "client if you need any clarification."
+        )
+    elif horizon == "3d":
+        client_content = (
+            f"{label}: {date_str}. "
+            "Your event is in 3 days. Please reconfirm the time and address, "
+            "plan your arrival, and share any last-minute updates in this chat."
+        )
+        artist_content = (
+            f"{label}: {date_str}. "
+            "Your event is in 3 days. Please confirm the time and address, "
+            "check technical and setup requirements, and share your arrival "
+            "plan with the client."
+        )
+    else:  # "0d" (today), rendered as “Event is today: …”
+        client_content = (
+            f"Event is today: {date_str}. "
+            "Your event is today. Please be ready at the agreed time and keep your "
+            "phone nearby in case your provider needs to reach you."
+        )
+        artist_content = (
+            f"Event is today: {date_str}. "
+            "Your event is today. Leave enough time for travel and setup, and send a quick "
+            "message here once you are on your way or on site."
+        )
+    return client_content, artist_content
 
-        br_id = _resolve_booking_request_id(db, b)
-        if not br_id:
-            continue
 
-        system_key = f"event_reminder:{horizon}"
+def handle_pre_event_reminders(db: Session) -> int:
+    """Send 30/7/3/0-day pre-event reminders with system messages to both parties.
 
-        # Dedupe: only send each horizon reminder once per thread
-        existing = (
-            db.query(models.Message)
-            .filter(
-                models.Message.booking_request_id == br_id,
-                models.Message.message_type == models.MessageType.SYSTEM,
-                models.Message.system_key == system_key,
+    Only bookings whose start date falls on one of the horizon days are
+    selected, joined to their thread in the same query.
+    """
+    today = datetime.utcnow().date()
+    windows = []
+    for days in _REMINDER_HORIZONS:
+        day_start = datetime.combine(today + timedelta(days=days), dt_time.min)
+        windows.append(
+            and_(
+                models.Booking.start_time >= day_start,
+                models.Booking.start_time < day_start + timedelta(days=1),
             )
-            .first()
         )
-        if existing:
-            continue
+    rows = (
+        db.query(
+            models.Booking.start_time,
+            models.Booking.client_id,
+            models.Booking.artist_id,
+            models.QuoteV2.booking_request_id,
+        )
+        .join(models.QuoteV2, models.QuoteV2.id == models.Booking.quote_id)
+        .filter(
+            models.Booking.status == models.BookingStatus.CONFIRMED,
+            models.QuoteV2.booking_request_id != None,  # noqa: E711
+            or_(*windows),
+        )
+        .order_by(models.Booking.id.asc())
+        .all()
+    )
+    if not rows:
+        return 0
 
-        date_str = b.start_time.strftime("%Y-%m-%d")
+    # Dedupe: only send each horizon reminder once per thread
+    keys = {f"event_reminder:{h}" for h, _ in _REMINDER_HORIZONS.values()}
+    done = _existing_system_keys(db, (r.booking_request_id for r in rows), keys)
+    users = _load_users(db, [r.client_id for r in rows] + [r.artist_id for r in rows])
 
-        client = db.query(models.User).filter(models.User.id == b.client_id).first()
-        artist = db.query(models.User).filter(models.User.id == b.artist_id).first()
-        if not client or not artist:
+    posts: list[_SystemPost] = []
+    sent = 0
+    for start_time, client_id, artist_id, br_id in rows:
+        horizon, label = _REMINDER_HORIZONS[(start_time.date() - today).days]
+        system_key = f"event_reminder:{horizon}"
+        if (int(br_id), system_key) in done:
             continue
-
-        if horizon == "30d":
-            client_content = (
-                f"{label}: {date_str}. "
-                "Your event is in 30 days. Take a moment to double-check the date, "
-                "location and guest count, and share any important details in this chat."
-            )
-            artist_content = (
-                f"{label}: {date_str}. "
-                "You have an event in 30 days. Block your calendar, review travel and "
-                "equipment needs, and message the client if anything major changes."
-            )
-        elif horizon == "7d":
-            client_content = (
-                f"{label}: {date_str}. "
-                "Your event is in 7 days. Please review your booking details "
-                "(time, address, guest count and any special requests) and use "
-                "this chat if anything needs to change."
-            )
-            artist_content = (
-                f"{label}: {date_str}. "
-                "You have an event in 7 days. Please review the booking details, "
-                "confirm your schedule, travel and equipment, and message the "
-                "client if you need any clarification."
-            )
-        elif horizon == "3d":
-            client_content = (
-                f"{label}: {date_str}. "
-                "Your event is in 3 days. Please reconfirm the time and address, "
-                "plan your arrival, and share any last-minute updates in this chat."
-            )
-            artist_content = (
-                f"{label}: {date_str}. "
-                "Your event is in 3 days. Please confirm the time and address, "
-                "check technical and setup requirements, and share your arrival "
-                "plan with the client."
-            )
-        else:  # "0d" (today)
-            client_content = (
-                f"Event is today: {date_str}. "
-                "Your event is today. Please be ready at the agreed time and keep your "
-                "phone nearby in case your provider needs to reach you."
-            )
-            artist_content = (
-                f"Event is today: {date_str}. "
-                "Your event is today. Leave enough time for travel and setup, and send a quick "
-                "message here once you are on your way or on site."
-            )
-
-        _post_system(
-            db,
-            br_id,
-            actor_id=artist.id,
-            content=client_content,
-            visible_to=models.VisibleTo.CLIENT,
-            system_key=system_key,
-        )
-
-        _post_system(
-            db,
-            br_id,
-            actor_id=artist.id,
-            content=artist_content,
-            visible_to=models.VisibleTo.ARTIST,
-            system_key=system_key,
+        artist = users.get(artist_id)
+        if not users.get(client_id) or not artist:
+            continue
+        done.add((int(br_id), system_key))
+        client_content, artist_content = _reminder_contents(
+            horizon, label, start_time.strftime("%Y-%m-%d")
         )
-
+        posts.append(_SystemPost(int(br_id), int(artist.id), client_content, models.VisibleTo.CLIENT, system_key))
+        posts.append(_SystemPost(int(br_id), int(artist.id), artist_content, models.VisibleTo.ARTIST, system_key))
         sent += 2
+    _post_system_bulk(db, posts)
     return sent
 
 
@@ -393,49 +475,44 @@ def handle_post_event_prompts(db: Session) -> dict:
     """Send post-event prompts shortly after end_time to both parties."""
     now = datetime.utcnow()
     results = {"post_event_prompts_created": 0}
+    keys = ("event_finished_v1:client", "event_finished_v1:artist")
 
-    bookings = (
-        db.query(models.Booking)
+    # Only consider events that have ended but are still within the
+    # complaint window horizon; auto-completion covers the later phase.
+    rows = (
+        db.query(
+            models.Booking.end_time,
+            models.Booking.client_id,
+            models.Booking.artist_id,
+            models.QuoteV2.booking_request_id,
+        )
+        .join(models.QuoteV2, models.QuoteV2.id == models.Booking.quote_id)
         .filter(
             models.Booking.status == models.BookingStatus.CONFIRMED,
             models.Booking.end_time != None,  # noqa: E711
+            models.Booking.end_time <= now,
+            models.Booking.end_time > now - timedelta(hours=12),
+            models.QuoteV2.booking_request_id != None,  # noqa: E711
         )
+        .order_by(models.Booking.id.asc())
         .all()
     )
-    for b in bookings:
-        if not b.end_time:
-            continue
-        # Only consider events that have ended but are still within the
-        # complaint window horizon; auto-completion covers the later phase.
-        if not (now >= b.end_time and now < b.end_time + timedelta(hours=12)):
-            continue
+    if not rows:
+        return results
 
-        br_id = _resolve_booking_request_id(db, b)
-        if not br_id:
-            continue
+    # Dedupe: only send once per thread per role.
+    prompted = {br_id for br_id, _ in _existing_system_keys(db, (r.booking_request_id for r in rows), keys)}
+    users = _load_users(db, [r.client_id for r in rows] + [r.artist_id for r in rows])
 
-        # Dedupe: only send once per thread per role.
-        existing = (
-            db.query(models.Message)
-            .filter(
-                models.Message.booking_request_id == br_id,
-                models.Message.message_type == models.MessageType.SYSTEM,
-                models.Message.system_key.in_(
-                    ["event_finished_v1:client", "event_finished_v1:artist"]
-                ),
-            )
-            .first()
-        )
-        if existing:
+    posts: list[_SystemPost] = []
+    for end_time, client_id, artist_id, br_id in rows:
+        if int(br_id) in prompted:
             continue
-
-        date_str = b.end_time.strftime("%Y-%m-%d")
-
-        client = db.query(models.User).filter(models.User.id == b.client_id).first()
-        artist = db.query(models.User).filter(models.User.id == b.artist_id).first()
-        if not client or not artist:
+        artist = users.get(artist_id)
+        if not users.get(client_id) or not artist:
             continue
-
+        prompted.add(int(br_id))
+        date_str = end_time.strftime("%Y-%m-%d")
         client_content = (
             f"Event finished: {date_str}. "
             "Your event has finished. If anything was not as expected, you can "
@@ -446,156 +523,181 @@ def handle_post_event_prompts(db: Session) -> dict:
             "Your event has finished. Review the event and mark this booking as "
             "completed, or report a problem if something went wrong."
         )
-
-        _post_system(
-            db,
-            br_id,
-            actor_id=artist.id,
-            content=client_content,
-            visible_to=models.VisibleTo.CLIENT,
-            system_key="event_finished_v1:client",
-        )
-        _post_system(
-            db,
-            br_id,
-            actor_id=artist.id,
-            content=artist_content,
-            visible_to=models.VisibleTo.ARTIST,
-            system_key="event_finished_v1:artist",
-        )
-
+        posts.append(_SystemPost(int(br_id), int(artist.id), client_content, models.VisibleTo.CLIENT, keys[0]))
+        posts.append(_SystemPost(int(br_id), int(artist.id), artist_content, models.VisibleTo.ARTIST, keys[1]))
         results["post_event_prompts_created"] += 2
-
+    _post_system_bulk(db, posts)
     return results
 
 
+def _has_system_key(key: str):
+    return exists().where(
+        models.Message.booking_request_id == models.QuoteV2.booking_request_id,
+        models.Message.system_key == key,
+    )
+
+
 def handle_auto_completion(db: Session) -> dict:
-    """Auto-complete bookings 12h after end_time when no dispute is open."""
+    """Auto-complete bookings 12h after end_time when no dispute is open.
+
+    Candidates are confirmed bookings plus completed bookings whose thread
+    is still missing a review invite; disputes are checked in the same query
+    and status changes are applied with one UPDATE per chunk.
+    """
+    from ..utils.notifications import notify_review_requests_bulk
+
     now = datetime.utcnow()
     results = {"auto_completed": 0, "skipped_due_to_dispute": 0}
 
-    bookings = (
-        db.query(models.Booking)
+    open_dispute = exists().where(
+        models.Dispute.booking_id == models.Booking.id,
+        models.Dispute.status.in_(_OPEN_DISPUTE_STATUSES),
+    )
+    rows = (
+        db.query(
+            models.Booking.id,
+            models.Booking.status,
+            models.Booking.client_id,
+            models.Booking.artist_id,
+            models.QuoteV2.booking_request_id,
+            open_dispute.label("disputed"),
+        )
+        .outerjoin(models.QuoteV2, models.QuoteV2.id == models.Booking.quote_id)
         .filter(
-            models.Booking.status.in_(
-                [models.BookingStatus.CONFIRMED, models.BookingStatus.COMPLETED]
-            ),
             models.Booking.end_time != None,  # noqa: E711
             models.Booking.end_time <= now - timedelta(hours=12),
+            or_(
+                models.Booking.status == models.BookingStatus.CONFIRMED,
+                and_(
+                    models.Booking.status == models.BookingStatus.COMPLETED,
+                    models.QuoteV2.booking_request_id != None,  # noqa: E711
+                    or_(
+                        ~_has_system_key("review_invite_client_v1"),
+                        ~_has_system_key("review_invite_provider_v1"),
+                    ),
+                ),
+            ),
         )
+        .order_by(models.Booking.id.asc())
         .all()
     )
-    for b in bookings:
-        if _has_open_dispute(db, int(b.id)):
+    eligible = []
+    for row in rows:
+        if row.disputed:
             results["skipped_due_to_dispute"] += 1
-            continue
-
-        prev_status = b.status
-        just_completed = False
-        if b.status == models.BookingStatus.CONFIRMED:
-            b.status = models.BookingStatus.COMPLETED
-            db.add(b)
-            db.commit()
-            just_completed = True
-
-        br_id = _resolve_booking_request_id(db, b)
-        if br_id:
-            if just_completed:
-                _post_system(
-                    db,
+        else:
+            eligible.append(row)
+    if not eligible:
+        return results
+
+    just_completed = [int(r.id) for r in eligible if r.status == models.BookingStatus.CONFIRMED]
+    artist_of = {int(r.id): r.artist_id for r in eligible}
+    for chunk in _chunks(just_completed):
+        db.query(models.Booking).filter(
+            models.Booking.id.in_(chunk),
+            models.Booking.status == models.BookingStatus.CONFIRMED,
+        ).update({models.Booking.status: models.BookingStatus.COMPLETED}, synchronize_session=False)
+        note_provider_profile_dirty(db, (artist_of[bid] for bid in chunk))
+        db.commit()
+        log_status_changes(
+            "Booking",
+            ((bid, models.BookingStatus.CONFIRMED) for bid in chunk),
+            models.BookingStatus.COMPLETED,
+        )
+    if just_completed:
+        logger.info("Auto-completed %d bookings", len(just_completed))
+    completed_now = set(just_completed)
+
+    threads = [r for r in eligible if r.booking_request_id]
+    invite_keys = ("review_invite_client_v1", "review_invite_provider_v1")
+    invited = _existing_system_keys(db, (r.booking_request_id for r in threads), invite_keys)
+    users = _load_users(db, [r.client_id for r in eligible])
+    provider_names: dict[int, str] = {}
+    artist_ids = sorted({int(r.artist_id) for r in threads if r.artist_id is not None})
+    for chunk in _chunks(artist_ids):
+        for user_id, business_name in (
+            db.query(
+                models.ServiceProviderProfile.user_id,
+                models.ServiceProviderProfile.business_name,
+            )
+            .filter(models.ServiceProviderProfile.user_id.in_(chunk))
+            .all()
+        ):
+            provider_names[int(user_id)] = (business_name or "").strip()
+
+    posts: list[_SystemPost] = []
+    for r in threads:
+        br_id = int(r.booking_request_id)
+        actor_id = int(r.artist_id)
+        if int(r.id) in completed_now:
+            posts.append(
+                _SystemPost(
                     br_id,
-                    actor_id=b.artist_id,
-                    content=(
+                    actor_id,
+                    (
                         "This event has been automatically marked as completed. "
                         "If you still need help, you can contact support from this conversation."
                     ),
-                    visible_to=models.VisibleTo.BOTH,
-                    system_key="event_auto_completed_v1",
-                )
-            # Best-effort review invite system lines for both sides
-            try:
-                existing_invite = (
-                    db.query(models.Message)
-                    .filter(
-                        models.Message.booking_request_id == br_id,
-                        models.Message.message_type == models.MessageType.SYSTEM,
-                        models.Message.system_key == "review_invite_client_v1",
-                    )
-                    .first()
+                    models.VisibleTo.BOTH,
+                    "event_auto_completed_v1",
                 )
-                if not existing_invite:
-                    artist_profile = (
-                        db.query(models.ServiceProviderProfile)
-                        .filter(models.ServiceProviderProfile.user_id == b.artist_id)
-                        .first()
-                    )
-                    provider_name = (
-                        (artist_profile.business_name or "").strip()
-                        if artist_profile and artist_profile.business_name
-                        else ""
-                    )
-                    content = (
+            )
+        # Best-effort review invite system lines for both sides
+        if (br_id, "review_invite_client_v1") not in invited:
+            invited.add((br_id, "review_invite_client_v1"))
+            provider_name = provider_names.get(actor_id) or ""
+            posts.append(
+                _SystemPost(
+                    br_id,
+                    actor_id,
+                    (
                         f"How was your event with {provider_name or 'your service provider'}? "
                         "Leave a rating and short review to help others book with confidence."
-                    )
-                    _post_system(
-                        db,
-                        br_id,
-                        actor_id=b.artist_id,
-                        content=content,
-                        visible_to=models.VisibleTo.CLIENT,
-                        system_key="review_invite_client_v1",
-                    )
-                # Provider-side invite to review the client
-                existing_provider_invite = (
-                    db.query(models.Message)
-                    .filter(
-                        models.Message.booking_request_id == br_id,
-                        models.Message.message_type == models.MessageType.SYSTEM,
-                        models.Message.system_key == "review_invite_provider_v1",
-                    )
-                    .first()
+                    ),
+                    models.VisibleTo.CLIENT,
+                    "review_invite_client_v1",
                 )
-                if not existing_provider_invite:
-                    client = (
-                        db.query(models.User)
-                        .filter(models.User.id == b.client_id)
-                        .first()
-                    )
-                    client_label = (
-                        f"{client.first_name} {client.last_name}".strip()
-                        if client
-                        else "this client"
-                    )
-                    provider_invite_content = (
+            )
+        # Provider-side invite to review the client
+        if (br_id, "review_invite_provider_v1") not in invited:
+            invited.add((br_id, "review_invite_provider_v1"))
+            client = users.get(r.client_id)
+            client_label = (
+                f"{client.first_name} {client.last_name}".strip()
+                if client
+                else "this client"
+            )
+            posts.append(
+                _SystemPost(
+                    br_id,
+                    actor_id,
+                    (
                         f"How was your experience with {client_label}? "
                         "Share a short review to help you and other providers identify reliable clients."
-                    )
-                    _post_system(
-                        db,
-                        br_id,
-                        actor_id=b.artist_id,
-                        content=provider_invite_content,
-                        visible_to=models.VisibleTo.ARTIST,
-                        system_key="review_invite_provider_v1",
-                    )
-            except Exception:
-                pass
-        try:
-            from ..utils.notifications import notify_review_request
-
-            if prev_status != models.BookingStatus.COMPLETED and just_completed:
-                client = (
-                    db.query(models.User)
-                    .filter(models.User.id == b.client_id)
-                    .first()
+                    ),
+                    models.VisibleTo.ARTIST,
+                    "review_invite_provider_v1",
                 )
-                notify_review_request(db, client, int(b.id))
-        except Exception:
-            pass
+            )
+    try:
+        _post_system_bulk(db, posts)
+    except Exception as exc:
+        db.rollback()
+        logger.warning("auto-completion system lines failed: %s", exc)
 
-        results["auto_completed"] += 1
+    if completed_now:
+        try:
+            # Reload clients in one query; earlier commits expired them.
+            users = _load_users(db, [r.client_id for r in eligible if int(r.id) in completed_now])
+            notify_review_requests_bulk(
+                db,
+                [(users.get(r.client_id), int(r.id)) for r in eligible if int(r.id) in completed_now],
+            )
+        except Exception as exc:
+            db.rollback()
+            logger.warning("review request notifications failed: %s", exc)
 
+    results["auto_completed"] = len(eligible)
     return results
 
 
@@ -620,12 +722,15 @@ def handle_pv_auto_completion(db: Session) -> dict:
     q = db.query(models.BookingRequest).order_by(models.BookingRequest.id.asc())
     try:
         if db.bind and db.bind.dialect.name == "postgresql":
-            q = q.filter(text("service_extras::jsonb ? 'pv'"))
+            q = q.filter(text("(service_extras::jsonb -> 'pv' ->> 'status') = 'delivered'"))
+        else:
+            # Cheap prefilter; the payload is still validated below.
+            q = q.filter(cast(models.BookingRequest.service_extras, String).like('%"pv"%'))
     except Exception:
         pass
 
-    rows = q.all()
-    for br in rows:
+    candidates = []
+    for br in q.all():
         extras = getattr(br, "service_extras", None)
         if not isinstance(extras, dict) or "pv" not in extras:
             continue
@@ -641,68 +746,92 @@ def handle_pv_auto_completion(db: Session) -> dict:
             continue
         if not pv.booking_simple_id:
             continue
+        candidates.append((br, pv, int(pv.booking_simple_id)))
 
-        simple_id = int(pv.booking_simple_id)
-        if _has_open_simple_dispute(db, simple_id):
-            results["pv_skipped_due_to_dispute"] += 1
-            continue
+    for chunk in _chunks(candidates):
+        simple_ids = [simple_id for _, _, simple_id in chunk]
+        disputed = {
+            int(sid)
+            for (sid,) in db.query(models.Dispute.booking_simple_id)
+            .filter(
+                models.Dispute.booking_simple_id.in_(simple_ids),
+                models.Dispute.status.in_(_OPEN_DISPUTE_STATUSES),
+            )
+            .all()
+        }
+        simples = {
+            int(s.id): s
+            for s in db.query(models.BookingSimple)
+            .filter(models.BookingSimple.id.in_(simple_ids))
+            .all()
+        }
+
+        completed = []
+        for br, pv, simple_id in chunk:
+            if simple_id in disputed:
+                results["pv_skipped_due_to_dispute"] += 1
+                continue
+            simple = simples.get(simple_id)
+            if not simple:
+                continue
+            if (getattr(simple, "booking_type", "") or "").lower() != "personalized_video":
+                continue
+            if (getattr(simple, "payment_status", "") or "").lower() != "paid":
+                continue
 
-        simple = (
-            db.query(models.BookingSimple)
-            .filter(models.BookingSimple.id == simple_id)
-            .first()
-        )
-        if not simple:
+            pv.status = PvStatus.COMPLETED
+            pv.completed_at_utc = pv.completed_at_utc or now
+            pv.payout_state = "payable"
+            save_pv_payload(br, pv)
+            br.status = models.BookingStatus.REQUEST_COMPLETED
+            db.add(br)
+            completed.append((int(br.id), int(br.artist_id), pv, simple))
+        if not completed:
             continue
-        if (getattr(simple, "booking_type", "") or "").lower() != "personalized_video":
-            continue
-        if (getattr(simple, "payment_status", "") or "").lower() != "paid":
-            continue
-
-        pv.status = PvStatus.COMPLETED
-        pv.completed_at_utc = pv.completed_at_utc or now
-        pv.payout_state = "payable"
-        save_pv_payload(br, pv)
-        br.status = models.BookingStatus.REQUEST_COMPLETED
-        db.add(br)
         db.commit()
 
         # Create queued payout rows if missing (idempotent).
-        try:
-            from ..api.api_payment import _ensure_payout_rows  # noqa: WPS433
+        for br_id, _, pv, simple in completed:
+            try:
+                from ..api.api_payment import _ensure_payout_rows  # noqa: WPS433
 
-            ref = (
-                str(pv.paystack_reference or "").strip()
-                or str(getattr(simple, "payment_id", "") or "").strip()
-                or f"pv_auto_complete:{br.id}"
-            )
-            _ensure_payout_rows(
-                db,
-                simple=simple,
-                total_amount=Decimal(str(pv.total or 0)),
-                reference=ref,
-                phase="pv_auto_complete",
-            )
-        except Exception:
-            pass
+                ref = (
+                    str(pv.paystack_reference or "").strip()
+                    or str(getattr(simple, "payment_id", "") or "").strip()
+                    or f"pv_auto_complete:{br_id}"
+                )
+                _ensure_payout_rows(
+                    db,
+                    simple=simple,
+                    total_amount=Decimal(str(pv.total or 0)),
+                    reference=ref,
+                    phase="pv_auto_complete",
+                )
+            except Exception:
+                pass
 
         # Emit a system line for both parties.
         try:
-            _post_system(
+            _post_system_bulk(
                 db,
-                br.id,
-                actor_id=int(br.artist_id),
-                content=(
-                    "This personalised video order has been automatically marked as completed. "
-                    "If you still need help, you can contact support from this conversation."
-                ),
-                visible_to=models.VisibleTo.BOTH,
-                system_key="pv_auto_completed_v1",
+                [
+                    _SystemPost(
+                        br_id,
+                        artist_id,
+                        (
+                            "This personalised video order has been automatically marked as completed. "
+                            "If you still need help, you can contact support from this conversation."
+                        ),
+                        models.VisibleTo.BOTH,
+                        "pv_auto_completed_v1",
+                    )
+                    for br_id, artist_id, _, _ in completed
+                ],
             )
         except Exception:
-            pass
+            db.rollback()
 
-        results["pv_auto_completed"] += 1
+        results["pv_auto_completed"] += len(completed)
 
     return results
 
@@ -745,46 +874,76 @@ def handle_artist_accept_timeouts(db: Session) -> dict:
     """Cancel bookings that exceeded artist acceptance SLA and release holds."""
     now = datetime.utcnow()
     rows = (
-        db.query(models.Booking)
+        db.query(
+            models.Booking.id,
+            models.Booking.quote_id,
+            models.Booking.artist_id,
+            models.QuoteV2.booking_request_id,
+        )
+        .outerjoin(models.QuoteV2, models.QuoteV2.id == models.Booking.quote_id)
         .filter(
             models.Booking.status == models.BookingStatus.PENDING_ARTIST_CONFIRMATION,
             models.Booking.artist_accept_deadline_at != None,
             models.Booking.artist_accept_deadline_at <= now,
         )
+        .order_by(models.Booking.id.asc())
         .all()
     )
     cancelled = 0
     released_artist = 0
     released_sound = 0
-    for b in rows:
-        bs = (
-            db.query(models.BookingSimple)
-            .filter(models.BookingSimple.quote_id == b.quote_id)
-            .first()
+    posts: list[_SystemPost] = []
+    for chunk in _chunks(rows):
+        quote_ids = sorted({int(r.quote_id) for r in chunk if r.quote_id is not None})
+        # Holds live on the first BookingSimple of each quote.
+        first_simple: dict[int, tuple] = {}
+        if quote_ids:
+            for sid, quote_id, artist_hold, sound_hold in (
+                db.query(
+                    models.BookingSimple.id,
+                    models.BookingSimple.quote_id,
+                    models.BookingSimple.artist_hold_status,
+                    models.BookingSimple.sound_hold_status,
+                )
+                .filter(models.BookingSimple.quote_id.in_(quote_ids))
+                .order_by(models.BookingSimple.id.asc())
+                .all()
+            ):
+                first_simple.setdefault(int(quote_id), (int(sid), artist_hold, sound_hold))
+        artist_release = [sid for sid, a, _ in first_simple.values() if a == "authorized"]
+        sound_release = [sid for sid, _, snd in first_simple.values() if snd == "authorized"]
+        if artist_release:
+            db.query(models.BookingSimple).filter(models.BookingSimple.id.in_(artist_release)).update(
+                {models.BookingSimple.artist_hold_status: "released"}, synchronize_session=False
+            )
+        if sound_release:
+            db.query(models.BookingSimple).filter(models.BookingSimple.id.in_(sound_release)).update(
+                {models.BookingSimple.sound_hold_status: "released"}, synchronize_session=False
+            )
+        db.query(models.Booking).filter(models.Booking.id.in_([int(r.id) for r in chunk])).update(
+            {models.Booking.status: models.BookingStatus.CANCELLED}, synchronize_session=False
         )
-        if bs:
-            if bs.artist_hold_status == "authorized":
-                bs.artist_hold_status = "released"
-                released_artist += 1
-            if bs.sound_hold_status == "authorized":
-                bs.sound_hold_status = "released"
-                released_sound += 1
-            db.add(bs)
-        b.status = models.BookingStatus.CANCELLED
-        db.add(b)
+        note_provider_profile_dirty(db, (r.artist_id for r in chunk))
         db.commit()
-        cancelled += 1
+        log_status_changes(
+            "Booking",
+            ((int(r.id), models.BookingStatus.PENDING_ARTIST_CONFIRMATION) for r in chunk),
+            models.BookingStatus.CANCELLED,
+        )
+        cancelled += len(chunk)
+        released_artist += len(artist_release)
+        released_sound += len(sound_release)
 
         # Post timeline updates
-        br_id = _resolve_booking_request_id(db, b)
-        if br_id:
-            _post_system(
-                db,
-                br_id,
-                actor_id=b.artist_id,
-                content=(
-                    "Artist did not accept in time. Holds released; please choose another artist."
-                ),
-                visible_to=models.VisibleTo.CLIENT,
+        posts.extend(
+            _SystemPost(
+                int(r.booking_request_id),
+                int(r.artist_id),
+                "Artist did not accept in time. Holds released; please choose another artist.",
+                models.VisibleTo.CLIENT,
             )
+            for r in chunk
+            if r.booking_request_id
+        )
+    _post_system_bulk(db, posts)
     return {"artist_timeouts": cancelled, "artist_holds_released": released_artist, "sound_holds_released": released_sound}
@@ -0,0 +1,255 @@
+"""Cache of authenticated principals keyed by token subject.
+
+``get_current_user`` resolves every authenticated request to a ``Principal``:
+a frozen snapshot of the user row's scalar columns, served from an
+in-process LRU (``PRINCIPAL_CACHE_TTL`` seconds, default 15) and, with
+``PRINCIPAL_CACHE_REDIS=1``, a shared Redis tier (``PRINCIPAL_CACHE_REDIS_TTL``,
+default 120). A miss costs one query by email.
+
+Entries are dropped whenever a ``User`` row is updated or deleted through the
+ORM (on flush and again after commit, so a concurrent miss cannot re-cache the
+old row), and explicitly on logout-all. Other instances' local entries expire
+within the local TTL. Routes that mutate the user or walk its relationships
+depend on ``get_current_user_live`` instead.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.user import User, UserType
+from app.utils.auth import normalize_email
+
+try:
+    LOCAL_TTL_S = max(0.0, float(os.getenv("PRINCIPAL_CACHE_TTL") or 15.0))
+except Exception:
+    LOCAL_TTL_S = 15.0
+try:
+    LOCAL_MAX = max(1, int(os.getenv("PRINCIPAL_CACHE_MAX") or 10000))
+except Exception:
+    LOCAL_MAX = 10000
+try:
+    REDIS_TTL_S = max(1, int(os.getenv("PRINCIPAL_CACHE_REDIS_TTL") or 120))
+except Exception:
+    REDIS_TTL_S = 120
+REDIS_ENABLED = (os.getenv("PRINCIPAL_CACHE_REDIS") or "0").strip().lower() in {"1", "true", "yes"}
+
+_REDIS_PREFIX = "principal:v1:"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable view of the authenticated user.
+
+    Carries the ``User`` columns routes read so it can stand in for the ORM
+    object anywhere the user is only read. Secrets (password, MFA secret,
+    refresh token) are deliberately left out.
+    """
+
+    id: int
+    email: str
+    first_name: str
+    last_name: str
+    phone_number: Optional[str]
+    marketing_opt_in: bool
+    user_type: UserType
+    is_active: bool
+    is_verified: bool
+    mfa_enabled: bool
+    profile_picture_url: Optional[str]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=int(user.id),
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            phone_number=user.phone_number,
+            marketing_opt_in=bool(user.marketing_opt_in),
+            user_type=UserType(user.user_type),
+            is_active=bool(user.is_active),
+            is_verified=bool(user.is_verified),
+            mfa_enabled=bool(user.mfa_enabled),
+            profile_picture_url=user.profile_picture_url,
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["user_type"] = self.user_type.value
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: Any) -> "Principal":
+        data = json.loads(raw)
+        data["user_type"] = UserType(data["user_type"])
+        return cls(**data)
+
+
+_local: "OrderedDict[str, tuple[float, Principal]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _redis():
+    if not REDIS_ENABLED:
+        return None
+    try:
+        from app.utils.redis_cache import get_redis_client
+
+        return get_redis_client()
+    except Exception:
+        return None
+
+
+def _local_get(key: str) -> Optional[Principal]:
+    if LOCAL_TTL_S <= 0:
+        return None
+    now = time.monotonic()
+    with _lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            _local.pop(key, None)
+            return None
+        _local.move_to_end(key)
+        return entry[1]
+
+
+def _local_put(key: str, principal: Principal) -> None:
+    if LOCAL_TTL_S <= 0:
+        return
+    with _lock:
+        _local[key] = (time.monotonic() + LOCAL_TTL_S, principal)
+        _local.move_to_end(key)
+        while len(_local) > LOCAL_MAX:
+            _local.popitem(last=False)
+
+
+def get(subject: str) -> Optional[Principal]:
+    """Cached principal for a token subject (email), if any."""
+    key = normalize_email(subject)
+    principal = _local_get(key)
+    if principal is not None:
+        return principal
+    client = _redis()
+    if client is None:
+        return None
+    try:
+        raw = client.get(_REDIS_PREFIX + key)
+        if raw is None:
+            return None
+        principal = Principal.from_json(raw)
+    except Exception:
+        return None
+    _local_put(key, principal)
+    return principal
+
+
+def put(principal: Principal) -> None:
+    key = normalize_email(principal.email)
+    _local_put(key, principal)
+    client = _redis()
+    if client is not None:
+        try:
+            client.setex(_REDIS_PREFIX + key, REDIS_TTL_S, principal.to_json())
+        except Exception:
+            pass
+
+
+def load(db: Session, subject: str) -> Optional[Principal]:
+    """Cached principal for ``subject``, falling back to one DB query."""
+    principal = get(subject)
+    if principal is not None:
+        return principal
+    user = db.query(User).filter(User.email == normalize_email(subject)).first()
+    if user is None:
+        return None
+    principal = Principal.from_user(user)
+    put(principal)
+    return principal
+
+
+def invalidate(*emails: Optional[str]) -> None:
+    """Drop cached principals for the given subjects (both tiers)."""
+    keys = {normalize_email(e) for e in emails if e}
+    if not keys:
+        return
+    with _lock:
+        for key in keys:
+            _local.pop(key, None)
+    client = _redis()
+    if client is not None:
+        for key in keys:
+            try:
+                client.delete(_REDIS_PREFIX + key)
+            except Exception:
+                pass
+
+
+def invalidate_user(user: Any) -> None:
+    invalidate(getattr(user, "email", None))
+
+
+def clear() -> None:
+    with _lock:
+        _local.clear()
+
+
+# ---- ORM hooks: any User update/delete invalidates -----------------------------------
+
+_PENDING_KEY = "principal_cache_invalidate"
+
+
+def _user_emails(target: User) -> set[str]:
+    emails = {target.email} if target.email else set()
+    try:
+        hist = inspect(target).attrs.email.history
+        emails.update(e for e in (hist.deleted or ()) if e)
+    except Exception:
+        pass
+    return emails
+
+
+def _on_user_change(mapper, connection, target) -> None:  # noqa: ANN001
+    emails = _user_emails(target)
+    invalidate(*emails)
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    emails = session.info.pop(_PENDING_KEY, None)
+    if emails:
+        invalidate(*emails)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(User, "after_update", _on_user_change)
+event.listen(User, "after_delete", _on_user_change)
+
+
+__all__ = [
+    "Principal",
+    "clear",
+    "get",
+    "invalidate",
+    "invalidate_user",
+    "load",
+    "put",
+]
@@ -0,0 +1,263 @@
+"""Public provider profile payloads, built read-only and cached per provider.
+
+``GET /service-provider-profiles/{id}`` and ``/{id}/full`` (and their by-slug
+twins) back every provider page view, so they must not write or re-run the
+same aggregates on each request:
+
+* **Read-only builds.** Booking and rating counters come from one aggregate
+  query; the full payload embeds the newest ``PROFILE_REVIEWS_PAGE_SIZE``
+  reviews and a ``reviews_next_cursor`` for the reviews endpoint. Nothing on
+  the ORM rows is modified (legacy NULL timestamps were backfilled by a
+  migration; any left are covered in the payload only).
+* **Cached bodies.** The encoded JSON and its ETag are stored in the
+  ``provider_profile`` cache family scoped by provider, so the provider's
+  namespace generation is the content version and a hit is a byte copy.
+* **Event-driven invalidation.** A session ``after_flush`` listener records
+  providers whose profile, services, reviews, booking statuses or account
+  display fields changed and bumps their generation after the commit.
+  Writers that bypass the unit of work call :func:`note_provider_profile_dirty`.
+  Entries also expire after ``PROFILE_CACHE_TTL`` seconds, which bounds how
+  long a reviewer's own name change can lag.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import desc, func, inspect, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.booking import Booking
+from app.models.booking_status import BookingStatus
+from app.models.review import Review
+from app.models.service import Service
+from app.models.service_provider_profile import ServiceProviderProfile
+from app.models.user import User
+from app.schemas.artist import ArtistFullResponse, ArtistProfileResponse
+from app.schemas.review import ReviewDetails
+from app.schemas.user import UserResponse
+from app.services.provider_stats import LISTED_SERVICE_STATUSES
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
+from app.utils.redis_cache import (
+    cache_provider_profile,
+    get_cached_provider_profile,
+    invalidate_provider_profiles,
+)
+from app.utils.session_tracking import DirtyTracker
+
+logger = logging.getLogger(__name__)
+
+try:
+    REVIEWS_PAGE_SIZE = max(1, int(os.getenv("PROFILE_REVIEWS_PAGE_SIZE") or 20))
+except Exception:
+    REVIEWS_PAGE_SIZE = 20
+try:
+    PROFILE_CACHE_TTL = max(1, int(os.getenv("PROFILE_CACHE_TTL") or 300))
+except Exception:
+    PROFILE_CACHE_TTL = 300
+
+MAX_REVIEWS_PAGE_SIZE = 100
+REVIEWS_CURSOR_SORT = "reviews"
+
+_EPOCH = datetime(1970, 1, 1)
+_REVIEW_KEY = (func.coalesce(Review.created_at, _EPOCH), Review.id)
+_VARIANTS = {"profile": ArtistProfileResponse, "full": ArtistFullResponse}
+
+
+class _Overlay:
+    """Read-through view of an ORM row with some attributes replaced.
+
+    Lets the response models see computed values without assigning them to
+    the row (which would mark it dirty in the session).
+    """
+
+    def __init__(self, obj: Any, **values: Any) -> None:
+        self._obj = obj
+        self.__dict__.update(values)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._obj, name)
+
+
+def _timestamps(obj: Any) -> dict:
+    created = obj.created_at or obj.updated_at or _EPOCH
+    return {"created_at": created, "updated_at": obj.updated_at or created}
+
+
+def profile_counts(db: Session, artist_id: int) -> dict:
+    """Booking and rating counters for one provider in a single query."""
+
+    def bookings(status: BookingStatus):
+        return (
+            select(func.count(Booking.id))
+            .where(Booking.artist_id == artist_id, Booking.status == status)
+            .scalar_subquery()
+        )
+
+    reviews = select(func.avg(Review.rating), func.count(Review.id)).where(Review.artist_id == artist_id).subquery()
+    completed, cancelled, avg, count = db.execute(
+        select(bookings(BookingStatus.COMPLETED), bookings(BookingStatus.CANCELLED), *reviews.c)
+    ).one()
+    return {
+        "completed_events": int(completed or 0),
+        "cancelled_events": int(cancelled or 0),
+        "rating": float(avg) if avg is not None else None,
+        "rating_count": int(count or 0),
+    }
+
+
+def _profile_view(db: Session, artist: ServiceProviderProfile) -> _Overlay:
+    values = {**_timestamps(artist), **profile_counts(db, int(artist.user_id))}
+    # Inline/base64 portfolio blobs are never served; they bloat every payload.
+    imgs = artist.portfolio_image_urls
+    if isinstance(imgs, list):
+        values["portfolio_image_urls"] = [
+            u for u in imgs if isinstance(u, str) and not u.strip().lower().startswith("data:")
+        ]
+    return _Overlay(artist, **values)
+
+
+def _review_view(review: Review) -> _Overlay:
+    values = _timestamps(review)
+    booking = review.booking
+    client = booking.client if booking is not None else None
+    if client is not None:
+        display = f"{client.first_name or ''} {client.last_name or ''}".strip()
+        values.update(
+            client=client,
+            client_id=int(client.id),
+            client_first_name=client.first_name,
+            client_last_name=client.last_name,
+            client_display_name=display or None,
+        )
+        if booking.event_city:
+            values["client_location"] = booking.event_city
+    return _Overlay(review, **values)
+
+
+def review_page(
+    db: Session,
+    artist_id: int,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = REVIEWS_PAGE_SIZE,
+) -> Tuple[List[ReviewDetails], Optional[str]]:
+    """Return one page of a provider's reviews (newest first) and the next cursor.
+
+    ``limit=None`` returns every remaining review. Raises
+    :class:`~app.utils.pagination.InvalidCursor` for a malformed cursor.
+    """
+    query = (
+        db.query(Review, *_REVIEW_KEY)
+        .filter(Review.artist_id == artist_id)
+        .options(selectinload(Review.booking).selectinload(Booking.client))
+        .order_by(*[desc(c) for c in _REVIEW_KEY])
+    )
+    if cursor:
+        values = decode_cursor(cursor, REVIEWS_CURSOR_SORT, len(_REVIEW_KEY))
+        query = query.filter(keyset_after(list(_REVIEW_KEY), values, True))
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(REVIEWS_CURSOR_SORT, list(rows[-1][1:]))
+    return [ReviewDetails.model_validate(_review_view(row[0])) for row in rows], next_cursor
+
+
+def _build(db: Session, artist: ServiceProviderProfile, variant: str) -> Any:
+    provider = _profile_view(db, artist)
+    if variant == "profile":
+        return ArtistProfileResponse.model_validate(provider)
+    services = (
+        db.query(Service)
+        .filter(Service.artist_id == artist.user_id)
+        .filter(Service.status.in_(LISTED_SERVICE_STATUSES))
+        .order_by(Service.display_order)
+        .all()
+    )
+    reviews, next_cursor = review_page(db, int(artist.user_id))
+    return {
+        "provider": provider,
+        "services": [_Overlay(s, **_timestamps(s)) for s in services],
+        "reviews": reviews,
+        "reviews_next_cursor": next_cursor,
+    }
+
+
+def encode_profile(variant: str, payload: Any) -> Tuple[bytes, str]:
+    """Encode ``payload`` exactly as the route's response model would; return ``(body, etag)``."""
+    model = _VARIANTS[variant]
+    body = model.model_validate(payload).model_dump_json(by_alias=True, exclude_none=True).encode("utf-8")
+    return body, 'W/"' + hashlib.sha256(body).hexdigest() + '"'
+
+
+def get_profile_body(db: Session, artist_id: int, variant: str) -> Optional[Tuple[str, bytes, bool]]:
+    """Return ``(etag, body, cache_hit)`` for a provider, or ``None`` if there is no profile.
+
+    ``variant`` is ``"profile"`` (the profile alone) or ``"full"`` (profile,
+    listed services and the first page of reviews).
+    """
+    cached = get_cached_provider_profile(artist_id, variant)
+    if cached is not None:
+        etag, body = cached
+        return etag, body, True
+    artist = db.query(ServiceProviderProfile).filter(ServiceProviderProfile.user_id == artist_id).first()
+    if artist is None:
+        return None
+    body, etag = encode_profile(variant, _build(db, artist, variant))
+    cache_provider_profile(artist_id, variant, body, etag, expire=PROFILE_CACHE_TTL)
+    return etag, body, False
+
+
+# ---- invalidation -------------------------------------------------------------
+
+# Columns whose change alters a cached payload. Profiles, services and reviews
+# are rendered whole, so any change to them counts.
+_BOOKING_ATTRS = ("artist_id", "status")
+_USER_ATTRS = tuple(UserResponse.model_fields)
+
+
+def _changed(state: Any, attrs: Optional[Iterable[str]] = None) -> bool:
+    if attrs is None:
+        return any(attr.history.has_changes() for attr in state.attrs)
+    return any(a in state.attrs and state.attrs[a].history.has_changes() for a in attrs)
+
+
+def _artist_ids_of(obj: Any, whole: bool) -> Set[int]:
+    state = inspect(obj)
+    if isinstance(obj, User):
+        return {int(obj.id)} if not whole and obj.id and _changed(state, _USER_ATTRS) else set()
+    if not whole and not _changed(state, _BOOKING_ATTRS if isinstance(obj, Booking) else None):
+        return set()
+    if isinstance(obj, ServiceProviderProfile):
+        return {int(obj.user_id)} if obj.user_id else set()
+    ids = {int(a) for a in (state.attrs.artist_id.history.deleted or ()) if a}
+    if obj.artist_id:
+        ids.add(int(obj.artist_id))
+    return ids
+
+
+def _collect(session: Session) -> Set[int]:
+    dirty: Set[int] = set()
+    for group, whole in ((session.new, True), (session.deleted, True), (session.dirty, False)):
+        for obj in group:
+            if isinstance(obj, (ServiceProviderProfile, Service, Review, Booking, User)):
+                dirty |= _artist_ids_of(obj, whole)
+    return dirty
+
+
+_tracker = DirtyTracker(
+    "provider_profile_dirty",
+    collect=_collect,
+    on_commit=lambda session, artist_ids: invalidate_provider_profiles(artist_ids),
+)
+
+
+def note_provider_profile_dirty(db: Session, artist_ids: Iterable[int]) -> None:
+    """Invalidate providers' cached profiles after ``db`` commits."""
+    _tracker.note(db, artist_ids)
@@ -0,0 +1,306 @@
+"""Full-text and trigram search over provider names, categories and locations.
+
+Name searches used to run ``lower(col) ILIKE '%term%'`` across profiles,
+users and categories, and no B-tree index can serve that. Each
+``provider_search_stats`` row now carries two normalized strings (lower-cased,
+accents stripped, whitespace collapsed), built by
+:mod:`app.services.provider_stats`:
+
+* ``search_name``: business name, first name and last name.
+* ``search_document``: the name plus category names and location.
+
+They are indexed per backend:
+
+* **Postgres.** ``pg_trgm`` GIN indexes on ``search_name``,
+  ``search_document`` and ``service_provider_profiles.location`` serve
+  ``ILIKE '%term%'``. A GIN index on ``to_tsvector('simple', search_document)``
+  serves ranked word-prefix queries.
+* **SQLite.** An external-content FTS5 table with the trigram tokenizer
+  mirrors both columns. Triggers on ``provider_search_stats`` keep it in sync.
+  Whether the table exists is recorded per engine when it is created or
+  ensured, so searches do not look it up per request.
+
+:func:`provider_text_match` returns an ``(artist_id, score)`` subquery. The
+provider list (``artist=``) and the AI provider search join it, and higher
+scores rank first. Other backends fall back to ``ILIKE`` with a score of 0.
+So do SQLite builds without FTS5 trigram support, and terms shorter than a
+trigram.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import unicodedata
+import weakref
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, Integer, and_, event, func, literal, literal_column, or_, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models.provider_search_stats import ProviderSearchStats
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "provider_search_fts"
+
+_stats = ProviderSearchStats.__table__
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Engine -> whether its FTS5 table exists (SQLite)
+_fts_ready: "weakref.WeakKeyDictionary[Engine, bool]" = weakref.WeakKeyDictionary()
+
+_SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "search_name, search_document, content='provider_search_stats', "
+    "content_rowid='artist_id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON provider_search_stats BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_name, search_document) "
+    "VALUES (new.artist_id, new.search_name, new.search_document); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON provider_search_stats BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_name, search_document) "
+    "VALUES ('delete', old.artist_id, old.search_name, old.search_document); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON provider_search_stats BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_name, search_document) "
+    "VALUES ('delete', old.artist_id, old.search_name, old.search_document); "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_name, search_document) "
+    "VALUES (new.artist_id, new.search_name, new.search_document); END",
+)
+
+# Postgres: expression and trigram indexes, built CONCURRENTLY so startup does
+# not block writes. The tsvector expression must match _pg_tsvector() exactly
+# for the planner to use it.
+_PG_TSVECTOR_SQL = "to_tsvector('simple'::regconfig, coalesce(search_document, ''))"
+_PG_INDEXES = (
+    (
+        "ix_provider_search_stats_document_fts",
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_provider_search_stats_document_fts "
+        f"ON provider_search_stats USING gin ({_PG_TSVECTOR_SQL})",
+    ),
+    (
+        "ix_provider_search_stats_name_trgm",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_provider_search_stats_name_trgm "
+        "ON provider_search_stats USING gin (search_name gin_trgm_ops)",
+    ),
+    (
+        "ix_provider_search_stats_document_trgm",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_provider_search_stats_document_trgm "
+        "ON provider_search_stats USING gin (search_document gin_trgm_ops)",
+    ),
+    (
+        "ix_service_provider_profiles_location_trgm",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_service_provider_profiles_location_trgm "
+        "ON service_provider_profiles USING gin (location gin_trgm_ops)",
+    ),
+)
+
+
+def normalize_text(value: Any) -> str:
+    """Lower-case ``value``, strip accents and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", str(value or ""))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.lower().split())
+
+
+def build_search_fields(
+    business_name: Optional[str],
+    first_name: Optional[str],
+    last_name: Optional[str],
+    location: Optional[str],
+    category_names: Iterable[str],
+) -> Tuple[Optional[str], Optional[str]]:
+    """Return ``(search_name, search_document)`` for one provider."""
+    name = normalize_text(" ".join(p for p in (business_name, first_name, last_name) if p))
+    document = normalize_text(" ".join(p for p in (name, " ".join(category_names), location) if p))
+    return name or None, document or None
+
+
+# ---- schema ------------------------------------------------------------------
+
+
+def _sqlite_fts_present(conn: Connection) -> bool:
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first()
+    return row is not None
+
+
+def _create_sqlite_fts(conn: Connection) -> bool:
+    """Create the FTS5 table and triggers; return False when unsupported."""
+    try:
+        existed = _sqlite_fts_present(conn)
+        for ddl in _SQLITE_DDL:
+            conn.execute(text(ddl))
+        if not existed:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        _fts_ready[conn.engine] = True
+        return True
+    except Exception as exc:
+        # SQLite before 3.34 has no trigram tokenizer; searches use ILIKE.
+        logger.debug("provider search FTS5 unavailable: %s", exc)
+        _fts_ready[conn.engine] = False
+        return False
+
+
+def _fts_available(db: Session) -> bool:
+    bind = db.get_bind()
+    engine = getattr(bind, "engine", bind)
+    ready = _fts_ready.get(engine)
+    if ready is None:
+        # Tables created before this module was imported: look once.
+        ready = _fts_ready[engine] = _sqlite_fts_present(db.connection())
+    return ready
+
+
+def _create_pg_indexes(engine: Engine) -> int:
+    created = 0
+    # CONCURRENTLY cannot run inside a transaction block.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except Exception as exc:
+            logger.warning("pg_trgm extension unavailable: %s", exc)
+        for name, ddl in _PG_INDEXES:
+            try:
+                conn.execute(text(ddl))
+                created += 1
+            except Exception as exc:
+                logger.warning("provider search index %s skipped: %s", name, exc)
+                # A failed concurrent build leaves an INVALID index that
+                # IF NOT EXISTS would skip on every later start.
+                try:
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                except Exception:
+                    pass
+    return created
+
+
+def ensure_provider_search_index(engine: Engine) -> int:
+    """Create the backend's search indexes and fill missing search fields.
+
+    Returns the number of stats rows rewritten by the fill. Rows written
+    before the search columns existed have ``search_name`` NULL. When any are
+    found, one reconcile sweep computes them.
+    """
+    from app.services.provider_stats import reconcile_provider_stats
+
+    if engine.dialect.name == "postgresql":
+        _create_pg_indexes(engine)
+    elif engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            _create_sqlite_fts(conn)
+    with engine.begin() as conn:
+        stale = conn.execute(select(_stats.c.artist_id).where(_stats.c.search_name.is_(None)).limit(1)).first()
+        if stale is None:
+            return 0
+        return reconcile_provider_stats(conn)
+
+
+@event.listens_for(_stats, "after_create")
+def _after_stats_create(target, connection, **kw) -> None:  # noqa: ANN001
+    if connection.dialect.name == "sqlite":
+        _create_sqlite_fts(connection)
+
+
+@event.listens_for(_stats, "before_drop")
+def _before_stats_drop(target, connection, **kw) -> None:  # noqa: ANN001
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        _fts_ready[connection.engine] = False
+
+
+# ---- queries -----------------------------------------------------------------
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _pg_tsvector():
+    return func.to_tsvector(
+        literal_column("'simple'::regconfig"), func.coalesce(_stats.c.search_document, literal_column("''"))
+    )
+
+
+def _pg_tsquery(terms: Sequence[str], any_term: bool) -> Optional[str]:
+    parts = []
+    for term in terms:
+        words = _WORD_RE.findall(term)
+        if words:
+            parts.append("(" + " & ".join(f"{w}:*" for w in words) + ")")
+    return (" | " if any_term else " & ").join(parts) or None
+
+
+def _fts5_query(terms: Sequence[str], field: str, any_term: bool) -> str:
+    joiner = " OR " if any_term else " AND "
+    expr = joiner.join('"' + t.replace('"', '""') + '"' for t in terms)
+    return f"{{search_name}} : ({expr})" if field == "name" else f"({expr})"
+
+
+def provider_text_match(
+    db: Session,
+    terms: Sequence[str],
+    *,
+    field: str = "name",
+    any_term: bool = True,
+):
+    """Return a ``(artist_id, score)`` subquery of providers matching ``terms``.
+
+    Each term is a substring to find in ``search_name`` (``field="name"``) or
+    ``search_document`` (``field="document"``). The Postgres document search
+    matches word prefixes instead. With ``any_term`` one matching term is
+    enough, otherwise all must match. Returns ``None`` when no term is left
+    after normalization.
+    """
+    cleaned: List[str] = []
+    for term in terms:
+        norm = normalize_text(term)
+        if norm and norm not in cleaned:
+            cleaned.append(norm)
+    if not cleaned:
+        return None
+
+    column = _stats.c.search_name if field == "name" else _stats.c.search_document
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        tsquery = _pg_tsquery(cleaned, any_term)
+        if field == "document" and tsquery:
+            query = func.to_tsquery(literal_column("'simple'::regconfig"), tsquery)
+            cond = _pg_tsvector().op("@@")(query)
+        else:
+            likes = [column.ilike(_like_pattern(t), escape="\\") for t in cleaned]
+            cond = or_(*likes) if any_term else and_(*likes)
+        score = (
+            func.ts_rank(_pg_tsvector(), func.to_tsquery(literal_column("'simple'::regconfig"), tsquery))
+            if tsquery
+            else literal(0.0)
+        )
+        return select(_stats.c.artist_id, score.label("score")).where(cond).subquery("provider_text_match")
+
+    if dialect == "sqlite" and min(len(t) for t in cleaned) >= 3 and _fts_available(db):
+        # bm25() is lower-is-better; negate it so every backend ranks by score DESC.
+        return (
+            text(
+                f"SELECT rowid AS artist_id, -bm25({FTS_TABLE}) AS score "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :provider_fts_query"
+            )
+            .bindparams(provider_fts_query=_fts5_query(cleaned, field, any_term))
+            .columns(artist_id=Integer, score=Float)
+            .subquery("provider_text_match")
+        )
+
+    likes = [column.ilike(_like_pattern(t), escape="\\") for t in cleaned]
+    cond = or_(*likes) if any_term else and_(*likes)
+    return select(_stats.c.artist_id, literal(0.0).label("score")).where(cond).subquery("provider_text_match")
+
+
+__all__ = [
+    "FTS_TABLE",
+    "build_search_fields",
+    "ensure_provider_search_index",
+    "normalize_text",
+    "provider_text_match",
+]
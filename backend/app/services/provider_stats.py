@@ -0,0 +1,453 @@
+"""Maintain the denormalized ``provider_search_stats`` ranking table.
+
+The public provider list and the AI provider search sort and filter on
+booking counts, ratings, profile views, listed service prices and category
+names. Computing those with ``GROUP BY`` subqueries over every booking,
+review and service on each uncached request does not scale, so each
+provider gets one precomputed :class:`ProviderSearchStats` row instead.
+
+Every provider has a row: a new profile's row is computed inside the flush
+that inserts the profile, so it commits (or rolls back) with it and the
+list's join never drops a provider. Rows are then kept fresh two ways:
+
+* **Incrementally.** A session ``after_flush`` listener records which
+  providers a flush touched (new/deleted bookings, reviews, services and
+  profile views; rating, price, status or category edits; business name,
+  location or account name edits). After the commit those providers are
+  queued for a background thread that recomputes their rows on its own
+  connection, so the request thread does not pay for it
+  (``PROVIDER_STATS_REFRESH=inline`` refreshes on the committing thread).
+  Writers that bypass the unit of work (``query.update``, raw SQL) call
+  :func:`note_provider_stats_dirty`.
+* **Periodically.** :func:`reconcile_provider_stats_job` sweeps every
+  provider in chunks and rewrites rows that drifted, so a missed hook only
+  costs freshness until the next sweep.
+
+Per-provider recomputation reads each source table once for the whole chunk
+and compares against the stored rows; unchanged rows are not rewritten and
+changed ones are upserted (``ON CONFLICT DO UPDATE``), so concurrent
+refreshes of one provider never race a delete against an insert.
+The row also carries the normalized name and document text indexed by
+:mod:`app.services.provider_search_index`.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import queue
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, inspect, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models.booking import Booking
+from app.models.profile_view import ArtistProfileView
+from app.models.provider_search_stats import ProviderSearchStats
+from app.models.review import Review
+from app.models.service import Service
+from app.models.service_category import ServiceCategory
+from app.models.service_provider_profile import ServiceProviderProfile
+from app.models.user import User
+from app.services.provider_search_index import build_search_fields
+from app.utils.metrics import incr as metrics_incr
+from app.utils.session_tracking import DirtyTracker
+
+logger = logging.getLogger(__name__)
+
+# Service statuses that make a provider visible on the public list.
+LISTED_SERVICE_STATUSES = ("approved", "pending_review")
+
+try:
+    RECONCILE_CHUNK = max(1, int(os.getenv("PROVIDER_STATS_RECONCILE_CHUNK") or 500))
+except Exception:
+    RECONCILE_CHUNK = 500
+
+# deferred (default): refresh after commit on a background thread; inline: on
+# the committing thread.
+REFRESH_MODE = (os.getenv("PROVIDER_STATS_REFRESH") or "deferred").strip().lower()
+
+# best_match: Bayesian-smoothed rating (a handful of 5-star reviews should
+# not outrank a long 4.8 track record) plus a log-damped popularity bonus.
+_PRIOR_RATING = 3.5
+_PRIOR_WEIGHT = 5
+_BOOKING_WEIGHT = 0.25
+_VIEW_WEIGHT = 0.05
+
+_stats = ProviderSearchStats.__table__
+_COMPARED = (
+    "book_count",
+    "rating_avg",
+    "rating_count",
+    "rating_sort",
+    "view_count",
+    "best_match_score",
+    "has_listed_service",
+    "has_approved_service",
+    "min_price",
+    "min_approved_price",
+    "category_names",
+    "category_slugs",
+    "search_name",
+    "search_document",
+)
+
+
+def category_slug(name: str) -> str:
+    """Slug form used in ``category_slugs`` ("Sound Service" -> "sound_service")."""
+    return name.strip().lower().replace(" ", "_")
+
+
+def best_match_score(rating_avg: Optional[float], rating_count: int, book_count: int, view_count: int) -> float:
+    rating_sum = (rating_avg or 0.0) * rating_count
+    smoothed = (rating_sum + _PRIOR_RATING * _PRIOR_WEIGHT) / (rating_count + _PRIOR_WEIGHT)
+    score = smoothed + _BOOKING_WEIGHT * math.log1p(book_count) + _VIEW_WEIGHT * math.log1p(view_count)
+    return round(score, 6)
+
+
+def _min(current: Optional[Decimal], value: Any) -> Optional[Decimal]:
+    if value is None:
+        return current
+    value = Decimal(str(value))
+    return value if current is None or value < current else current
+
+
+def _compute(conn: Connection, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Return fresh stats rows for the providers in ``ids`` that still exist."""
+    profiles = ServiceProviderProfile.__table__
+    users = User.__table__
+    rows: Dict[int, Dict[str, Any]] = {}
+    # (business_name, first_name, last_name, location) for the search text
+    texts: Dict[int, tuple] = {}
+    for aid, business_name, location, first_name, last_name in conn.execute(
+        select(profiles.c.user_id, profiles.c.business_name, profiles.c.location, users.c.first_name, users.c.last_name)
+        .select_from(profiles.outerjoin(users, users.c.id == profiles.c.user_id))
+        .where(profiles.c.user_id.in_(ids))
+    ):
+        rows[int(aid)] = {
+            "artist_id": int(aid),
+            "book_count": 0,
+            "rating_avg": None,
+            "rating_count": 0,
+            "view_count": 0,
+            "has_listed_service": False,
+            "has_approved_service": False,
+            "min_price": None,
+            "min_approved_price": None,
+        }
+        texts[int(aid)] = (business_name, first_name, last_name, location)
+    if not rows:
+        return rows
+    present = list(rows)
+
+    bookings = Booking.__table__
+    for aid, n in conn.execute(
+        select(bookings.c.artist_id, func.count(bookings.c.id))
+        .where(bookings.c.artist_id.in_(present))
+        .group_by(bookings.c.artist_id)
+    ):
+        rows[int(aid)]["book_count"] = int(n or 0)
+
+    reviews = Review.__table__
+    for aid, avg, n in conn.execute(
+        select(reviews.c.artist_id, func.avg(reviews.c.rating), func.count(reviews.c.id))
+        .where(reviews.c.artist_id.in_(present))
+        .group_by(reviews.c.artist_id)
+    ):
+        rows[int(aid)]["rating_avg"] = round(float(avg), 4) if avg is not None else None
+        rows[int(aid)]["rating_count"] = int(n or 0)
+
+    views = ArtistProfileView.__table__
+    for aid, n in conn.execute(
+        select(views.c.artist_id, func.count(views.c.id))
+        .where(views.c.artist_id.in_(present))
+        .group_by(views.c.artist_id)
+    ):
+        rows[int(aid)]["view_count"] = int(n or 0)
+
+    # Services are few per provider: fetch them and fold in Python so the
+    # category list and both price minima come from a single pass.
+    services = Service.__table__
+    categories = ServiceCategory.__table__
+    names: Dict[int, Set[str]] = {aid: set() for aid in present}
+    for aid, status, price, cat_name in conn.execute(
+        select(services.c.artist_id, services.c.status, services.c.price, categories.c.name)
+        .select_from(services.outerjoin(categories, services.c.service_category_id == categories.c.id))
+        .where(services.c.artist_id.in_(present), services.c.status.in_(LISTED_SERVICE_STATUSES))
+    ):
+        row = rows[int(aid)]
+        row["has_listed_service"] = True
+        row["min_price"] = _min(row["min_price"], price)
+        if status == "approved":
+            row["has_approved_service"] = True
+            row["min_approved_price"] = _min(row["min_approved_price"], price)
+        if cat_name:
+            names[int(aid)].add(str(cat_name))
+
+    for aid, row in rows.items():
+        cats = sorted(names[aid])
+        row["category_names"] = ",".join(cats) if cats else None
+        row["category_slugs"] = ("," + ",".join(category_slug(c) for c in cats) + ",") if cats else None
+        business_name, first_name, last_name, location = texts[aid]
+        row["search_name"], row["search_document"] = build_search_fields(
+            business_name, first_name, last_name, location, cats
+        )
+        row["rating_sort"] = float(row["rating_avg"] or 0.0)
+        row["best_match_score"] = best_match_score(
+            row["rating_avg"], row["rating_count"], row["book_count"], row["view_count"]
+        )
+    return rows
+
+
+def _same(stored: Dict[str, Any], fresh: Dict[str, Any]) -> bool:
+    for col in _COMPARED:
+        a, b = stored.get(col), fresh.get(col)
+        if isinstance(a, (Decimal, float)) or isinstance(b, (Decimal, float)):
+            if a is None or b is None:
+                if a is not b:
+                    return False
+            elif abs(float(a) - float(b)) > 1e-6:
+                return False
+        elif a != b:
+            return False
+    return True
+
+
+def refresh_provider_stats(conn: Connection, artist_ids: Iterable[int]) -> int:
+    """Recompute stats rows for ``artist_ids`` on ``conn``; return rows written.
+
+    Rows of providers that no longer exist are removed. The caller owns the
+    transaction.
+    """
+    ids = sorted({int(a) for a in artist_ids if a})
+    if not ids:
+        return 0
+    fresh = _compute(conn, ids)
+    stored = {
+        int(r["artist_id"]): dict(r)
+        for r in conn.execute(select(_stats).where(_stats.c.artist_id.in_(ids))).mappings()
+    }
+    gone = [aid for aid in stored if aid not in fresh]
+    changed = [row for aid, row in fresh.items() if aid not in stored or not _same(stored[aid], row)]
+    if gone:
+        conn.execute(delete(_stats).where(_stats.c.artist_id.in_(gone)))
+    if changed:
+        now = datetime.utcnow()
+        _upsert(conn, [{**row, "created_at": now, "updated_at": now} for row in changed])
+    return len(changed) + len(gone)
+
+
+def _upsert(conn: Connection, rows: List[Dict[str, Any]]) -> None:
+    """Insert ``rows`` or update the existing ones in place (keeps ``created_at``)."""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        conn.execute(delete(_stats).where(_stats.c.artist_id.in_([r["artist_id"] for r in rows])))
+        conn.execute(insert(_stats), rows)
+        return
+    stmt = dialect_insert(_stats)
+    updates = {c: stmt.excluded[c] for c in rows[0] if c not in ("artist_id", "created_at")}
+    conn.execute(stmt.on_conflict_do_update(index_elements=[_stats.c.artist_id], set_=updates), rows)
+
+
+def reconcile_provider_stats(conn: Connection, chunk_size: Optional[int] = None) -> int:
+    """Sweep every provider (and orphaned stats row); return rows corrected."""
+    size = chunk_size or RECONCILE_CHUNK
+    profiles = ServiceProviderProfile.__table__
+    ids = {int(a) for (a,) in conn.execute(select(profiles.c.user_id))}
+    ids.update(int(a) for (a,) in conn.execute(select(_stats.c.artist_id)))
+    ordered = sorted(ids)
+    written = 0
+    for start in range(0, len(ordered), size):
+        written += refresh_provider_stats(conn, ordered[start : start + size])
+    return written
+
+
+def reconcile_provider_stats_job() -> None:
+    """Periodic drift repair for ``provider_search_stats`` (scheduled job)."""
+    from app.database import SessionLocal
+
+    with SessionLocal() as db:
+        corrected = reconcile_provider_stats(db.connection())
+        db.commit()
+    metrics_incr("provider_stats.reconciled", corrected)
+    if corrected:
+        logger.info("provider_search_stats reconcile corrected %s rows", corrected)
+
+
+def ensure_provider_search_stats(engine: Engine) -> int:
+    """Backfill the table when it is empty but providers exist (fresh deploys)."""
+    with engine.begin() as conn:
+        if conn.execute(select(_stats.c.artist_id).limit(1)).first() is not None:
+            return 0
+        profiles = ServiceProviderProfile.__table__
+        if conn.execute(select(profiles.c.user_id).limit(1)).first() is None:
+            return 0
+        return reconcile_provider_stats(conn)
+
+
+# ---- session listeners -------------------------------------------------------
+
+# Attributes whose change alters a provider's stats; new and deleted rows of
+# these models always count, except users (a provider's profile row covers it).
+_TRACKED_ATTRS = {
+    Booking: ("artist_id",),
+    Review: ("artist_id", "rating"),
+    Service: ("artist_id", "status", "price", "service_category_id"),
+    ArtistProfileView: ("artist_id",),
+    ServiceProviderProfile: ("business_name", "location"),
+    User: ("first_name", "last_name"),
+}
+
+
+def _artist_ids_of(obj: Any, attrs: Iterable[str], whole: bool) -> Set[int]:
+    state = inspect(obj)
+    if isinstance(obj, User):
+        # Only name edits matter, and only for providers; refreshing a
+        # client's id finds no profile and writes nothing.
+        if whole or not any(state.attrs[a].history.has_changes() for a in attrs):
+            return set()
+        return {int(obj.id)} if obj.id else set()
+    if isinstance(obj, ServiceProviderProfile):
+        if not whole and not any(state.attrs[a].history.has_changes() for a in attrs):
+            return set()
+        return {int(obj.user_id)} if obj.user_id else set()
+    ids: Set[int] = set()
+    if not whole:
+        if not any(state.attrs[a].history.has_changes() for a in attrs):
+            return ids
+        ids.update(int(a) for a in (state.attrs.artist_id.history.deleted or ()) if a)
+    if obj.artist_id:
+        ids.add(int(obj.artist_id))
+    return ids
+
+
+def _collect(session: Session) -> Set[int]:
+    dirty: Set[int] = set()
+    for group, whole in ((session.new, True), (session.deleted, True), (session.dirty, False)):
+        for obj in group:
+            for model, attrs in _TRACKED_ATTRS.items():
+                if isinstance(obj, model):
+                    dirty |= _artist_ids_of(obj, attrs, whole)
+                    break
+    new_profiles = [
+        int(obj.user_id) for obj in session.new if isinstance(obj, ServiceProviderProfile) and obj.user_id
+    ]
+    if new_profiles:
+        # Part of the profile's transaction, so no committed provider lacks a row.
+        try:
+            refresh_provider_stats(session.connection(), new_profiles)
+        except Exception as exc:
+            logger.warning("provider_search_stats row for new providers %s failed: %s", new_profiles, exc)
+    return dirty
+
+
+# ---- deferred refresh ----------------------------------------------------------
+
+_REFRESH_QUEUE: "queue.Queue[Tuple[Engine, frozenset]]" = queue.Queue()
+_refresher_lock = threading.Lock()
+_refresher: Optional[threading.Thread] = None
+
+
+def _refresh_now(engine: Engine, ids: Iterable[int]) -> None:
+    ids = set(ids)
+    try:
+        with engine.begin() as conn:
+            refresh_provider_stats(conn, ids)
+        metrics_incr("provider_stats.refreshed", len(ids))
+    except Exception as exc:
+        # The reconcile job repairs whatever a failed refresh leaves behind.
+        logger.warning("provider_search_stats refresh failed for %s: %s", sorted(ids), exc)
+
+
+def _refresher_loop() -> None:
+    while True:
+        engine, ids = _REFRESH_QUEUE.get()
+        batches: Dict[Engine, Set[int]] = {engine: set(ids)}
+        taken = 1
+        # Coalesce everything committed meanwhile into one refresh per engine.
+        while True:
+            try:
+                engine, ids = _REFRESH_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+            batches.setdefault(engine, set()).update(ids)
+            taken += 1
+        try:
+            for engine, pending in batches.items():
+                _refresh_now(engine, pending)
+        finally:
+            for _ in range(taken):
+                _REFRESH_QUEUE.task_done()
+
+
+def _defer_refresh(engine: Engine, ids: Set[int]) -> None:
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(target=_refresher_loop, name="provider-stats-refresh", daemon=True)
+            _refresher.start()
+    _REFRESH_QUEUE.put((engine, frozenset(ids)))
+
+
+def wait_for_provider_stats(timeout: Optional[float] = None) -> bool:
+    """Block until queued refreshes are written; False if ``timeout`` ran out."""
+    if timeout is None:
+        _REFRESH_QUEUE.join()
+        return True
+    done = threading.Event()
+    threading.Thread(target=lambda: (_REFRESH_QUEUE.join(), done.set()), daemon=True).start()
+    return done.wait(timeout)
+
+
+def _is_private_database(engine: Engine) -> bool:
+    # An in-memory SQLite database lives in one connection; another thread
+    # cannot reach it through the pool.
+    return engine.dialect.name == "sqlite" and (engine.url.database or ":memory:") == ":memory:"
+
+
+def _after_commit(session: Session, pending: Set[int]) -> None:
+    try:
+        bind = session.get_bind()
+    except Exception as exc:
+        logger.warning("provider_search_stats refresh skipped for %s: %s", sorted(pending), exc)
+        return
+    if isinstance(bind, Connection):
+        try:
+            refresh_provider_stats(bind, pending)
+            metrics_incr("provider_stats.refreshed", len(pending))
+        except Exception as exc:
+            logger.warning("provider_search_stats refresh failed for %s: %s", sorted(pending), exc)
+    elif REFRESH_MODE == "inline" or _is_private_database(bind):
+        _refresh_now(bind, pending)
+    else:
+        _defer_refresh(bind, pending)
+
+
+_tracker = DirtyTracker("provider_stats_dirty", collect=_collect, on_commit=_after_commit)
+
+
+def note_provider_stats_dirty(db: Session, artist_ids: Iterable[int]) -> None:
+    """Mark providers for refresh after ``db`` commits."""
+    _tracker.note(db, artist_ids)
+
+
+__all__ = [
+    "LISTED_SERVICE_STATUSES",
+    "best_match_score",
+    "category_slug",
+    "ensure_provider_search_stats",
+    "note_provider_stats_dirty",
+    "reconcile_provider_stats",
+    "reconcile_provider_stats_job",
+    "refresh_provider_stats",
+    "wait_for_provider_stats",
+]
@@ -0,0 +1,76 @@
+"""Radius search over provider base locations.
+
+``nearby_providers`` narrows a provider query to the geohash cells covering a
+search circle (an index range scan on ``location_geohash``), trims to the
+exact bounding box, then ranks the remaining candidates by haversine distance
+in Python. Only ``(user_id, lat, lng)`` is read for candidates; callers load
+full rows for the page they serve.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import List, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from app.models import ServiceProviderProfile
+from app.services.distance_service import _haversine_km
+from app.utils.geohash import bounding_box, cells_for_radius, prefix_upper_bound
+
+try:
+    CLOSEST_SEARCH_RADIUS_KM = max(1.0, float(os.getenv("CLOSEST_SEARCH_RADIUS_KM") or 300.0))
+except Exception:
+    CLOSEST_SEARCH_RADIUS_KM = 300.0
+
+try:
+    CLOSEST_MAX_CANDIDATES = max(1, int(os.getenv("CLOSEST_MAX_CANDIDATES") or 5000))
+except Exception:
+    CLOSEST_MAX_CANDIDATES = 5000
+
+
+def nearby_providers(
+    query: Query,
+    lat: float,
+    lng: float,
+    radius_km: float,
+    max_candidates: int = CLOSEST_MAX_CANDIDATES,
+) -> List[Tuple[int, float]]:
+    """Return ``(user_id, distance_km)`` within ``radius_km``, nearest first.
+
+    ``query`` is any provider query (filters and joins are kept; its selected
+    columns are replaced). Ties break on ``user_id`` so paging is stable. At
+    most ``max_candidates`` nearest providers are returned.
+    """
+    artist = ServiceProviderProfile
+    cells = cells_for_radius(lat, lng, radius_km)
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    if min_lng < -180.0 or max_lng > 180.0:
+        # The box wraps the antimeridian; the geohash cells already did too.
+        lng_filter = or_(
+            artist.location_lng >= (min_lng + 360.0 if min_lng < -180.0 else min_lng),
+            artist.location_lng <= (max_lng - 360.0 if max_lng > 180.0 else max_lng),
+        )
+    else:
+        lng_filter = artist.location_lng.between(min_lng, max_lng)
+    candidates = (
+        query.with_entities(artist.user_id, artist.location_lat, artist.location_lng)
+        .filter(
+            or_(*[artist.location_geohash.between(c, prefix_upper_bound(c)) for c in cells]),
+            artist.location_lat.between(min_lat, max_lat),
+            lng_filter,
+        )
+        .order_by(None)
+        .all()
+    )
+    ranked: List[Tuple[int, float]] = []
+    for user_id, c_lat, c_lng in candidates:
+        km = _haversine_km(lat, lng, float(c_lat), float(c_lng))
+        if km <= radius_km:
+            ranked.append((int(user_id), km))
+    ranked.sort(key=lambda item: (item[1], item[0]))
+    return ranked[:max_candidates]
+
+
+__all__ = ["CLOSEST_MAX_CANDIDATES", "CLOSEST_SEARCH_RADIUS_KM", "nearby_providers"]
@@ -0,0 +1,384 @@
+"""Maintain ``thread_participant_state``: per-participant unread counters.
+
+Unread badges, ``/inbox/unread`` and inbox-stream snapshots used to count
+unread rows in ``messages`` joined to ``booking_requests`` on every call, so
+their cost grew with total message history. Each participant of a thread
+(its client and its artist) now has one :class:`ThreadParticipantState` row
+and those reads are indexed lookups.
+
+Rows are written in the same transaction as the messages:
+
+* A session ``after_flush`` listener turns new messages into counter
+  increments (one UPDATE per participant). Edited, tombstoned or deleted
+  messages, and threads without rows yet, are recounted for that thread
+  only. Deleted threads lose their rows.
+* :func:`mark_thread_read` is called by the bulk read-receipt UPDATE, which
+  the listener cannot see.
+* :func:`reconcile_thread_state_job` rewrites rows that drifted (bulk
+  updates, concurrent first messages). It recounts only threads with a
+  message whose ``updated_at`` is at or after the previous run's start (less
+  ``THREAD_STATE_WATERMARK_OVERLAP`` seconds for transactions still open
+  then). The first run in a process, and one every
+  ``THREAD_STATE_FULL_RECONCILE`` seconds, sweeps every thread instead;
+  that also catches raw SQL writes that leave ``updated_at`` alone.
+  ``scripts/db/reconcile_thread_state.py`` runs the full sweep on demand and
+  doubles as the backfill.
+
+"Unread" keeps its old meaning: sent by someone else, ``is_read`` false or
+NULL, and not a deletion tombstone.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, delete, func, inspect, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models.booking_request import BookingRequest
+from app.models.message import Message
+from app.models.thread_participant_state import ThreadParticipantState
+from app.utils.metrics import incr as metrics_incr
+from app.utils.session_tracking import DirtyTracker
+
+logger = logging.getLogger(__name__)
+
+try:
+    RECONCILE_CHUNK = max(1, int(os.getenv("THREAD_STATE_RECONCILE_CHUNK") or 500))
+except Exception:
+    RECONCILE_CHUNK = 500
+try:
+    FULL_RECONCILE_S = max(0.0, float(os.getenv("THREAD_STATE_FULL_RECONCILE") or 7 * 86400))
+except Exception:
+    FULL_RECONCILE_S = 7 * 86400.0
+try:
+    WATERMARK_OVERLAP_S = max(0.0, float(os.getenv("THREAD_STATE_WATERMARK_OVERLAP") or 600))
+except Exception:
+    WATERMARK_OVERLAP_S = 600.0
+
+_state = ThreadParticipantState.__table__
+_messages = Message.__table__
+_requests = BookingRequest.__table__
+_COMPARED = ("unread_count", "last_message_id", "last_activity_at")
+# Start of the last reconcile job run (naive UTC, like messages.updated_at)
+# and the monotonic time of the last full sweep.
+_watermark: Optional[datetime] = None
+_last_full_at = 0.0
+# Message columns whose change can move a message in or out of the counts
+_RECOUNT_ATTRS = ("booking_request_id", "sender_id", "is_read", "system_key")
+
+
+def _guarded(conn: Connection):
+    """Savepoint so a failed statement does not abort the caller's transaction.
+
+    pysqlite does not run SAVEPOINTs reliably and SQLite has no aborted-
+    transaction state, so it goes without.
+    """
+    return nullcontext() if conn.dialect.name == "sqlite" else conn.begin_nested()
+
+
+def _is_tombstone(system_key: Optional[str]) -> bool:
+    from app.crud.crud_message import DELETED_SYSTEM_KEY  # lazy: crud imports this module
+
+    return system_key == DELETED_SYSTEM_KEY
+
+
+def _unread_clause():
+    from app.crud.crud_message import DELETED_SYSTEM_KEY
+
+    m = _messages.c
+    return and_(
+        or_(m.is_read.is_(False), m.is_read.is_(None)),
+        or_(m.system_key.is_(None), m.system_key != DELETED_SYSTEM_KEY),
+    )
+
+
+def _participants(conn: Connection, thread_ids: Iterable[int]) -> Dict[int, Tuple[int, ...]]:
+    ids = sorted({int(t) for t in thread_ids if t})
+    if not ids:
+        return {}
+    rows = conn.execute(
+        select(_requests.c.id, _requests.c.client_id, _requests.c.artist_id).where(_requests.c.id.in_(ids))
+    )
+    return {int(tid): tuple(sorted({int(u) for u in (client, artist) if u})) for tid, client, artist in rows}
+
+
+def _compute(conn: Connection, thread_ids: List[int]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """Return fresh rows keyed by ``(user_id, thread_id)`` for threads that exist."""
+    participants = _participants(conn, thread_ids)
+    rows = {
+        (user_id, tid): {
+            "user_id": user_id,
+            "booking_request_id": tid,
+            "unread_count": 0,
+            "last_message_id": None,
+            "last_activity_at": None,
+        }
+        for tid, users in participants.items()
+        for user_id in users
+    }
+    present = list(participants)
+    if not present:
+        return rows
+    m = _messages.c
+    for tid, last_id, last_at in conn.execute(
+        select(m.booking_request_id, func.max(m.id), func.max(m.timestamp))
+        .where(m.booking_request_id.in_(present))
+        .group_by(m.booking_request_id)
+    ):
+        for user_id in participants[int(tid)]:
+            rows[(user_id, int(tid))].update(last_message_id=last_id, last_activity_at=last_at)
+    for tid, sender_id, n in conn.execute(
+        select(m.booking_request_id, m.sender_id, func.count(m.id))
+        .where(m.booking_request_id.in_(present), _unread_clause())
+        .group_by(m.booking_request_id, m.sender_id)
+    ):
+        for user_id in participants[int(tid)]:
+            if user_id != sender_id:
+                rows[(user_id, int(tid))]["unread_count"] += int(n or 0)
+    return rows
+
+
+def _same(stored: Dict[str, Any], fresh: Dict[str, Any]) -> bool:
+    for key in _COMPARED:
+        a, b = stored.get(key), fresh.get(key)
+        if isinstance(a, datetime) and isinstance(b, datetime):
+            a, b = a.replace(tzinfo=None), b.replace(tzinfo=None)
+        if a != b:
+            return False
+    return True
+
+
+def _upsert(conn: Connection, rows: List[Dict[str, Any]]) -> None:
+    insert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+    now = datetime.utcnow()
+    stmt = insert(_state).values([{**row, "created_at": now, "updated_at": now} for row in rows])
+    # last_read_message_id is owned by mark_thread_read; a recount keeps it.
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[_state.c.user_id, _state.c.booking_request_id],
+        set_={key: stmt.excluded[key] for key in (*_COMPARED, "updated_at")},
+    )
+    conn.execute(stmt)
+
+
+def refresh_thread_state(conn: Connection, thread_ids: Iterable[int]) -> int:
+    """Recount rows for ``thread_ids`` on ``conn``; return rows written.
+
+    Rows of threads (or participants) that no longer exist are removed. The
+    caller owns the transaction.
+    """
+    ids = sorted({int(t) for t in thread_ids if t})
+    if not ids:
+        return 0
+    fresh = _compute(conn, ids)
+    stored = {
+        (int(r["user_id"]), int(r["booking_request_id"])): dict(r)
+        for r in conn.execute(select(_state).where(_state.c.booking_request_id.in_(ids))).mappings()
+    }
+    gone = [key for key in stored if key not in fresh]
+    for user_id, tid in gone:
+        conn.execute(
+            delete(_state).where(_state.c.user_id == user_id, _state.c.booking_request_id == tid)
+        )
+    changed = [row for key, row in fresh.items() if key not in stored or not _same(stored[key], row)]
+    if changed:
+        _upsert(conn, changed)
+    return len(changed) + len(gone)
+
+
+def _apply_new_messages(conn: Connection, messages: List[Message]) -> Set[int]:
+    """Increment counters for freshly inserted messages; return threads to recount."""
+    participants = _participants(conn, (msg.booking_request_id for msg in messages))
+    # (user_id, thread_id) -> [unread delta, newest message id, its timestamp]
+    changes: Dict[Tuple[int, int], List[Any]] = {}
+    for msg in messages:
+        tid = int(msg.booking_request_id)
+        unread = not msg.is_read and not _is_tombstone(msg.system_key)
+        for user_id in participants.get(tid, ()):
+            entry = changes.setdefault((user_id, tid), [0, 0, None])
+            if unread and user_id != msg.sender_id:
+                entry[0] += 1
+            if int(msg.id) > entry[1]:
+                entry[1], entry[2] = int(msg.id), msg.timestamp
+    recount: Set[int] = set()
+    now = datetime.utcnow()
+    for (user_id, tid), (delta, last_id, last_at) in changes.items():
+        newer = func.coalesce(_state.c.last_message_id, 0) < last_id
+        result = conn.execute(
+            update(_state)
+            .where(_state.c.user_id == user_id, _state.c.booking_request_id == tid)
+            .values(
+                unread_count=_state.c.unread_count + delta,
+                last_message_id=case((newer, last_id), else_=_state.c.last_message_id),
+                last_activity_at=case((newer, last_at), else_=_state.c.last_activity_at),
+                updated_at=now,
+            )
+        )
+        if not result.rowcount:
+            recount.add(tid)
+    return recount
+
+
+def mark_thread_read(db: Session, booking_request_id: int, user_id: int, updated: int) -> None:
+    """Record that ``user_id`` read thread ``booking_request_id`` (before commit).
+
+    ``updated`` is the number of messages the read receipt flipped; when it
+    is non-zero the thread is recounted, since a message from a third sender
+    (system lines) is also cleared for the other participant.
+    """
+    try:
+        conn = db.connection()
+        with _guarded(conn):
+            if updated:
+                refresh_thread_state(conn, [booking_request_id])
+            last_id = conn.execute(
+                select(func.max(_messages.c.id)).where(_messages.c.booking_request_id == booking_request_id)
+            ).scalar()
+            conn.execute(
+                update(_state)
+                .where(_state.c.user_id == user_id, _state.c.booking_request_id == booking_request_id)
+                .values(last_read_message_id=last_id, unread_count=0)
+            )
+    except Exception as exc:
+        # The reconcile job repairs whatever a failed update leaves behind.
+        logger.warning("thread state read update failed for %s/%s: %s", booking_request_id, user_id, exc)
+
+
+# ---- reads -------------------------------------------------------------------
+
+def unread_counts(db: Session, user_id: int, thread_ids: Optional[List[int]] = None) -> Dict[int, int]:
+    """Return ``{thread_id: unread}`` for the user's threads with unread messages."""
+    query = db.query(ThreadParticipantState.booking_request_id, ThreadParticipantState.unread_count).filter(
+        ThreadParticipantState.user_id == user_id,
+        ThreadParticipantState.unread_count > 0,
+    )
+    if thread_ids:
+        query = query.filter(ThreadParticipantState.booking_request_id.in_(thread_ids))
+    return {int(tid): int(n) for tid, n in query.all()}
+
+
+def unread_totals(db: Session, user_id: int) -> Tuple[int, Optional[datetime]]:
+    """Return the user's total unread messages and the latest activity among unread threads."""
+    total, latest = (
+        db.query(
+            func.sum(ThreadParticipantState.unread_count),
+            func.max(ThreadParticipantState.last_activity_at),
+        )
+        .filter(ThreadParticipantState.user_id == user_id, ThreadParticipantState.unread_count > 0)
+        .one()
+    )
+    return int(total or 0), latest
+
+
+# ---- reconcile ---------------------------------------------------------------
+
+def reconcile_thread_state(
+    conn: Connection,
+    chunk_size: Optional[int] = None,
+    since: Optional[datetime] = None,
+) -> int:
+    """Recount threads in chunks; return rows corrected.
+
+    Without ``since`` every thread with messages or state rows is swept. With
+    it, only threads having a message updated at or after ``since``.
+    """
+    size = chunk_size or RECONCILE_CHUNK
+    m = _messages.c
+    if since is None:
+        ids = {int(t) for (t,) in conn.execute(select(m.booking_request_id).distinct())}
+        ids.update(int(t) for (t,) in conn.execute(select(_state.c.booking_request_id).distinct()))
+    else:
+        ids = {int(t) for (t,) in conn.execute(select(m.booking_request_id).where(m.updated_at >= since).distinct())}
+    ordered = sorted(ids)
+    written = 0
+    for start in range(0, len(ordered), size):
+        written += refresh_thread_state(conn, ordered[start : start + size])
+    return written
+
+
+def reconcile_thread_state_job() -> None:
+    """Periodic drift repair for ``thread_participant_state`` (scheduled job)."""
+    from app.database import SessionLocal
+
+    global _watermark, _last_full_at
+    started = datetime.utcnow()
+    full = _watermark is None or time.monotonic() - _last_full_at >= FULL_RECONCILE_S
+    since = None if full else _watermark - timedelta(seconds=WATERMARK_OVERLAP_S)
+    with SessionLocal() as db:
+        corrected = reconcile_thread_state(db.connection(), since=since)
+        db.commit()
+    _watermark = started
+    if full:
+        _last_full_at = time.monotonic()
+    metrics_incr("thread_state.reconciled", corrected, tags={"sweep": "full" if full else "incremental"})
+    if corrected:
+        logger.info("thread_participant_state reconcile corrected %s rows", corrected)
+
+
+def ensure_thread_participant_state(engine: Engine) -> int:
+    """Backfill the table when it is empty but messages exist (fresh deploys)."""
+    with engine.begin() as conn:
+        if conn.execute(select(_state.c.user_id).limit(1)).first() is not None:
+            return 0
+        if conn.execute(select(_messages.c.id).limit(1)).first() is None:
+            return 0
+        return reconcile_thread_state(conn)
+
+
+# ---- session tracking --------------------------------------------------------
+
+def _recount_flushed(session: Session) -> None:
+    """Apply the flush to the counters inside the same transaction."""
+    try:
+        new_messages: List[Message] = []
+        recount: Set[int] = _tracker.pop(session)
+        dropped: Set[int] = set()
+        for obj in session.new:
+            if isinstance(obj, Message) and obj.booking_request_id and obj.id:
+                new_messages.append(obj)
+        for obj in session.deleted:
+            if isinstance(obj, Message) and obj.booking_request_id:
+                recount.add(int(obj.booking_request_id))
+            elif isinstance(obj, BookingRequest) and obj.id:
+                dropped.add(int(obj.id))
+        for obj in session.dirty:
+            if not isinstance(obj, (Message, BookingRequest)):
+                continue
+            state = inspect(obj)
+            attrs = _RECOUNT_ATTRS if isinstance(obj, Message) else ("client_id", "artist_id")
+            if not any(state.attrs[a].history.has_changes() for a in attrs):
+                continue
+            if isinstance(obj, BookingRequest):
+                recount.add(int(obj.id))
+                continue
+            recount.update(int(t) for t in (state.attrs.booking_request_id.history.deleted or ()) if t)
+            recount.add(int(obj.booking_request_id))
+        if not (new_messages or recount or dropped):
+            return
+        conn = session.connection()
+        with _guarded(conn):
+            if new_messages:
+                recount |= _apply_new_messages(conn, new_messages)
+            if dropped:
+                conn.execute(delete(_state).where(_state.c.booking_request_id.in_(sorted(dropped))))
+            refresh_thread_state(conn, recount - dropped)
+    except Exception as exc:
+        # Never fail the message write; the reconcile job repairs the counters.
+        logger.warning("thread state update failed: %s", exc)
+
+
+# The set is consumed by the next flush, not the commit.
+_tracker = DirtyTracker("thread_state_refresh", collect=_recount_flushed)
+
+
+def note_thread_state_dirty(db: Session, thread_ids: Iterable[int]) -> None:
+    """Recount ``thread_ids`` at the session's next flush (call before it)."""
+    _tracker.note(db, thread_ids)
@@ -1,10 +1,23 @@
+import asyncio
 import logging
+import weakref
+
 import httpx
+from fastapi.concurrency import run_in_threadpool
 
 from app.utils.redis_cache import get_cached_weather, cache_weather
 
 logger = logging.getLogger(__name__)
 
+WTTR_URL = "https://wttr.in"
+
+# Longest a stale-while-revalidate refresh waits for its upstream fetch.
+REFRESH_TIMEOUT_S = 15.0
+
+# One pooled client per event loop so upstream connections are reused.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
 class WeatherAPIError(Exception):
     """General weather service failure."""
 
@@ -12,15 +25,56 @@ class LocationNotFoundError(Exception):
     """Raised when the service cannot find the location."""
 
 
-def get_3day_forecast(location: str) -> dict:
-    """Return a 3-day weather forecast for the given location."""
-    cached = get_cached_weather(location)
+def normalize_location(location: str) -> str:
+    """Key used to cache and coalesce forecasts for ``location``."""
+    return " ".join(location.split()).lower()
+
+
+def _client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=3.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return client
+
+
+async def close_client() -> None:
+    """Close this loop's upstream client (application shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def get_3day_forecast(location: str) -> dict:
+    """Return a 3-day weather forecast for the given location.
+
+    The cache is read in the threadpool (its L2 is the sync Redis client). An
+    expired L1 copy is served while a background refresh refetches it on
+    this loop. Concurrent misses for one location are coalesced by the
+    caller's ``background_worker`` ``coalesce_key``, which holds across
+    instances; the thread-bound ``single_flight_scope`` cannot span the
+    awaited fetch, so it is not used here.
+    """
+    loop = asyncio.get_running_loop()
+
+    def refresh() -> None:
+        # Runs on the cache's refresh thread; the fetch itself runs on the loop.
+        asyncio.run_coroutine_threadsafe(_fetch_forecast(location), loop).result(REFRESH_TIMEOUT_S)
+
+    cached = await run_in_threadpool(get_cached_weather, location, refresh)
     if cached:
         return cached
+    return await _fetch_forecast(location)
+
 
-    url = f"https://wttr.in/{location}"
+async def _fetch_forecast(location: str) -> dict:
+    """Fetch the forecast from wttr.in and cache it."""
+    url = f"{WTTR_URL}/{location}"
     try:
-        resp = httpx.get(url, params={"format": "j1"}, timeout=10)
+        resp = await _client().get(url, params={"format": "j1"})
         resp.raise_for_status()
     except Exception as exc:  # pragma: no cover - network failure path
         logger.error("Weather API request failed: %s", exc, exc_info=True)
@@ -38,5 +92,5 @@ def get_3day_forecast(location: str) -> dict:
         raise LocationNotFoundError(location)
 
     result = {"location": location, "forecast": forecast[:3]}
-    cache_weather(result, location)
+    await run_in_threadpool(cache_weather, result, location)
     return result
@@ -1,5 +1,12 @@
 from passlib.context import CryptContext
+import asyncio
 import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from .metrics import incr as metrics_incr, timing_ms as metrics_timing
 
 # Configure bcrypt rounds explicitly for predictable performance.
 # Defaults to 11 rounds unless overridden via BCRYPT_ROUNDS env var.
@@ -19,6 +26,92 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# ---- dedicated hashing executor ---------------------------------------------------
+#
+# bcrypt is deliberately slow. Running it in Starlette's shared threadpool lets a
+# login burst starve every other sync route, so async callers hash on a small
+# executor of their own: PASSWORD_HASH_WORKERS threads (or processes with
+# PASSWORD_HASH_EXECUTOR=process), with at most PASSWORD_HASH_MAX_PENDING
+# operations queued before callers are turned away with HashingBusy.
+
+try:
+    HASH_WORKERS = max(1, int(os.getenv("PASSWORD_HASH_WORKERS") or min(4, os.cpu_count() or 1)))
+except Exception:
+    HASH_WORKERS = 2
+try:
+    HASH_MAX_PENDING = max(1, int(os.getenv("PASSWORD_HASH_MAX_PENDING") or 64))
+except Exception:
+    HASH_MAX_PENDING = 64
+HASH_EXECUTOR_KIND = (os.getenv("PASSWORD_HASH_EXECUTOR") or "thread").strip().lower()
+
+_hash_executor: Optional[Executor] = None
+_hash_lock = threading.Lock()
+_hash_pending = 0
+
+
+class HashingBusy(RuntimeError):
+    """The hashing executor queue is full; the caller should shed the request."""
+
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        with _hash_lock:
+            if _hash_executor is None:
+                if HASH_EXECUTOR_KIND == "process":
+                    _hash_executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+                else:
+                    _hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="pwd-hash")
+    return _hash_executor
+
+
+def _run_hash_op(op: str, args: tuple, submitted_at: float) -> tuple:
+    # Module level so it pickles for the process pool. CLOCK_MONOTONIC is
+    # system-wide on Linux, so queue time is meaningful across processes.
+    started = time.monotonic()
+    if op == "verify":
+        result = verify_password(*args)
+    else:
+        result = get_password_hash(*args)
+    return result, (started - submitted_at) * 1000.0, (time.monotonic() - started) * 1000.0
+
+
+async def _submit_hash_op(op: str, *args: str):
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= HASH_MAX_PENDING:
+            metrics_incr("auth.hash.rejected_total", tags={"op": op})
+            raise HashingBusy("password hashing queue full")
+        _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        result, queue_ms, run_ms = await loop.run_in_executor(
+            _get_hash_executor(), _run_hash_op, op, args, time.monotonic()
+        )
+    finally:
+        with _hash_lock:
+            _hash_pending -= 1
+    metrics_timing("auth.hash.queue_ms", queue_ms, tags={"op": op})
+    metrics_timing("auth.hash.run_ms", run_ms, tags={"op": op})
+    return result
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """``verify_password`` on the hashing executor. May raise HashingBusy."""
+    return bool(await _submit_hash_op("verify", plain_password, hashed_password))
+
+
+async def get_password_hash_async(password: str) -> str:
+    """``get_password_hash`` on the hashing executor. May raise HashingBusy."""
+    return await _submit_hash_op("hash", password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when the stored hash's bcrypt cost differs from BCRYPT_ROUNDS."""
+    rounds = bcrypt_rounds_from_hash(hashed_password) if isinstance(hashed_password, str) else None
+    return rounds is not None and rounds != _BCRYPT_ROUNDS
+
+
 def bcrypt_rounds_from_hash(hashed_password: str) -> int | None:
     """Return the cost factor encoded in a bcrypt hash, or None if unknown.
 
@@ -1,57 +1,275 @@
-"""Simple thread-based background worker with retries and dead-lettering."""
+"""Short, request-scoped tasks whose results any instance can read.
+
+Only for work whose result is fetched by a follow-up request (e.g. the travel
+forecast). Side effects that must survive a restart (SMS, WhatsApp, email) go
+through the durable queue in ``app.services.job_queue``.
+
+* A task runs as an asyncio task on the instance that submitted it. Its state
+  (``pending``, then ``done`` with the result or ``error``) is written to
+  Redis under ``bgtask:{id}`` for ``BACKGROUND_TASK_TTL`` seconds, so a poll
+  that lands on another machine still finds it. Results must be JSON-able.
+* Submissions sharing a ``coalesce_key`` while one is in flight get the same
+  task id instead of starting another run. The claim is a Redis ``SET NX``,
+  so this holds across instances.
+* :func:`result` waits up to ``BACKGROUND_TASK_WAIT`` seconds. It awaits the
+  task directly when it runs here. Otherwise it blocks on ``BLPOP
+  bgtask:{id}:done``, a list the task pushes a token to when it finishes, so
+  a remote waiter wakes on completion instead of polling.
+* All Redis calls go through the async client, so nothing blocks the event
+  loop.
+* A task left ``pending`` for longer than ``BACKGROUND_TASK_INFLIGHT_TTL``
+  seconds (its instance restarted mid-run) is reported as failed.
+* When Redis is unreachable, state is kept in this process (at most
+  ``BACKGROUND_TASK_MAX`` entries), which is the single-instance behaviour.
+"""
 
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
+import os
+import threading
 import time
 import uuid
-from concurrent.futures import Future, ThreadPoolExecutor
-from collections import deque
-from typing import Any, Callable, Dict, Tuple
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.services.redis_client import redis as _redis_client  # async redis (or null)
+
+from .metrics import incr as metrics_incr
 
 logger = logging.getLogger(__name__)
 
-_executor = ThreadPoolExecutor(max_workers=4)
-_tasks: Dict[str, Future] = {}
-# Dead-letter queue storing failed jobs for later inspection
-# Each entry: (function name, args, kwargs, exception)
-dead_letter_queue: deque[Tuple[str, tuple, dict, Exception]] = deque()
+try:
+    TASK_TTL_S = max(1, int(os.getenv("BACKGROUND_TASK_TTL") or 600))
+except Exception:
+    TASK_TTL_S = 600
+try:
+    MAX_TASKS = max(1, int(os.getenv("BACKGROUND_TASK_MAX") or 10000))
+except Exception:
+    MAX_TASKS = 10000
+try:
+    RESULT_WAIT_S = max(0.0, float(os.getenv("BACKGROUND_TASK_WAIT") or 10.0))
+except Exception:
+    RESULT_WAIT_S = 10.0
+try:
+    # Expected upper bound on a run. Coalescing claims expire after it, and a
+    # task still pending past it is reported lost (its instance went away).
+    INFLIGHT_TTL_S = max(1, int(os.getenv("BACKGROUND_TASK_INFLIGHT_TTL") or 30))
+except Exception:
+    INFLIGHT_TTL_S = 30
+
+# BLPOP is issued in slices kept under the client's socket timeout.
+WAIT_SLICE_S = 2.0
+# Fallback wait between reads when the client cannot BLPOP (no Redis).
+POLL_INTERVAL_S = 0.1
+_KEY_PREFIX = "bgtask"
+
+# Local fallback store: task_id -> (expires_at, state json), oldest first
+_local: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+_local_inflight: Dict[str, str] = {}
+_lock = threading.Lock()
+_running: Dict[str, "asyncio.Task[Any]"] = {}
+
+
+class TaskPending(Exception):
+    """The task has not finished within the wait budget."""
+
+
+class TaskFailed(Exception):
+    """The task raised; ``error_type`` is the exception's class name."""
+
+    def __init__(self, error_type: str, message: str) -> None:
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def _state_key(task_id: str) -> str:
+    return f"{_KEY_PREFIX}:{task_id}"
+
+
+def _inflight_key(coalesce_key: str) -> str:
+    return f"{_KEY_PREFIX}:inflight:{coalesce_key}"
+
+
+def _done_key(task_id: str) -> str:
+    return f"{_KEY_PREFIX}:{task_id}:done"
 
 
-def _run_with_retry(
-    func: Callable[..., Any], *args: Any, retries: int = 3, backoff: int = 1, **kwargs: Any
+async def _write(task_id: str, state: dict) -> None:
+    payload = json.dumps(state, separators=(",", ":"), default=str)
+    now = time.monotonic()
+    with _lock:
+        while _local and (len(_local) >= MAX_TASKS or next(iter(_local.values()))[0] < now):
+            _local.popitem(last=False)
+        _local[task_id] = (now + TASK_TTL_S, payload)
+        _local.move_to_end(task_id)
+    try:
+        await _redis_client.setex(_state_key(task_id), TASK_TTL_S, payload)
+        if state.get("state") != "pending" and hasattr(_redis_client, "rpush"):
+            # Wake remote waiters blocked in result().
+            await _redis_client.rpush(_done_key(task_id), "1")
+            await _redis_client.expire(_done_key(task_id), TASK_TTL_S)
+    except Exception as exc:
+        logger.warning("Could not store task %s in Redis: %s", task_id, exc)
+
+
+async def _read(task_id: str) -> Optional[dict]:
+    raw = None
+    try:
+        raw = await _redis_client.get(_state_key(task_id))
+    except Exception as exc:
+        logger.warning("Could not read task %s from Redis: %s", task_id, exc)
+    if raw is None:
+        with _lock:
+            entry = _local.get(task_id)
+        if entry is not None and entry[0] >= time.monotonic():
+            raw = entry[1]
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except Exception:
+        return None
+
+
+async def _claim(coalesce_key: str, task_id: str) -> Optional[str]:
+    """Claim ``coalesce_key`` for ``task_id``; return the current owner's id if taken."""
+    with _lock:
+        owner = _local_inflight.get(coalesce_key)
+        if owner is not None:
+            return owner
+        _local_inflight[coalesce_key] = task_id
+    try:
+        if await _redis_client.set(_inflight_key(coalesce_key), task_id, nx=True, ex=INFLIGHT_TTL_S):
+            return None
+        owner = await _redis_client.get(_inflight_key(coalesce_key))
+        if isinstance(owner, bytes):
+            owner = owner.decode("utf-8")
+        if owner and owner != task_id and await _read(owner) is not None:
+            with _lock:
+                _local_inflight.pop(coalesce_key, None)
+            return owner
+    except Exception:
+        # No Redis (or no SET NX on the null client): coalesce in-process only.
+        pass
+    return None
+
+
+async def _unclaim(coalesce_key: str, task_id: str) -> None:
+    with _lock:
+        if _local_inflight.get(coalesce_key) == task_id:
+            _local_inflight.pop(coalesce_key, None)
+    try:
+        owner = await _redis_client.get(_inflight_key(coalesce_key))
+        if isinstance(owner, bytes):
+            owner = owner.decode("utf-8")
+        if owner == task_id:
+            await _redis_client.delete(_inflight_key(coalesce_key))
+    except Exception:
+        pass
+
+
+async def _run(
+    task_id: str,
+    coalesce_key: Optional[str],
+    func: Callable[..., Awaitable[Any]],
+    args: tuple,
+    kwargs: dict,
 ) -> Any:
-    """Execute ``func`` with retry and exponential backoff."""
+    try:
+        value = await func(*args, **kwargs)
+    except Exception as exc:
+        await _write(task_id, {"state": "error", "error_type": type(exc).__name__, "message": str(exc)})
+        raise
+    else:
+        await _write(task_id, {"state": "done", "result": value})
+        return value
+    finally:
+        if coalesce_key:
+            await _unclaim(coalesce_key, task_id)
+        _running.pop(task_id, None)
 
-    for attempt in range(1, retries + 1):
-        try:
-            return func(*args, **kwargs)
-        except Exception as exc:  # pragma: no cover - defensive
-            logger.error(
-                "Background task %s failed on attempt %s/%s: %s", func.__name__, attempt, retries, exc
-            )
-            if attempt == retries:
-                dead_letter_queue.append((func.__name__, args, kwargs, exc))
-                raise
-            time.sleep(backoff * attempt)
-
-
-def enqueue(
-    func: Callable[..., Any], *args: Any, retries: int = 3, backoff: int = 1, **kwargs: Any
+
+def _consume(task: "asyncio.Task[Any]") -> None:
+    # The outcome is already stored; keep asyncio from logging it as unhandled.
+    if not task.cancelled():
+        task.exception()
+
+
+async def submit(
+    func: Callable[..., Awaitable[Any]],
+    *args: Any,
+    coalesce_key: Optional[str] = None,
+    **kwargs: Any,
 ) -> str:
-    """Submit ``func`` to the worker and return a task id."""
+    """Start ``await func(*args, **kwargs)`` in the background and return a task id.
 
+    With ``coalesce_key``, a submission while an identical one is in flight
+    returns the in-flight task's id.
+    """
     task_id = str(uuid.uuid4())
-    future = _executor.submit(_run_with_retry, func, *args, retries=retries, backoff=backoff, **kwargs)
-    _tasks[task_id] = future
+    if coalesce_key:
+        owner = await _claim(coalesce_key, task_id)
+        if owner is not None:
+            metrics_incr("background_task.coalesced")
+            return owner
+    await _write(task_id, {"state": "pending", "at": time.time()})
+    task = asyncio.create_task(_run(task_id, coalesce_key, func, args, kwargs))
+    _running[task_id] = task
+    task.add_done_callback(_consume)
     return task_id
 
 
-async def result(task_id: str) -> Any:
-    """Return the result for ``task_id`` or raise its exception."""
+async def result(task_id: str, wait_s: Optional[float] = None) -> Any:
+    """Return the result for ``task_id``.
+
+    Raises ``KeyError`` for unknown or expired ids, :class:`TaskFailed` when the
+    task raised, and :class:`TaskPending` when it is still running after
+    ``wait_s`` (default ``BACKGROUND_TASK_WAIT``) seconds.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (RESULT_WAIT_S if wait_s is None else wait_s)
+    task = _running.get(task_id)
+    if task is not None and task.get_loop() is loop:
+        await asyncio.wait({task}, timeout=max(0.0, deadline - loop.time()))
+    while True:
+        state = await _read(task_id)
+        if state is None:
+            raise KeyError(task_id)
+        if state.get("state") == "done":
+            return state.get("result")
+        if state.get("state") == "error":
+            raise TaskFailed(str(state.get("error_type") or ""), str(state.get("message") or ""))
+        if time.time() - float(state.get("at") or 0) > INFLIGHT_TTL_S and task_id not in _running:
+            raise TaskFailed("TaskLost", "task was abandoned before finishing")
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise TaskPending(task_id)
+        await _wait_done(task_id, remaining)
+
+
+async def _wait_done(task_id: str, timeout: float) -> None:
+    """Block until ``task_id`` signals completion or ``timeout`` runs out."""
+    key = _done_key(task_id)
+    try:
+        popped = await _redis_client.blpop(key, timeout=min(timeout, WAIT_SLICE_S))
+    except Exception:
+        # No BLPOP (null client) or Redis trouble: fall back to a short sleep.
+        await asyncio.sleep(min(timeout, POLL_INTERVAL_S))
+        return
+    if popped:
+        # Put the token back for any other waiter on this task.
+        try:
+            await _redis_client.rpush(key, popped[1])
+        except Exception:
+            pass
+
 
-    future = _tasks.get(task_id)
-    if future is None:
-        raise KeyError(task_id)
-    return await asyncio.wrap_future(future)
+def clear() -> None:
+    """Forget local task state (tests)."""
+    with _lock:
+        _local.clear()
+        _local_inflight.clear()
+    _running.clear()
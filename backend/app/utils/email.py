@@ -12,6 +12,7 @@ except Exception:  # pragma: no cover - optional
     _HAS_SMTP = False
 
 from ..core.config import settings
+from ..services.job_queue import enqueue as enqueue_job, job_kind
 
 logger = logging.getLogger(__name__)
 
@@ -36,17 +37,22 @@ async def _send_async(msg: EmailMessage) -> None:
 
 
 def send_email(recipient: str, subject: str, body: str) -> None:
-    """Send a plain-text email via SMTP and log failures."""
+    """Queue a plain-text email for SMTP delivery and log failures."""
+    if not _HAS_SMTP:
+        logger.error("Failed to send email to %s: SMTP client not available", recipient)
+        return
+    enqueue_job("email.send", {"recipient": recipient, "subject": subject, "body": body})
+
+
+@job_kind("email.send", concurrency=4, max_attempts=5, backoff_s=30.0)
+def _deliver_email(recipient: str, subject: str, body: str) -> None:
     msg = EmailMessage()
     msg["From"] = SMTP_FROM
     msg["To"] = recipient
     msg["Subject"] = subject
     msg.set_content(body)
-    try:
-        asyncio.run(_send_async(msg))
-        logger.info("Sent email to %s", recipient)
-    except Exception as exc:  # pragma: no cover - network issues
-        logger.error("Failed to send email to %s: %s", recipient, exc)
+    asyncio.run(_send_async(msg))
+    logger.info("Sent email to %s", recipient)
 
 
 def send_template_email(
@@ -55,11 +61,36 @@ def send_template_email(
     variables: dict[str, object],
     subject: str | None = None,
 ) -> None:
-    """Send an email using a Mailjet template via SMTP headers.
+    """Queue an email using a Mailjet template via SMTP headers.
 
     This relies on Mailjet's SMTP relay being configured via the SMTP_* settings.
-    If SMTP is not available or delivery fails, the error is logged but not raised.
+    Delivery runs on the durable job queue with retries; failures are logged
+    but never raised to the caller.
     """
+    if not _HAS_SMTP:
+        logger.error(
+            "Failed to send template email %s to %s: SMTP client not available",
+            template_id,
+            recipient,
+        )
+        return
+    try:
+        variables = json.loads(json.dumps(variables, ensure_ascii=False, default=str))
+    except Exception:
+        variables = {}
+    enqueue_job(
+        "email.template",
+        {"recipient": recipient, "template_id": template_id, "variables": variables, "subject": subject},
+    )
+
+
+@job_kind("email.template", concurrency=4, max_attempts=5, backoff_s=30.0)
+def _deliver_template_email(
+    recipient: str,
+    template_id: int,
+    variables: dict[str, object],
+    subject: str | None = None,
+) -> None:
     msg = EmailMessage()
     msg["From"] = SMTP_FROM
     msg["To"] = recipient
@@ -73,13 +104,5 @@ def send_template_email(
         msg["X-MJ-Vars"] = "{}"
     # Provide a minimal fallback body; Mailjet will render the template.
     msg.set_content(subject or "New booking request")
-    try:
-        asyncio.run(_send_async(msg))
-        logger.info("Sent template email %s to %s", template_id, recipient)
-    except Exception as exc:  # pragma: no cover - network issues
-        logger.error(
-            "Failed to send template email %s to %s: %s",
-            template_id,
-            recipient,
-            exc,
-        )
+    asyncio.run(_send_async(msg))
+    logger.info("Sent template email %s to %s", template_id, recipient)
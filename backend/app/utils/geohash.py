@@ -0,0 +1,144 @@
+"""Geohash encoding and radius cell covers for proximity search.
+
+A geohash interleaves longitude/latitude bits into a base32 string, so rows
+that share a prefix lie in the same rectangular cell and a plain B-tree index
+on the hash answers "everything in this cell" as a range scan. Proximity
+search covers the search circle's bounding box with a handful of cells
+(:func:`cells_for_radius`), range-scans those, then ranks the candidates by
+true great-circle distance.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from typing import List, Optional, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+try:
+    GEOHASH_PRECISION = min(12, max(4, int(os.getenv("GEOHASH_PRECISION") or 9)))
+except Exception:
+    GEOHASH_PRECISION = 9
+
+try:
+    GEOHASH_MAX_CELLS = max(1, int(os.getenv("GEOHASH_MAX_CELLS") or 16))
+except Exception:
+    GEOHASH_MAX_CELLS = 16
+
+# Mean kilometres per degree of latitude.
+_KM_PER_DEG = 111.32
+
+
+def encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Return the geohash of ``(lat, lng)`` with ``precision`` characters."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars: List[str] = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                value = (value << 1) | 1
+                lng_lo = mid
+            else:
+                value <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def encode_optional(lat, lng) -> Optional[str]:
+    """Geohash for possibly-missing coordinates; None unless both are set."""
+    if lat is None or lng is None:
+        return None
+    try:
+        return encode(float(lat), float(lng))
+    except Exception:
+        return None
+
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    """Return ``(height, width)`` in degrees of a cell at ``precision``."""
+    bits = 5 * precision
+    return 180.0 / (1 << (bits // 2)), 360.0 / (1 << ((bits + 1) // 2))
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Return ``(min_lat, max_lat, min_lng, max_lng)`` enclosing the circle.
+
+    Longitude spans the full range near the poles, where a degree of
+    longitude shrinks towards zero.
+    """
+    dlat = radius_km / _KM_PER_DEG
+    cos_lat = math.cos(math.radians(lat))
+    dlng = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (_KM_PER_DEG * cos_lat))
+    return max(-90.0, lat - dlat), min(90.0, lat + dlat), lng - dlng, lng + dlng
+
+
+def cells_for_radius(
+    lat: float,
+    lng: float,
+    radius_km: float,
+    max_cells: int = GEOHASH_MAX_CELLS,
+) -> List[str]:
+    """Return geohash prefixes whose cells cover the circle's bounding box.
+
+    Picks the longest prefix length whose cover needs at most ``max_cells``
+    cells, so small radii scan tight ranges and large ones fall back to a few
+    coarse cells. Boxes crossing the antimeridian wrap around.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    best: List[str] = [""]
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = _cell_size(precision)
+        rows = math.floor((max_lat + 90.0) / height) - math.floor((min_lat + 90.0) / height) + 1
+        cols = math.floor((max_lng + 180.0) / width) - math.floor((min_lng + 180.0) / width) + 1
+        cols = min(cols, int(round(360.0 / width)))
+        if rows * cols > max_cells:
+            break
+        cells = set()
+        lat_start = (math.floor((min_lat + 90.0) / height) + 0.5) * height - 90.0
+        lng_start = (math.floor((min_lng + 180.0) / width) + 0.5) * width - 180.0
+        for r in range(rows):
+            cell_lat = min(90.0 - height / 2, lat_start + r * height)
+            for c in range(cols):
+                cell_lng = (lng_start + c * width + 180.0) % 360.0 - 180.0
+                cells.add(encode(cell_lat, cell_lng, precision))
+        best = sorted(cells)
+    return best
+
+
+def prefix_upper_bound(prefix: str, precision: int = GEOHASH_PRECISION) -> str:
+    """Largest full-length hash starting with ``prefix``.
+
+    ``hash BETWEEN prefix AND prefix_upper_bound(prefix)`` is the index range
+    for one cell; unlike ``LIKE 'prefix%'`` it needs no special operator class.
+    """
+    return prefix + _BASE32[-1] * max(0, precision - len(prefix))
+
+
+__all__ = [
+    "GEOHASH_PRECISION",
+    "bounding_box",
+    "cells_for_radius",
+    "encode",
+    "encode_optional",
+    "prefix_upper_bound",
+]
@@ -7,6 +7,7 @@ Usage (non-blocking, safe in failures):
   from app.utils.metrics import incr, timing_ms
   incr('payment.verify.success', tags={'source': 'webhook'})
   timing_ms('broadcast.ms', 42.5, tags={'topic': 'booking_requests'})
+  gauge('ws.fanout.queue_depth_max', 12)
 
 Env:
   METRICS_STATSD_ADDR = "host:port" (e.g., "127.0.0.1:8125")
@@ -78,6 +79,17 @@ def timing_ms(name: str, ms: float, tags: Optional[Dict[str, object]] = None) ->
         pass
 
 
+def gauge(name: str, value: float, tags: Optional[Dict[str, object]] = None) -> None:
+    try:
+        s = _get_sock()
+        if not s:
+            return
+        msg = f"{name}:{float(value):g}|g{_format_tags(tags)}"
+        s.send(msg.encode("utf-8"))
+    except Exception:
+        pass
+
+
 class Timer:
     def __init__(self, name: str, tags: Optional[Dict[str, object]] = None):
         self.name = name
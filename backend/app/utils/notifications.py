@@ -22,7 +22,7 @@ try:  # optional dependency
 except Exception:  # pragma: no cover - optional for tooling
     Client = None  # type: ignore
     _HAS_TWILIO = False
-from . import background_worker
+from ..services.job_queue import enqueue as enqueue_job, job_kind
 from .email import send_template_email
 from ..core.config import settings
 
@@ -372,21 +372,21 @@ def _send_sms(phone: Optional[str], message: str) -> None:
     if (not phone) or (not TWILIO_SID) or (not TWILIO_TOKEN) or (not TWILIO_FROM) or (not _HAS_TWILIO):
         return
 
-    def _task():
-        Client(TWILIO_SID, TWILIO_TOKEN).messages.create(
-            body=message, from_=TWILIO_FROM, to=phone
-        )
+    enqueue_job("sms.send", {"to": phone, "body": message})
 
-    try:
-        background_worker.enqueue(_task)
-    except Exception as exc:  # pragma: no cover - background scheduling errors
-        logger.warning("SMS enqueue failed: %s", exc)
+
+@job_kind("sms.send", concurrency=4, max_attempts=5)
+def _deliver_sms(to: str, body: str) -> None:
+    """Job handler: send one SMS via Twilio (raises to trigger a retry)."""
+    if not _HAS_TWILIO:
+        raise RuntimeError("twilio client not available")
+    Client(TWILIO_SID, TWILIO_TOKEN).messages.create(body=body, from_=TWILIO_FROM, to=to)
 
 
 def _send_whatsapp_text(phone: Optional[str], body: str, *, preview_url: bool = True) -> None:
     """Send a basic WhatsApp text via the Cloud API.
 
-    Best-effort only: logs and returns on failure without raising. Requires:
+    Delivery runs on the durable job queue; this never raises. Requires:
       - WHATSAPP_ENABLED=1
       - WHATSAPP_PHONE_ID and WHATSAPP_TOKEN set in the environment.
     """
@@ -419,39 +419,42 @@ def _send_whatsapp_text(phone: Optional[str], body: str, *, preview_url: bool =
         },
     }
 
+    enqueue_job("whatsapp.send", {"payload": payload, "label": "WhatsApp"})
+
+
+@job_kind("whatsapp.send", concurrency=4, max_attempts=5)
+def _deliver_whatsapp(payload: dict[str, Any], label: str = "WhatsApp") -> None:
+    """Job handler: POST one message to the WhatsApp Cloud API.
+
+    Client errors (4xx other than 429) are logged and dropped; network errors,
+    throttling and 5xx responses raise so the queue retries with backoff.
+    """
     url = f"https://graph.facebook.com/v22.0/{WHATSAPP_PHONE_ID}/messages"
-    data = json.dumps(payload).encode("utf-8")
     req = urllib.request.Request(
         url,
-        data=data,
+        data=json.dumps(payload).encode("utf-8"),
         headers={
             "Authorization": f"Bearer {WHATSAPP_TOKEN}",
             "Content-Type": "application/json",
         },
         method="POST",
     )
-
-    def _task() -> None:
-        try:
-            with urllib.request.urlopen(req, timeout=8) as resp:  # nosec B310
-                try:
-                    raw = resp.read()
-                    logger.info("WhatsApp send ok status=%s body=%s", resp.status, raw.decode("utf-8", "ignore"))
-                except Exception:
-                    logger.info("WhatsApp send ok status=%s", resp.status)
-        except urllib.error.HTTPError as exc:  # pragma: no cover - best-effort
+    try:
+        with urllib.request.urlopen(req, timeout=8) as resp:  # nosec B310
             try:
-                detail = exc.read().decode("utf-8", "ignore")
+                raw = resp.read()
+                logger.info("%s send ok status=%s body=%s", label, resp.status, raw.decode("utf-8", "ignore"))
             except Exception:
-                detail = "<unavailable>"
-            logger.warning("WhatsApp HTTPError status=%s body=%s", getattr(exc, "code", "?"), detail)
-        except Exception as exc:  # pragma: no cover - network errors
-            logger.warning("WhatsApp send failed: %s", exc)
-
-    try:
-        background_worker.enqueue(_task)
-    except Exception as exc:  # pragma: no cover - background scheduling errors
-        logger.warning("WhatsApp enqueue failed: %s", exc)
+                logger.info("%s send ok status=%s", label, resp.status)
+    except urllib.error.HTTPError as exc:
+        try:
+            detail = exc.read().decode("utf-8", "ignore")
+        except Exception:
+            detail = "<unavailable>"
+        code = int(getattr(exc, "code", 0) or 0)
+        logger.warning("%s HTTPError status=%s body=%s", label, code or "?", detail)
+        if code == 429 or code >= 500:
+            raise
 
 
 def _send_whatsapp_template(
@@ -465,7 +468,7 @@ def _send_whatsapp_template(
 ) -> None:
     """Send a WhatsApp template message via the Cloud API.
 
-    Best-effort only: logs and returns on failure without raising. This helper
+    Delivery runs on the durable job queue; this never raises. This helper
     is intended for approved templates like ``new_booking_request_1`` so we
     can benefit from the 24h+ template window instead of plain-text fallbacks.
     """
@@ -536,47 +539,7 @@ def _send_whatsapp_template(
         "template": template,
     }
 
-    url = f"https://graph.facebook.com/v22.0/{WHATSAPP_PHONE_ID}/messages"
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={
-            "Authorization": f"Bearer {WHATSAPP_TOKEN}",
-            "Content-Type": "application/json",
-        },
-        method="POST",
-    )
-
-    def _task() -> None:
-        try:
-            with urllib.request.urlopen(req, timeout=8) as resp:  # nosec B310
-                try:
-                    raw = resp.read()
-                    logger.info(
-                        "WhatsApp template send ok status=%s body=%s",
-                        resp.status,
-                        raw.decode("utf-8", "ignore"),
-                    )
-                except Exception:
-                    logger.info("WhatsApp template send ok status=%s", resp.status)
-        except urllib.error.HTTPError as exc:  # pragma: no cover - best-effort
-            try:
-                detail = exc.read().decode("utf-8", "ignore")
-            except Exception:
-                detail = "<unavailable>"
-            logger.warning(
-                "WhatsApp template HTTPError status=%s body=%s",
-                getattr(exc, "code", "?"),
-                detail,
-            )
-        except Exception as exc:  # pragma: no cover - network errors
-            logger.warning("WhatsApp template send failed: %s", exc)
-
-    try:
-        background_worker.enqueue(_task)
-    except Exception as exc:  # pragma: no cover - background scheduling errors
-        logger.warning("WhatsApp template enqueue failed: %s", exc)
+    enqueue_job("whatsapp.send", {"payload": payload, "label": "WhatsApp template"})
 
 
 def _create_and_broadcast(
@@ -596,6 +559,7 @@ def _create_and_broadcast(
         type=ntype,
         message=message,
         link=link,
+        booking_request_id=extra.get("booking_request_id"),
     )
     response = _build_response(db, notif)
     data = response.model_dump(mode="json")
@@ -610,6 +574,57 @@ def _create_and_broadcast(
         asyncio.run(notifications_manager.broadcast(user_id, data))
 
 
+def _create_and_broadcast_bulk(
+    db: Session,
+    entries: list[tuple[int, NotificationType, str, str, dict]],
+) -> None:
+    """Persist many notifications in one commit, then broadcast them.
+
+    ``entries`` are ``(user_id, type, message, link, extra)``. Payloads are
+    built from the flushed rows (``extra`` fills empty fields as in
+    :func:`_create_and_broadcast`) without the per-row derivation queries of
+    ``_build_response``, and all broadcasts share one event loop.
+    """
+    if not entries:
+        return
+    notifs = [
+        models.Notification(
+            user_id=user_id,
+            type=ntype,
+            message=message,
+            link=link,
+            booking_request_id=extra.get("booking_request_id"),
+        )
+        for user_id, ntype, message, link, extra in entries
+    ]
+    db.add_all(notifs)
+    # Flush populates ids/defaults so payloads are built without a reload
+    # per row after the commit expires the instances.
+    db.flush()
+    payloads: list[tuple[int, dict]] = []
+    for notif, (user_id, _, _, _, extra) in zip(notifs, entries):
+        data = NotificationResponse.model_validate(notif).model_dump(mode="json")
+        for k, v in extra.items():
+            if v is not None and data.get(k) in [None, ""]:
+                data[k] = v
+        payloads.append((user_id, data))
+    db.commit()
+
+    async def _broadcast_all() -> None:
+        for user_id, data in payloads:
+            await notifications_manager.broadcast(user_id, data)
+
+    try:
+        loop = asyncio.get_running_loop()
+        loop.create_task(_broadcast_all())
+    except RuntimeError:
+        # Scheduler threads have no loop: one event loop for the whole batch.
+        try:
+            asyncio.run(_broadcast_all())
+        except Exception as exc:  # pragma: no cover - best effort only
+            logger.warning("bulk broadcast failed: %s", exc)
+
+
 BOOKING_DETAILS_PREFIX = "Booking details:"
 VIDEO_FLOW_QUESTIONS = [
     "Who is the video for?",
@@ -683,6 +698,84 @@ def notify_user_new_message(
     _send_sms(user.phone_number, message)
 
 
+def notify_users_new_messages_bulk(
+    db: Session,
+    items: list[tuple[User, User, int, str]],
+    message_type: "models.MessageType",
+) -> int:
+    """Bulk form of :func:`notify_user_new_message` for scheduler fan-out.
+
+    ``items`` are ``(recipient, sender, booking_request_id, content)``.
+    Sender profiles are resolved in one query and all notifications are
+    inserted with a single commit before broadcasting. Returns the number
+    of notifications created.
+    """
+    if message_type == models.MessageType.SYSTEM:
+        items = [
+            it
+            for it in items
+            if not (
+                it[3].startswith(BOOKING_DETAILS_PREFIX)
+                or it[3] == VIDEO_FLOW_READY_MESSAGE
+                or it[3] in VIDEO_FLOW_QUESTIONS
+            )
+        ]
+    if not items:
+        return 0
+
+    provider_ids = {
+        int(sender.id)
+        for _, sender, _, _ in items
+        if sender.user_type == models.UserType.SERVICE_PROVIDER
+    }
+    profiles = {}
+    if provider_ids:
+        profiles = {
+            int(p.user_id): p
+            for p in db.query(models.ServiceProviderProfile)
+            .filter(models.ServiceProviderProfile.user_id.in_(provider_ids))
+            .all()
+        }
+
+    entries: list[tuple[int, NotificationType, str, str, dict]] = []
+    sms: list[tuple[Optional[str], str]] = []
+    for user, sender, booking_request_id, content in items:
+        sender_name = f"{sender.first_name} {sender.last_name}"
+        avatar_url = None
+        profile = profiles.get(int(sender.id))
+        if profile is not None:
+            if profile.business_name:
+                sender_name = profile.business_name
+            if profile.profile_picture_url:
+                avatar_url = profile.profile_picture_url
+        elif sender.user_type != models.UserType.SERVICE_PROVIDER and sender.profile_picture_url:
+            avatar_url = sender.profile_picture_url
+        message = format_notification_message(
+            NotificationType.NEW_MESSAGE,
+            content=content,
+            sender_name=sender_name,
+        )
+        low = (content or "").strip().lower()
+        link = f"/inbox?requestId={booking_request_id}"
+        if low.startswith("listing approved:") or low.startswith("listing rejected:"):
+            link = "/inbox?booka=1"
+        extra = {
+            "sender_name": sender_name,
+            "avatar_url": avatar_url,
+            "booking_request_id": booking_request_id,
+            "sender_id": int(sender.id),
+            "message_type": (message_type.value if hasattr(message_type, "value") else str(message_type)),
+        }
+        entries.append((int(user.id), NotificationType.NEW_MESSAGE, message, link, extra))
+        sms.append((user.phone_number, message))
+
+    _create_and_broadcast_bulk(db, entries)
+    for phone, message in sms:
+        _send_sms(phone, message)
+    logger.info("Notified %d users of new messages", len(entries))
+    return len(entries)
+
+
 ## Deposits removed — no deposit reminder notifications
 
 
@@ -867,6 +960,13 @@ def notify_review_request(db: Session, user: Optional[User], booking_id: int) ->
     )
 
 
+def notify_review_requests_bulk(db: Session, items: list[tuple[Optional[User], int]]) -> int:
+    """Facade for batched review request notifications."""
+    from app.notifications.intents import booking_lifecycle as booking_lifecycle_intent
+
+    return booking_lifecycle_intent.send_review_request_notifications_bulk(db=db, items=items)
+
+
 try:  # pragma: no cover - module import side effect
     from ..api.api_ws import notifications_manager  # type: ignore
 except Exception:  # pragma: no cover - fallback for circular import during tests
@@ -1,18 +1,73 @@
 from __future__ import annotations
 
 from app.utils.json import dumps_bytes as _json_dumps
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import json
 import logging
+import os
+import random
 from typing import Any, Optional
 
 from sqlalchemy.orm import Session
 from decimal import Decimal
 from datetime import date
-from sqlalchemy import text
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    and_,
+    case,
+    delete,
+    or_,
+    select,
+    text,
+    update,
+)
 
 
 logger = logging.getLogger(__name__)
 
+try:
+    OUTBOX_LEASE_S = max(1.0, float(os.getenv("OUTBOX_LEASE_SECONDS") or 30.0))
+except Exception:
+    OUTBOX_LEASE_S = 30.0
+try:
+    OUTBOX_BACKOFF_BASE_S = max(0.1, float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS") or 1.0))
+except Exception:
+    OUTBOX_BACKOFF_BASE_S = 1.0
+try:
+    OUTBOX_BACKOFF_MAX_S = max(1.0, float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS") or 300.0))
+except Exception:
+    OUTBOX_BACKOFF_MAX_S = 300.0
+try:
+    OUTBOX_RETENTION_S = max(60.0, float(os.getenv("OUTBOX_RETENTION_HOURS") or 24.0) * 3600.0)
+except Exception:
+    OUTBOX_RETENTION_S = 24 * 3600.0
+try:
+    OUTBOX_UNDELIVERED_RETENTION_S = max(60.0, float(os.getenv("OUTBOX_UNDELIVERED_RETENTION_HOURS") or 72.0) * 3600.0)
+except Exception:
+    OUTBOX_UNDELIVERED_RETENTION_S = 72 * 3600.0
+
+# Core mirror of the 20251001_add_outbox_events_table migration (no ORM model:
+# rows are written with raw SQL and only ever read by the relay).
+outbox_events = Table(
+    "outbox_events",
+    MetaData(),
+    Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("topic", String(255), nullable=False),
+    Column("payload_json", Text, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"), nullable=False),
+    Column("delivered_at", DateTime(timezone=True), nullable=True),
+    Column("attempt_count", Integer, nullable=False, server_default="0"),
+    Column("last_error", Text, nullable=True),
+    Column("due_at", DateTime(timezone=True), nullable=True),
+)
+
 
 def enqueue_outbox(db: Session, topic: str, payload: dict[str, Any], due_at: Optional[datetime] = None) -> int:
     """Insert an outbox event row for reliable realtime fanout.
@@ -33,7 +88,11 @@ def enqueue_outbox(db: Session, topic: str, payload: dict[str, Any], due_at: Opt
         return str(o)
 
     try:
-        payload_str = _json_dumps(payload).decode("utf-8")
+        if hasattr(payload, "to_json_bytes"):
+            # api_ws.Envelope: store its wire form, not the dataclass fields.
+            payload_str = payload.to_json_bytes().decode("utf-8")
+        else:
+            payload_str = _json_dumps(payload).decode("utf-8")
     except Exception:
         # Fallback: attempt to coerce
         payload_str = _json_dumps({"_error": "non-serializable-payload"}).decode("utf-8")
@@ -46,20 +105,18 @@ def enqueue_outbox(db: Session, topic: str, payload: dict[str, Any], due_at: Opt
             """
         )
         res = db.execute(sql, {"topic": topic, "payload_json": payload_str, "due_at": due_at})
-        db.commit()
+        # Consume RETURNING before committing (SQLite refuses to commit with
+        # the statement still open).
         try:
             rid = res.scalar_one()
-            try:
-                logger.info("outbox_enqueue topic=%s id=%s bytes=%s", topic, int(rid or 0), len(payload_str))
-            except Exception:
-                pass
-            return int(rid or 0)
         except Exception:
-            try:
-                logger.info("outbox_enqueue topic=%s id=%s bytes=%s", topic, 0, len(payload_str))
-            except Exception:
-                pass
-            return 0
+            rid = None
+        db.commit()
+        try:
+            logger.info("outbox_enqueue topic=%s id=%s bytes=%s", topic, int(rid or 0), len(payload_str))
+        except Exception:
+            pass
+        return int(rid or 0)
     except Exception as exc:
         db.rollback()
         try:
@@ -67,3 +124,171 @@ def enqueue_outbox(db: Session, topic: str, payload: dict[str, Any], due_at: Opt
         except Exception:
             pass
         return 0
+
+
+# ---- relay -------------------------------------------------------------------------
+#
+# Delivery is lease based so it works the same on Postgres and SQLite. Claiming
+# a batch pushes ``due_at`` out by OUTBOX_LEASE_SECONDS and bumps
+# ``attempt_count`` in one UPDATE ... RETURNING; on Postgres the candidate rows
+# are picked with FOR UPDATE SKIP LOCKED, on SQLite the UPDATE itself holds the
+# database write lock. Concurrent workers therefore never claim the same row,
+# and rows of a crashed worker become due again when the lease lapses.
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def outbox_backoff_s(attempts: int) -> float:
+    """Exponential per-row retry delay with 10% jitter."""
+    base = min(OUTBOX_BACKOFF_MAX_S, OUTBOX_BACKOFF_BASE_S * (2 ** max(0, attempts - 1)))
+    return base + random.uniform(0, base * 0.1)
+
+
+def claim_outbox_batch(
+    db: Session,
+    limit: int,
+    now: Optional[datetime] = None,
+    lease_s: float = OUTBOX_LEASE_S,
+) -> list[tuple[int, str, str, int]]:
+    """Lease up to ``limit`` due rows; returns (id, topic, payload_json, attempt_count)."""
+    now = now or _utcnow()
+    t = outbox_events
+    ids = (
+        select(t.c.id)
+        .where(t.c.delivered_at.is_(None), or_(t.c.due_at.is_(None), t.c.due_at <= now))
+        .order_by(t.c.created_at.asc(), t.c.id.asc())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(
+        update(t)
+        .where(t.c.id.in_(ids))
+        .values(due_at=now + timedelta(seconds=lease_s), attempt_count=t.c.attempt_count + 1)
+        .returning(t.c.id, t.c.topic, t.c.payload_json, t.c.attempt_count)
+    ).fetchall()
+    db.commit()
+    # RETURNING order is unspecified; deliver oldest first.
+    return sorted(((int(r[0]), r[1], r[2], int(r[3])) for r in rows), key=lambda r: r[0])
+
+
+def ack_outbox(db: Session, ids: list[int], now: Optional[datetime] = None) -> int:
+    """Mark a batch delivered with a single UPDATE."""
+    if not ids:
+        return 0
+    t = outbox_events
+    res = db.execute(
+        update(t).where(t.c.id.in_(ids)).values(delivered_at=now or _utcnow(), due_at=None, last_error=None)
+    )
+    db.commit()
+    return int(res.rowcount or 0)
+
+
+def retry_outbox(db: Session, failures: list[tuple[int, int, str]], now: Optional[datetime] = None) -> int:
+    """Reschedule failed rows ``(id, attempt_count, error)`` with per-row backoff."""
+    if not failures:
+        return 0
+    now = now or _utcnow()
+    t = outbox_events
+    due = {rid: now + timedelta(seconds=outbox_backoff_s(attempts)) for rid, attempts, _ in failures}
+    errors = {rid: (err or "publish_failed")[:500] for rid, _, err in failures}
+    res = db.execute(
+        update(t)
+        .where(t.c.id.in_(list(due)))
+        .values(
+            due_at=case(due, value=t.c.id),
+            last_error=case(errors, value=t.c.id),
+        )
+    )
+    db.commit()
+    return int(res.rowcount or 0)
+
+
+def outbox_bus_frame(row_id: int, topic: str, payload_json: str) -> bytes:
+    """Bus frame for one outbox row: the envelope a direct broadcast would send.
+
+    The frame's origin is this process's instance id with an ``:outbox``
+    suffix (so the API instance hosting the relay does not take it for its own
+    publish), and it carries the row id as ``outbox_id``. API instances drop relayed frames whose row id or bytes
+    they delivered recently, so an event that was also broadcast
+    synchronously reaches each socket once.
+    """
+    from app.api.api_ws import INSTANCE_ID, Envelope, topic_envelope  # lazy: api_ws imports crud
+
+    try:
+        raw = json.loads(payload_json)
+    except Exception:
+        raw = {"payload": payload_json}
+    if isinstance(raw, dict) and isinstance(raw.get("payload"), dict) and raw.get("type"):
+        # Stored envelope (see enqueue_outbox).
+        env = Envelope.from_raw(raw)
+    else:
+        env = topic_envelope(topic, raw)
+    env.topic = env.topic or topic
+    return env.to_bus_bytes(f"{INSTANCE_ID}:outbox", outbox_id=row_id)
+
+
+async def relay_outbox_batch(db: Session, redis: Any, max_batch: int = 200) -> dict[str, int]:
+    """Claim one batch, publish it in a single Redis pipeline and ack in bulk.
+
+    Rows are published to ``ws-topic:<topic>``, the channel the API
+    instances' bus consumers subscribe to, as :func:`outbox_bus_frame` envelopes.
+    """
+    rows = claim_outbox_batch(db, max_batch)
+    if not rows:
+        return {"claimed": 0, "delivered": 0, "failed": 0}
+    results: list[Any]
+    try:
+        pipe = redis.pipeline(transaction=False)
+        for rid, topic, payload_json, _ in rows:
+            pipe.publish(f"ws-topic:{topic}", outbox_bus_frame(rid, topic, payload_json))
+        results = await pipe.execute(raise_on_error=False)
+    except Exception as exc:
+        results = [exc] * len(rows)
+    delivered: list[int] = []
+    failures: list[tuple[int, int, str]] = []
+    for (rid, _, _, attempts), res in zip(rows, results):
+        if isinstance(res, Exception):
+            failures.append((rid, attempts, f"{type(res).__name__}: {res}"))
+        else:
+            delivered.append(rid)
+    ack_outbox(db, delivered)
+    retry_outbox(db, failures)
+    return {"claimed": len(rows), "delivered": len(delivered), "failed": len(failures)}
+
+
+def prune_outbox(
+    db: Session,
+    now: Optional[datetime] = None,
+    retention_s: float = OUTBOX_RETENTION_S,
+    undelivered_retention_s: float = OUTBOX_UNDELIVERED_RETENTION_S,
+    chunk: int = 5000,
+) -> int:
+    """Delete delivered rows past retention, and undelivered ones long past use.
+
+    Deletes in chunks so no single statement holds locks on a large range.
+    """
+    now = now or _utcnow()
+    t = outbox_events
+    stale = or_(
+        t.c.delivered_at < now - timedelta(seconds=retention_s),
+        and_(t.c.delivered_at.is_(None), t.c.created_at < now - timedelta(seconds=undelivered_retention_s)),
+    )
+    total = 0
+    while True:
+        ids = select(t.c.id).where(stale).limit(chunk)
+        res = db.execute(delete(t).where(t.c.id.in_(ids)))
+        db.commit()
+        n = int(res.rowcount or 0)
+        total += n
+        if n < chunk:
+            return total
+
+
+def prune_outbox_job() -> dict:
+    """Scheduler job: outbox retention."""
+    from app.database import SessionLocal
+
+    with SessionLocal() as db:
+        return {"outbox_pruned": prune_outbox(db)}
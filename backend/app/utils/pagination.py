@@ -0,0 +1,133 @@
+"""Keyset (cursor) pagination helpers.
+
+OFFSET pagination makes the database walk and discard every earlier row, so
+deep pages get linearly slower. Keyset pagination instead remembers the sort
+key of the last row served and asks for rows strictly after it, which an
+index on ``(sort key, id)`` answers directly at any depth.
+
+Cursors are opaque to clients: URL-safe base64 of a small JSON document
+holding the sort name and the last row's key values (``id`` last, as the
+tiebreak). A cursor minted for one sort is rejected for another.
+
+Totals are the other per-page cost: :func:`approximate_count` caches a
+``COUNT(*)`` per filter set in Redis for a short TTL so cursor pages do not
+recount the whole table.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence
+
+from sqlalchemy import and_, or_
+
+from .redis_cache import get_redis_client, namespaced_key
+
+logger = logging.getLogger(__name__)
+
+try:
+    APPROX_COUNT_TTL = max(1, int(os.getenv("PAGINATION_COUNT_TTL") or 60))
+except Exception:
+    APPROX_COUNT_TTL = 60
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or belongs to another sort."""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise InvalidCursor("unknown cursor value")
+    return value
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """Return an opaque cursor for the row whose sort key is ``values``."""
+    doc = {"s": sort, "k": [_encode_value(v) for v in values]}
+    raw = json.dumps(doc, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, size: int) -> List[Any]:
+    """Return the key values stored in ``cursor``; raise :class:`InvalidCursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        doc = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = [_decode_value(v) for v in doc["k"]]
+    except InvalidCursor:
+        raise
+    except Exception as exc:
+        raise InvalidCursor("malformed cursor") from exc
+    if doc.get("s") != sort or len(values) != size or any(v is None for v in values):
+        raise InvalidCursor("cursor does not match this listing")
+    return values
+
+
+def keyset_after(columns: Sequence[Any], values: Sequence[Any], descending: bool = True):
+    """Filter for rows strictly after ``values`` in ``ORDER BY columns``.
+
+    All columns share one direction and none may be NULL (wrap nullable sort
+    columns in ``coalesce``). Expands to ``(a < x) OR (a = x AND b < y) ...``
+    which every backend can serve from an index on ``columns``.
+    """
+    clauses = []
+    for i, col in enumerate(columns):
+        cmp = col < values[i] if descending else col > values[i]
+        clauses.append(and_(*[columns[j] == values[j] for j in range(i)], cmp))
+    return or_(*clauses)
+
+
+def approximate_count(family: str, parts: Sequence[Any], compute: Callable[[], int], ttl: Optional[int] = None) -> int:
+    """Return a ``COUNT(*)`` cached per filter set for ``ttl`` seconds.
+
+    ``family`` is a ``redis_cache`` namespace, so bumping it (e.g. the artist
+    list invalidation) also drops its counts. Without Redis the count is
+    computed on every call.
+    """
+    digest = hashlib.sha1(json.dumps([str(p) for p in parts]).encode("utf-8")).hexdigest()[:20]
+    key = namespaced_key(family, "count", digest)
+    if key is not None:
+        try:
+            cached = get_redis_client().get(key)
+            if cached is not None:
+                return int(cached)
+        except Exception:
+            pass
+    total = int(compute() or 0)
+    if key is not None:
+        try:
+            get_redis_client().setex(key, ttl or APPROX_COUNT_TTL, total)
+        except Exception as exc:
+            logger.debug("Could not cache count for %s: %s", family, exc)
+    return total
+
+
+__all__ = [
+    "InvalidCursor",
+    "approximate_count",
+    "decode_cursor",
+    "encode_cursor",
+    "keyset_after",
+]
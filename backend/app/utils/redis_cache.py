@@ -2,14 +2,18 @@ import json
 import logging
 import random
 import base64
+import hashlib
+import threading
+import time
 from datetime import date
-from typing import List, Optional, Any, Iterable
+from typing import Callable, List, Optional, Any, Iterable
 
 import redis
 import os
 
 from app.core.config import settings
 from .json_utils import dumps
+from .tiered_cache import L1_TTL_S, TieredCache
 
 _redis_client: Optional[redis.Redis] = None
 
@@ -33,6 +37,12 @@ class _NullRedis:
     def delete(self, key: str):
         return 0
 
+    def incr(self, key: str):
+        return 0
+
+    def expire(self, key: str, seconds: int):
+        return None
+
     def close(self):
         return None
 
@@ -76,6 +86,17 @@ def get_redis() -> redis.Redis:
 ARTIST_LIST_KEY_PREFIX = "service_provider_profiles:list"
 WEATHER_KEY_PREFIX = "weather:3day"
 AVAILABILITY_KEY_PREFIX = "availability"
+PREVIEW_KEY_PREFIX = "preview"
+AI_PARSE_KEY_PREFIX = "ai:parse"
+
+# Generation counters outlive every entry TTL they guard; a counter that ages
+# out simply restarts at 0 long after its old entries have expired.
+try:
+    NAMESPACE_GENERATION_TTL = max(3600, int(os.getenv("CACHE_NAMESPACE_GENERATION_TTL", "604800") or 604800))
+except Exception:
+    NAMESPACE_GENERATION_TTL = 604800
+
+_REDIS_ERRORS = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
 
 
 def _apply_jitter(expire: int) -> int:
@@ -83,6 +104,148 @@ def _apply_jitter(expire: int) -> int:
     return expire + random.randint(0, max(1, expire // 10))
 
 
+# ─── GENERATION-NAMESPACED CACHE FAMILIES ─────────────────────────────────────
+#
+# Each cache family (optionally narrowed to a scope such as a user or artist id)
+# has a counter at ``gen:{family}[:{scope}]``. Entry keys embed the current
+# generation, so invalidating a whole family is a single INCR: readers move on to
+# the next generation and the orphaned entries expire through their own TTL.
+# No SCAN over the keyspace is ever needed.
+#
+# Read the generation *before* computing a value and write it under that same
+# key: if an invalidation lands in between, the write goes to the dead
+# generation and is never served.
+
+
+# Families whose L1 entries may lag another instance's invalidation by up to
+# the L1 TTL: their generation is memoised in-process for that long so an L1
+# hit costs no round trip at all. Invalidations made by this process apply
+# immediately. Thread previews are deliberately absent: they must see other
+# instances' writes at once.
+_gen_memo: dict = {}
+_gen_memo_lock = threading.Lock()
+_GEN_MEMO_MAX = 4096
+
+
+def _generation_key(family: str, scope: object = None) -> str:
+    if scope is None:
+        return f"gen:{family}"
+    return f"gen:{family}:{scope}"
+
+
+def _memo_generation(family: str, scope: object, gen: int, ttl: float) -> None:
+    if ttl <= 0:
+        return
+    with _gen_memo_lock:
+        if len(_gen_memo) >= _GEN_MEMO_MAX:
+            _gen_memo.clear()
+        _gen_memo[(family, scope)] = (time.monotonic() + ttl, gen)
+
+
+def namespace_generation(family: str, scope: object = None, *, local_ttl: float = 0) -> Optional[int]:
+    """Return the current generation of ``family``/``scope``.
+
+    With ``local_ttl`` the value is memoised in-process for that many seconds.
+    Returns ``None`` when Redis is unreachable so callers can skip the cache.
+    """
+    if local_ttl > 0:
+        memo = _gen_memo.get((family, scope))
+        if memo is not None and memo[0] > time.monotonic():
+            return memo[1]
+    client = get_redis_client()
+    try:
+        raw = client.get(_generation_key(family, scope))
+    except _REDIS_ERRORS as exc:
+        logging.warning("Redis unavailable: %s", exc)
+        return None
+    try:
+        gen = int(raw or 0)
+    except (TypeError, ValueError):
+        gen = 0
+    _memo_generation(family, scope, gen, local_ttl)
+    return gen
+
+
+def namespaced_key(family: str, *parts: object, scope: object = None, local_ttl: float = 0) -> Optional[str]:
+    """Return ``{family}[:{scope}]:g{generation}:{parts...}`` or ``None`` if Redis is down."""
+    gen = namespace_generation(family, scope, local_ttl=local_ttl)
+    if gen is None:
+        return None
+    head = family if scope is None else f"{family}:{scope}"
+    tail = ":".join(str(p) for p in parts)
+    return f"{head}:g{gen}:{tail}" if tail else f"{head}:g{gen}"
+
+
+def bump_namespace(family: str, scope: object = None) -> Optional[int]:
+    """Invalidate every entry of ``family``/``scope``; returns the new generation."""
+    return bump_namespaces(family, [scope]).get(scope)
+
+
+def bump_namespaces(family: str, scopes: Iterable[object]) -> dict:
+    """Bump several scopes of one family in a single round trip.
+
+    Returns ``{scope: new_generation}`` for the scopes that were bumped.
+    """
+    scopes = list(dict.fromkeys(scopes))
+    if not scopes:
+        return {}
+    client = get_redis_client()
+    try:
+        if hasattr(client, "pipeline"):
+            pipe = client.pipeline(transaction=False)
+            for scope in scopes:
+                key = _generation_key(family, scope)
+                pipe.incr(key)
+                pipe.expire(key, NAMESPACE_GENERATION_TTL)
+            results = pipe.execute()[::2]
+        else:
+            results = []
+            for scope in scopes:
+                key = _generation_key(family, scope)
+                results.append(client.incr(key))
+                client.expire(key, NAMESPACE_GENERATION_TTL)
+    except Exception as exc:
+        # Invalidation is best-effort and must never fail the write path.
+        logging.warning("Could not bump cache namespace %s: %s", family, exc)
+        with _gen_memo_lock:
+            for scope in scopes:
+                _gen_memo.pop((family, scope), None)
+        return {}
+    bumped = {scope: int(gen or 0) for scope, gen in zip(scopes, results)}
+    with _gen_memo_lock:
+        for scope, gen in bumped.items():
+            if (family, scope) in _gen_memo:
+                _gen_memo[(family, scope)] = (time.monotonic() + L1_TTL_S, gen)
+    return bumped
+
+
+def clear_local_caches() -> None:
+    """Forget memoised generations and every in-process (L1) entry."""
+    from . import tiered_cache
+
+    with _gen_memo_lock:
+        _gen_memo.clear()
+    tiered_cache.clear_all()
+
+
+# In-process tiers in front of Redis (see ``utils.tiered_cache``).
+_artist_list_cache = TieredCache("artist_list")
+_availability_cache = TieredCache("availability")
+_weather_cache = TieredCache("weather")
+_bytes_cache = TieredCache("bytes")
+_provider_profile_cache = TieredCache("provider_profile")
+_ai_parse_cache = TieredCache("ai_parse")
+
+
+def _redis_get(key: str) -> Any:
+    """Raw Redis GET that treats an unreachable server as a miss."""
+    try:
+        return get_redis_client().get(key)
+    except _REDIS_ERRORS as exc:
+        logging.warning("Redis unavailable: %s", exc)
+        return None
+
+
 def _make_key(
     page: int,
     limit: int,
@@ -92,12 +255,15 @@ def _make_key(
     min_price: Optional[float],
     max_price: Optional[float],
     fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    radius_km: Optional[float] = None,
 ) -> str:
-    """Return a Redis key for the given parameter combination.
+    """Return the parameter suffix of an artist list key.
 
     Includes ``fields`` so that trimmed payload variants don't collide with
     full payload caches. The ``fields`` string is normalized to a sorted,
-    comma-separated list for key stability.
+    comma-separated list for key stability. The full key is namespaced by
+    ``_artist_list_response_key``.
     """
     cat = (category or "").strip()
     loc = (location or "").strip()
@@ -112,7 +278,83 @@ def _make_key(
             fld = ",".join(parts)
         except Exception:
             fld = (fields or "").strip()
-    return f"{ARTIST_LIST_KEY_PREFIX}:{page}:{limit}:{cat}:{loc}:{srt}:{minp}:{maxp}:{fld}"
+    key = f"{page}:{limit}:{cat}:{loc}:{srt}:{minp}:{maxp}:{fld}"
+    if radius_km is not None:
+        key = f"{key}:r{radius_km}"
+    return f"{key}:c{cursor}" if cursor else key
+
+
+def _artist_list_response_key(*args: Any) -> Optional[str]:
+    return namespaced_key(ARTIST_LIST_KEY_PREFIX, "resp", _make_key(*args), local_ttl=L1_TTL_S)
+
+
+def _load_encoded_response(key: str) -> Optional[tuple]:
+    raw = _redis_get(key)
+    if not raw:
+        return None
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    etag, sep, body = raw.partition("\n")
+    if not sep or not etag:
+        return None
+    return etag, body.encode("utf-8")
+
+
+def get_cached_artist_list_response(
+    page: int = 1,
+    *,
+    limit: int = 20,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    sort: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    radius_km: Optional[float] = None,
+) -> Optional[tuple]:
+    """Return ``(etag, body)`` for a cached, fully encoded artist list response.
+
+    ``body`` is the exact JSON the route sends, so a hit needs no decoding,
+    validation or re-encoding.
+    """
+    key = _artist_list_response_key(
+        page, limit, category, location, sort, min_price, max_price, fields, cursor, radius_km
+    )
+    if key is None:
+        return None
+    return _artist_list_cache.get(key, lambda: _load_encoded_response(key))
+
+
+def cache_artist_list_response(
+    body: bytes,
+    etag: str,
+    page: int = 1,
+    *,
+    limit: int = 20,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    sort: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    expire: int = 60,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    radius_km: Optional[float] = None,
+) -> None:
+    """Cache an encoded artist list response body with its precomputed ETag."""
+    key = _artist_list_response_key(
+        page, limit, category, location, sort, min_price, max_price, fields, cursor, radius_km
+    )
+    if key is None:
+        return None
+    _artist_list_cache.put_local(key, (etag, bytes(body)), expire)
+    _artist_list_cache.filled(key)
+    try:
+        get_redis_client().setex(key, expire, etag + "\n" + body.decode("utf-8"))
+    except _REDIS_ERRORS as exc:
+        logging.warning("Could not cache artist list: %s", exc)
+    return None
 
 
 def get_cached_artist_list(
@@ -126,21 +368,24 @@ def get_cached_artist_list(
     max_price: Optional[float] = None,
     fields: Optional[str] = None,
 ) -> Any | None:
-    """Retrieve a cached artist page (data or payload) for the given parameters if available."""
-    client = get_redis_client()
-    key = _make_key(page, limit, category, location, sort, min_price, max_price, fields)
-    try:
-        data = client.get(key)
-    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
-        logging.warning("Redis unavailable: %s", exc)
-        return None
-    if not data:
+    """Decoded form of :func:`get_cached_artist_list_response`."""
+    cached = get_cached_artist_list_response(
+        page,
+        limit=limit,
+        category=category,
+        location=location,
+        sort=sort,
+        min_price=min_price,
+        max_price=max_price,
+        fields=fields,
+    )
+    if cached is None:
         return None
     try:
-        return json.loads(data)
+        return json.loads(cached[1])
     except Exception as exc:
         # Defensive: treat malformed payloads as cache misses instead of 500s.
-        logging.warning("Could not decode artist list cache for key %s: %s", key, exc)
+        logging.warning("Could not decode artist list cache: %s", exc)
         return None
 
 
@@ -157,24 +402,63 @@ def cache_artist_list(
     expire: int = 60,
     fields: Optional[str] = None,
 ) -> None:
-    """Cache the artist page payload for the given parameter combination."""
-    client = get_redis_client()
-    key = _make_key(page, limit, category, location, sort, min_price, max_price, fields)
+    """Encode ``data`` and store it with :func:`cache_artist_list_response`."""
+    body = dumps(data).encode("utf-8")
+    cache_artist_list_response(
+        body,
+        'W/"' + hashlib.sha256(body).hexdigest() + '"',
+        page,
+        limit=limit,
+        category=category,
+        location=location,
+        sort=sort,
+        min_price=min_price,
+        max_price=max_price,
+        expire=expire,
+        fields=fields,
+    )
+
+
+# Public provider profiles: one namespace per provider, so its generation is
+# the content version and a bump drops every variant at once.
+PROVIDER_PROFILE_FAMILY = "provider_profile"
+
+
+def _provider_profile_key(artist_id: int, variant: str) -> Optional[str]:
+    return namespaced_key(PROVIDER_PROFILE_FAMILY, variant, scope=int(artist_id), local_ttl=L1_TTL_S)
+
+
+def get_cached_provider_profile(artist_id: int, variant: str) -> Optional[tuple]:
+    """Return ``(etag, body)`` for a provider's encoded profile payload."""
+    key = _provider_profile_key(artist_id, variant)
+    if key is None:
+        return None
+    return _provider_profile_cache.get(key, lambda: _load_encoded_response(key))
+
+
+def cache_provider_profile(artist_id: int, variant: str, body: bytes, etag: str, expire: int = 300) -> None:
+    """Cache an encoded provider profile payload with its ETag."""
+    key = _provider_profile_key(artist_id, variant)
+    if key is None:
+        return None
+    _provider_profile_cache.put_local(key, (etag, bytes(body)), expire)
+    _provider_profile_cache.filled(key)
     try:
-        client.setex(key, expire, dumps(data))
-    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
-        logging.warning("Could not cache artist list: %s", exc)
+        get_redis_client().setex(key, expire, etag + "\n" + body.decode("utf-8"))
+    except _REDIS_ERRORS as exc:
+        logging.warning("Could not cache provider profile: %s", exc)
+    return None
+
+
+def invalidate_provider_profiles(artist_ids: Iterable[int]) -> None:
+    """Drop the cached profile payloads of ``artist_ids`` (one pipelined INCR)."""
+    bump_namespaces(PROVIDER_PROFILE_FAMILY, sorted({int(a) for a in artist_ids if a}))
     return None
 
 
 def invalidate_artist_list_cache() -> None:
-    """Remove all cached artist list entries."""
-    client = get_redis_client()
-    try:
-        for key in client.scan_iter(f"{ARTIST_LIST_KEY_PREFIX}:*"):
-            client.delete(key)
-    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
-        logging.warning("Could not clear artist list cache: %s", exc)
+    """Invalidate all cached artist list entries (one INCR)."""
+    bump_namespace(ARTIST_LIST_KEY_PREFIX)
     return None
 
 
@@ -185,6 +469,8 @@ def cache_bytes(key: str, data: bytes, expire: int) -> None:
     The global Redis client is configured with decode_responses=True, so we
     encode binary blobs as base64 strings for storage.
     """
+    _bytes_cache.put_local(key, bytes(data), expire)
+    _bytes_cache.filled(key)
     client = get_redis_client()
     try:
         b64 = base64.b64encode(data).decode("ascii")
@@ -193,14 +479,8 @@ def cache_bytes(key: str, data: bytes, expire: int) -> None:
         logging.warning("Could not cache bytes: %s", exc)
 
 
-def get_cached_bytes(key: str) -> Optional[bytes]:
-    """Return cached bytes for the key if present, else None."""
-    client = get_redis_client()
-    try:
-        data = client.get(key)
-    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
-        logging.warning("Redis unavailable: %s", exc)
-        return None
+def _load_bytes(key: str) -> Optional[bytes]:
+    data = _redis_get(key)
     if not data:
         return None
     try:
@@ -209,19 +489,25 @@ def get_cached_bytes(key: str) -> Optional[bytes]:
         return None
 
 
+def get_cached_bytes(key: str, *, local: bool = True) -> Optional[bytes]:
+    """Return cached bytes for the key if present, else None.
+
+    ``local=False`` skips the in-process tier, for values that must be read
+    together with a sibling Redis key (e.g. a body and its ETag).
+    """
+    if not local:
+        return _load_bytes(key)
+    return _bytes_cache.get(key, lambda: _load_bytes(key))
+
 
 def _weather_key(location: str) -> str:
     return f"{WEATHER_KEY_PREFIX}:{location.lower()}"
 
 
-def get_cached_weather(location: str) -> dict | None:
-    client = get_redis_client()
+def get_cached_weather(location: str, refresh: Optional[Callable[[], None]] = None) -> dict | None:
+    """Cached forecast for ``location``; ``refresh`` lets a stale copy be served while it runs."""
     key = _weather_key(location)
-    try:
-        data = client.get(key)
-    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
-        logging.warning("Redis unavailable: %s", exc)
-        return None
+    data = _weather_cache.get(key, lambda: _redis_get(key), refresh=refresh)
     if data:
         return json.loads(data)
     return None
@@ -231,66 +517,87 @@ def cache_weather(data: dict, location: str, expire: int = 1800) -> None:
     client = get_redis_client()
     key = _weather_key(location)
     ttl = _apply_jitter(expire)
+    payload = dumps(data)
+    _weather_cache.put_local(key, payload, ttl)
+    _weather_cache.filled(key)
     try:
-        client.setex(key, ttl, dumps(data))
+        client.setex(key, ttl, payload)
     except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
         logging.warning("Could not cache weather: %s", exc)
     return None
 
 
-def _availability_key(artist_id: int, when: Optional[date]) -> str:
+def _ai_parse_key(kind: str, digest: str) -> str:
+    return f"{AI_PARSE_KEY_PREFIX}:{kind}:{digest}"
+
+
+def get_cached_ai_parse(kind: str, digest: str) -> Optional[dict]:
+    """Cached parsed model output (``kind`` e.g. ``search_filters``) for a query digest."""
+    key = _ai_parse_key(kind, digest)
+    data = _ai_parse_cache.get(key, lambda: _redis_get(key))
+    if data:
+        return json.loads(data)
+    return None
+
+
+def cache_ai_parse(kind: str, digest: str, data: dict, expire: int = 3600) -> None:
+    key = _ai_parse_key(kind, digest)
+    ttl = _apply_jitter(expire)
+    payload = dumps(data)
+    _ai_parse_cache.put_local(key, payload, ttl)
+    _ai_parse_cache.filled(key)
+    try:
+        get_redis_client().setex(key, ttl, payload)
+    except _REDIS_ERRORS as exc:
+        logging.warning("Could not cache AI parse: %s", exc)
+    return None
+
+
+def _availability_key(artist_id: int, when: Optional[date]) -> Optional[str]:
     day = when.isoformat() if when else "all"
-    return f"{AVAILABILITY_KEY_PREFIX}:{artist_id}:{day}"
+    return namespaced_key(AVAILABILITY_KEY_PREFIX, day, scope=int(artist_id), local_ttl=L1_TTL_S)
 
 
-# ─── PREVIEW CACHE INVALIDATION ───────────────────────────────────────────────
-def invalidate_preview_cache_for_user(user_id: int, role: Optional[str] = None, limit: Optional[int] = None) -> int:
-    """Delete cached preview entries for a user.
+# ─── THREAD PREVIEW CACHE ─────────────────────────────────────────────────────
+def preview_cache_key(user_id: int, role: str, limit: int) -> Optional[str]:
+    """Base key for a user's cached thread preview; append ``:etag`` / ``:body``.
 
-    Keys are of the form: preview:{user_id}:{role}:{limit}:{suffix}
-    where role ∈ {artist, client} and suffix ∈ {etag, body}.
+    Keys look like ``preview:{user_id}:g{gen}:{role}:{limit}``. Returns None
+    when Redis is unreachable.
+    """
+    return namespaced_key(PREVIEW_KEY_PREFIX, role, int(limit), scope=int(user_id))
 
-    When role/limit are omitted, all roles/limits for the user are cleared.
 
-    Returns the number of keys deleted (best‑effort; 0 on Redis unavailability).
+def invalidate_preview_cache_for_user(user_id: int, role: Optional[str] = None, limit: Optional[int] = None) -> int:
+    """Invalidate every cached preview for a user (one INCR).
+
+    ``role`` and ``limit`` are accepted for compatibility; all variants for the
+    user share one generation and are dropped together.
+
+    Returns 1 when the generation was bumped, 0 on Redis unavailability.
     """
-    client = get_redis_client()
-    try:
-        r = (role or "*").strip()
-        l = str(limit) if limit is not None else "*"
-        pattern = f"preview:{int(user_id)}:{r}:{l}:*"
-        deleted = 0
-        for key in client.scan_iter(pattern):
-            try:
-                deleted += int(client.delete(key) or 0)
-            except Exception:
-                continue
-        return deleted
-    except Exception:
-        return 0
+    return 1 if bump_namespace(PREVIEW_KEY_PREFIX, int(user_id)) is not None else 0
 
 
 def invalidate_preview_cache_for_users(user_ids: Iterable[int]) -> int:
-    """Delete cached preview entries for multiple users. Returns total keys deleted."""
-    total = 0
-    for uid in user_ids:
-        try:
-            total += invalidate_preview_cache_for_user(int(uid))
-        except Exception:
-            continue
-    return total
+    """Invalidate cached previews for several users in one round trip."""
+    try:
+        ids = [int(uid) for uid in user_ids]
+    except Exception:
+        return 0
+    return len(bump_namespaces(PREVIEW_KEY_PREFIX, ids))
 
 
 def get_cached_availability(
-    artist_id: int, when: Optional[date] = None
+    artist_id: int,
+    when: Optional[date] = None,
+    refresh: Optional[Callable[[], None]] = None,
 ) -> dict | None:
-    client = get_redis_client()
+    """Cached availability; ``refresh`` lets a stale copy be served while it runs."""
     key = _availability_key(artist_id, when)
-    try:
-        data = client.get(key)
-    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
-        logging.warning("Redis unavailable: %s", exc)
+    if key is None:
         return None
+    data = _availability_cache.get(key, lambda: _redis_get(key), refresh=refresh)
     if not data:
         return None
     try:
@@ -308,11 +615,16 @@ def cache_availability(
     when: Optional[date] = None,
     expire: int = 300,
 ) -> None:
-    client = get_redis_client()
     key = _availability_key(artist_id, when)
+    if key is None:
+        return None
+    client = get_redis_client()
     ttl = _apply_jitter(expire)
+    payload = dumps(data)
+    _availability_cache.put_local(key, payload, ttl)
+    _availability_cache.filled(key)
     try:
-        client.setex(key, ttl, dumps(data))
+        client.setex(key, ttl, payload)
     except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
         logging.warning("Could not cache availability: %s", exc)
     return None
@@ -321,15 +633,17 @@ def cache_availability(
 def invalidate_availability_cache(
     artist_id: int, when: Optional[date] = None
 ) -> None:
-    client = get_redis_client()
+    """Invalidate one cached day, or every entry for the artist when ``when`` is None."""
+    if when is None:
+        bump_namespace(AVAILABILITY_KEY_PREFIX, int(artist_id))
+        return None
+    key = _availability_key(artist_id, when)
+    if key is None:
+        return None
+    _availability_cache.delete(key)
     try:
-        if when is None:
-            pattern = f"{AVAILABILITY_KEY_PREFIX}:{artist_id}:*"
-            for key in client.scan_iter(pattern):
-                client.delete(key)
-        else:
-            client.delete(_availability_key(artist_id, when))
-    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as exc:
+        get_redis_client().delete(key)
+    except _REDIS_ERRORS as exc:
         logging.warning("Could not clear availability cache: %s", exc)
     return None
 
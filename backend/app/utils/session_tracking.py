@@ -0,0 +1,108 @@
+"""Per-session dirty id sets that follow the transaction.
+
+Several services keep derived state in step with ORM writes (inbox signals,
+cached provider profiles, provider search stats, thread unread counters).
+They all do it the same way, through a :class:`DirtyTracker`:
+
+* ``collect`` runs after every flush and returns the ids the flushed objects
+  touched; they are added to a set on ``session.info``.
+* Writers the flush cannot see (bulk ``query.update`` / ``query.delete``)
+  add ids with :meth:`DirtyTracker.note`.
+* After commit the set is handed to ``on_commit``; a rollback drops it.
+  Trackers that act inside the transaction instead pop the set themselves
+  from ``collect``.
+
+:func:`register_session_trackers` attaches one set of ``Session`` listeners
+that serves every tracker. It is called once at startup (and by the test
+configuration); trackers declared afterwards are picked up as well.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Iterable, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_trackers: List["DirtyTracker"] = []
+_registered = False
+_register_lock = threading.Lock()
+
+
+class DirtyTracker:
+    """One named set of dirty ids kept on ``session.info``."""
+
+    def __init__(
+        self,
+        key: str,
+        *,
+        collect: Optional[Callable[[Session], Optional[Iterable[int]]]] = None,
+        on_commit: Optional[Callable[[Session, Set[int]], None]] = None,
+    ) -> None:
+        self.key = key
+        self.collect = collect
+        self.on_commit = on_commit
+        _trackers.append(self)
+
+    def note(self, db: Session, ids: Iterable[int]) -> None:
+        """Mark ``ids`` dirty on ``db`` for writes the flush cannot see."""
+        try:
+            self.add(db, ids)
+        except Exception:
+            pass
+
+    def add(self, session: Session, ids: Iterable[int]) -> None:
+        ids = {int(i) for i in ids if i}
+        if ids:
+            session.info.setdefault(self.key, set()).update(ids)
+
+    def pop(self, session: Session) -> Set[int]:
+        return set(session.info.pop(self.key, None) or ())
+
+
+def _after_flush(session: Session, flush_context) -> None:  # noqa: ANN001
+    for tracker in list(_trackers):
+        if tracker.collect is None:
+            continue
+        try:
+            tracker.add(session, tracker.collect(session) or ())
+        except Exception as exc:
+            # Never fail the write; each tracker has a reconcile path.
+            logger.warning("%s collect failed: %s", tracker.key, exc)
+
+
+def _after_commit(session: Session) -> None:
+    for tracker in list(_trackers):
+        if tracker.on_commit is None:
+            continue
+        pending = tracker.pop(session)
+        if not pending:
+            continue
+        try:
+            tracker.on_commit(session, pending)
+        except Exception as exc:
+            logger.warning("%s after-commit handler failed: %s", tracker.key, exc)
+
+
+def _after_rollback(session: Session) -> None:
+    for tracker in list(_trackers):
+        session.info.pop(tracker.key, None)
+
+
+def register_session_trackers() -> None:
+    """Attach the shared ``Session`` listeners (idempotent)."""
+    global _registered
+    with _register_lock:
+        if _registered:
+            return
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+        _registered = True
+
+
+__all__ = ["DirtyTracker", "register_session_trackers"]
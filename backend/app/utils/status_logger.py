@@ -1,4 +1,6 @@
 import logging
+from typing import Any, Iterable, Tuple
+
 from sqlalchemy import event
 from sqlalchemy.orm.attributes import NO_VALUE
 
@@ -26,6 +28,24 @@ def _listener_factory(model_name: str):
     return _status_change
 
 
+def log_status_changes(model_name: str, changes: Iterable[Tuple[Any, Any]], value: Any) -> None:
+    """Log status changes made by a bulk ``query.update``.
+
+    Bulk updates bypass the ``set`` listeners below, so callers pass the
+    ``(id, old status)`` pairs they updated to keep the same audit line.
+    """
+    for entity_id, oldvalue in changes:
+        if oldvalue == value:
+            continue
+        logger.info(
+            "%s id=%s status changed from %s to %s",
+            model_name,
+            entity_id,
+            oldvalue,
+            value,
+        )
+
+
 def register_status_listeners() -> None:
     """Attach listeners for all models with a ``status`` attribute."""
     for model in (
@@ -0,0 +1,317 @@
+"""In-process L1 tier in front of Redis, with per-key single-flight.
+
+``redis_cache`` reads go through a :class:`TieredCache` per family (artist
+lists, availability, weather, byte blobs):
+
+* **L1** is a bounded LRU in this process (``CACHE_L1_MAX_ENTRIES`` entries,
+  ``CACHE_L1_TTL`` seconds fresh, blobs over ``CACHE_L1_MAX_ITEM_BYTES`` are
+  not kept). Values are stored in their Redis wire form and decoded per hit,
+  so callers never share mutable objects.
+* **L2** is Redis, exactly as before.
+* **Single-flight.** Inside a :func:`single_flight_scope` (a decorator on the
+  routes that refill these caches) only one thread per key and process
+  recomputes a miss; the others wait for it (``CACHE_SINGLE_FLIGHT_WAIT``
+  seconds at most) and read what it stored. Leases are released when the
+  value is stored or, at the latest, when the scoped call returns.
+* **Stale-while-revalidate.** An L1 entry stays servable for
+  ``CACHE_L1_STALE_TTL`` seconds past its freshness. While another thread is
+  refilling the key (or a background ``refresh`` started by the caller is
+  running), requests get the stale copy instead of waiting.
+
+Hit/miss/coalesced/stale counts go to ``utils.metrics`` as ``cache.<result>``
+tagged with the family, and are kept in-process for :func:`stats`.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .metrics import incr as metrics_incr
+
+logger = logging.getLogger(__name__)
+
+L1_ENABLED = (os.getenv("CACHE_L1_ENABLED") or "1").strip().lower() not in {"0", "false", "no"}
+try:
+    L1_MAX_ENTRIES = max(1, int(os.getenv("CACHE_L1_MAX_ENTRIES") or 2048))
+except Exception:
+    L1_MAX_ENTRIES = 2048
+try:
+    L1_TTL_S = max(0.0, float(os.getenv("CACHE_L1_TTL") or 5.0))
+except Exception:
+    L1_TTL_S = 5.0
+try:
+    L1_STALE_TTL_S = max(0.0, float(os.getenv("CACHE_L1_STALE_TTL") or 30.0))
+except Exception:
+    L1_STALE_TTL_S = 30.0
+try:
+    L1_MAX_ITEM_BYTES = max(0, int(os.getenv("CACHE_L1_MAX_ITEM_BYTES") or 262144))
+except Exception:
+    L1_MAX_ITEM_BYTES = 262144
+try:
+    FLIGHT_WAIT_S = max(0.0, float(os.getenv("CACHE_SINGLE_FLIGHT_WAIT") or 5.0))
+except Exception:
+    FLIGHT_WAIT_S = 5.0
+
+_scope = threading.local()
+_flights_lock = threading.Lock()
+_flights: Dict[Tuple[str, str], "_Flight"] = {}
+_families: Dict[str, "TieredCache"] = {}
+
+
+class _Flight:
+    __slots__ = ("owner", "done")
+
+    def __init__(self, owner: int) -> None:
+        self.owner = owner
+        self.done = threading.Event()
+
+
+def _held() -> list:
+    held = getattr(_scope, "held", None)
+    if held is None:
+        held = _scope.held = []
+    return held
+
+
+def _in_scope() -> bool:
+    return getattr(_scope, "depth", 0) > 0
+
+
+def single_flight_scope(func: Callable) -> Callable:
+    """Enable single-flight for cache reads made during ``func``.
+
+    Any lease this thread still holds when ``func`` returns or raises is
+    released, so waiters never stall on a leader that bailed out early.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _scope.depth = getattr(_scope, "depth", 0) + 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _scope.depth -= 1
+            if _scope.depth == 0:
+                held = _held()
+                while held:
+                    _release(held.pop())
+
+    return wrapper
+
+
+def _try_lead(flight_key: Tuple[str, str]) -> Tuple[bool, _Flight]:
+    """Return ``(is_leader, flight)``; re-entrant for the owning thread."""
+    owner = threading.get_ident()
+    with _flights_lock:
+        flight = _flights.get(flight_key)
+        if flight is None:
+            flight = _flights[flight_key] = _Flight(owner)
+            return True, flight
+        return flight.owner == owner, flight
+
+
+def _release(flight_key: Tuple[str, str]) -> None:
+    with _flights_lock:
+        flight = _flights.pop(flight_key, None)
+    if flight is not None:
+        flight.done.set()
+
+
+def _size_of(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, tuple):
+        return sum(_size_of(v) for v in value)
+    return 0
+
+
+class TieredCache:
+    """One cache family: a bounded, TTL'd LRU plus single-flight bookkeeping."""
+
+    def __init__(
+        self,
+        family: str,
+        *,
+        ttl: Optional[float] = None,
+        stale_ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        self.family = family
+        self.ttl = L1_TTL_S if ttl is None else ttl
+        self.stale_ttl = L1_STALE_TTL_S if stale_ttl is None else stale_ttl
+        self.max_entries = L1_MAX_ENTRIES if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+        self.counters: Dict[str, int] = {}
+        _families[family] = self
+
+    # ---- counters -----------------------------------------------------------------
+    def _count(self, result: str, tier: Optional[str] = None) -> None:
+        with self._lock:
+            self.counters[result] = self.counters.get(result, 0) + 1
+        tags: Dict[str, object] = {"family": self.family}
+        if tier:
+            tags["tier"] = tier
+        metrics_incr(f"cache.{result}", tags=tags)
+
+    # ---- L1 -----------------------------------------------------------------------
+    def _local_get(self, key: str) -> Tuple[Any, bool]:
+        """Return ``(value, fresh)``; value is None when absent or past the stale window."""
+        if not L1_ENABLED:
+            return None, False
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            fresh_until, stale_until, value = entry
+            if now >= stale_until:
+                self._entries.pop(key, None)
+                return None, False
+            self._entries.move_to_end(key)
+            return value, now < fresh_until
+
+    def peek(self, key: str) -> Any:
+        """Fresh L1 value for ``key``, or None; never loads and is not counted."""
+        value, fresh = self._local_get(key)
+        return value if fresh else None
+
+    def put_local(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if not L1_ENABLED or value is None:
+            return
+        if _size_of(value) > L1_MAX_ITEM_BYTES:
+            return
+        fresh = self.ttl if ttl is None else min(self.ttl, float(ttl))
+        if fresh <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + fresh, now + fresh + self.stale_ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.counters.clear()
+
+    # ---- read path -----------------------------------------------------------------
+    def get(
+        self,
+        key: str,
+        load: Callable[[], Any],
+        *,
+        refresh: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """Return the raw cached value for ``key`` or None on a miss.
+
+        ``load`` reads L2 (Redis) and returns the raw value or None. ``refresh``,
+        if given, recomputes and stores the value off-request; it lets a stale
+        entry be served while the refresh runs.
+        """
+        value, fresh = self._local_get(key)
+        if fresh:
+            self._count("hit", "l1")
+            return value
+        stale = value
+
+        raw = load()
+        if raw is not None:
+            self.put_local(key, raw)
+            self._count("hit", "l2")
+            return raw
+
+        if stale is not None and refresh is not None:
+            if self._start_refresh(key, refresh):
+                self._count("stale")
+                return stale
+
+        if not _in_scope():
+            self._count("miss")
+            return None
+
+        flight_key = (self.family, key)
+        leader, flight = _try_lead(flight_key)
+        if leader:
+            held = _held()
+            if flight_key not in held:
+                held.append(flight_key)
+            self._count("miss")
+            return None
+        if stale is not None:
+            self._count("stale")
+            return stale
+        flight.done.wait(FLIGHT_WAIT_S)
+        value, fresh = self._local_get(key)
+        if value is None:
+            raw = load()
+            if raw is not None:
+                self.put_local(key, raw)
+                value = raw
+        if value is not None:
+            self._count("coalesced")
+            return value
+        self._count("miss")
+        return None
+
+    def filled(self, key: str) -> None:
+        """Mark ``key`` stored: wake threads waiting on its single-flight."""
+        flight_key = (self.family, key)
+        held = _held()
+        if flight_key in held:
+            held.remove(flight_key)
+            _release(flight_key)
+
+    def _start_refresh(self, key: str, refresh: Callable[[], None]) -> bool:
+        """Run ``refresh`` on a daemon thread unless one is already running."""
+        flight_key = (self.family, key)
+        with _flights_lock:
+            if flight_key in _flights:
+                # Someone is already refilling this key; serving stale is correct.
+                return True
+            _flights[flight_key] = _Flight(0)
+
+        def run() -> None:
+            try:
+                refresh()
+            except Exception as exc:  # pragma: no cover - best effort
+                logger.warning("Background cache refresh failed for %s: %s", self.family, exc)
+            finally:
+                _release(flight_key)
+
+        try:
+            threading.Thread(target=run, name=f"cache-refresh:{self.family}", daemon=True).start()
+        except Exception:
+            _release(flight_key)
+            return False
+        return True
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Per-family in-process counters (hit/miss/coalesced/stale)."""
+    return {name: dict(cache.counters) for name, cache in _families.items()}
+
+
+def clear_all() -> None:
+    """Drop every L1 entry and counter (tests, admin flushes)."""
+    for cache in list(_families.values()):
+        cache.clear()
+
+
+__all__ = [
+    "TieredCache",
+    "clear_all",
+    "single_flight_scope",
+    "stats",
+]
@@ -16,3 +16,70 @@ def patch_notifications_broadcast(monkeypatch):
 
 # Load environment variables for tests
 load_dotenv(Path(__file__).resolve().parents[1] / '.env.test')
+
+
+@pytest.fixture(autouse=True, scope="session")
+def session_trackers():
+    """Attach the session listeners main registers at startup."""
+    from app.utils.session_tracking import register_session_trackers
+
+    register_session_trackers()
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Each test builds its own database; cached principals must not leak."""
+    from app.services import principal_cache
+
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_local_caches():
+    """In-process cache tiers outlive each test's fake Redis; start clean."""
+    from app.utils import redis_cache
+
+    redis_cache.clear_local_caches()
+    yield
+    redis_cache.clear_local_caches()
+
+
+def add_provider(db, name, *, email=None, first_name=None, last_name='L', location=None, coords=None,
+                 category=None, price=100, status='approved', bookings=0, ratings=()):
+    """Create a service provider with a profile and one service; return ``(user, service)``.
+
+    ``category`` is created on first use, ``coords`` is a ``(lat, lng)`` pair,
+    and ``bookings``/``ratings`` seed that many bookings and reviews.
+    """
+    from datetime import datetime
+
+    from app.models import Booking, Review, Service, ServiceCategory, ServiceProviderProfile, User, UserType
+
+    user = User(email=email or f'{name.replace(" ", "")}@test.com', password='x',
+                first_name=first_name or name, last_name=last_name, user_type=UserType.SERVICE_PROVIDER)
+    db.add(user)
+    db.flush()
+    category_id = None
+    if category is not None:
+        cat = db.query(ServiceCategory).filter(ServiceCategory.name == category).first()
+        if cat is None:
+            cat = ServiceCategory(name=category)
+            db.add(cat)
+            db.flush()
+        category_id = cat.id
+    lat, lng = coords if coords else (None, None)
+    db.add(ServiceProviderProfile(user_id=user.id, business_name=name, location=location,
+                                  location_lat=lat, location_lng=lng))
+    service = Service(artist_id=user.id, title='Gig', price=price, duration_minutes=60, media_url='x',
+                      service_category_id=category_id, status=status)
+    db.add(service)
+    db.flush()
+    for _ in range(bookings):
+        db.add(Booking(artist_id=user.id, client_id=user.id, service_id=service.id,
+                       start_time=datetime.utcnow(), end_time=datetime.utcnow(), total_price=price))
+    for rating in ratings:
+        db.add(Review(artist_id=user.id, service_id=service.id, booking_id=1, rating=rating))
+    db.commit()
+    return user, service
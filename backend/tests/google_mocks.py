@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from datetime import datetime
+import threading
+from datetime import date, datetime
 
 import pytest
 from app.services import calendar_service
@@ -44,3 +45,75 @@ def google_dummy_flow(monkeypatch: pytest.MonkeyPatch) -> None:
 
 
 # Fixtures for tests can import google_dummy_flow to patch the OAuth flow.
+
+
+class FakeCalendarClient:
+    """In-memory stand-in for :class:`calendar_service.GoogleCalendarClient`.
+
+    Events are stored per user id. Every change bumps a version number and
+    sync tokens encode the version they were issued at, so an incremental
+    ``list_events`` returns only events changed since then (including
+    cancelled ones), like Google's ``syncToken`` protocol.
+    """
+
+    def __init__(self, *, page_size: int = 100) -> None:
+        self.page_size = page_size
+        self.events: dict[int, dict[str, dict]] = {}
+        self.changed: dict[tuple[int, str], int] = {}
+        self.version = 0
+        self.fail: Exception | None = None
+        self.calls: list[dict] = []
+        self.watches: list[dict] = []
+        self._expired = False
+        self._lock = threading.Lock()
+
+    def put(self, user_id: int, event_id: str, start: datetime | date) -> None:
+        key = "date" if not isinstance(start, datetime) else "dateTime"
+        value = start.isoformat() + ("Z" if key == "dateTime" else "")
+        with self._lock:
+            self.version += 1
+            self.events.setdefault(user_id, {})[event_id] = {
+                "id": event_id,
+                "status": "confirmed",
+                "start": {key: value},
+            }
+            self.changed[(user_id, event_id)] = self.version
+
+    def cancel(self, user_id: int, event_id: str) -> None:
+        with self._lock:
+            self.version += 1
+            self.events.setdefault(user_id, {})[event_id] = {"id": event_id, "status": "cancelled"}
+            self.changed[(user_id, event_id)] = self.version
+
+    def expire_tokens(self) -> None:
+        """Make the next incremental request fail with HTTP 410."""
+        self._expired = True
+
+    def list_events(self, account, *, sync_token=None, page_token=None, time_min=None) -> dict:
+        with self._lock:
+            self.calls.append(
+                {"account_id": account.id, "sync_token": sync_token, "page_token": page_token, "time_min": time_min}
+            )
+            if self.fail is not None:
+                raise self.fail
+            if sync_token and self._expired:
+                self._expired = False
+                raise calendar_service.CalendarSyncTokenExpired(sync_token)
+            since = int(sync_token.split(":")[1]) if sync_token else None
+            items = [
+                dict(item)
+                for event_id, item in sorted(self.events.get(account.user_id, {}).items())
+                if (since is None and item["status"] != "cancelled")
+                or (since is not None and self.changed[(account.user_id, event_id)] > since)
+            ]
+            offset = int(page_token or 0)
+            page = {"items": items[offset : offset + self.page_size]}
+            if offset + self.page_size < len(items):
+                page["nextPageToken"] = str(offset + self.page_size)
+            else:
+                page["nextSyncToken"] = f"v:{self.version}"
+            return page
+
+    def watch(self, account, *, channel_id, address, token, ttl_s) -> dict:
+        self.watches.append({"account_id": account.id, "channel_id": channel_id, "address": address, "token": token})
+        return {"id": channel_id, "resourceId": f"res-{account.id}"}
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.dependencies import get_db
+from app.core.config import settings
+from app.main import app
+from app.models import User, UserType
+from app.models.base import BaseModel
+from app.schemas.booking_agent import BookingAgentState
+from app.services import ai_search, booking_agent, llm
+from app.services.genai_client import FakeGenAIClient, set_genai_client
+from app.utils import redis_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    fake = fakeredis.FakeStrictRedis(decode_responses=True)
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
+    monkeypatch.setattr(settings, "FEATURE_AI_SEARCH", True, raising=False)
+    redis_cache.clear_local_caches()
+    yield
+    set_genai_client(None)
+    redis_cache.clear_local_caches()
+    app.dependency_overrides.pop(get_db, None)
+
+
+def test_gate_bounds_concurrent_model_calls(monkeypatch):
+    client = FakeGenAIClient("ok", delay_s=0.05)
+    set_genai_client(client)
+    monkeypatch.setattr(llm, "_gate", llm._Gate(2))
+
+    async def burst():
+        return await asyncio.gather(*(llm.agenerate_text(f"p{i}", label="t") for i in range(6)))
+
+    assert asyncio.run(burst()) == ["ok"] * 6
+    assert client.max_in_flight == 2
+
+    # A caller that cannot get a slot in time falls back instead of queueing.
+    monkeypatch.setattr(llm, "LLM_GATE_WAIT_S", 0.0)
+    assert llm._gate.acquire(0) and llm._gate.acquire(0)
+    try:
+        assert llm.generate_text("late", label="t") is None
+        assert asyncio.run(llm.agenerate_text("late", label="t")) is None
+    finally:
+        llm._gate.release()
+        llm._gate.release()
+    assert len(client.prompts) == 6
+
+
+def test_parsed_filters_and_state_are_cached_by_normalized_text():
+    client = FakeGenAIClient('```json\n{"location": "Durban", "max_price": 9000}\n```')
+    set_genai_client(client)
+    base = ai_search.AiSearchFilters()
+    first = ai_search._ai_derive_filters("A DJ for my party", base)
+    again = ai_search._ai_derive_filters("  a dj   for my PARTY ", base)
+    assert first == again
+    assert (first.category, first.location, first.max_price) == ("dj", "Durban", 9000.0)
+    assert len(client.prompts) == 1
+    assert ai_search._ai_derive_filters("A DJ for my party", base, skip_llm=True).location is None
+
+    client.reply = '{"guests": "120", "city": "Durban", "colour": "red"}'
+    messages = [{"role": "user", "content": "About 120 guests in Durban"}]
+    state = BookingAgentState()
+    assert booking_agent._call_gemini_parse_state(messages, state) == {"guests": 120, "city": "Durban"}
+    assert asyncio.run(booking_agent._call_gemini_parse_state_async(messages, state)) == {
+        "guests": 120,
+        "city": "Durban",
+    }
+    assert len(client.prompts) == 2
+
+    # Unparseable replies are not cached.
+    client.reply = "sorry"
+    other = [{"role": "user", "content": "hmm"}]
+    assert booking_agent._call_gemini_parse_state(other, state) == {}
+    assert booking_agent._call_gemini_parse_state(other, state) == {}
+    assert len(client.prompts) == 4
+
+
+def test_search_route_holds_no_connection_during_model_calls(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ai.db'}")
+    BaseModel.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_db
+    checked_out = []
+
+    def reply(prompt):
+        checked_out.append(engine.pool.checkedout())
+        if "INPUT JSON" in prompt:
+            return json.dumps({"ordered_indices": [], "explanation": "No DJs matched on Booka."})
+        return '{"location": "Cape Town"}'
+
+    set_genai_client(FakeGenAIClient(reply))
+    res = TestClient(app).post("/api/v1/ai/providers/search", json={"query": "dj for a wedding"})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["filters"]["location"] == "Cape Town"
+    assert body["explanation"].startswith("No DJs matched on Booka.")
+    assert checked_out == [0, 0]
+
+
+def test_async_agent_step_matches_sync_step():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    BaseModel.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    user = User(email="c@test.com", password="x", first_name="C", last_name="L", user_type=UserType.CLIENT)
+    db.add(user)
+    db.commit()
+    messages = [
+        {"role": "user", "content": "I need a DJ"},
+        {"role": "assistant", "content": "Sure, tell me more."},
+        {"role": "user", "content": "It's a wedding in Cape Town"},
+    ]
+    sync_step = booking_agent.run_booking_agent_step(db, user, messages, BookingAgentState())
+    async_step = asyncio.run(booking_agent.run_booking_agent_step_async(db, user, messages, BookingAgentState()))
+    assert async_step.messages == sync_step.messages
+    assert async_step.state == sync_step.state
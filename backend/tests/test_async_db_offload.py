@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import database
+from app.api import api_message, api_search_analytics
+from app.models import BookingRequest, BookingStatus, User, UserType
+from app.models.base import BaseModel
+
+
+def setup_db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    BaseModel.metadata.create_all(engine)
+    return sessionmaker(bind=engine, expire_on_commit=False)()
+
+
+async def max_loop_lag_ms(coro):
+    """Run ``coro`` while ticking the loop; return the worst wake-up delay."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            t0 = loop.time()
+            await asyncio.sleep(0.005)
+            lags.append((loop.time() - t0 - 0.005) * 1000.0)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    try:
+        return await coro, max(lags)
+    finally:
+        done.set()
+        await task
+
+
+def test_mark_messages_delivered_keeps_loop_responsive(monkeypatch):
+    db = setup_db()
+    client = User(email="c@test.com", password="x", first_name="C", last_name="C", user_type=UserType.CLIENT)
+    artist = User(email="a@test.com", password="x", first_name="A", last_name="A", user_type=UserType.SERVICE_PROVIDER)
+    db.add_all([client, artist])
+    db.flush()
+    br = BookingRequest(client_id=client.id, artist_id=artist.id, status=BookingStatus.PENDING_QUOTE)
+    db.add(br)
+    db.commit()
+
+    real_get = api_message.crud.crud_booking_request.get_booking_request
+
+    def slow_get(session, request_id):
+        time.sleep(0.3)
+        return real_get(session, request_id=request_id)
+
+    async def no_broadcast(*_args, **_kwargs):
+        return None
+
+    monkeypatch.setattr(api_message.crud.crud_booking_request, "get_booking_request", slow_get)
+    monkeypatch.setattr(api_message.manager, "broadcast", no_broadcast)
+    payload = api_message.DeliveredIn(up_to_id=1)
+    result, lag = asyncio.run(
+        max_loop_lag_ms(api_message.mark_messages_delivered(br.id, payload, db=db, current_user=client))
+    )
+    assert result == {"ok": True}
+    assert lag < 150
+
+
+def test_run_db_caps_concurrent_offloads(monkeypatch):
+    monkeypatch.setattr(database, "DB_OFFLOAD_CONCURRENCY", 2)
+    active = []
+    peak = []
+
+    def work():
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.05)
+        active.pop()
+
+    async def main():
+        await asyncio.gather(*(database.run_db(work) for _ in range(6)))
+
+    asyncio.run(main())
+    assert max(peak) == 2
+
+
+def test_search_event_insert_runs_off_loop():
+    db = setup_db()
+    db.execute(
+        api_search_analytics.text(
+            "CREATE TABLE search_events (id INTEGER PRIMARY KEY, created_at TIMESTAMP, user_id INTEGER,"
+            " session_id TEXT, source TEXT, category_value TEXT, location TEXT, when_date TEXT,"
+            " results_count INTEGER, search_id TEXT, clicked_artist_id INTEGER, click_rank INTEGER, meta TEXT)"
+        )
+    )
+    db.commit()
+
+    class FakeRequest:
+        headers = {}
+        cookies = {}
+
+        async def json(self):
+            return {"search_id": "s1", "source": "home", "location": "Cape Town"}
+
+    res = asyncio.run(api_search_analytics.log_search_event(FakeRequest(), db=db))
+    assert res == {"status": "ok"}
+    row = db.execute(api_search_analytics.text("SELECT source, location FROM search_events")).fetchone()
+    assert tuple(row) == ("home", "Cape Town")
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.api_service_provider import read_all_service_provider_profiles, read_bulk_availability
+from app.models import (
+    Booking,
+    BookingRequest,
+    BookingStatus,
+    CalendarAccount,
+    CalendarBusyDay,
+    CalendarProvider,
+)
+from app.models.base import BaseModel
+from backend.tests.conftest import add_provider
+
+DAY = datetime.utcnow().date() + timedelta(days=10)
+AT = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=18)
+
+
+def setup_db():
+    engine = create_engine(
+        'sqlite://',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    BaseModel.metadata.create_all(engine)
+    return sessionmaker(bind=engine, expire_on_commit=False)()
+
+
+def seed(db):
+    user, service = add_provider(db, 'booked')
+    booked = user.id
+    requested, synced, free, declined = (
+        add_provider(db, name)[0].id for name in ('requested', 'synced', 'free', 'declined')
+    )
+    db.add(Booking(artist_id=booked, client_id=free, service_id=service.id, start_time=AT,
+                   end_time=AT + timedelta(hours=2), status=BookingStatus.CONFIRMED, total_price=100))
+    db.add(BookingRequest(client_id=free, artist_id=requested, proposed_datetime_2=AT,
+                          status=BookingStatus.PENDING_QUOTE))
+    db.add(BookingRequest(client_id=free, artist_id=declined, proposed_datetime_1=AT,
+                          status=BookingStatus.REQUEST_DECLINED))
+    account = CalendarAccount(user_id=synced, provider=CalendarProvider.GOOGLE, refresh_token='r',
+                              access_token='a', token_expiry=AT)
+    db.add(account)
+    db.flush()
+    db.add(CalendarBusyDay(account_id=account.id, user_id=synced, event_id='evt', day=DAY))
+    db.commit()
+    return booked, requested, synced, free, declined
+
+
+def test_list_filters_busy_providers_before_paging():
+    db = setup_db()
+    booked, requested, synced, free, declined = seed(db)
+
+    first = read_all_service_provider_profiles(db=db, when=DAY, page=1, limit=1)
+    second = read_all_service_provider_profiles(db=db, when=DAY, page=2, limit=1)
+    assert first['total'] == 2
+    assert [p.user_id for p in first['data'] + second['data']] == [free, declined]
+    assert all(p.is_available for p in first['data'])
+
+    other_day = read_all_service_provider_profiles(db=db, when=DAY + timedelta(days=1), page=1, limit=10)
+    assert other_day['total'] == 5
+
+
+def test_bulk_endpoint_groups_all_sources():
+    db = setup_db()
+    booked, requested, synced, free, declined = seed(db)
+    ids = ','.join(str(i) for i in (booked, requested, synced, free, declined))
+
+    res = read_bulk_availability(ids=ids, start=DAY - timedelta(days=2), end=DAY + timedelta(days=2), db=db)
+    day = DAY.isoformat()
+    assert res['availability'] == {
+        str(booked): [day],
+        str(requested): [day],
+        str(synced): [day],
+        str(free): [],
+        str(declined): [],
+    }
+
@@ -1,7 +1,11 @@
+import asyncio
+import json
+
 import pytest
 import fakeredis
 
 from app.utils import redis_cache
+from app.utils.tiered_cache import TieredCache
 from app.services import weather_service
 from app.api.v1 import api_service_provider
 
@@ -61,6 +65,57 @@ def test_invalidate_artist_list_cache(monkeypatch):
     assert redis_cache.get_cached_artist_list(page=1) is None
 
 
+def test_namespace_bump_is_single_incr_without_scan(monkeypatch):
+    fake = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("invalidation must not scan the keyspace")
+
+    monkeypatch.setattr(fake, "scan_iter", no_scan)
+    redis_cache.cache_artist_list([{"id": 1}], page=1)
+    redis_cache.cache_artist_list([{"id": 2}], page=2, category="DJ")
+    old_keys = set(fake.keys("service_provider_profiles:list:*"))
+    redis_cache.invalidate_artist_list_cache()
+    assert redis_cache.get_cached_artist_list(page=1) is None
+    assert redis_cache.get_cached_artist_list(page=2, category="DJ") is None
+    # Orphaned entries are left to expire via their TTL.
+    assert old_keys and set(fake.keys("service_provider_profiles:list:*")) == old_keys
+    assert all(fake.ttl(k) > 0 for k in old_keys)
+
+
+def test_availability_namespace_is_per_artist(monkeypatch):
+    from datetime import date
+
+    fake = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
+
+    redis_cache.cache_availability({"a": 1}, 1)
+    redis_cache.cache_availability({"a": 1, "d": 1}, 1, date(2026, 1, 2))
+    redis_cache.cache_availability({"a": 2}, 2)
+    redis_cache.invalidate_availability_cache(1, date(2026, 1, 2))
+    assert redis_cache.get_cached_availability(1, date(2026, 1, 2)) is None
+    assert redis_cache.get_cached_availability(1) == {"a": 1}
+    redis_cache.invalidate_availability_cache(1)
+    assert redis_cache.get_cached_availability(1) is None
+    assert redis_cache.get_cached_availability(2) == {"a": 2}
+
+
+def test_preview_keys_move_to_new_generation(monkeypatch):
+    fake = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
+
+    k1 = redis_cache.preview_cache_key(7, "client", 50)
+    other = redis_cache.preview_cache_key(8, "client", 50)
+    assert k1 == "preview:7:g0:client:50"
+    assert redis_cache.invalidate_preview_cache_for_users([7, 7]) == 1
+    assert redis_cache.preview_cache_key(7, "client", 50) == "preview:7:g1:client:50"
+    assert redis_cache.preview_cache_key(7, "artist", 20) == "preview:7:g1:artist:20"
+    assert redis_cache.preview_cache_key(8, "client", 50) == other
+    assert redis_cache.invalidate_preview_cache_for_user(8) == 1
+    assert redis_cache.preview_cache_key(8, "client", 50) == "preview:8:g1:client:50"
+
+
 from types import SimpleNamespace
 from datetime import datetime
 from app.models.service import Service, ServiceType
@@ -237,18 +292,60 @@ def test_cache_weather_forecast(monkeypatch):
         def json(self):
             return {"weather": [{"day": 1}, {"day": 2}, {"day": 3}]}
 
-    def fake_get(url, params, timeout):
-        calls["count"] += 1
-        return DummyResp()
+    class DummyClient:
+        async def get(self, url, params):
+            calls["count"] += 1
+            return DummyResp()
 
-    monkeypatch.setattr(weather_service.httpx, "get", fake_get)
+    monkeypatch.setattr(weather_service, "_client", lambda: DummyClient())
 
-    first = weather_service.get_3day_forecast("Paris")
-    second = weather_service.get_3day_forecast("Paris")
+    first = asyncio.run(weather_service.get_3day_forecast("Paris"))
+    second = asyncio.run(weather_service.get_3day_forecast("Paris"))
     assert calls["count"] == 1
     assert first == second
 
 
+def test_stale_forecast_served_while_refresh_refetches(monkeypatch):
+    fake = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
+    monkeypatch.setattr(redis_cache, "_weather_cache", TieredCache("test_weather_swr", ttl=0.05, stale_ttl=10))
+    days = iter([[{"day": 1}], [{"day": 2}]])
+
+    class DummyResp:
+        def __init__(self, weather):
+            self.weather = weather
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"weather": self.weather}
+
+    class DummyClient:
+        async def get(self, url, params):
+            return DummyResp(next(days))
+
+    monkeypatch.setattr(weather_service, "_client", lambda: DummyClient())
+
+    async def scenario():
+        first = await weather_service.get_3day_forecast("Paris")
+        # The L1 copy goes stale and Redis has lost its copy.
+        fake.flushall()
+        await asyncio.sleep(0.1)
+        stale = await weather_service.get_3day_forecast("Paris")
+        fresh = None
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            fresh = redis_cache.get_cached_weather("Paris")
+            if fresh and fresh["forecast"] == [{"day": 2}]:
+                break
+        return first, stale, fresh
+
+    first, stale, fresh = asyncio.run(scenario())
+    assert first["forecast"] == stale["forecast"] == [{"day": 1}]
+    assert fresh["forecast"] == [{"day": 2}]
+
+
 def test_cache_artist_availability(monkeypatch):
     fake = fakeredis.FakeStrictRedis()
     monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
@@ -282,3 +379,56 @@ def test_cache_artist_availability(monkeypatch):
     assert first == second
 
 
+
+
+def test_list_cache_hit_serves_stored_bytes_and_etag(monkeypatch):
+    from starlette.requests import Request
+
+    fake = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    BaseModel.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        User(email="c@test.com", password="x", first_name="C", last_name="D", user_type=UserType.SERVICE_PROVIDER),
+        ServiceProviderProfile(user_id=1, business_name="Cached"),
+        Service(
+            artist_id=1,
+            title="Gig",
+            description="",
+            media_url="http://example.com",
+            price=100,
+            currency="ZAR",
+            duration_minutes=60,
+            service_type=ServiceType.LIVE_PERFORMANCE,
+        ),
+    ])
+    db.commit()
+
+    def call(db, etag=None):
+        headers = [(b"if-none-match", etag.encode())] if etag else []
+        request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+        return api_service_provider.read_all_service_provider_profiles(
+            request=request, db=db, category=None, location=None, sort=None, page=1, limit=20,
+            include_price_distribution=False,
+        )
+
+    miss = call(db)
+    assert miss.headers["X-Cache"] == "MISS"
+    etag = miss.headers["ETag"]
+
+    monkeypatch.setattr(
+        api_service_provider.ArtistProfileResponse,
+        "model_validate",
+        classmethod(lambda cls, *a, **k: (_ for _ in ()).throw(AssertionError("hit must not validate"))),
+    )
+    hit = call(FailingDB([]))
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.headers["ETag"] == etag
+    assert hit.body == miss.body
+    assert json.loads(hit.body)["data"][0]["business_name"] == "Cached"
+
+    revalidated = call(FailingDB([]), etag=etag)
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
@@ -0,0 +1,180 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1 import api_service_provider
+from app.models import CalendarAccount, CalendarBusyDay, CalendarProvider, User, UserType
+from app.models.base import BaseModel
+from app.services import calendar_service, calendar_sync
+
+from backend.tests.google_mocks import FakeCalendarClient
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+def make_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    BaseModel.metadata.create_all(engine)
+    return sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def add_account(db, name="a"):
+    user = User(
+        email=f"{name}@test.com",
+        password="x",
+        first_name=name,
+        last_name="L",
+        user_type=UserType.SERVICE_PROVIDER,
+    )
+    db.add(user)
+    db.flush()
+    account = CalendarAccount(
+        user_id=user.id,
+        provider=CalendarProvider.GOOGLE,
+        refresh_token="r",
+        access_token="a",
+        token_expiry=NOW,
+    )
+    db.add(account)
+    db.commit()
+    return user.id, account.id
+
+
+def busy(db, user_id):
+    rows = db.query(CalendarBusyDay.event_id, CalendarBusyDay.day).filter(CalendarBusyDay.user_id == user_id)
+    return dict(rows.all())
+
+
+def test_full_then_incremental_sync():
+    Session = make_factory()
+    client = FakeCalendarClient(page_size=2)
+    with Session() as db:
+        uid, account_id = add_account(db)
+    client.put(uid, "e1", datetime(2026, 3, 2, 18, 0))
+    client.put(uid, "e2", date(2026, 3, 5))
+    client.put(uid, "e3", datetime(2026, 3, 9, 9, 0))
+
+    assert calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+    with Session() as db:
+        assert busy(db, uid) == {"e1": date(2026, 3, 2), "e2": date(2026, 3, 5), "e3": date(2026, 3, 9)}
+        account = db.get(CalendarAccount, account_id)
+        assert account.sync_token == f"v:{client.version}"
+        assert account.next_sync_at == NOW + timedelta(seconds=calendar_sync.SYNC_INTERVAL_S)
+    assert [c["page_token"] for c in client.calls] == [None, "2"]
+    assert client.calls[0]["sync_token"] is None
+
+    client.calls.clear()
+    client.cancel(uid, "e1")
+    client.put(uid, "e3", datetime(2026, 3, 10, 9, 0))
+    assert calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+    with Session() as db:
+        assert busy(db, uid) == {"e2": date(2026, 3, 5), "e3": date(2026, 3, 10)}
+    assert client.calls[0]["sync_token"] == "v:3"
+
+    # A rejected token falls back to a full listing that replaces the rows.
+    client.calls.clear()
+    client.put(uid, "e4", date(2026, 3, 12))
+    client.expire_tokens()
+    assert calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+    with Session() as db:
+        assert set(busy(db, uid)) == {"e2", "e3", "e4"}
+    assert [c["sync_token"] for c in client.calls][:2] == ["v:5", None]
+
+
+def test_failures_back_off_per_account():
+    Session = make_factory()
+    client = FakeCalendarClient()
+    with Session() as db:
+        uid, account_id = add_account(db)
+    client.put(uid, "e1", date(2026, 3, 2))
+    assert calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+
+    client.fail = RuntimeError("boom")
+    with Session() as db:
+        db.get(CalendarAccount, account_id).next_sync_at = None
+        db.commit()
+    assert not calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+    assert not calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+    with Session() as db:
+        account = db.get(CalendarAccount, account_id)
+        assert account.sync_failures == 2
+        assert account.status == "error"
+        delay = (account.next_sync_at - NOW).total_seconds()
+        assert 2 * calendar_sync.BACKOFF_BASE_S <= delay <= 2.2 * calendar_sync.BACKOFF_BASE_S
+        # The last good snapshot survives failed syncs.
+        assert busy(db, uid) == {"e1": date(2026, 3, 2)}
+
+    client.fail = calendar_service.CalendarAuthError("revoked")
+    assert not calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+    with Session() as db:
+        account = db.get(CalendarAccount, account_id)
+        assert account.status == "needs_reauth"
+        assert account.next_sync_at == NOW + timedelta(seconds=calendar_sync.BACKOFF_MAX_S)
+
+
+def test_sync_due_accounts_only_runs_due_accounts():
+    Session = make_factory()
+    client = FakeCalendarClient()
+    with Session() as db:
+        due_uid, due_id = add_account(db, "due")
+        later_uid, later_id = add_account(db, "later")
+        db.get(CalendarAccount, later_id).next_sync_at = NOW + timedelta(hours=1)
+        db.commit()
+    client.put(due_uid, "e1", date(2026, 3, 2))
+    client.put(later_uid, "e2", date(2026, 3, 3))
+
+    assert calendar_sync.sync_due_accounts(lambda: client, Session, NOW) == 1
+    assert {c["account_id"] for c in client.calls} == {due_id}
+    # Nothing is due until the interval passes.
+    assert calendar_sync.sync_due_accounts(lambda: client, Session, NOW) == 0
+    with Session() as db:
+        assert busy(db, due_uid) == {"e1": date(2026, 3, 2)}
+        assert busy(db, later_uid) == {}
+
+
+def test_push_notification_marks_account_due(monkeypatch):
+    Session = make_factory()
+    client = FakeCalendarClient()
+    monkeypatch.setattr(calendar_sync, "WEBHOOK_URL", "https://example.com/hook")
+    with Session() as db:
+        _, account_id = add_account(db)
+    assert calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+    assert len(client.watches) == 1
+
+    with Session() as db:
+        account = db.get(CalendarAccount, account_id)
+        channel_id = account.channel_id
+        assert client.watches[0]["token"] == calendar_sync.channel_token(channel_id)
+        assert account.next_sync_at is not None
+        assert not calendar_sync.handle_push_notification(db, channel_id, "forged", "exists")
+        assert calendar_sync.handle_push_notification(db, channel_id, calendar_sync.channel_token(channel_id), "exists")
+        assert db.get(CalendarAccount, account_id).next_sync_at is None
+
+    # The open channel is reused on the next sync.
+    assert calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+    assert len(client.watches) == 1
+
+
+def test_availability_reads_synced_days_without_google(monkeypatch):
+    Session = make_factory()
+    client = FakeCalendarClient()
+    with Session() as db:
+        uid, account_id = add_account(db)
+    client.put(uid, "e1", datetime(2026, 3, 2, 18, 0))
+    calendar_sync.sync_account_by_id(account_id, client, Session, NOW)
+
+    def no_fetch(*_args, **_kwargs):
+        raise AssertionError("availability must not call Google")
+
+    monkeypatch.setattr(calendar_service, "fetch_events", no_fetch)
+    with Session() as db:
+        resp = api_service_provider.read_artist_availability(uid, db=db)
+        assert resp["unavailable_dates"] == ["2026-03-02"]
+        resp = api_service_provider.read_artist_availability(uid, when=date(2026, 3, 3), db=db)
+        assert resp["unavailable_dates"] == []
@@ -9,6 +9,7 @@ from app.models import (
     Booking,
     BookingStatus,
     CalendarAccount,
+    CalendarBusyDay,
     CalendarProvider,
     User,
     UserType,
@@ -307,12 +308,22 @@ def test_unavailable_dates_include_calendar(monkeypatch):
         total_price=10,
     )
     db.add(booking)
+    account = CalendarAccount(
+        user_id=user.id,
+        provider=CalendarProvider.GOOGLE,
+        refresh_token="r",
+        access_token="a",
+        token_expiry=datetime(2025, 1, 1),
+    )
+    db.add(account)
+    db.flush()
+    # Busy days come from the background sync table, never a live fetch.
+    db.add(CalendarBusyDay(account_id=account.id, user_id=user.id, event_id="e1", day=datetime(2025, 1, 2).date()))
     db.commit()
-
     monkeypatch.setattr(
         calendar_service,
         "fetch_events",
-        lambda uid, s, e, d: [datetime(2025, 1, 2, 10, 0)],
+        Mock(side_effect=AssertionError("availability must not call Google")),
     )
 
     resp = api_service_provider.read_artist_availability(user.id, db=db)
@@ -0,0 +1,132 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.models import (
+    BookingRequest,
+    BookingStatus,
+    MessageType,
+    SenderType,
+    User,
+    UserType,
+)
+from app.models.base import BaseModel
+from app.realtime import inbox_events
+
+
+def setup_db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    BaseModel.metadata.create_all(engine)
+    return sessionmaker(bind=engine, expire_on_commit=False)()
+
+
+def create_thread(db):
+    artist = User(email="a@test.com", password="x", first_name="A", last_name="R", user_type=UserType.SERVICE_PROVIDER)
+    client = User(email="c@test.com", password="x", first_name="C", last_name="L", user_type=UserType.CLIENT)
+    db.add_all([artist, client])
+    db.commit()
+    br = BookingRequest(client_id=client.id, artist_id=artist.id, status=BookingStatus.PENDING_QUOTE)
+    db.add(br)
+    db.commit()
+    return br, artist, client
+
+
+def test_message_create_wakes_both_participants():
+    db = setup_db()
+    br, artist, client = create_thread(db)
+
+    async def run():
+        ev_artist = inbox_events.subscribe(artist.id)
+        ev_client = inbox_events.subscribe(client.id)
+        try:
+            crud.crud_message.create_message(
+                db, br.id, client.id, SenderType.CLIENT, "hi", MessageType.USER
+            )
+            await asyncio.sleep(0)
+            return ev_artist.is_set(), ev_client.is_set()
+        finally:
+            inbox_events.unsubscribe(artist.id, ev_artist)
+            inbox_events.unsubscribe(client.id, ev_client)
+
+    assert asyncio.run(run()) == (True, True)
+    assert inbox_events.waiter_count() == 0
+
+
+def test_mark_read_wakes_reader_only():
+    db = setup_db()
+    br, artist, client = create_thread(db)
+    crud.crud_message.create_message(db, br.id, client.id, SenderType.CLIENT, "hi", MessageType.USER)
+
+    async def run():
+        ev_artist = inbox_events.subscribe(artist.id)
+        ev_client = inbox_events.subscribe(client.id)
+        try:
+            assert crud.crud_message.mark_messages_read(db, br.id, artist.id) == 1
+            await asyncio.sleep(0)
+            return ev_artist.is_set(), ev_client.is_set()
+        finally:
+            inbox_events.unsubscribe(artist.id, ev_artist)
+            inbox_events.unsubscribe(client.id, ev_client)
+
+    assert asyncio.run(run()) == (True, False)
+
+
+def test_status_change_signals_and_rollback_does_not():
+    db = setup_db()
+    br, artist, client = create_thread(db)
+
+    async def run():
+        ev = inbox_events.subscribe(client.id)
+        try:
+            br.status = BookingStatus.QUOTE_PROVIDED
+            db.flush()
+            db.rollback()
+            await asyncio.sleep(0)
+            rolled_back = ev.is_set()
+
+            br.status = BookingStatus.QUOTE_PROVIDED
+            db.commit()
+            await asyncio.sleep(0)
+            return rolled_back, ev.is_set()
+        finally:
+            inbox_events.unsubscribe(client.id, ev)
+
+    assert asyncio.run(run()) == (False, True)
+
+
+def test_remote_publishes_leave_the_commit_and_share_one_pipeline(monkeypatch):
+    import threading
+
+    from app.utils import redis_cache
+
+    executed = threading.Event()
+    published = []
+
+    class Pipe:
+        def publish(self, channel, data):
+            published.append(channel)
+
+        def execute(self):
+            executed.set()
+
+    class Client:
+        def pipeline(self, transaction=True):
+            return Pipe()
+
+        def publish(self, *a):  # pragma: no cover - must not be used
+            raise AssertionError("per-user publish on the commit path")
+
+    db = setup_db()
+    br, artist, client = create_thread(db)
+    monkeypatch.setattr(inbox_events, "bus_enabled", lambda: True)
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: Client())
+    crud.crud_message.create_message(db, br.id, client.id, SenderType.CLIENT, "hi", MessageType.USER)
+    assert executed.wait(2)
+    assert sorted(published) == sorted(f"ws-topic:inbox:{u}" for u in (artist.id, client.id))
@@ -0,0 +1,178 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import BaseModel
+from app.services import job_queue
+from app.services.job_queue import DbJobStore, JobKind, JobWorker, LocalJobStore
+
+
+def db_store():
+    engine = create_engine(
+        'sqlite:///:memory:', connect_args={'check_same_thread': False}, poolclass=StaticPool
+    )
+    BaseModel.metadata.create_all(engine)
+    return DbJobStore(sessionmaker(bind=engine, expire_on_commit=False))
+
+
+@pytest.fixture(params=['db', 'local'])
+def store(request):
+    return db_store() if request.param == 'db' else LocalJobStore()
+
+
+@pytest.fixture
+def kinds(monkeypatch):
+    registry = {}
+    monkeypatch.setattr(job_queue, '_KINDS', registry)
+    return registry
+
+
+def test_failed_job_is_rescheduled_then_buried(store, kinds):
+    calls = []
+
+    def flaky(n):
+        calls.append(n)
+        raise RuntimeError('boom')
+
+    kinds['t.flaky'] = JobKind('t.flaky', flaky, max_attempts=2, backoff_s=60)
+    job_id = store.add('t.flaky', {'n': 1}, datetime.utcnow(), 2)
+    worker = JobWorker(store=store)
+
+    async def run():
+        assert await worker.run_once() == 1
+        await worker.drain()
+        # Backoff moves run_at forward instead of sleeping on a worker slot.
+        assert worker.inflight('t.flaky') == 0
+        assert await worker.run_once() == 0
+        row = store.get(job_id)
+        assert row['status'] == 'queued'
+        assert row['run_at'] > datetime.utcnow() + timedelta(seconds=50)
+        assert 'boom' in row['last_error']
+
+        later = datetime.utcnow() + timedelta(seconds=200)
+        claimed = store.claim('t.flaky', 5, worker.worker_id, later, 30)
+        assert [j.attempts for j in claimed] == [2]
+        worker._handle_failure(kinds['t.flaky'], claimed[0], RuntimeError('boom'))
+
+    asyncio.run(run())
+    assert calls == [1]
+    row = store.get(job_id)
+    assert row['status'] == 'dead'
+    assert row['attempts'] == 2
+
+
+def test_lapsed_lock_is_reclaimed_and_stale_worker_cannot_finish(store):
+    now = datetime.utcnow()
+    job_id = store.add('t.slow', {}, now, 3)
+    first = store.claim('t.slow', 10, 'w1', now, 30)
+    assert [j.id for j in first] == [job_id]
+    # Locked: nobody else gets it until the visibility timeout lapses.
+    assert store.claim('t.slow', 10, 'w2', now + timedelta(seconds=10), 30) == []
+
+    second = store.claim('t.slow', 10, 'w2', now + timedelta(seconds=31), 30)
+    assert [(j.id, j.attempts) for j in second] == [(job_id, 2)]
+    assert store.complete(job_id, 'w1', None, now) is False
+    assert store.complete(job_id, 'w2', {'ok': True}, now) is True
+    assert store.get(job_id)['status'] == 'succeeded'
+
+
+def test_per_kind_concurrency_limit(kinds):
+    store = LocalJobStore()
+    release = asyncio.Event()
+    loop_holder = {}
+
+    def wait(i):
+        asyncio.run_coroutine_threadsafe(release.wait(), loop_holder['loop']).result(5)
+        return i
+
+    kinds['t.wait'] = JobKind('t.wait', wait, concurrency=2)
+    now = datetime.utcnow()
+    for i in range(5):
+        store.add('t.wait', {'i': i}, now, 1)
+    worker = JobWorker(store=store)
+
+    async def run():
+        loop_holder['loop'] = asyncio.get_running_loop()
+        assert await worker.run_once() == 2
+        assert await worker.run_once() == 0
+        assert worker.inflight('t.wait') == 2
+        release.set()
+        await worker.drain()
+        assert await worker.run_once() == 2
+        await worker.drain()
+
+    asyncio.run(run())
+    counts = store.stats()['t.wait']
+    assert counts == {'succeeded': 4, 'queued': 1}
+
+
+def test_cleanup_purges_expired_and_buries_abandoned(store):
+    now = datetime.utcnow()
+    done = store.add('t.x', {}, now, 1)
+    stuck = store.add('t.x', {}, now + timedelta(seconds=1), 1)
+    store.claim('t.x', 1, 'w', now, 30)
+    store.complete(done, 'w', None, now - timedelta(days=2))
+    store.claim('t.x', 1, 'w', now + timedelta(seconds=1), 30)
+
+    result = store.cleanup(now + timedelta(seconds=60), result_ttl_s=86400, dead_ttl_s=7 * 86400)
+    assert result == {'jobs_abandoned': 1, 'jobs_purged': 1}
+    assert store.get(done) is None
+    assert store.get(stuck)['status'] == 'dead'
+
+
+def test_claim_many_takes_every_kind_in_one_statement(store):
+    now = datetime.utcnow()
+    for _ in range(3):
+        store.add('t.a', {}, now, 3)
+    store.add('t.b', {}, now, 3)
+    store.add('t.c', {}, now, 3)
+    statements = []
+    if isinstance(store, DbJobStore):
+        from sqlalchemy import event
+
+        engine = store._session().get_bind()
+        event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+    claimed = store.claim_many({'t.a': 2, 't.b': 5}, 'w', now, {'t.a': 30, 't.b': 600})
+    claim_statements = list(statements)
+    assert sorted(j.kind for j in claimed) == ['t.a', 't.a', 't.b']
+    # Each kind keeps its own visibility timeout.
+    later = now + timedelta(seconds=31)
+    assert store.claim('t.b', 5, 'w2', later, 30) == []
+    assert len(store.claim('t.a', 5, 'w2', later, 30)) == 3
+    if claim_statements:
+        assert len([s for s in claim_statements if s.lstrip().upper().startswith('UPDATE')]) == 1
+
+
+def test_idle_worker_backs_off_and_wakes_on_enqueue(kinds, monkeypatch):
+    store = LocalJobStore()
+    kinds['t.x'] = JobKind('t.x', lambda: None)
+    worker = JobWorker(store=store, poll_interval_s=0.01, max_poll_interval_s=0.08)
+    polls = []
+    real_run_once = worker.run_once
+
+    async def counting_run_once():
+        polls.append(asyncio.get_running_loop().time())
+        return await real_run_once()
+
+    monkeypatch.setattr(worker, 'run_once', counting_run_once)
+    monkeypatch.setattr(job_queue, 'load_job_kinds', lambda: None)
+
+    async def run():
+        task = asyncio.create_task(worker.run_forever())
+        await asyncio.sleep(0.4)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    gaps = [b - a for a, b in zip(polls, polls[1:])]
+    # 0.01, 0.02, 0.04, then capped at 0.08 instead of ~40 polls at 0.01.
+    assert len(polls) < 10
+    assert max(gaps) >= 0.07
@@ -0,0 +1,136 @@
+import asyncio
+
+from app.services import job_scheduler as js
+from app.services.job_scheduler import JobScheduler, LocalLeaderLease, RedisLeaderLease
+
+
+def make_pair(state):
+    a = JobScheduler(holder_id="a", lease=LocalLeaderLease("a", state, ttl_s=30))
+    b = JobScheduler(holder_id="b", lease=LocalLeaderLease("b", state, ttl_s=30))
+    return a, b
+
+
+def test_only_leader_runs_jobs():
+    state: dict = {}
+    a, b = make_pair(state)
+    calls = []
+    for node in (a, b):
+        node.register("maint", lambda n=node.holder_id: calls.append(n), interval_s=60)
+
+    async def run():
+        assert await a.refresh_leadership() is True
+        assert await b.refresh_leadership() is False
+        # First run waits one interval without history.
+        assert await a.run_pending(now=1000.0) == []
+        ran_a = await a.run_pending(now=1000.0 + 61)
+        ran_b = await b.run_pending(now=1000.0 + 61)
+        return ran_a, ran_b
+
+    ran_a, ran_b = asyncio.run(run())
+    assert ran_a == ["maint"]
+    assert ran_b == []
+    assert calls == ["a"]
+    job = a.jobs["maint"]
+    assert job.runs == 1 and job.last_duration_ms is not None
+    assert state["last_run"]["maint"] == 1061.0
+
+
+def test_new_leader_resumes_from_shared_last_run(monkeypatch):
+    state: dict = {}
+    a, b = make_pair(state)
+    calls = []
+    a.register("maint", lambda: calls.append("a"), interval_s=60)
+    b.register("maint", lambda: calls.append("b"), interval_s=60)
+    clock = [100.0]
+    monkeypatch.setattr(js.time, "monotonic", lambda: clock[0])
+
+    async def run():
+        await a.refresh_leadership()
+        await a.run_pending(now=0.0)
+        await a.run_pending(now=61.0)
+        # Leader stops renewing; lease expires and b takes over.
+        clock[0] += 31
+        assert await b.refresh_leadership() is True
+        assert await a.refresh_leadership() is False
+        early = await b.run_pending(now=100.0)
+        due = await b.run_pending(now=122.0)
+        return early, due
+
+    early, due = asyncio.run(run())
+    assert early == []
+    assert due == ["maint"]
+    assert calls == ["a", "b"]
+
+
+def test_failures_are_counted_and_rescheduled():
+    node = JobScheduler(holder_id="a", lease=LocalLeaderLease("a", {}))
+
+    def boom():
+        raise RuntimeError("nope")
+
+    node.register("bad", boom, interval_s=10)
+
+    async def run():
+        await node.refresh_leadership()
+        await node.run_pending(now=0.0)
+        await node.run_pending(now=11.0)
+
+    asyncio.run(run())
+    job = node.jobs["bad"]
+    assert (job.runs, job.failures, job.last_error) == (1, 1, "nope")
+    assert job.next_run_at == 21.0
+
+
+class FakeRedis:
+    def __init__(self):
+        self.kv = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.kv:
+            return None
+        self.kv[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, holder, *args):
+        if self.kv.get(key) != holder:
+            return 0
+        if "del" in script:
+            del self.kv[key]
+        return 1
+
+
+def test_redis_lease_is_exclusive_and_released():
+    redis = FakeRedis()
+    a = RedisLeaderLease(redis, "a")
+    b = RedisLeaderLease(redis, "b")
+
+    async def run():
+        first = (await a.acquire_or_renew(), await b.acquire_or_renew(), await a.acquire_or_renew())
+        await a.release()
+        return first, await b.acquire_or_renew()
+
+    assert asyncio.run(run()) == ((True, False, True), True)
+
+
+def test_default_lease_uses_redis_whenever_configured(monkeypatch):
+    class Client:
+        async def eval(self, *args):
+            return 0
+
+    monkeypatch.setattr(js, "_redis_client", Client())
+    monkeypatch.delenv("SCHEDULER_LEADER_BACKEND", raising=False)
+    assert isinstance(js.default_lease("a"), RedisLeaderLease)
+    monkeypatch.setenv("SCHEDULER_LEADER_BACKEND", "local")
+    assert isinstance(js.default_lease("a"), LocalLeaderLease)
+    monkeypatch.setattr(js, "_redis_client", object())
+    monkeypatch.setenv("SCHEDULER_LEADER_BACKEND", "auto")
+    assert isinstance(js.default_lease("a"), LocalLeaderLease)
+
+
+def test_explicit_redis_backend_without_client_never_leads(monkeypatch, caplog):
+    monkeypatch.setattr(js, "_redis_client", object())
+    monkeypatch.setenv("SCHEDULER_LEADER_BACKEND", "redis")
+    lease = js.default_lease("a")
+    assert isinstance(lease, js.NoLeaderLease)
+    assert "no Redis client" in caplog.text
+    assert asyncio.run(lease.acquire_or_renew()) is False
@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.api import api_message
+from app.api.v1.api_service_provider import read_all_service_provider_profiles
+from app.crud import crud_message
+from app.models.base import BaseModel
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+from backend.tests.conftest import add_provider
+
+
+def setup_db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    BaseModel.metadata.create_all(engine)
+    return sessionmaker(bind=engine, expire_on_commit=False)()
+
+
+def test_cursor_roundtrip_and_sort_binding():
+    when = datetime.datetime(2026, 1, 2, 3, 4, 5, 678)
+    token = encode_cursor("newest", [when, 42])
+    assert decode_cursor(token, "newest", 2) == [when, 42]
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, "top_rated", 2)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor", "newest", 2)
+
+
+@pytest.mark.parametrize("sort", ["most_booked", None])
+def test_provider_list_cursor_walk_matches_offset_order(sort):
+    db = setup_db()
+    for n, bookings in enumerate([2, 0, 5, 2, 1]):
+        add_provider(db, f"P{n}", email=f"p{n}@test.com", first_name="P", last_name=str(n), bookings=bookings)
+
+    expected = [p.user_id for p in read_all_service_provider_profiles(db=db, sort=sort, page=1, limit=10)["data"]]
+    seen, cursor = [], None
+    for _ in range(5):
+        res = read_all_service_provider_profiles(db=db, sort=sort, page=1, limit=2, cursor=cursor)
+        seen += [p.user_id for p in res["data"]]
+        assert res["total"] == 5
+        cursor = res["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected and len(seen) == 5
+
+
+def test_provider_list_rejects_foreign_cursor():
+    db = setup_db()
+    add_provider(db, "P1", email="p1@test.com", first_name="P", last_name="1")
+    with pytest.raises(HTTPException) as exc:
+        read_all_service_provider_profiles(db=db, sort="top_rated", cursor=encode_cursor("newest", [1, 1]))
+    assert exc.value.status_code == 400
+
+
+def test_message_history_cursor_walks_older_pages():
+    db = setup_db()
+    client = models.User(email="c@test.com", password="x", first_name="C", last_name="C",
+                         user_type=models.UserType.CLIENT)
+    artist = models.User(email="a@test.com", password="x", first_name="A", last_name="A",
+                         user_type=models.UserType.SERVICE_PROVIDER)
+    db.add_all([client, artist])
+    db.commit()
+    br = models.BookingRequest(client_id=client.id, artist_id=artist.id,
+                               status=models.BookingStatus.PENDING_QUOTE)
+    db.add(br)
+    db.commit()
+    for i in range(5):
+        crud_message.create_message(
+            db,
+            booking_request_id=br.id,
+            sender_id=client.id,
+            sender_type=models.SenderType.CLIENT,
+            content=f"m{i}",
+            message_type=models.MessageType.USER,
+            visible_to=models.VisibleTo.BOTH,
+        )
+
+    def page(cursor=None):
+        return api_message.read_messages(
+            br.id, db=db, current_user=client, skip=0, limit=2, after_id=None, before_id=None,
+            fields=None, mode="full", since=None, include_quotes=False, known_quote_ids=None,
+            if_none_match=None, x_after_write=None, cursor=cursor,
+        )
+
+    first = page()
+    assert [m.content for m in first.items] == ["m3", "m4"]
+    second = page(first.history_cursor)
+    assert [m.content for m in second.items] == ["m1", "m2"]
+    last = page(second.history_cursor)
+    assert [m.content for m in last.items] == ["m0"]
+    assert last.history_cursor is None
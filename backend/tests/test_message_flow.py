@@ -2,6 +2,7 @@ import pytest
 import asyncio
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.models import (
     User,
@@ -19,7 +20,9 @@ from app.schemas import MessageCreate
 
 
 def setup_db():
-    engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+    # StaticPool: async routes run their DB work in the threadpool, and a
+    # per-thread :memory: connection would see an empty database there.
+    engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False}, poolclass=StaticPool)
     BaseModel.metadata.create_all(engine)
     Session = sessionmaker(bind=engine)
     return Session()
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud import crud_notification
+from app.models import (
+    BookingRequest,
+    BookingStatus,
+    Message,
+    MessageType,
+    Notification,
+    NotificationType,
+    SenderType,
+    User,
+    UserType,
+)
+from app.models.base import BaseModel
+from app.utils.notifications import notify_user_new_message
+
+
+def setup():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    BaseModel.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    client = User(email="c@test.com", password="x", first_name="Cee", last_name="Lient", user_type=UserType.CLIENT)
+    artist = User(email="a@test.com", password="x", first_name="Aye", last_name="Artist",
+                  user_type=UserType.SERVICE_PROVIDER)
+    db.add_all([client, artist])
+    db.flush()
+    threads = [
+        BookingRequest(client_id=client.id, artist_id=artist.id, status=BookingStatus.PENDING_QUOTE)
+        for _ in range(3)
+    ]
+    db.add_all(threads)
+    db.commit()
+    return engine, db, client, artist, threads
+
+
+def notify(db, user, link, when, is_read=False, message="msg"):
+    db.add(Notification(user_id=user.id, type=NotificationType.NEW_MESSAGE, message=message, link=link,
+                        is_read=is_read, timestamp=when))
+    db.commit()
+
+
+def test_thread_aggregate_uses_the_column_in_one_grouped_query():
+    engine, db, client, artist, (t1, t2, t3) = setup()
+    base = datetime(2026, 1, 1)
+    notify(db, artist, f"/inbox?requestId={t1.id}", base, message="old")
+    notify(db, artist, f"/booking-requests/{t1.id}", base + timedelta(minutes=3), message="newest t1")
+    notify(db, artist, f"/inbox?requestId={t2.id}", base + timedelta(minutes=1), is_read=True)
+    notify(db, artist, f"/inbox?requestId={t3.id}", base + timedelta(minutes=2))
+    assert {n.booking_request_id for n in db.query(Notification)} == {t1.id, t2.id, t3.id}
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    threads = crud_notification.get_message_thread_notifications(db, artist.id)
+    assert len([s for s in statements if "FROM notifications" in s]) == 2
+    assert [t["booking_request_id"] for t in threads] == [t1.id, t3.id, t2.id]
+    assert threads[0]["unread_count"] == 2
+    assert threads[0]["last_message"] == "newest t1"
+    assert threads[0]["name"] == "Cee Lient"
+    assert threads[2]["unread_count"] == 0
+
+    recent = crud_notification.get_message_thread_notifications(db, artist.id, limit=2)
+    assert [t["booking_request_id"] for t in recent] == [t1.id, t3.id]
+    assert crud_notification.get_unread_counts_for_threads(db, artist.id) == {t1.id: 2, t2.id: 0, t3.id: 1}
+
+    crud_notification.mark_thread_read(db, artist.id, t1.id)
+    assert crud_notification.get_unread_counts_for_threads(db, artist.id)[t1.id] == 0
+    assert crud_notification.get_unread_counts_for_threads(db, artist.id)[t3.id] == 1
+
+
+def test_booka_alias_notifications_carry_their_thread():
+    _, db, client, artist, (t1, _, _) = setup()
+    notify_user_new_message(db, artist, client, t1.id, "Listing approved: Set", MessageType.SYSTEM)
+    notif = db.query(Notification).one()
+    assert notif.link == crud_notification.BOOKA_ALIAS_LINK
+    assert notif.booking_request_id == t1.id
+    assert [t["booking_request_id"] for t in crud_notification.get_message_thread_notifications(db, artist.id)] == [t1.id]
+
+
+def test_backfill_resolves_legacy_links():
+    _, db, client, artist, (t1, t2, _) = setup()
+    now = datetime(2026, 1, 1)
+    notify(db, artist, f"/inbox?requestId={t1.id}", now)
+    notify(db, artist, crud_notification.BOOKA_ALIAS_LINK, now)
+    notify(db, artist, "/dashboard/artist?tab=services", now)
+    db.add(Message(booking_request_id=t2.id, sender_id=client.id, sender_type=SenderType.CLIENT,
+                   content="Listing approved", message_type=MessageType.SYSTEM, system_key="listing_approved_v1"))
+    db.execute(text("UPDATE notifications SET booking_request_id = NULL"))
+    db.commit()
+
+    assert crud_notification.backfill_notification_threads(db, chunk=1) == 2
+    assert crud_notification.backfill_notification_threads(db) == 0
+    db.expire_all()
+    by_link = {n.link: n.booking_request_id for n in db.query(Notification)}
+    assert by_link[f"/inbox?requestId={t1.id}"] == t1.id
+    assert by_link[crud_notification.BOOKA_ALIAS_LINK] == t2.id
+    assert by_link["/dashboard/artist?tab=services"] is None
+
+
+def test_retention_purges_only_old_read_notifications():
+    _, db, _, artist, (t1, _, _) = setup()
+    now = datetime(2026, 6, 1)
+    old = now - timedelta(days=crud_notification.NOTIFICATION_RETENTION_DAYS + 1)
+    notify(db, artist, f"/inbox?requestId={t1.id}", old, is_read=True, message="old read")
+    notify(db, artist, f"/inbox?requestId={t1.id}", old, message="old unread")
+    notify(db, artist, f"/inbox?requestId={t1.id}", now, is_read=True, message="recent read")
+
+    assert crud_notification.purge_read_notifications(db, now=now, chunk=1) == 1
+    assert sorted(n.message for n in db.query(Notification)) == ["old unread", "recent read"]
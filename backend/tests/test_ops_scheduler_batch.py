@@ -0,0 +1,189 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.models.base import BaseModel
+from app.services import ops_scheduler
+
+
+def setup_db():
+    engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+    BaseModel.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    return Session()
+
+
+def seed_users(db):
+    artist = models.User(
+        email='a@test.com',
+        password='x',
+        first_name='A',
+        last_name='R',
+        user_type=models.UserType.SERVICE_PROVIDER,
+    )
+    client = models.User(
+        email='c@test.com',
+        password='x',
+        first_name='C',
+        last_name='L',
+        user_type=models.UserType.CLIENT,
+    )
+    db.add_all([artist, client])
+    db.commit()
+    db.add(models.ServiceProviderProfile(user_id=artist.id, business_name='DJ Test'))
+    db.commit()
+    return artist, client
+
+
+def seed_booking(db, artist, client, status, start, end=None, **extra):
+    br = models.BookingRequest(
+        client_id=client.id,
+        artist_id=artist.id,
+        status=models.BookingStatus.REQUEST_CONFIRMED,
+    )
+    db.add(br)
+    db.commit()
+    quote = models.QuoteV2(
+        booking_request_id=br.id,
+        artist_id=artist.id,
+        client_id=client.id,
+        services=[{'description': 'Gig', 'price': 100}],
+        sound_fee=Decimal('0'),
+        travel_fee=Decimal('0'),
+        subtotal=Decimal('100'),
+        total=Decimal('100'),
+        status=models.QuoteStatusV2.ACCEPTED,
+    )
+    db.add(quote)
+    db.commit()
+    booking = models.Booking(
+        artist_id=artist.id,
+        client_id=client.id,
+        start_time=start,
+        end_time=end or start + timedelta(hours=2),
+        status=status,
+        total_price=Decimal('100'),
+        quote_id=quote.id,
+        **extra,
+    )
+    db.add(booking)
+    db.commit()
+    return br, quote, booking
+
+
+def system_keys(db, br_id):
+    rows = db.query(models.Message.system_key).filter(models.Message.booking_request_id == br_id).all()
+    return sorted(k or '' for (k,) in rows)
+
+
+def test_pre_event_reminders_dedupe_across_runs():
+    db = setup_db()
+    artist, client = seed_users(db)
+    now = datetime.utcnow()
+    br7, _, _ = seed_booking(db, artist, client, models.BookingStatus.CONFIRMED, now + timedelta(days=7))
+    br3, _, _ = seed_booking(db, artist, client, models.BookingStatus.CONFIRMED, now + timedelta(days=3))
+    seed_booking(db, artist, client, models.BookingStatus.CONFIRMED, now + timedelta(days=5))
+    seed_booking(db, artist, client, models.BookingStatus.CANCELLED, now + timedelta(days=7))
+
+    assert ops_scheduler.handle_pre_event_reminders(db) == 4
+    assert ops_scheduler.handle_pre_event_reminders(db) == 0
+
+    # One message per thread/key (the unique constraint), both parties notified.
+    assert system_keys(db, br7.id) == ['event_reminder:7d']
+    assert system_keys(db, br3.id) == ['event_reminder:3d']
+    assert db.query(models.Notification).count() == 8
+
+
+@patch('app.utils.notifications.notify_review_requests_bulk')
+def test_auto_completion_skips_disputes_and_invites_once(mock_review, caplog):
+    caplog.set_level('INFO', logger='app.utils.status_logger')
+    db = setup_db()
+    artist, client = seed_users(db)
+    ended = datetime.utcnow() - timedelta(days=2)
+    br_ok, _, ok = seed_booking(db, artist, client, models.BookingStatus.CONFIRMED, ended)
+    _, _, disputed = seed_booking(db, artist, client, models.BookingStatus.CONFIRMED, ended)
+    db.add(models.Dispute(booking_id=disputed.id, status='open'))
+    db.commit()
+
+    results = ops_scheduler.handle_auto_completion(db)
+    assert results == {'auto_completed': 1, 'skipped_due_to_dispute': 1}
+    db.refresh(ok)
+    db.refresh(disputed)
+    assert ok.status == models.BookingStatus.COMPLETED
+    assert disputed.status == models.BookingStatus.CONFIRMED
+    # The bulk UPDATE bypasses the status listeners but keeps the audit line.
+    assert [r.getMessage() for r in caplog.records if r.name == 'app.utils.status_logger'] == [
+        f'Booking id={ok.id} status changed from {models.BookingStatus.CONFIRMED} to {models.BookingStatus.COMPLETED}'
+    ]
+    assert system_keys(db, br_ok.id) == [
+        'event_auto_completed_v1',
+        'review_invite_client_v1',
+        'review_invite_provider_v1',
+    ]
+    invite = (
+        db.query(models.Message)
+        .filter(models.Message.system_key == 'review_invite_client_v1')
+        .one()
+    )
+    assert 'DJ Test' in invite.content
+    assert [b for _, b in mock_review.call_args[0][1]] == [ok.id]
+
+    # Completed threads with both invites drop out of the candidate set.
+    results = ops_scheduler.handle_auto_completion(db)
+    assert results == {'auto_completed': 0, 'skipped_due_to_dispute': 1}
+    assert len(system_keys(db, br_ok.id)) == 3
+
+
+@patch('app.services.ops_scheduler.notify_users_new_messages_bulk')
+def test_artist_accept_timeouts_release_first_hold(mock_notify, caplog):
+    caplog.set_level('INFO', logger='app.utils.status_logger')
+    db = setup_db()
+    artist, client = seed_users(db)
+    now = datetime.utcnow()
+    br, quote, booking = seed_booking(
+        db,
+        artist,
+        client,
+        models.BookingStatus.PENDING_ARTIST_CONFIRMATION,
+        now + timedelta(days=10),
+        artist_accept_deadline_at=now - timedelta(minutes=1),
+    )
+    _, _, pending = seed_booking(
+        db,
+        artist,
+        client,
+        models.BookingStatus.PENDING_ARTIST_CONFIRMATION,
+        now + timedelta(days=10),
+        artist_accept_deadline_at=now + timedelta(hours=1),
+    )
+    simple = models.BookingSimple(
+        quote_id=quote.id,
+        artist_id=artist.id,
+        client_id=client.id,
+        artist_hold_status='authorized',
+        sound_hold_status='captured',
+    )
+    db.add(simple)
+    db.commit()
+
+    results = ops_scheduler.handle_artist_accept_timeouts(db)
+    assert results == {'artist_timeouts': 1, 'artist_holds_released': 1, 'sound_holds_released': 0}
+    db.refresh(booking)
+    db.refresh(pending)
+    db.refresh(simple)
+    assert booking.status == models.BookingStatus.CANCELLED
+    assert pending.status == models.BookingStatus.PENDING_ARTIST_CONFIRMATION
+    assert [r.getMessage() for r in caplog.records if r.name == 'app.utils.status_logger'] == [
+        f'Booking id={booking.id} status changed from '
+        f'{models.BookingStatus.PENDING_ARTIST_CONFIRMATION} to {models.BookingStatus.CANCELLED}'
+    ]
+    assert simple.artist_hold_status == 'released'
+    assert simple.sound_hold_status == 'captured'
+    msg = db.query(models.Message).filter(models.Message.booking_request_id == br.id).one()
+    assert msg.visible_to == models.VisibleTo.CLIENT
+    items = mock_notify.call_args[0][1]
+    assert [(u.id, s.id) for u, s, _, _ in items] == [(client.id, artist.id), (artist.id, artist.id)]
@@ -0,0 +1,193 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import fakeredis.aioredis
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.utils import outbox
+from app.utils.outbox import (
+    claim_outbox_batch,
+    enqueue_outbox,
+    outbox_events,
+    prune_outbox,
+    relay_outbox_batch,
+)
+
+
+def setup_db():
+    engine = create_engine(
+        'sqlite:///:memory:', connect_args={'check_same_thread': False}, poolclass=StaticPool
+    )
+    outbox_events.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def rows(db):
+    t = outbox_events
+    return {
+        r.id: r
+        for r in db.execute(
+            select(t.c.id, t.c.delivered_at, t.c.attempt_count, t.c.due_at, t.c.last_error)
+        ).fetchall()
+    }
+
+
+class FlakyPipeline:
+    """Pipeline whose publishes to ``bad_topics`` come back as errors."""
+
+    def __init__(self, bad_topics):
+        self.bad_topics = bad_topics
+        self.channels = []
+
+    def publish(self, channel, data):
+        self.channels.append(channel)
+
+    async def execute(self, raise_on_error=True):
+        return [
+            ConnectionError('down') if c.split(':', 1)[1] in self.bad_topics else 1
+            for c in self.channels
+        ]
+
+
+class FlakyRedis:
+    def __init__(self, bad_topics):
+        self.bad_topics = bad_topics
+        self.pipelines = []
+
+    def pipeline(self, transaction=True):
+        pipe = FlakyPipeline(self.bad_topics)
+        self.pipelines.append(pipe)
+        return pipe
+
+
+def test_batch_is_published_to_bus_topics_and_acked():
+    db = setup_db()
+    for i in range(5):
+        enqueue_outbox(db, topic=f'booking-requests:{i}', payload={'type': 'message', 'i': i})
+
+    async def run():
+        redis = fakeredis.aioredis.FakeRedis()
+        pubsub = redis.pubsub()
+        await pubsub.psubscribe('ws-topic:*')
+        await pubsub.get_message(timeout=0.1)
+        first = await relay_outbox_batch(db, redis, max_batch=3)
+        second = await relay_outbox_batch(db, redis, max_batch=3)
+        got = []
+        while True:
+            msg = await pubsub.get_message(timeout=0.1)
+            if msg is None:
+                break
+            got.append(msg['channel'].decode())
+        return first, second, got
+
+    first, second, got = asyncio.run(run())
+    assert first == {'claimed': 3, 'delivered': 3, 'failed': 0}
+    assert second == {'claimed': 2, 'delivered': 2, 'failed': 0}
+    assert got == [f'ws-topic:booking-requests:{i}' for i in range(5)]
+    assert all(r.delivered_at is not None for r in rows(db).values())
+
+
+def test_claimed_rows_are_leased_not_reclaimed():
+    db = setup_db()
+    for i in range(4):
+        enqueue_outbox(db, topic=f'notifications:{i}', payload={'i': i})
+    now = datetime.now(timezone.utc)
+    a = claim_outbox_batch(db, 2, now=now)
+    b = claim_outbox_batch(db, 10, now=now)
+    assert {r[0] for r in a}.isdisjoint({r[0] for r in b})
+    assert len(a) + len(b) == 4
+    assert claim_outbox_batch(db, 10, now=now) == []
+    # A dead worker's lease lapses and the rows come back.
+    again = claim_outbox_batch(db, 10, now=now + timedelta(seconds=outbox.OUTBOX_LEASE_S + 1))
+    assert sorted(r[3] for r in again) == [2, 2, 2, 2]
+
+
+def test_failed_rows_back_off_per_row(monkeypatch):
+    monkeypatch.setattr(outbox, 'OUTBOX_BACKOFF_BASE_S', 10.0)
+    db = setup_db()
+    ok_id = enqueue_outbox(db, topic='booking-requests:1', payload={})
+    bad_id = enqueue_outbox(db, topic='booking-requests:2', payload={})
+    redis = FlakyRedis({'booking-requests:2'})
+
+    summary = asyncio.run(relay_outbox_batch(db, redis))
+    assert summary == {'claimed': 2, 'delivered': 1, 'failed': 1}
+    state = rows(db)
+    assert state[ok_id].delivered_at is not None
+    bad = state[bad_id]
+    assert bad.delivered_at is None
+    assert 'down' in bad.last_error
+    first_due = bad.due_at
+    assert first_due > datetime.utcnow() + timedelta(seconds=9)
+
+    # Not due yet: nothing to claim until the backoff elapses.
+    assert asyncio.run(relay_outbox_batch(db, redis))['claimed'] == 0
+    later = datetime.now(timezone.utc) + timedelta(seconds=20)
+    claimed = claim_outbox_batch(db, 10, now=later)
+    assert [(r[0], r[3]) for r in claimed] == [(bad_id, 2)]
+    outbox.retry_outbox(db, [(bad_id, 2, 'down')], now=later)
+    # Second failure waits roughly twice as long.
+    assert rows(db)[bad_id].due_at - later.replace(tzinfo=None) > timedelta(seconds=19)
+
+
+def test_prune_removes_old_delivered_and_stale_undelivered():
+    db = setup_db()
+    keep = enqueue_outbox(db, topic='t:1', payload={})
+    old = enqueue_outbox(db, topic='t:2', payload={})
+    pending = enqueue_outbox(db, topic='t:3', payload={})
+    now = datetime.now(timezone.utc)
+    outbox.ack_outbox(db, [keep], now=now)
+    outbox.ack_outbox(db, [old], now=now - timedelta(days=3))
+
+    assert prune_outbox(db, now=now, retention_s=86400, undelivered_retention_s=3 * 86400) == 1
+    assert set(rows(db)) == {keep, pending}
+    assert prune_outbox(db, now=now + timedelta(days=4), retention_s=86400 * 30, undelivered_retention_s=86400, chunk=1) == 1
+    assert set(rows(db)) == {keep}
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code=1000, reason=''):
+        pass
+
+
+def test_relayed_frames_are_deduped_against_direct_broadcasts(monkeypatch):
+    from app.api import api_ws
+
+    monkeypatch.setattr(api_ws, '_recent_frames', api_ws._RecentKeys(60, 100))
+    db = setup_db()
+    message = {'id': 11, 'booking_request_id': 3, 'content': 'hi', 'timestamp': datetime(2026, 1, 2, 3, 4, 5)}
+    direct_id = enqueue_outbox(db, topic='booking-requests:3', payload=message)
+    relay_only_id = enqueue_outbox(db, topic='booking-requests:3', payload={'type': 'message_deleted', 'id': 9})
+    frames = {rid: outbox.outbox_bus_frame(rid, topic, body) for rid, topic, body, _ in claim_outbox_batch(db, 10)}
+
+    async def run():
+        conn = api_ws.NoiseWS(FakeSocket())
+        await api_ws.chat.connect(3, conn)
+        try:
+            # The request already broadcast ``message`` itself.
+            await api_ws.manager.broadcast(3, message)
+            await asyncio.sleep(0.01)
+            direct = list(conn.ws.sent)
+            for rid in (direct_id, relay_only_id, relay_only_id):
+                await api_ws._bus_dispatch('booking-requests:3', frames[rid])
+            await asyncio.sleep(0.01)
+            return direct, conn.ws.sent[len(direct):]
+        finally:
+            api_ws.chat.disconnect(3, conn)
+            await conn.shutdown()
+
+    direct, relayed = asyncio.run(run())
+    assert len(direct) == 1
+    assert json.loads(frames[direct_id])['outbox_id'] == direct_id
+    # Only the event nobody broadcast arrives, once, without relay metadata.
+    assert [json.loads(t) for t in relayed] == [
+        {'v': 1, 'type': 'message_deleted', 'topic': 'booking-requests:3', 'payload': {'id': 9}}
+    ]
@@ -0,0 +1,114 @@
+import asyncio
+
+import fakeredis
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.models import User, UserType
+from app.models.base import BaseModel
+from app.api.auth import get_db
+from app.api import auth as auth_module
+from app.utils import auth as auth_utils
+from app.utils import redis_cache
+from app.utils.auth import (
+    HashingBusy,
+    bcrypt_rounds_from_hash,
+    get_password_hash,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
+)
+
+
+def setup_app(monkeypatch):
+    engine = create_engine(
+        'sqlite:///:memory:',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    BaseModel.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    fake = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(redis_cache, 'get_redis_client', lambda: fake)
+    monkeypatch.setattr(auth_module, 'get_redis_client', lambda: fake)
+    app.dependency_overrides[get_db] = override_db
+    return Session
+
+
+def test_async_verify_and_hash_roundtrip():
+    async def run():
+        hashed = await get_password_hash_async('pw')
+        return hashed, await verify_password_async('pw', hashed), await verify_password_async('no', hashed)
+
+    hashed, ok, bad = asyncio.run(run())
+    assert ok is True and bad is False
+    assert not password_needs_rehash(hashed)
+
+
+def test_pending_cap_rejects_with_hashing_busy(monkeypatch):
+    monkeypatch.setattr(auth_utils, 'HASH_MAX_PENDING', 1)
+    hashed = get_password_hash('pw')
+
+    async def run():
+        return await asyncio.gather(
+            verify_password_async('pw', hashed),
+            verify_password_async('pw', hashed),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert results.count(True) == 1
+    assert sum(isinstance(r, HashingBusy) for r in results) == 1
+    assert auth_utils._hash_pending == 0
+
+
+def test_login_rehashes_outdated_cost(monkeypatch):
+    Session = setup_app(monkeypatch)
+    old = CryptContext(schemes=['bcrypt'], bcrypt__rounds=4).hash('secret')
+    assert password_needs_rehash(old)
+    db = Session()
+    db.add(User(email='rehash@test.com', password=old, first_name='R', last_name='H', user_type=UserType.CLIENT))
+    db.commit()
+    db.close()
+
+    try:
+        res = TestClient(app).post('/auth/login', data={'username': 'rehash@test.com', 'password': 'secret'})
+        assert res.status_code == 200
+        db = Session()
+        stored = db.query(User).filter(User.email == 'rehash@test.com').one().password
+        db.close()
+        assert stored != old
+        assert bcrypt_rounds_from_hash(stored) == auth_utils._BCRYPT_ROUNDS
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+def test_login_returns_503_when_hashing_saturated(monkeypatch):
+    Session = setup_app(monkeypatch)
+    db = Session()
+    db.add(User(email='busy@test.com', password=get_password_hash('secret'), first_name='B', last_name='U', user_type=UserType.CLIENT))
+    db.commit()
+    db.close()
+
+    async def busy(*_args):
+        raise HashingBusy('full')
+
+    monkeypatch.setattr(auth_module, 'verify_password_async', busy)
+    try:
+        res = TestClient(app).post('/auth/login', data={'username': 'busy@test.com', 'password': 'secret'})
+        assert res.status_code == 503
+        assert res.headers.get('retry-after') == '1'
+    finally:
+        app.dependency_overrides.pop(get_db, None)
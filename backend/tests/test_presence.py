@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+from app.realtime import presence as presence_mod
+from app.realtime.presence import PresenceRegistry
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.ops.append((name, args, kwargs))
+        return queue
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        return [await getattr(self.redis, n)(*a, **k) for n, a, k in self.ops]
+
+
+class FakeRedis:
+    """Sorted-set subset of redis.asyncio shared by several registries."""
+
+    def __init__(self):
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, member):
+        self.round_trips += 1
+        self.zsets.get(key, {}).pop(member, None)
+
+    async def zremrangebyscore(self, key, lo, hi):
+        zs = self.zsets.get(key, {})
+        for m in [m for m, s in zs.items() if s <= hi]:
+            zs.pop(m)
+
+    async def zcount(self, key, lo, hi):
+        return sum(1 for s in self.zsets.get(key, {}).values() if s >= lo)
+
+    async def pexpire(self, key, ms):
+        return True
+
+
+def test_presence_is_shared_across_instances():
+    redis = FakeRedis()
+    node_a = PresenceRegistry(redis, "inst-a", use_redis=True)
+    node_b = PresenceRegistry(redis, "inst-b", use_redis=True)
+
+    async def run():
+        lease = await node_a.connect(7)
+        online_from_b = await node_b.is_online(7)
+        node_b._cache.clear()
+        await node_a.disconnect(lease)
+        offline_from_b = await node_b.is_online(7)
+        return online_from_b, offline_from_b
+
+    assert asyncio.run(run()) == (True, False)
+
+
+def test_batched_lookup_uses_one_round_trip_and_local_cache(monkeypatch):
+    monkeypatch.setattr(presence_mod, "CACHE_TTL_S", 60.0)
+    redis = FakeRedis()
+    node_a = PresenceRegistry(redis, "inst-a", use_redis=True)
+    node_b = PresenceRegistry(redis, "inst-b", use_redis=True)
+
+    async def run():
+        await node_a.connect(1)
+        await node_a.connect(3)
+        await node_b.connect(5)
+        before = redis.round_trips
+        first = await node_b.is_online_many([1, 2, 3, 4, 5])
+        after_first = redis.round_trips
+        second = await node_b.is_online_many([1, 2, 3, 4])
+        return first, second, after_first - before, redis.round_trips - after_first
+
+    first, second, trips_first, trips_second = asyncio.run(run())
+    assert first == {1: True, 2: False, 3: True, 4: False, 5: True}
+    assert second == {1: True, 2: False, 3: True, 4: False}
+    assert trips_first == 1
+    assert trips_second == 0
+
+
+def test_expired_leases_from_dead_instance_are_offline(monkeypatch):
+    redis = FakeRedis()
+    crashed = PresenceRegistry(redis, "inst-dead", use_redis=True)
+    observer = PresenceRegistry(redis, "inst-live", use_redis=True)
+
+    async def run():
+        await crashed.connect(9)
+        assert await observer.is_online(9)
+        observer._cache.clear()
+        # Leases are never renewed once the instance is gone.
+        future = time.time() + presence_mod.LEASE_TTL_S + 1
+        monkeypatch.setattr(presence_mod.time, "time", lambda: future)
+        return await observer.is_online(9)
+
+    assert asyncio.run(run()) is False
+
+
+def test_local_backend_counts_connections():
+    node = PresenceRegistry(FakeRedis(), "inst-a", use_redis=False)
+
+    async def run():
+        first = await node.connect(4)
+        second = await node.connect(4)
+        await node.disconnect(first)
+        still_online = await node.is_online(4)
+        await node.disconnect(second)
+        return still_online, await node.is_online(4)
+
+    assert asyncio.run(run()) == (True, False)
+
+
+def test_remote_answer_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(presence_mod, "CACHE_TTL_S", 60.0)
+    monkeypatch.setattr(presence_mod, "CACHE_MAX_ENTRIES", 3)
+    redis = FakeRedis()
+    node = PresenceRegistry(redis, "inst-a", use_redis=True)
+
+    async def run():
+        await node.is_online_many([1, 2, 3, 4, 5])
+        before = redis.round_trips
+        recent = await node.is_online_many([3, 4, 5])
+        trips_recent = redis.round_trips - before
+        await node.is_online_many([1])
+        return recent, trips_recent, redis.round_trips - before - trips_recent
+
+    recent, trips_recent, trips_evicted = asyncio.run(run())
+    assert recent == {3: False, 4: False, 5: False}
+    assert trips_recent == 0
+    assert trips_evicted == 1
+    assert len(node._cache._entries) == 3
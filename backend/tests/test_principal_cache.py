@@ -0,0 +1,120 @@
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.auth import create_access_token
+from app.api.dependencies import get_current_user, get_current_user_live
+from app.models import User, UserType
+from app.models.base import BaseModel
+from app.services import principal_cache
+from app.services.principal_cache import Principal
+from app.utils import redis_cache
+
+
+def setup_db():
+    engine = create_engine(
+        'sqlite:///:memory:', connect_args={'check_same_thread': False}, poolclass=StaticPool
+    )
+    BaseModel.metadata.create_all(engine)
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count(conn, cursor, statement, *args):  # noqa: ANN001
+        statements.append(statement)
+
+    return sessionmaker(bind=engine), statements
+
+
+def make_user(Session, email='p@test.com'):
+    with Session() as db:
+        user = User(
+            email=email,
+            password='x',
+            first_name='Pat',
+            last_name='Lee',
+            user_type=UserType.CLIENT,
+        )
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+def test_principal_is_cached_after_first_lookup():
+    Session, statements = setup_db()
+    user_id = make_user(Session)
+    token = create_access_token({'sub': 'P@test.com'})
+
+    with Session() as db:
+        statements.clear()
+        first = get_current_user(token=token, db=db)
+        assert len(statements) == 1
+        second = get_current_user(token=token, db=db)
+        assert len(statements) == 1
+
+    assert isinstance(first, Principal)
+    assert second is first
+    assert (first.id, first.user_type, first.first_name) == (user_id, UserType.CLIENT, 'Pat')
+    with pytest.raises(AttributeError):
+        first.password
+
+
+def test_orm_update_invalidates_on_commit():
+    Session, _ = setup_db()
+    user_id = make_user(Session)
+    token = create_access_token({'sub': 'p@test.com'})
+    with Session() as db:
+        assert get_current_user(token=token, db=db).is_active is True
+
+    with Session() as db:
+        user = db.get(User, user_id)
+        user.is_active = False
+        user.user_type = UserType.SERVICE_PROVIDER
+        db.commit()
+
+    with Session() as db:
+        principal = get_current_user(token=token, db=db)
+    assert principal.is_active is False
+    assert principal.user_type == UserType.SERVICE_PROVIDER
+
+
+def test_deleted_user_is_rejected_and_live_user_is_session_bound():
+    Session, _ = setup_db()
+    user_id = make_user(Session)
+    token = create_access_token({'sub': 'p@test.com'})
+    with Session() as db:
+        principal = get_current_user(token=token, db=db)
+        live = get_current_user_live(principal=principal, db=db)
+        assert isinstance(live, User)
+        assert live in db
+        db.delete(live)
+        db.commit()
+
+    with Session() as db:
+        with pytest.raises(HTTPException) as exc:
+            get_current_user(token=token, db=db)
+    assert exc.value.status_code == 401
+
+
+def test_redis_tier_shared_across_instances(monkeypatch):
+    fake = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(redis_cache, 'get_redis_client', lambda: fake)
+    monkeypatch.setattr(principal_cache, 'REDIS_ENABLED', True)
+    Session, statements = setup_db()
+    make_user(Session)
+    token = create_access_token({'sub': 'p@test.com'})
+    with Session() as db:
+        get_current_user(token=token, db=db)
+
+    # Another instance: empty local tier, warm Redis tier.
+    principal_cache.clear()
+    statements.clear()
+    with Session() as db:
+        principal = get_current_user(token=token, db=db)
+    assert statements == []
+    assert principal.email == 'p@test.com'
+
+    principal_cache.invalidate('p@test.com')
+    assert fake.get('principal:v1:p@test.com') is None
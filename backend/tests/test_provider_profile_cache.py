@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.dependencies import get_db
+from app.main import app
+from app.models import Booking, BookingStatus, Review, Service, ServiceProviderProfile, User, UserType
+from app.models.base import BaseModel
+from app.services import provider_profile
+from app.utils import redis_cache
+
+
+@pytest.fixture(autouse=True)
+def shared_redis(monkeypatch):
+    fake = fakeredis.FakeStrictRedis(decode_responses=True)
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
+    redis_cache.clear_local_caches()
+    yield fake
+    redis_cache.clear_local_caches()
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def env():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    BaseModel.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_db
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    return Session, statements
+
+
+def seed(db, n_reviews=0):
+    artist = User(email="dj@test.com", password="x", first_name="Dee", last_name="Jay",
+                  user_type=UserType.SERVICE_PROVIDER)
+    client = User(email="c@test.com", password="x", first_name="Cee", last_name="Lient", user_type=UserType.CLIENT)
+    db.add_all([artist, client])
+    db.flush()
+    db.add(ServiceProviderProfile(user_id=artist.id, business_name="Dee Jay", slug="dee-jay"))
+    service = Service(artist_id=artist.id, title="Set", price=100, duration_minutes=60, media_url="x",
+                      status="approved")
+    db.add(service)
+    db.flush()
+    base = datetime(2026, 1, 1)
+    for i in range(n_reviews):
+        booking = Booking(artist_id=artist.id, client_id=client.id, service_id=service.id, start_time=base,
+                          end_time=base, total_price=100, status=BookingStatus.COMPLETED, event_city="Durban")
+        db.add(booking)
+        db.flush()
+        db.add(Review(artist_id=artist.id, service_id=service.id, booking_id=booking.id, rating=5,
+                      comment=f"r{i}", created_at=base + timedelta(minutes=i)))
+    db.commit()
+    return artist.id, service
+
+
+def test_full_profile_is_cached_and_revalidates(env):
+    Session, statements = env
+    with Session() as db:
+        artist_id, _ = seed(db, n_reviews=2)
+    http = TestClient(app)
+    url = f"/api/v1/service-provider-profiles/{artist_id}/full"
+
+    statements.clear()
+    first = http.get(url)
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+    assert not [s for s in statements if not s.lstrip().upper().startswith("SELECT")]
+    body = first.json()
+    assert body["provider"]["completed_events"] == 2
+    assert body["provider"]["rating_count"] == 2
+    assert [r["comment"] for r in body["reviews"]] == ["r1", "r0"]
+    assert body["reviews"][0]["client_display_name"] == "Cee Lient"
+    assert body["reviews"][0]["client_location"] == "Durban"
+    assert len(body["services"]) == 1
+
+    statements.clear()
+    second = http.get(url)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert not [s for s in statements if "reviews" in s or "bookings" in s]
+
+    etag = first.headers["ETag"]
+    assert http.get(url, headers={"If-None-Match": etag}).status_code == 304
+    slug = http.get("/api/v1/service-provider-profiles/by-slug/dee-jay/full")
+    assert slug.headers["ETag"] == etag
+    assert http.get("/api/v1/service-provider-profiles/by-slug/nobody/full").status_code == 404
+
+
+def test_writes_invalidate_the_provider(env):
+    Session, _ = env
+    with Session() as db:
+        artist_id, service = seed(db, n_reviews=1)
+    http = TestClient(app)
+    url = f"/api/v1/service-provider-profiles/{artist_id}"
+    assert http.get(url).json()["completed_events"] == 1
+    assert http.get(url).headers["X-Cache"] == "HIT"
+
+    with Session() as db:
+        db.query(Booking).first().status = BookingStatus.CANCELLED
+        db.commit()
+    resp = http.get(url)
+    assert resp.headers["X-Cache"] == "MISS"
+    assert resp.json()["cancelled_events"] == 1
+
+    with Session() as db:
+        db.get(ServiceProviderProfile, artist_id).description = "New bio"
+        db.commit()
+    assert http.get(url).json()["description"] == "New bio"
+
+    with Session() as db:
+        db.get(Service, service.id).title = "Longer set"
+        db.commit()
+    full = http.get(f"{url}/full").json()
+    assert full["services"][0]["title"] == "Longer set"
+
+    # Bulk writes report their providers explicitly.
+    with Session() as db:
+        db.query(Booking).update({Booking.status: BookingStatus.COMPLETED}, synchronize_session=False)
+        provider_profile.note_provider_profile_dirty(db, [artist_id])
+        db.commit()
+    assert http.get(url).json()["completed_events"] == 1
+
+
+def test_reviews_page_and_cursor(env):
+    Session, _ = env
+    with Session() as db:
+        artist_id, _ = seed(db, n_reviews=provider_profile.REVIEWS_PAGE_SIZE + 3)
+    http = TestClient(app)
+    full = http.get(f"/api/v1/service-provider-profiles/{artist_id}/full").json()
+    assert len(full["reviews"]) == provider_profile.REVIEWS_PAGE_SIZE
+    assert full["provider"]["rating_count"] == provider_profile.REVIEWS_PAGE_SIZE + 3
+
+    reviews_url = f"/api/v1/reviews/service-provider-profiles/{artist_id}/reviews"
+    rest = http.get(reviews_url, params={"cursor": full["reviews_next_cursor"]})
+    assert [r["comment"] for r in rest.json()] == ["r2", "r1", "r0"]
+    assert "X-Next-Cursor" not in rest.headers
+
+    page = http.get(reviews_url, params={"limit": 2})
+    assert [r["comment"] for r in page.json()] == [f"r{provider_profile.REVIEWS_PAGE_SIZE + 2}",
+                                                   f"r{provider_profile.REVIEWS_PAGE_SIZE + 1}"]
+    assert page.headers["X-Next-Cursor"]
+    assert len(http.get(reviews_url).json()) == provider_profile.REVIEWS_PAGE_SIZE + 3
+    assert http.get(reviews_url, params={"cursor": "garbage"}).status_code == 400
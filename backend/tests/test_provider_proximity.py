@@ -0,0 +1,116 @@
+import math
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1 import api_service_provider
+from app.api.v1.api_service_provider import read_all_service_provider_profiles
+from app.models import ServiceProviderProfile
+from app.models.base import BaseModel
+from app.services import geocode
+from app.services.geocode import GeocodeResult
+from app.utils.geohash import cells_for_radius, encode
+from backend.tests.conftest import add_provider
+
+CAPE_TOWN = (-33.9249, 18.4241)
+
+
+def setup_db():
+    engine = create_engine(
+        'sqlite://',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    BaseModel.metadata.create_all(engine)
+    return sessionmaker(bind=engine, expire_on_commit=False)()
+
+
+def offset_km(origin, north_km, east_km):
+    lat, lng = origin
+    return (lat + north_km / 111.32, lng + east_km / (111.32 * math.cos(math.radians(lat))))
+
+
+def test_geohash_encode_and_cover():
+    assert encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    cells = cells_for_radius(*CAPE_TOWN, 25)
+    assert 0 < len(cells) <= 16
+    for bearing in range(0, 360, 30):
+        point = offset_km(CAPE_TOWN, 24 * math.cos(math.radians(bearing)), 24 * math.sin(math.radians(bearing)))
+        assert any(encode(*point).startswith(c) for c in cells)
+
+
+def test_geohash_follows_coordinates():
+    db = setup_db()
+    user, _ = add_provider(db, 'geo', coords=CAPE_TOWN, location='Somewhere')
+    profile = db.get(ServiceProviderProfile, user.id)
+    assert profile.location_geohash == encode(*CAPE_TOWN)
+    profile.location_lat, profile.location_lng = None, None
+    db.commit()
+    assert profile.location_geohash is None
+
+
+def test_closest_ranks_by_distance_and_honours_radius(monkeypatch):
+    db = setup_db()
+    far, near, mid, nowhere = (
+        add_provider(db, name, coords=coords, location=location)[0].id
+        for name, coords, location in [
+            ('far', offset_km(CAPE_TOWN, 0, 80), 'Cape Town'),
+            ('near', offset_km(CAPE_TOWN, 3, 0), 'Somewhere'),
+            ('mid', offset_km(CAPE_TOWN, -20, 5), 'Somewhere'),
+            ('nowhere', None, 'Somewhere'),
+        ]
+    )
+    monkeypatch.setattr(api_service_provider, 'geocode_address', lambda _addr: GeocodeResult(*CAPE_TOWN))
+
+    res = read_all_service_provider_profiles(db=db, sort='closest', location='Cape Town', page=1, limit=10)
+    assert [p.user_id for p in res['data']] == [near, mid, far, nowhere]
+    assert res['data'][0].distance_km == 3.0
+    assert res['data'][3].distance_km is None
+
+    page2 = read_all_service_provider_profiles(db=db, sort='closest', location='Cape Town', page=2, limit=3)
+    assert [p.user_id for p in page2['data']] == [nowhere]
+
+    within = read_all_service_provider_profiles(db=db, sort='closest', location='Cape Town', radius_km=50, page=1, limit=10)
+    assert [p.user_id for p in within['data']] == [near, mid]
+    assert within['total'] == 2
+
+
+def test_geocode_results_and_misses_are_cached(monkeypatch):
+    calls = []
+
+    class FakeResponse:
+        def __init__(self, payload):
+            self.payload = payload
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return self.payload
+
+    class FakeClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def get(self, url, params=None):
+            calls.append(params['address'])
+            if params['address'] == 'Atlantis Nowhere':
+                return FakeResponse({'status': 'ZERO_RESULTS', 'results': []})
+            return FakeResponse({'status': 'OK', 'results': [{'geometry': {'location': {'lat': -33.9, 'lng': 18.4}}}]})
+
+    monkeypatch.setenv('GOOGLE_MAPS_API_KEY', 'test')
+    monkeypatch.setattr(geocode.httpx, 'AsyncClient', FakeClient)
+    geocode._geocode_cache.clear()
+
+    assert geocode.geocode_address('Cape  Town') == GeocodeResult(-33.9, 18.4)
+    assert geocode.geocode_address('cape town ') == GeocodeResult(-33.9, 18.4)
+    assert geocode.geocode_address('Atlantis Nowhere') is None
+    assert geocode.geocode_address('atlantis nowhere') is None
+    assert calls == ['Cape  Town', 'Atlantis Nowhere']
@@ -0,0 +1,108 @@
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.api_service_provider import read_all_service_provider_profiles
+from app.models import ProviderSearchStats, ServiceProviderProfile
+from app.models.base import BaseModel
+from app.services import provider_search_index
+from app.services.ai_search import AiSearchFilters, _search_providers_with_filters
+from app.services.provider_search_index import FTS_TABLE, ensure_provider_search_index, provider_text_match
+from backend.tests.conftest import add_provider
+
+
+def setup_db():
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    BaseModel.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine, expire_on_commit=False)()
+
+
+def add(db, business, first='Pat', last='Lee', location='Cape Town'):
+    user, _ = add_provider(db, business, first_name=first, last_name=last, location=location, category='DJ', price=500)
+    return user
+
+
+def matches(db, terms, **kw):
+    sq = provider_text_match(db, terms, **kw)
+    return [aid for aid, _ in db.execute(sq.select().order_by(sq.c.score.desc(), sq.c.artist_id))]
+
+
+def test_search_text_follows_profile_and_name_edits():
+    _, db = setup_db()
+    zoe = add(db, 'Groove Masters', first='Zoë', last='Smith', location='Durban')
+    row = db.get(ProviderSearchStats, zoe.id)
+    assert row.search_name == 'groove masters zoe smith'
+    assert row.search_document == 'groove masters zoe smith dj durban'
+
+    assert matches(db, ['ZOE']) == [zoe.id]
+    assert matches(db, ['durban']) == []
+    assert matches(db, ['durban'], field='document') == [zoe.id]
+    assert matches(db, ['groove', 'nobody'], any_term=False) == []
+
+    zoe.last_name = 'Jones'
+    db.get(ServiceProviderProfile, zoe.id).location = 'Pretoria'
+    db.commit()
+    assert matches(db, ['smith']) == [] and matches(db, ['jones']) == [zoe.id]
+    assert matches(db, ['pretoria'], field='document') == [zoe.id]
+
+    db.execute(text('DELETE FROM provider_search_stats'))
+    db.commit()
+    assert db.execute(text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'jones'")).scalar() == 0
+
+
+def test_list_artist_filter_is_ranked_through_the_index():
+    engine, db = setup_db()
+    exact = add(db, 'Soul Sound')
+    jazz = add(db, 'Jazz Trio', first='Sam', last='Ray')
+    partial = add(db, 'Soul Sound And Soul Sound Collective Band Of Many Words')
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+    res = read_all_service_provider_profiles(db=db, page=1, limit=1, artist='soul sound')
+    assert res['total'] == 2
+    assert [p.user_id for p in res['data']] == [exact.id]
+    assert any(f'{FTS_TABLE} MATCH' in s for s in statements)
+    assert not any('business_name) LIKE' in s for s in statements)
+
+    page2 = read_all_service_provider_profiles(db=db, page=1, limit=1, artist='soul sound', cursor=res['next_cursor'])
+    assert [p.user_id for p in page2['data']] == [partial.id]
+
+    # Terms shorter than a trigram fall back to a LIKE scan of search_name.
+    short = read_all_service_provider_profiles(db=db, page=1, limit=5, artist='ay')
+    assert [p.user_id for p in short['data']] == [jazz.id]
+
+
+def test_ai_search_name_tokens_use_the_index():
+    _, db = setup_db()
+    add(db, 'Beats Unlimited')
+    kabza = add(db, 'Piano Kings', first='Kabza', last='Mokoena')
+    providers = _search_providers_with_filters(db, AiSearchFilters(category='dj'), 5, query_text='DJ Kabza please')
+    assert [p['artist_id'] for p in providers] == [kabza.id]
+
+
+def test_fts_presence_is_not_looked_up_per_search():
+    engine, db = setup_db()
+    groove = add(db, 'Groove Masters')
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+    for _ in range(3):
+        assert matches(db, ['groove']) == [groove.id]
+    assert not any('sqlite_master' in s for s in statements)
+
+
+def test_ensure_builds_missing_index_and_search_text():
+    engine, db = setup_db()
+    user = add(db, 'Legacy Lights')
+    db.execute(text(f'DROP TABLE {FTS_TABLE}'))
+    for suffix in ('ai', 'ad', 'au'):
+        db.execute(text(f'DROP TRIGGER {FTS_TABLE}_{suffix}'))
+    db.execute(text('UPDATE provider_search_stats SET search_name = NULL, search_document = NULL'))
+    db.commit()
+    # As seen by a process starting against a database without the FTS table.
+    provider_search_index._fts_ready.clear()
+    assert matches(db, ['legacy']) == []
+
+    assert ensure_provider_search_index(engine) == 1
+    assert ensure_provider_search_index(engine) == 0
+    assert provider_search_index._sqlite_fts_present(db.connection())
+    assert matches(db, ['lights']) == [user.id]
@@ -0,0 +1,123 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.api_service_provider import read_all_service_provider_profiles
+from app.models import ProviderSearchStats
+from app.models.base import BaseModel
+from app.services.provider_stats import reconcile_provider_stats
+from backend.tests.conftest import add_provider
+
+
+def setup_db():
+    engine = create_engine(
+        'sqlite://',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    BaseModel.metadata.create_all(engine)
+    return sessionmaker(bind=engine, expire_on_commit=False)()
+
+
+def add(db, name, category='DJ', **kw):
+    user, service = add_provider(db, name, location='Cape Town', category=category, **kw)
+    return user.id, service
+
+
+def stats_for(db, artist_id):
+    db.expire_all()
+    return db.get(ProviderSearchStats, artist_id)
+
+
+def test_commit_refreshes_stats_row():
+    db = setup_db()
+    aid, service = add(db, 'alpha', category='Sound Service', price=250, bookings=3, ratings=(4, 5))
+
+    row = stats_for(db, aid)
+    assert row.book_count == 3
+    assert row.rating_count == 2 and row.rating_avg == 4.5 and row.rating_sort == 4.5
+    assert row.has_listed_service and row.has_approved_service
+    assert row.min_price == Decimal('250.00')
+    assert row.category_names == 'Sound Service'
+    assert row.category_slugs == ',sound_service,'
+
+    service.status = 'rejected'
+    db.commit()
+    row = stats_for(db, aid)
+    assert not row.has_listed_service and row.min_price is None
+    assert read_all_service_provider_profiles(db=db, page=1, limit=10)['total'] == 0
+
+
+def test_reconcile_repairs_writes_the_hooks_missed():
+    db = setup_db()
+    aid, service = add(db, 'beta', bookings=1)
+    db.execute(
+        text(
+            "INSERT INTO bookings (artist_id, client_id, service_id, start_time, end_time, total_price) "
+            "VALUES (:a, :a, :s, :t, :t, 100)"
+        ),
+        {'a': aid, 's': service.id, 't': datetime.utcnow()},
+    )
+    db.info.clear()  # raw SQL is invisible to the flush listener
+    db.commit()
+    assert stats_for(db, aid).book_count == 1
+
+    assert reconcile_provider_stats(db.connection()) == 1
+    db.commit()
+    assert stats_for(db, aid).book_count == 2
+    assert reconcile_provider_stats(db.connection()) == 0
+
+
+def test_list_sorts_read_stats_table():
+    db = setup_db()
+    busy, _ = add(db, 'busy', bookings=5, ratings=(3,))
+    loved, _ = add(db, 'loved', bookings=1, ratings=(5, 5, 5, 5, 5, 5, 5, 5))
+    fresh, _ = add(db, 'fresh', category='Musician')
+
+    def ids(**kw):
+        res = read_all_service_provider_profiles(db=db, page=1, limit=10, **kw)
+        return [p.user_id for p in res['data']]
+
+    assert ids(sort='most_booked') == [busy, loved, fresh]
+    assert ids(sort='top_rated') == [loved, busy, fresh]
+    assert ids(sort='best_match')[0] == loved
+    assert ids(category='dj', sort='most_booked') == [busy, loved]
+
+
+def test_deferred_refresh_runs_off_the_committing_thread(tmp_path, monkeypatch):
+    import threading
+
+    from app.services import provider_stats
+
+    monkeypatch.setattr(provider_stats, 'REFRESH_MODE', 'deferred')
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    BaseModel.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    threads = []
+    real_refresh = provider_stats.refresh_provider_stats
+
+    def recording_refresh(conn, ids):
+        threads.append(threading.current_thread().name)
+        return real_refresh(conn, ids)
+
+    monkeypatch.setattr(provider_stats, 'refresh_provider_stats', recording_refresh)
+    aid, service = add(db, 'gamma', price=300)
+    # The row is written with the profile itself, so the provider is listed at once.
+    assert threads[0] == threading.current_thread().name
+    assert stats_for(db, aid).has_listed_service
+    assert read_all_service_provider_profiles(db=db, page=1, limit=10)['total'] == 1
+
+    created = stats_for(db, aid).created_at
+    service.price = 150
+    db.commit()
+    assert provider_stats.wait_for_provider_stats(timeout=5)
+    row = stats_for(db, aid)
+    assert row.min_price == Decimal('150.00')
+    # Upserted in place rather than deleted and re-inserted.
+    assert row.created_at == created
+    assert threads[-1] == 'provider-stats-refresh'
+    db.close()
+    engine.dispose()
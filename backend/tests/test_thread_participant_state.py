@@ -0,0 +1,160 @@
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud import crud_message
+from app.models import (
+    BookingRequest,
+    BookingStatus,
+    Message,
+    MessageType,
+    SenderType,
+    ThreadParticipantState,
+    User,
+    UserType,
+)
+from app.models.base import BaseModel
+from app.services import thread_state
+
+
+def setup():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    BaseModel.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    db = Session()
+    users = []
+    for name, kind in (("client", UserType.CLIENT), ("artist", UserType.SERVICE_PROVIDER), ("ops", UserType.CLIENT)):
+        user = User(email=f"{name}@test.com", password="x", first_name=name, last_name="L", user_type=kind)
+        db.add(user)
+        users.append(user)
+    db.flush()
+    client, artist, ops = users
+    threads = []
+    for _ in range(2):
+        br = BookingRequest(client_id=client.id, artist_id=artist.id, status=BookingStatus.PENDING_QUOTE)
+        db.add(br)
+        threads.append(br)
+    db.commit()
+    return engine, db, client, artist, ops, threads
+
+
+def send(db, thread, sender, content="hi", **kwargs):
+    kind = SenderType.ARTIST if sender.user_type == UserType.SERVICE_PROVIDER else SenderType.CLIENT
+    return crud_message.create_message(db, thread.id, sender.id, kind, content, **kwargs)
+
+
+def legacy_counts(db, user_id):
+    """The message-history COUNT the state table replaces."""
+    rows = (
+        db.query(Message.booking_request_id, func.count(Message.id))
+        .join(BookingRequest, BookingRequest.id == Message.booking_request_id)
+        .filter((BookingRequest.client_id == user_id) | (BookingRequest.artist_id == user_id))
+        .filter(Message.sender_id != user_id)
+        .filter((Message.is_read.is_(False)) | (Message.is_read.is_(None)))
+        .filter((Message.system_key.is_(None)) | (Message.system_key != crud_message.DELETED_SYSTEM_KEY))
+        .group_by(Message.booking_request_id)
+    )
+    return {int(t): int(n) for t, n in rows}
+
+
+def assert_matches_history(db, *users):
+    for user in users:
+        counts = legacy_counts(db, user.id)
+        assert crud_message.get_unread_counts_for_user_threads(db, user.id) == counts
+        assert crud_message.get_unread_message_totals_for_user(db, user.id)[0] == sum(counts.values())
+
+
+def test_counters_follow_sends_reads_and_deletes():
+    _, db, client, artist, ops, (t1, t2) = setup()
+    send(db, t1, client)
+    send(db, t1, client)
+    last = send(db, t2, client)
+    send(db, t2, artist)
+    assert crud_message.get_unread_counts_for_user_threads(db, artist.id) == {t1.id: 2, t2.id: 1}
+    assert crud_message.get_unread_counts_for_user_threads(db, client.id) == {t2.id: 1}
+    assert crud_message.get_unread_counts_for_user_threads(db, artist.id, thread_ids=[t2.id]) == {t2.id: 1}
+    total, latest = crud_message.get_unread_message_totals_for_user(db, artist.id)
+    assert total == 3 and latest is not None
+    assert_matches_history(db, client, artist)
+
+    # A system line from a third sender is unread for both participants.
+    send(db, t1, ops, "Booking confirmed", message_type=MessageType.SYSTEM, system_key="confirmed_v1")
+    assert_matches_history(db, client, artist)
+
+    assert crud_message.mark_messages_read(db, t1.id, artist.id) == 3
+    state = db.get(ThreadParticipantState, (artist.id, t1.id))
+    assert state.unread_count == 0
+    assert state.last_read_message_id == state.last_message_id
+    assert_matches_history(db, client, artist)
+
+    crud_message.mark_message_deleted(last)
+    db.commit()
+    assert crud_message.get_unread_counts_for_user_threads(db, artist.id) == {}
+    assert_matches_history(db, client, artist)
+
+    reply = send(db, t2, artist, "again")
+    assert crud_message.get_unread_counts_for_user_threads(db, client.id) == {t2.id: 2}
+    assert crud_message.delete_message(db, reply.id)
+    assert_matches_history(db, client, artist)
+
+    db.delete(t2)
+    db.commit()
+    assert db.query(ThreadParticipantState).filter_by(booking_request_id=t2.id).count() == 0
+
+
+def test_reconcile_backfills_and_repairs():
+    engine, db, client, artist, _, (t1, t2) = setup()
+    for _ in range(3):
+        send(db, t1, client)
+    send(db, t2, artist)
+    db.query(ThreadParticipantState).delete()
+    db.commit()
+    assert crud_message.get_unread_message_totals_for_user(db, artist.id)[0] == 0
+
+    assert thread_state.ensure_thread_participant_state(engine) == 4
+    assert thread_state.ensure_thread_participant_state(engine) == 0
+    assert_matches_history(db, client, artist)
+
+    # Drift from a write the listener cannot see is repaired by the sweep.
+    db.query(Message).filter(Message.booking_request_id == t1.id).update({"is_read": True}, synchronize_session=False)
+    db.commit()
+    assert crud_message.get_unread_counts_for_user_threads(db, artist.id) == {t1.id: 3}
+    with engine.begin() as conn:
+        assert thread_state.reconcile_thread_state(conn, chunk_size=1) == 1
+    assert_matches_history(db, client, artist)
+
+
+def test_incremental_reconcile_recounts_changed_threads_only(monkeypatch):
+    engine, db, client, artist, _, (t1, t2) = setup()
+    for _ in range(2):
+        send(db, t1, client)
+    send(db, t2, client)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    monkeypatch.setattr("app.database.SessionLocal", Session)
+    monkeypatch.setattr(thread_state, "_watermark", None)
+    monkeypatch.setattr(thread_state, "WATERMARK_OVERLAP_S", 0)
+    swept = []
+    real_refresh = thread_state.refresh_thread_state
+    monkeypatch.setattr(
+        thread_state, "refresh_thread_state", lambda conn, ids: swept.append(list(ids)) or real_refresh(conn, ids)
+    )
+
+    thread_state.reconcile_thread_state_job()  # first run in the process: full sweep
+    assert swept == [[t1.id, t2.id]]
+
+    # The bulk update bumps messages.updated_at; the state edit leaves no trace there.
+    db.query(Message).filter(Message.booking_request_id == t1.id).update({"is_read": True}, synchronize_session=False)
+    db.query(ThreadParticipantState).filter_by(booking_request_id=t2.id, user_id=artist.id).update({"unread_count": 9})
+    db.commit()
+    swept.clear()
+    thread_state.reconcile_thread_state_job()
+    assert swept == [[t1.id]]
+    assert crud_message.get_unread_counts_for_user_threads(db, artist.id) == {t2.id: 9}
+    assert legacy_counts(db, artist.id) == {t2.id: 1}
+
+    # The periodic full sweep matches the old message-history query again.
+    monkeypatch.setattr(thread_state, "FULL_RECONCILE_S", 0)
+    swept.clear()
+    thread_state.reconcile_thread_state_job()
+    assert swept == [[t1.id, t2.id]]
+    assert_matches_history(db, client, artist)
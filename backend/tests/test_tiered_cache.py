@@ -0,0 +1,103 @@
+import threading
+import time
+
+import fakeredis
+
+from app.utils import redis_cache, tiered_cache
+from app.utils.tiered_cache import TieredCache, single_flight_scope
+
+
+def test_l1_serves_without_redis_round_trip(monkeypatch):
+    fake = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
+    redis_cache.cache_artist_list({"data": [1]}, page=1)
+
+    calls = {"get": 0}
+    real_get = fake.get
+
+    def counting_get(key):
+        calls["get"] += 1
+        return real_get(key)
+
+    monkeypatch.setattr(fake, "get", counting_get)
+    assert redis_cache.get_cached_artist_list(page=1) == {"data": [1]}
+    assert redis_cache.get_cached_artist_list(page=1) == {"data": [1]}
+    assert calls["get"] == 0
+    assert tiered_cache.stats()["artist_list"]["hit"] == 2
+
+
+def test_l1_is_bounded_and_expires(monkeypatch):
+    cache = TieredCache("test_bounded", ttl=0.05, stale_ttl=0, max_entries=2)
+    for k in ("a", "b", "c"):
+        cache.put_local(k, k)
+    assert cache.get("a", lambda: None) is None
+    assert cache.get("c", lambda: None) == "c"
+    time.sleep(0.06)
+    assert cache.get("c", lambda: None) is None
+
+
+def test_single_flight_coalesces_concurrent_misses():
+    cache = TieredCache("test_flight", ttl=10, stale_ttl=0)
+    computed = []
+    leader_in = threading.Event()
+
+    @single_flight_scope
+    def handler():
+        value = cache.get("k", lambda: None)
+        if value is not None:
+            return value
+        computed.append(1)
+        leader_in.set()
+        time.sleep(0.1)
+        cache.put_local("k", "v")
+        cache.filled("k")
+        return "v"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(handler()))
+    first.start()
+    leader_in.wait(1)
+    others = [threading.Thread(target=lambda: results.append(handler())) for _ in range(4)]
+    for t in others:
+        t.start()
+    for t in [first, *others]:
+        t.join(2)
+    assert results == ["v"] * 5
+    assert computed == [1]
+    assert cache.counters["coalesced"] == 4
+
+
+def test_leader_that_bails_releases_waiters():
+    cache = TieredCache("test_bail", ttl=10, stale_ttl=0)
+
+    @single_flight_scope
+    def failing():
+        assert cache.get("k", lambda: None) is None
+        raise RuntimeError("boom")
+
+    try:
+        failing()
+    except RuntimeError:
+        pass
+    assert tiered_cache._flights == {}
+
+
+def test_stale_entry_served_while_background_refresh_runs():
+    cache = TieredCache("test_swr", ttl=0.02, stale_ttl=10)
+    cache.put_local("k", "old")
+    time.sleep(0.03)
+    refreshed = threading.Event()
+    release = threading.Event()
+
+    def refresh():
+        release.wait(1)
+        cache.put_local("k", "new")
+        refreshed.set()
+
+    assert cache.get("k", lambda: None, refresh=refresh) == "old"
+    # Refresh already in flight: no second one, still stale.
+    assert cache.get("k", lambda: None, refresh=lambda: None) == "old"
+    release.set()
+    assert refreshed.wait(1)
+    assert cache.get("k", lambda: None) == "new"
+    assert cache.counters["stale"] == 2
@@ -1,11 +1,53 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
 from fastapi.testclient import TestClient
 import app.api.api_weather as api_weather
 from app.main import app
-from fastapi.testclient import TestClient
+from app.utils import background_worker, redis_cache
 
 
-def test_travel_forecast_success(monkeypatch):
-    def fake_get(url, params=None, timeout=10):
+class AsyncFacade:
+    """Async view of the shared sync fake, usable from any event loop."""
+
+    def __init__(self, sync):
+        self._sync = sync
+
+    def __getattr__(self, name):
+        method = getattr(self._sync, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return call
+
+
+@pytest.fixture(autouse=True)
+def shared_redis(monkeypatch):
+    fake = fakeredis.FakeStrictRedis(decode_responses=True)
+    monkeypatch.setattr(redis_cache, "get_redis_client", lambda: fake)
+    monkeypatch.setattr(background_worker, "_redis_client", AsyncFacade(fake))
+    background_worker.clear()
+    yield fake
+    background_worker.clear()
+
+
+class FakeClient:
+    """Stand-in for the pooled ``httpx.AsyncClient``."""
+
+    def __init__(self, payload, delay=0.0):
+        self.payload = payload
+        self.delay = delay
+        self.calls = []
+
+    async def get(self, url, params=None):
+        self.calls.append(url)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        payload = self.payload
+
         class Resp:
             status_code = 200
 
@@ -13,11 +55,14 @@ def test_travel_forecast_success(monkeypatch):
                 pass
 
             def json(self):
-                return {"weather": [1, 2, 3, 4]}
+                return payload
 
         return Resp()
 
-    monkeypatch.setattr(api_weather.weather_service.httpx, "get", fake_get)
+
+def test_travel_forecast_success(monkeypatch):
+    fake = FakeClient({"weather": [1, 2, 3, 4]})
+    monkeypatch.setattr(api_weather.weather_service, "_client", lambda: fake)
     client = TestClient(app)
     res = client.get("/api/v1/travel-forecast", params={"location": "Paris"})
     assert res.status_code == 202
@@ -28,19 +73,8 @@ def test_travel_forecast_success(monkeypatch):
 
 
 def test_travel_forecast_invalid_location(monkeypatch):
-    def fake_get(url, params=None, timeout=10):
-        class Resp:
-            status_code = 200
-
-            def raise_for_status(self):
-                pass
-
-            def json(self):
-                return {}
-
-        return Resp()
-
-    monkeypatch.setattr(api_weather.weather_service.httpx, "get", fake_get)
+    fake = FakeClient({})
+    monkeypatch.setattr(api_weather.weather_service, "_client", lambda: fake)
     client = TestClient(app)
     res = client.get("/api/v1/travel-forecast", params={"location": "Nowhere"})
     task = res.json()["task_id"]
@@ -51,7 +85,7 @@ def test_travel_forecast_invalid_location(monkeypatch):
 
 
 def test_travel_forecast_service_error(monkeypatch):
-    def fake_get_3day_forecast(location: str):
+    async def fake_get_3day_forecast(location: str):
         raise api_weather.weather_service.WeatherAPIError("boom")
 
     monkeypatch.setattr(
@@ -65,3 +99,88 @@ def test_travel_forecast_service_error(monkeypatch):
     data = res2.json()
     assert data["detail"]["message"] == "Weather service error"
     assert data["detail"]["field_errors"] == {}
+
+
+def test_identical_locations_share_one_upstream_call(monkeypatch):
+    fake = FakeClient({"weather": [1, 2, 3]}, delay=0.05)
+    monkeypatch.setattr(api_weather.weather_service, "_client", lambda: fake)
+
+    async def scenario():
+        ids = await asyncio.gather(*(api_weather.travel_forecast(location=loc) for loc in ("Paris", "paris ", "Paris")))
+        other = await api_weather.travel_forecast(location="Lyon")
+        results = [await api_weather.travel_forecast_result(i["task_id"]) for i in ids]
+        return ids, other, results
+
+    ids, other, results = asyncio.run(scenario())
+    assert len({i["task_id"] for i in ids}) == 1
+    assert other["task_id"] != ids[0]["task_id"]
+    assert fake.calls == ["https://wttr.in/Paris", "https://wttr.in/Lyon"]
+    assert results[0]["forecast"] == [1, 2, 3]
+
+
+def test_result_readable_from_another_instance(monkeypatch, shared_redis):
+    fake = FakeClient({"weather": [1, 2, 3]})
+    monkeypatch.setattr(api_weather.weather_service, "_client", lambda: fake)
+
+    async def submit():
+        task = await api_weather.travel_forecast(location="Durban")
+        await background_worker.result(task["task_id"])
+        return task["task_id"]
+
+    task_id = asyncio.run(submit())
+    # A poll on another machine has no local state, only Redis.
+    background_worker.clear()
+    res = asyncio.run(api_weather.travel_forecast_result(task_id))
+    assert res == {"location": "Durban", "forecast": [1, 2, 3]}
+    assert 0 < shared_redis.ttl(f"bgtask:{task_id}") <= background_worker.TASK_TTL_S
+
+    with pytest.raises(Exception) as exc:
+        asyncio.run(api_weather.travel_forecast_result("missing"))
+    assert exc.value.status_code == 404
+
+
+def test_slow_task_reports_pending(monkeypatch):
+    fake = FakeClient({"weather": [1]}, delay=0.3)
+    monkeypatch.setattr(api_weather.weather_service, "_client", lambda: fake)
+    monkeypatch.setattr(background_worker, "RESULT_WAIT_S", 0.05)
+
+    async def scenario():
+        task = await api_weather.travel_forecast(location="Cairo")
+        first = await api_weather.travel_forecast_result(task["task_id"])
+        await asyncio.sleep(0.4)
+        return first, await api_weather.travel_forecast_result(task["task_id"])
+
+    first, second = asyncio.run(scenario())
+    assert first.status_code == 202
+    assert second["forecast"] == [1]
+
+
+def test_abandoned_task_reports_error(shared_redis):
+    shared_redis.setex("bgtask:lost", 60, '{"state":"pending","at":1}')
+    with pytest.raises(Exception) as exc:
+        asyncio.run(api_weather.travel_forecast_result("lost"))
+    assert exc.value.status_code == 502
+
+
+def test_remote_waiter_wakes_on_completion(monkeypatch, shared_redis):
+    # Polling would sleep for the whole wait; the completion list wakes it.
+    monkeypatch.setattr(background_worker, "POLL_INTERVAL_S", 30)
+
+    async def scenario():
+        await background_worker._write("remote", {"state": "pending", "at": time.time()})
+        background_worker.clear()  # the task runs on another instance
+
+        async def finish():
+            await asyncio.sleep(0.1)
+            await background_worker._write("remote", {"state": "done", "result": 7})
+
+        finisher = asyncio.create_task(finish())
+        start = time.monotonic()
+        value = await background_worker.result("remote", wait_s=5)
+        await finisher
+        return value, time.monotonic() - start
+
+    value, elapsed = asyncio.run(scenario())
+    assert value == 7
+    assert elapsed < 2
+    assert shared_redis.lrange("bgtask:remote:done", 0, -1) == ["1"]
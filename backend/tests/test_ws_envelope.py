@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+from app.api import api_ws
+from app.api.api_ws import Envelope, NoiseWS, _bus_dispatch, _split_bus_frame
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent: list[str] = []
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        pass
+
+
+def test_envelope_encodes_once_and_reencodes_after_field_change(monkeypatch):
+    calls = []
+    real = api_ws.dumps_bytes
+
+    def counting(obj):
+        calls.append(obj)
+        return real(obj)
+
+    monkeypatch.setattr(api_ws, "dumps_bytes", counting)
+    env = Envelope(type="message", payload={"id": 1})
+    first = env.to_json_bytes()
+    assert env.to_json_bytes() is first
+    assert len(calls) == 1
+
+    env.topic = "booking-requests:9"
+    assert json.loads(env.to_json_bytes())["topic"] == "booking-requests:9"
+    assert len(calls) == 2
+
+
+def test_bus_bytes_carry_origin_and_split_back_to_frame():
+    env = Envelope(type="read", topic="booking-requests:3", payload={"up_to_id": 5})
+    wire = env.to_bus_bytes("inst-abc")
+    assert json.loads(wire)["origin"] == "inst-abc"
+    origin, frame = _split_bus_frame(wire)
+    assert origin == "inst-abc"
+    assert frame == env.to_json_bytes()
+
+
+def test_bus_dispatch_forwards_remote_frame_and_skips_own(monkeypatch):
+    async def run():
+        conn = NoiseWS(FakeSocket())
+        await api_ws.mux.subscribe(conn, "booking-requests:3")
+        await api_ws.chat.connect(3, conn)
+        try:
+            env = Envelope(type="message", topic="booking-requests:3", payload={"id": 7})
+            await _bus_dispatch("booking-requests:3", env.to_bus_bytes(api_ws.INSTANCE_ID))
+            await _bus_dispatch("booking-requests:3", env.to_bus_bytes("inst-other"))
+            await asyncio.sleep(0.01)
+            return list(conn.ws.sent), env.to_json()
+        finally:
+            await api_ws.mux.disconnect(conn)
+            api_ws.chat.disconnect(3, conn)
+            await conn.shutdown()
+
+    sent, expected = asyncio.run(run())
+    # One copy for the mux subscription and one for the room socket.
+    assert sent == [expected, expected]
+
+
+def test_bus_dispatch_normalizes_foreign_payloads():
+    async def run():
+        conn = NoiseWS(FakeSocket())
+        api_ws.notify.user_sockets.setdefault(42, set()).add(conn)
+        try:
+            await _bus_dispatch("notifications:42", b'{"type":"notification","id":1}')
+            await asyncio.sleep(0.01)
+            return [json.loads(t) for t in conn.ws.sent]
+        finally:
+            api_ws.notify.disconnect(42, conn)
+            await conn.shutdown()
+
+    sent = asyncio.run(run())
+    assert sent == [
+        {"v": 1, "type": "notification", "topic": "notifications:42", "payload": {"id": 1}}
+    ]
@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+from app.api import api_ws
+from app.api.api_ws import ChatRoom, Envelope, NoiseWS, TopicMux
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent: list[dict] = []
+        self.closed_with = None
+
+    async def send_text(self, text: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.closed_with = (code, reason)
+
+
+def test_slow_socket_does_not_delay_fast_subscribers():
+    async def run():
+        mux = TopicMux()
+        fast = [NoiseWS(FakeSocket()) for _ in range(50)]
+        slow = NoiseWS(FakeSocket(delay=0.5))
+        for conn in fast + [slow]:
+            await mux.subscribe(conn, "booking-requests:1")
+
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await mux.broadcast_topic("booking-requests:1", Envelope(type="message", payload={"id": 1}), publish=False)
+        enqueue_s = loop.time() - t0
+        await asyncio.sleep(0.05)
+        delivered = sum(len(c.ws.sent) for c in fast)
+        for conn in fast + [slow]:
+            await conn.shutdown()
+        return enqueue_s, delivered
+
+    enqueue_s, delivered = asyncio.run(run())
+    assert enqueue_s < 0.1
+    assert delivered == 50
+
+
+def test_full_queue_drops_oldest_and_closes_slow_consumer(monkeypatch):
+    monkeypatch.setattr(api_ws, "WS_SEND_QUEUE_MAX", 2)
+    monkeypatch.setattr(api_ws, "WS_SLOW_CONSUMER_MAX_DROPS", 3)
+
+    async def run():
+        room = ChatRoom()
+        stuck = NoiseWS(FakeSocket(delay=10))
+        await room.connect(7, stuck)
+        for i in range(3):
+            await room.broadcast(7, Envelope(type="message", payload={"i": i}), publish=False)
+            # Let the writer pick up frame 0 and block on the stuck socket.
+            await asyncio.sleep(0)
+        dropped_before_close = stuck.dropped
+        queued = [json.loads(d)["payload"]["i"] for _, d, _ in stuck._outbox]
+        for i in range(3, 6):
+            await room.broadcast(7, Envelope(type="message", payload={"i": i}), publish=False)
+        await asyncio.sleep(0)
+        result = (dropped_before_close, queued, stuck.closed, room.room_sockets.get(7))
+        await stuck.shutdown()
+        return result, stuck.ws.closed_with
+
+    (dropped, queued, closed, remaining), closed_with = asyncio.run(run())
+    # First frame is in flight on the writer, later ones are queued.
+    assert dropped == 0
+    assert queued == [1, 2]
+    assert closed is True
+    assert remaining is None
+    assert closed_with == (1011, "slow consumer")
+
+
+def test_drop_count_resets_once_the_queue_drains(monkeypatch):
+    monkeypatch.setattr(api_ws, "WS_SEND_QUEUE_MAX", 2)
+    monkeypatch.setattr(api_ws, "WS_SLOW_CONSUMER_MAX_DROPS", 3)
+
+    async def burst(conn, start):
+        for i in range(start, start + 5):
+            conn.enqueue(Envelope(type="message", payload={"i": i}).to_json_bytes())
+            if i == start:
+                await asyncio.sleep(0)
+
+    async def run():
+        conn = NoiseWS(FakeSocket(delay=0.01))
+        await burst(conn, 0)
+        during = conn.dropped
+        await asyncio.sleep(0.1)
+        after = conn.dropped
+        # A second short backlog does not inherit the first one's drops.
+        await burst(conn, 10)
+        await asyncio.sleep(0.1)
+        closed = conn.closed
+        await conn.shutdown()
+        return during, after, closed
+
+    assert asyncio.run(run()) == (2, 0, False)
+
+
+def test_typing_frames_coalesce_in_queue():
+    async def run():
+        conn = NoiseWS(FakeSocket(delay=0.01))
+        for uid in (1, 2, 3):
+            conn.enqueue(
+                Envelope(type="typing", topic="booking-requests:1", payload={"users": [uid]}).to_json_bytes(),
+                "typing:booking-requests:1",
+            )
+            if uid == 1:
+                # Frame 1 goes in flight; 2 and 3 meet in the queue.
+                await asyncio.sleep(0)
+        await asyncio.sleep(0.1)
+        await conn.shutdown()
+        return conn.ws.sent
+
+    sent = asyncio.run(run())
+    assert [m["payload"]["users"] for m in sent] == [[1], [3]]
+
+
+def test_broadcast_reaches_every_subscriber():
+    n = 1000
+
+    async def run():
+        mux = TopicMux()
+        conns = [NoiseWS(FakeSocket()) for _ in range(n)]
+        for conn in conns:
+            await mux.subscribe(conn, "t")
+        await mux.broadcast_topic("t", Envelope(type="message"), publish=False)
+        await asyncio.sleep(0.05)
+        count = sum(len(c.ws.sent) for c in conns)
+        for conn in conns:
+            await conn.shutdown()
+        return count
+
+    assert asyncio.run(run()) == n
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark event-loop lag while async routes hit a slow database.
+
+Seeds a file-backed SQLite database with one thread of messages and adds
+``--query-ms`` of latency to every statement (a stand-in for a slow
+Postgres round trip). ``--requests`` concurrent message-history reads then
+run on one event loop while a ticker measures how late it wakes up:
+
+  inline   the pre-offload behaviour: the blocking handler body runs on the
+           event loop (``_read_messages_page`` called directly)
+  offload  the route as served: ``read_messages_async`` awaiting ``run_db``
+
+Lag is what every WebSocket/SSE stream on the worker would feel.
+
+Usage:
+  python scripts/bench_async_db_offload.py
+  python scripts/bench_async_db_offload.py --requests 50 --query-ms 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.api import api_message  # noqa: E402
+from app.models import BookingRequest, BookingStatus, Message, MessageType, SenderType, User, UserType, VisibleTo  # noqa: E402
+from app.models.base import BaseModel  # noqa: E402
+
+
+def seed(url: str, n_messages: int):
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    BaseModel.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    with Session() as db:
+        client = User(email="c@example.com", password="x", first_name="C", last_name="C", user_type=UserType.CLIENT)
+        artist = User(email="a@example.com", password="x", first_name="A", last_name="A",
+                      user_type=UserType.SERVICE_PROVIDER)
+        db.add_all([client, artist])
+        db.flush()
+        br = BookingRequest(client_id=client.id, artist_id=artist.id, status=BookingStatus.PENDING_QUOTE)
+        db.add(br)
+        db.flush()
+        db.add_all([
+            Message(booking_request_id=br.id, sender_id=client.id, sender_type=SenderType.CLIENT,
+                    content=f"message {i}", message_type=MessageType.USER, visible_to=VisibleTo.BOTH)
+            for i in range(n_messages)
+        ])
+        db.commit()
+        return engine, Session, br.id, client
+
+
+def page_args(request_id, db, user):
+    return dict(
+        request_id=request_id, db=db, current_user=user, skip=0, limit=50, after_id=None, before_id=None,
+        fields=None, mode="lite", since=None, include_quotes=False, known_quote_ids=None, if_none_match=None,
+        x_after_write="1", request=None, response=None, cursor=None,
+    )
+
+
+async def measure(Session, request_id, user, n_requests: int, offload: bool):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            t0 = loop.time()
+            await asyncio.sleep(0.005)
+            lags.append((loop.time() - t0 - 0.005) * 1000.0)
+
+    async def one():
+        with Session() as db:
+            args = page_args(request_id, db, user)
+            if offload:
+                await api_message.read_messages_async(**args)
+            else:
+                api_message._read_messages_page(**args)
+        await asyncio.sleep(0)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n_requests)))
+    wall = (time.perf_counter() - t0) * 1000.0
+    done.set()
+    await tick
+    lags.sort()
+    return wall, lags[len(lags) // 2], lags[int(0.99 * (len(lags) - 1))], lags[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--query-ms", type=float, default=10.0)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session, request_id, user = seed(f"sqlite:///{tmp}/bench.db", args.messages)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _slow(*_a):
+            time.sleep(args.query_ms / 1000.0)
+
+        print(f"{args.requests} concurrent reads, +{args.query_ms:.0f} ms per statement")
+        print(f"{'mode':<8} {'wall ms':>9} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+        for name, offload in (("inline", False), ("offload", True)):
+            wall, p50, p99, worst = asyncio.run(measure(Session, request_id, user, args.requests, offload))
+            print(f"{name:<8} {wall:>9.1f} {p50:>9.1f} {p99:>9.1f} {worst:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ops_scheduler maintenance handlers against a seeded database.
+
+Seeds a throwaway SQLite database with N bookings spread across the states
+the handlers care about (reminder horizons, recently ended, long ended,
+missed artist deadlines, plus far-future noise) and times each handler.
+
+Usage:
+  python scripts/bench_ops_scheduler.py                 # 10k and 100k bookings
+  python scripts/bench_ops_scheduler.py --bookings 10000
+  OPS_BATCH_CHUNK=1000 python scripts/bench_ops_scheduler.py --bookings 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import models  # noqa: E402
+from app.models.base import BaseModel  # noqa: E402
+from app.services import ops_scheduler  # noqa: E402
+
+HANDLERS = [
+    ("pre_event_reminders", ops_scheduler.handle_pre_event_reminders),
+    ("post_event_prompts", ops_scheduler.handle_post_event_prompts),
+    ("auto_completion", ops_scheduler.handle_auto_completion),
+    ("artist_accept_timeouts", ops_scheduler.handle_artist_accept_timeouts),
+]
+
+
+def _insert(conn, table, rows, chunk=5000):
+    for i in range(0, len(rows), chunk):
+        conn.execute(table.insert(), rows[i : i + chunk])
+
+
+def seed(engine, n_bookings: int, n_artists: int = 200, n_clients: int = 2000) -> None:
+    now = datetime.utcnow()
+    users = [
+        {
+            "id": i + 1,
+            "email": f"u{i}@bench.test",
+            "password": "x",
+            "first_name": "U",
+            "last_name": str(i),
+            "user_type": models.UserType.SERVICE_PROVIDER if i < n_artists else models.UserType.CLIENT,
+        }
+        for i in range(n_artists + n_clients)
+    ]
+    profiles = [{"user_id": i + 1, "business_name": f"Artist {i}"} for i in range(n_artists)]
+    requests, quotes, bookings = [], [], []
+    for i in range(n_bookings):
+        artist_id = (i % n_artists) + 1
+        client_id = n_artists + (i % n_clients) + 1
+        bucket = i % 10
+        status = models.BookingStatus.CONFIRMED
+        deadline = None
+        if bucket == 0:
+            start = now + timedelta(days=7)
+        elif bucket == 1:
+            start = now + timedelta(days=3)
+        elif bucket == 2:
+            start = now - timedelta(hours=5)  # ended ~3h ago
+        elif bucket == 3:
+            start = now - timedelta(days=2)  # past the 12h completion window
+        elif bucket == 4:
+            start = now + timedelta(days=20)
+            status = models.BookingStatus.PENDING_ARTIST_CONFIRMATION
+            deadline = now - timedelta(hours=1)
+        elif bucket == 5:
+            start = now - timedelta(days=60)
+            status = models.BookingStatus.COMPLETED
+        else:
+            start = now + timedelta(days=40 + (i % 300))
+        requests.append(
+            {
+                "id": i + 1,
+                "client_id": client_id,
+                "artist_id": artist_id,
+                "status": models.BookingStatus.REQUEST_CONFIRMED,
+            }
+        )
+        quotes.append(
+            {
+                "id": i + 1,
+                "booking_request_id": i + 1,
+                "artist_id": artist_id,
+                "client_id": client_id,
+                "services": [],
+                "sound_fee": 0,
+                "travel_fee": 0,
+                "subtotal": 100,
+                "total": 100,
+                "status": models.QuoteStatusV2.ACCEPTED,
+            }
+        )
+        bookings.append(
+            {
+                "id": i + 1,
+                "artist_id": artist_id,
+                "client_id": client_id,
+                "start_time": start,
+                "end_time": start + timedelta(hours=2),
+                "status": status,
+                "total_price": 100,
+                "quote_id": i + 1,
+                "artist_accept_deadline_at": deadline,
+            }
+        )
+    with engine.begin() as conn:
+        _insert(conn, models.User.__table__, users)
+        _insert(conn, models.ServiceProviderProfile.__table__, profiles)
+        _insert(conn, models.BookingRequest.__table__, requests)
+        _insert(conn, models.QuoteV2.__table__, quotes)
+        _insert(conn, models.Booking.__table__, bookings)
+
+
+def run(n_bookings: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        statements = {"count": 0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(*_args, **_kwargs):  # noqa: ANN001
+            statements["count"] += 1
+
+        BaseModel.metadata.create_all(engine)
+        t0 = time.perf_counter()
+        seed(engine, n_bookings)
+        print(f"\n{n_bookings} bookings (seeded in {time.perf_counter() - t0:.1f}s)")
+        Session = sessionmaker(bind=engine)
+        for name, handler in HANDLERS:
+            for label in ("first", "rerun"):
+                statements["count"] = 0
+                with Session() as db:
+                    t0 = time.perf_counter()
+                    result = handler(db)
+                    elapsed = time.perf_counter() - t0
+                print(f"  {name:<24} {label:<5} {elapsed:8.2f}s {statements['count']:>8} stmts  {result}")
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, action="append", help="booking count (repeatable)")
+    args = parser.parse_args()
+    for n in args.bookings or [10_000, 100_000]:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
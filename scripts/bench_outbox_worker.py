@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark outbox relay throughput: legacy per-row loop vs batched relay.
+
+Seeds a throwaway SQLite database with N undelivered outbox_events and
+drains it twice: once the way the old worker did (one publish and one
+UPDATE + COMMIT per row) and once with ``relay_outbox_batch`` (leased
+claim, pipelined publishes, one bulk ack per batch). Publishes go to an
+in-process fakeredis server unless --redis-url points at a real Redis.
+
+Usage:
+  python scripts/bench_outbox_worker.py                     # 10k rows
+  python scripts/bench_outbox_worker.py --rows 50000 --batch 500
+  python scripts/bench_outbox_worker.py --redis-url redis://localhost:6379/0
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.utils.outbox import outbox_events, relay_outbox_batch  # noqa: E402
+
+
+def seed(engine, n_rows: int) -> None:
+    rows = [
+        {
+            "topic": f"booking-requests:{i % 500}",
+            "payload_json": json.dumps({"type": "message", "payload": {"id": i, "content": "x" * 120}}),
+            "attempt_count": 0,
+        }
+        for i in range(n_rows)
+    ]
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM outbox_events"))
+        for i in range(0, len(rows), 5000):
+            conn.execute(outbox_events.insert(), rows[i : i + 5000])
+
+
+def _redis(url):
+    if url:
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(url)
+    import fakeredis.aioredis
+
+    return fakeredis.aioredis.FakeRedis()
+
+
+async def legacy(Session, redis_url, batch: int) -> int:
+    """The pre-batching loop: fresh client per run, row-at-a-time publish and commit."""
+    delivered = 0
+    while True:
+        redis = _redis(redis_url)
+        with Session() as db:
+            rows = db.execute(
+                text(
+                    "SELECT id, topic, payload_json FROM outbox_events "
+                    "WHERE delivered_at IS NULL ORDER BY created_at ASC LIMIT :lim"
+                ),
+                {"lim": batch},
+            ).fetchall()
+            for rid, topic, payload_json in rows:
+                await redis.publish(f"ws-topic:{topic}", json.dumps(json.loads(payload_json), separators=(",", ":")))
+                db.execute(text("UPDATE outbox_events SET delivered_at = CURRENT_TIMESTAMP WHERE id = :id"), {"id": rid})
+                db.commit()
+                delivered += 1
+        await redis.aclose()
+        if len(rows) < batch:
+            return delivered
+
+
+async def batched(Session, redis_url, batch: int) -> int:
+    delivered = 0
+    redis = _redis(redis_url)
+    try:
+        while True:
+            with Session() as db:
+                summary = await relay_outbox_batch(db, redis, max_batch=batch)
+            delivered += summary["delivered"]
+            if summary["claimed"] < batch:
+                return delivered
+    finally:
+        await redis.aclose()
+
+
+def run(n_rows: int, batch: int, redis_url) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        statements = {"count": 0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(*_args, **_kwargs):  # noqa: ANN001
+            statements["count"] += 1
+
+        outbox_events.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        print(f"\n{n_rows} rows, batch {batch}")
+        for name, relay in (("legacy", legacy), ("batched", batched)):
+            seed(engine, n_rows)
+            statements["count"] = 0
+            t0 = time.perf_counter()
+            delivered = asyncio.run(relay(Session, redis_url, batch))
+            elapsed = time.perf_counter() - t0
+            print(
+                f"  {name:<8} {elapsed:8.2f}s {delivered / elapsed:10.0f} rows/s "
+                f"{statements['count']:>8} stmts  delivered={delivered}"
+            )
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, action="append", help="outbox row count (repeatable)")
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+    for n in args.rows or [10_000]:
+        run(n, args.batch, args.redis_url)
+
+
+if __name__ == "__main__":
+    main()
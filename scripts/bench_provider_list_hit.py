@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the provider-list cache HIT path: legacy dict cache vs encoded bytes.
+
+Seeds an in-memory SQLite database with N providers, builds the list payload
+once through ``read_all_service_provider_profiles`` and then times only the
+work a cache hit does after the value is fetched:
+
+  legacy  JSON parse, timestamp scrub, sort_keys re-dump + SHA-256 ETag,
+          per-item ``ArtistProfileResponse`` validation, then response-model
+          validation and encoding (what FastAPI does with the returned dict)
+  l2      split the stored "etag\\nbody" string and build a raw Response
+  l1      build a raw Response from the in-process (etag, bytes) tuple
+
+Usage:
+  python scripts/bench_provider_list_hit.py                 # limit 12, 20, 100
+  python scripts/bench_provider_list_hit.py --limit 50 --iterations 5000
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.api.v1 import api_service_provider as sp  # noqa: E402
+from app.models.base import BaseModel  # noqa: E402
+from app.models.service import Service, ServiceType  # noqa: E402
+from app.models.service_provider_profile import ServiceProviderProfile  # noqa: E402
+from app.models.user import User, UserType  # noqa: E402
+from app.schemas.artist import ArtistListResponse, ArtistProfileResponse  # noqa: E402
+
+
+def build_payload(n: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    BaseModel.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    for i in range(1, n + 1):
+        db.add(User(id=i, email=f"p{i}@example.com", password="x", first_name="P", last_name=str(i),
+                    user_type=UserType.SERVICE_PROVIDER))
+        db.add(ServiceProviderProfile(user_id=i, business_name=f"Provider {i}", description="d" * 200,
+                                      location="Cape Town", profile_picture_url=f"profile_pics/{i}.webp"))
+        db.add(Service(artist_id=i, title="Set", description="", media_url="http://example.com", price=1000 + i,
+                       currency="ZAR", duration_minutes=60, service_type=ServiceType.LIVE_PERFORMANCE))
+    db.commit()
+    payload = sp.read_all_service_provider_profiles(
+        db=db, category=None, location=None, sort=None, page=1, limit=n, include_price_distribution=False,
+    )
+    db.close()
+    return payload
+
+
+def legacy_hit(raw: str) -> bytes:
+    cached = json.loads(raw)
+    for it in cached["data"]:
+        if it.get("user_id") is None and isinstance(it.get("id"), int):
+            it["user_id"] = int(it["id"])
+        it["created_at"] = it.get("created_at") or it.get("updated_at")
+        it["updated_at"] = it.get("updated_at") or it.get("created_at")
+    etag = 'W/"' + hashlib.sha256(json.dumps(cached, separators=(",", ":"), sort_keys=True).encode()).hexdigest() + '"'
+    data = [ArtistProfileResponse.model_validate(it) for it in cached["data"]]
+    out = {"data": data, "total": cached["total"], "price_distribution": cached["price_distribution"]}
+    body = ArtistListResponse.model_validate(out).model_dump_json(by_alias=True, exclude_none=True).encode()
+    return sp.Response(content=body, media_type="application/json", headers={"ETag": etag}).body
+
+
+def l2_hit(raw: str) -> bytes:
+    etag, _, body = raw.partition("\n")
+    return sp._list_body_response(body.encode(), etag, None, cache_control="x", x_cache="HIT").body
+
+
+def l1_hit(entry) -> bytes:
+    etag, body = entry
+    return sp._list_body_response(body, etag, None, cache_control="x", x_cache="HIT").body
+
+
+def timeit(fn, arg, iterations: int) -> float:
+    fn(arg)
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter() - t0) / iterations * 1e6
+
+
+def run(limit: int, iterations: int) -> None:
+    payload = build_payload(limit)
+    legacy_raw = json.dumps(jsonable_encoder({
+        "data": [{**p.model_dump(), "user_id": p.user_id} for p in payload["data"]],
+        "total": payload["total"],
+        "price_distribution": payload["price_distribution"],
+    }))
+    body, etag = sp._encode_list_response(payload)
+    new_raw = etag + "\n" + body.decode()
+    print(f"\nlimit={limit} ({len(body)} byte body, {iterations} iterations)")
+    base = None
+    for name, fn, arg in (("legacy", legacy_hit, legacy_raw), ("l2", l2_hit, new_raw), ("l1", l1_hit, (etag, body))):
+        us = timeit(fn, arg, iterations)
+        base = base or us
+        print(f"  {name:<7} {us:10.1f} us/hit  {base / us:6.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, action="append", help="page size (repeatable)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    for limit in args.limit or [12, 20, 100]:
+        run(limit, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark provider name search: ILIKE scans vs the provider search index.
+
+Seeds an SQLite database with N providers (random business and personal
+names, locations and categories), builds ``provider_search_stats`` through
+``reconcile_provider_stats`` (which fills the FTS5 table via its triggers)
+and times what the list endpoint does per name search, a match count plus
+the first page of 20:
+
+  ilike  the former filter: ``ILIKE '%term%'`` on business_name, first_name
+         and last_name, joined to users, ordered by id
+  index  ``provider_text_match`` (FTS5 trigram MATCH), ranked by bm25
+
+On Postgres the same call runs against the pg_trgm / tsvector GIN indexes;
+point ``--url`` at a scratch database to measure that.
+
+Usage:
+  python scripts/bench_provider_text_search.py                 # 10k and 100k providers
+  python scripts/bench_provider_text_search.py --providers 50000 --iterations 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from sqlalchemy import create_engine, func, insert, or_, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.models.base import BaseModel  # noqa: E402
+from app.models.service import Service  # noqa: E402
+from app.models.service_category import ServiceCategory  # noqa: E402
+from app.models.service_provider_profile import ServiceProviderProfile  # noqa: E402
+from app.models.user import User, UserType  # noqa: E402
+from app.services.provider_search_index import provider_text_match  # noqa: E402
+from app.services.provider_stats import reconcile_provider_stats  # noqa: E402
+
+WORDS = (
+    "groove soul beats sound rhythm vibe melody harmony electric velvet golden urban ocean thunder "
+    "midnight acoustic royal cosmic jazz piano strings echo pulse studio lens frame story moments"
+).split()
+FIRST = "thabo lerato sipho naledi johan anika kabza zanele pieter aisha liam emma noah mia".split()
+LAST = "mokoena naidoo van der merwe dlamini smith botha khumalo pillay jacobs nkosi".split()
+CITIES = "cape town;durban;johannesburg;pretoria;stellenbosch;gqeberha;bloemfontein".split(";")
+CATEGORIES = ("DJ", "Musician", "Photographer", "Videographer", "Sound Service", "Caterer")
+QUERIES = ("groove", "kabza", "velvet echo", "naidoo", "studio")
+
+
+def seed(url: str, n: int):
+    engine = create_engine(url)
+    BaseModel.metadata.drop_all(engine)
+    BaseModel.metadata.create_all(engine)
+    rnd = random.Random(42)
+    users, profiles, services = [], [], []
+    for i in range(1, n + 1):
+        users.append({
+            "id": i, "email": f"p{i}@example.com", "password": "x", "first_name": rnd.choice(FIRST).title(),
+            "last_name": rnd.choice(LAST).title(), "user_type": UserType.SERVICE_PROVIDER, "is_active": True,
+        })
+        profiles.append({
+            "user_id": i, "business_name": " ".join(rnd.sample(WORDS, 2)).title() + f" {i}",
+            "location": rnd.choice(CITIES).title(),
+        })
+        services.append({
+            "artist_id": i, "title": "Set", "description": "", "media_url": "x", "price": 1000 + i % 5000,
+            "duration_minutes": 60, "service_category_id": rnd.randint(1, len(CATEGORIES)), "status": "approved",
+        })
+    with engine.begin() as conn:
+        conn.execute(insert(ServiceCategory.__table__), [{"id": i, "name": c} for i, c in enumerate(CATEGORIES, 1)])
+        conn.execute(insert(User.__table__), users)
+        conn.execute(insert(ServiceProviderProfile.__table__), profiles)
+        conn.execute(insert(Service.__table__), services)
+        t0 = time.perf_counter()
+        reconcile_provider_stats(conn)
+    print(f"  seeded; stats + index built in {time.perf_counter() - t0:.1f}s")
+    return engine
+
+
+def ilike_page(db, term: str, limit: int):
+    pattern = f"%{term}%"
+    match = or_(
+        ServiceProviderProfile.business_name.ilike(pattern),
+        User.first_name.ilike(pattern),
+        User.last_name.ilike(pattern),
+    )
+    base = select(ServiceProviderProfile.user_id).join(User, User.id == ServiceProviderProfile.user_id).where(match)
+    total = db.execute(select(func.count()).select_from(base.subquery())).scalar()
+    return total, db.execute(base.order_by(ServiceProviderProfile.user_id).limit(limit)).all()
+
+
+def index_page(db, term: str, limit: int):
+    sq = provider_text_match(db, [term], field="name")
+    total = db.execute(select(func.count()).select_from(sq)).scalar()
+    return total, db.execute(select(sq.c.artist_id).order_by(sq.c.score.desc()).limit(limit)).all()
+
+
+def timeit(fn, db, term: str, iterations: int) -> float:
+    fn(db, term, 20)
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn(db, term, 20)
+    return (time.perf_counter() - t0) / iterations * 1000
+
+
+def run(url: str, n: int, iterations: int) -> None:
+    print(f"\n{n} providers ({iterations} iterations per query)")
+    engine = seed(url, n)
+    db = sessionmaker(bind=engine)()
+    print(f"  {'query':<14} {'ilike ms':>9} {'index ms':>9} {'speedup':>8}")
+    for term in QUERIES:
+        old = timeit(ilike_page, db, term, iterations)
+        new = timeit(index_page, db, term, iterations)
+        print(f"  {term:<14} {old:9.2f} {new:9.2f} {old / new:7.1f}x")
+    db.close()
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", type=int, action="append", help="provider count (repeatable)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--url", default="sqlite:////tmp/bench_provider_text_search.db")
+    args = parser.parse_args()
+    for n in args.providers or [10_000, 100_000]:
+        run(args.url, n, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Recount thread_participant_state (unread counters) from the messages table.
+
+Backfills an empty table and corrects rows that drifted. Safe to run while
+the API serves traffic: each chunk of threads is recounted and only rows
+that differ are rewritten. The API also runs this sweep as the
+``thread_state_reconcile`` scheduled job.
+
+Usage:
+  python scripts/db/reconcile_thread_state.py
+  python scripts/db/reconcile_thread_state.py --chunk 200
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "backend")))
+
+from app.database import engine  # noqa: E402
+from app.services.thread_state import reconcile_thread_state  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunk", type=int, default=None, help="Threads per recount batch")
+    args = parser.parse_args()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    with engine.begin() as conn:
+        corrected = reconcile_thread_state(conn, args.chunk)
+    print(f"thread_participant_state rows written: {corrected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Job worker: executes durable background jobs (SMS, WhatsApp, email).
+
+Environment:
+  - SQLALCHEMY_DATABASE_URL or DB_URL (from app config)
+  - JOB_QUEUE_BACKEND (default db)
+  - JOB_POLL_INTERVAL (seconds, default 1.0)
+  - JOB_VISIBILITY_TIMEOUT (seconds, default 300)
+
+Run any number of these next to the API (set JOB_WORKER_EMBEDDED=0 on the
+API to stop its embedded worker). Jobs are claimed with SKIP LOCKED, so
+workers never double-process a job; one that dies mid-job has it retried
+once its visibility timeout lapses.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+
+# Reuse the app's DB session factory for configuration parity
+try:
+    import sys
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "backend")))
+except Exception:
+    pass
+
+from app.services.job_queue import JobWorker  # type: ignore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--kinds", default="", help="Comma-separated job kinds to run (default: all)")
+    args = parser.parse_args()
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()] or None
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    asyncio.run(JobWorker(kinds=kinds).run_forever())
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -7,16 +7,20 @@ Environment:
   - WEBSOCKET_REDIS_URL (same as API's Redis)
   - OUTBOX_POLL_INTERVAL_MS (default 1000)
   - OUTBOX_MAX_BATCH (default 200)
-
-This worker is idempotent and safe to run alongside API instances.
+  - OUTBOX_LEASE_SECONDS (default 30)
+  - OUTBOX_BACKOFF_BASE_SECONDS / OUTBOX_BACKOFF_MAX_SECONDS (default 1 / 300)
+
+Each batch is claimed with a short lease (FOR UPDATE SKIP LOCKED on
+Postgres), published in one Redis pipeline to ``ws-topic:<topic>`` and
+acked with a single UPDATE, so any number of workers can run side by side
+without double delivery. Failed rows are retried with per-row exponential
+backoff. Delivered rows are pruned by the API's ``outbox_retention``
+scheduled job.
 """
 from __future__ import annotations
 
 import asyncio
-import json
 import os
-from datetime import datetime, timezone
-from typing import Any
 
 from sqlalchemy import text
 
@@ -28,14 +32,18 @@ except Exception:
     pass
 
 from app.database import SessionLocal  # type: ignore
+from app.utils.outbox import relay_outbox_batch  # type: ignore
 try:
-    from app.utils.metrics import incr as metrics_incr
+    from app.utils.metrics import gauge as metrics_gauge, incr as metrics_incr
 except Exception:  # pragma: no cover
     def metrics_incr(*args, **kwargs):  # type: ignore
         return None
 
+    def metrics_gauge(*args, **kwargs):  # type: ignore
+        return None
+
 
-async def _get_redis():
+def _get_redis():
     url = os.getenv("WEBSOCKET_REDIS_URL")
     if not url:
         return None
@@ -46,146 +54,77 @@ async def _get_redis():
     return aioredis.from_url(url, health_check_interval=30, retry_on_timeout=True, socket_keepalive=True, socket_timeout=5)
 
 
-async def publish(redis, channel: str, payload: dict[str, Any]) -> bool:
-    if not redis:
-        return False
-    try:
-        data = json.dumps(payload, separators=(",", ":"))
-        await redis.publish(channel, data)
-        return True
-    except Exception:
-        return False
-
-
-def _now_tz() -> datetime:
-    return datetime.now(timezone.utc)
-
-
-async def run_once(max_batch: int = 200) -> int:
-    delivered = 0
-    async_redis = await _get_redis()
-    if async_redis is None:
+async def run_once(redis, max_batch: int = 200) -> int:
+    """Relay one batch over the shared Redis connection; returns rows delivered."""
+    if redis is None:
         # Without Redis, there is nothing to deliver
         return 0
     db = SessionLocal()
     try:
-        rows = db.execute(
-            text(
-                """
-                SELECT id, topic, payload_json
-                FROM outbox_events
-                WHERE delivered_at IS NULL
-                  AND (due_at IS NULL OR due_at <= CURRENT_TIMESTAMP)
-                ORDER BY created_at ASC
-                LIMIT :lim
-                """
-            ),
-            {"lim": max_batch},
-        ).fetchall()
-        for rid, topic, payload_json in rows:
-            # Derive thread id from topic 'booking-requests:<id>'
-            try:
-                if not isinstance(topic, str) or ":" not in topic:
-                    continue
-                _, id_str = topic.split(":", 1)
-                thread_id = int(id_str)
-            except Exception:
-                continue
-            try:
-                payload = json.loads(payload_json)
-            except Exception:
-                payload = {"_error": "invalid-payload"}
-            ok = await publish(async_redis, f"ws:{thread_id}", payload)
-            if ok:
-                db.execute(text("UPDATE outbox_events SET delivered_at = CURRENT_TIMESTAMP WHERE id = :id"), {"id": rid})
-                db.commit()
-                try:
-                    print(f"outbox_delivered id={int(rid)} topic={topic} thread={thread_id}")
-                except Exception:
-                    pass
-                try:
-                    metrics_incr("outbox.delivered_total")
-                except Exception:
-                    pass
-                delivered += 1
-            else:
-                # Retry with backoff
-                db.execute(
-                    text(
-                        "UPDATE outbox_events SET attempt_count = attempt_count + 1, last_error = :err, due_at = CURRENT_TIMESTAMP + INTERVAL '5 seconds' WHERE id = :id"
-                    ),
-                    {"id": rid, "err": "publish_failed"},
-                )
-                db.commit()
-                try:
-                    print(f"outbox_attempt_failed id={int(rid)} topic={topic} thread={thread_id}")
-                except Exception:
-                    pass
-                try:
-                    metrics_incr("outbox.attempt_failed_total")
-                except Exception:
-                    pass
+        summary = await relay_outbox_batch(db, redis, max_batch=max_batch)
     finally:
         try:
             db.close()
         except Exception:
             pass
+    if summary["delivered"]:
+        metrics_incr("outbox.delivered_total", summary["delivered"])
+    if summary["failed"]:
+        metrics_incr("outbox.attempt_failed_total", summary["failed"])
+        print(f"outbox_attempt_failed count={summary['failed']}")
+    return summary["delivered"]
+
+
+def _log_lag() -> None:
+    db = SessionLocal()
     try:
-        if async_redis:
-            try:
-                await async_redis.aclose()  # redis-py 5.x async close
-            except Exception:
-                # Fallback for older redis versions
-                try:
-                    await async_redis.close()  # type: ignore[attr-defined]
-                except Exception:
-                    pass
+        row = db.execute(text(
+            """
+            SELECT COUNT(*) AS cnt, MIN(created_at) AS oldest
+            FROM outbox_events
+            WHERE delivered_at IS NULL
+            """
+        )).first()
+        cnt = int(row[0] or 0) if row is not None else 0
+        metrics_gauge("outbox.backlog", cnt)
+        # Lightweight log line; apps can grep for 'outbox_lag'
+        print(f"outbox_lag count={cnt} oldest={row[1] if row is not None else None}")
     except Exception:
         pass
-    return delivered
+    finally:
+        try:
+            db.close()
+        except Exception:
+            pass
 
 
 async def main() -> None:
     interval_ms = int(os.getenv("OUTBOX_POLL_INTERVAL_MS") or 1000)
     max_batch = int(os.getenv("OUTBOX_MAX_BATCH") or 200)
+    # One connection pool for the life of the worker; redis-py reconnects on its own.
+    redis = _get_redis()
     last_lag_log = 0.0
-    while True:
-        try:
-            await run_once(max_batch=max_batch)
-        except Exception:
-            # Keep going; the loop is resilient
-            pass
-        # Periodic lag metric: count undelivered and oldest age
-        try:
+    try:
+        while True:
+            delivered = 0
+            try:
+                delivered = await run_once(redis, max_batch=max_batch)
+            except Exception:
+                # Keep going; the loop is resilient
+                pass
             now = asyncio.get_running_loop().time()
             if now - last_lag_log >= 10.0:  # every ~10s
-                db = SessionLocal()
-                try:
-                    row = db.execute(text(
-                        """
-                        SELECT COUNT(*) AS cnt,
-                               EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - MIN(created_at))) AS age_s
-                        FROM outbox_events
-                        WHERE delivered_at IS NULL
-                          AND (due_at IS NULL OR due_at <= CURRENT_TIMESTAMP)
-                        """
-                    )).first()
-                    cnt = int(row[0] or 0) if row is not None else 0
-                    age = float(row[1] or 0.0) if row is not None else 0.0
-                    # Lightweight log line; apps can grep for 'outbox_lag'
-                    print(f"outbox_lag count={cnt} oldest_s={age:.1f}")
-                except Exception:
-                    pass
-                finally:
-                    try:
-                        db.close()
-                    except Exception:
-                        pass
+                _log_lag()
                 last_lag_log = now
-        except Exception:
-            # do not break the loop if lag metric fails
-            pass
-        await asyncio.sleep(interval_ms / 1000.0)
+            # A full batch means more is waiting: drain without sleeping.
+            if delivered < max_batch:
+                await asyncio.sleep(interval_ms / 1000.0)
+    finally:
+        if redis is not None:
+            try:
+                await redis.aclose()
+            except Exception:
+                pass
 
 
 if __name__ == "__main__":